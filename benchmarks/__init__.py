@@ -0,0 +1,5 @@
+"""
+Micro-benchmarks for the serving and retraining paths
+
+Run from the repository root, e.g. ``python -m benchmarks.bench_encoder``.
+"""
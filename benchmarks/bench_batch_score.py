@@ -0,0 +1,53 @@
+"""
+Benchmark: offline batch scoring throughput vs number of worker processes
+
+Writes a synthetic customer CSV and scores it with ``src.batch_score`` for
+each worker count (default 1, 2, 4, ... up to the CPU count), reporting
+rows/s, speedup over one worker and parallel efficiency. Pool start-up
+(spawn + model load) is included in the timings.
+
+    python -m benchmarks.bench_batch_score [--rows 1000000] [--chunk-rows 50000] [--workers 1 2 4 8 16]
+"""
+
+import argparse
+import os
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import synthetic_raw_frame, write_artifacts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({min(2 ** i, cpus) for i in range(cpus.bit_length() + 1)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, model_dir = write_artifacts(tmp)
+        input_path = Path(tmp) / "customers.csv"
+        synthetic_raw_frame(args.rows, seed=2).drop(columns=["target_offer"]).to_csv(input_path, index=False)
+
+        from src.batch_score import batch_score
+
+        print(f"rows={args.rows} chunk_rows={args.chunk_rows} cpus={cpus}")
+        print(f"{'workers':>7} {'seconds':>8} {'rows/s':>11} {'speedup':>8} {'efficiency':>10}")
+        baseline = None
+        for workers in worker_counts:
+            summary = batch_score(
+                input_path, Path(tmp) / f"scores-{workers}", workers=workers, chunk_rows=args.chunk_rows,
+                model_path=model_dir / "best_model.onnx", processed_dir=data_dir / "processed",
+                restart=True, verbose=False
+            )
+            baseline = baseline or summary["elapsed_s"]
+            speedup = baseline / summary["elapsed_s"]
+            print(f"{workers:>7} {summary['elapsed_s']:>8.2f} {summary['rows_per_sec']:>11,.0f} "
+                  f"{speedup:>7.2f}x {speedup / workers:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: per-request ONNX runs vs. the micro-batching dispatcher
+
+Simulates ``--concurrency`` clients each sending one-row requests and
+reports throughput, request latency and the batcher's queue-wait time for
+every window in ``--windows``.
+
+    python -m benchmarks.bench_batching [--concurrency 64] [--windows 0.5 2 5]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import synthetic_onnx_session
+from src.serving.batcher import MicroBatcher
+
+
+def make_runner(session):
+    input_name = session.get_inputs()[0].name
+    output_names = [o.name for o in session.get_outputs()]
+
+    def run(batch, model=None):
+        return dict(zip(output_names, session.run(None, {input_name: batch})))
+
+    return run
+
+
+async def drive(call, rows, concurrency, requests_per_client):
+    latencies = []
+
+    async def client(offset):
+        for i in range(requests_per_client):
+            x = rows[(offset + i) % len(rows)][None, :]
+            start = time.perf_counter()
+            await call(x)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lat = np.asarray(latencies)
+    return len(lat) / elapsed, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+async def main_async(args, run, rows):
+    async def direct(x):
+        run(x)
+        await asyncio.sleep(0)  # yield like a real handler would between requests
+
+    rps, p50, p99 = await drive(direct, rows, args.concurrency, args.requests)
+    print(f"{'mode':>16} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'wait p99':>9} {'avg rows':>9}")
+    print(f"{'unbatched':>16} {rps:>9.0f} {p50:>8.2f} {p99:>8.2f} {'-':>9} {'1':>9}")
+
+    for window in args.windows:
+        batcher = MicroBatcher(run, window_ms=window, max_batch_size=args.max_batch)
+        await batcher.start()
+        rps, p50, p99 = await drive(batcher.submit, rows, args.concurrency, args.requests)
+        stats = batcher.stats()
+        await batcher.stop()
+        print(f"{f'window={window}ms':>16} {rps:>9.0f} {p50:>8.2f} {p99:>8.2f} "
+              f"{stats['queue_wait_ms']['p99']:>9.2f} {stats['avg_batch_rows']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per client")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0.5, 2.0, 5.0])
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session, _, X = synthetic_onnx_session(Path(tmp) / "model.onnx")
+        asyncio.run(main_async(args, make_runner(session), X.astype(np.float32)))
+
+
+if __name__ == "__main__":
+    main()
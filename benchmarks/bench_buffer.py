@@ -0,0 +1,69 @@
+"""
+Benchmark: per-row cost of logging a prediction vs. rows already buffered
+
+Compares the legacy read-modify-write CSV buffer with the append-only
+segment writer (fsync "never" and "always").
+
+    python -m benchmarks.bench_buffer [--sizes 10 10000 1000000]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.common import synthetic_raw_frame
+from src.data_ingestion.buffer import PredictionBufferWriter
+
+
+def legacy_append(path: Path, row: dict):
+    """The pre-segment DataRepository.append_to_buffer"""
+    df_new = pd.DataFrame([row])
+    if path.exists():
+        df_new = pd.concat([pd.read_csv(path), df_new], ignore_index=True)
+    df_new.to_csv(path, index=False)
+
+
+def per_row_us(fn, rows, appends):
+    start = time.perf_counter()
+    for i in range(appends):
+        fn(rows[i % len(rows)])
+    return (time.perf_counter() - start) / appends * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 10_000, 1_000_000])
+    parser.add_argument("--appends", type=int, default=2000)
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="Skip the legacy CSV path above this size (it is O(n) per row)")
+    args = parser.parse_args()
+
+    rows = synthetic_raw_frame(1000).to_dict(orient="records")
+    print(f"{'buffered rows':>14} {'legacy csv us/row':>18} {'segments us/row':>16} {'segments+fsync':>15}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            legacy = "-"
+            if size <= args.legacy_max:
+                csv_path = tmp / "prediction_buffer.csv"
+                pd.DataFrame([rows[i % len(rows)] for i in range(size)]).to_csv(csv_path, index=False)
+                legacy = f"{per_row_us(lambda r: legacy_append(csv_path, r), rows, 20):.0f}"
+
+            results = []
+            for fsync in ("never", "always"):
+                seg_dir = tmp / f"segments_{fsync}"
+                writer = PredictionBufferWriter(seg_dir, flush_interval=0, fsync="never")
+                for start in range(0, size, 10_000):
+                    writer.extend([rows[i % len(rows)] for i in range(start, min(size, start + 10_000))])
+                writer.seal()
+                writer.fsync = fsync
+                results.append(per_row_us(writer.append, rows, args.appends))
+                writer.close()
+            print(f"{size:>14} {legacy:>18} {results[0]:>16.1f} {results[1]:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: columnar buffer segments vs the CSV buffer
+
+For each size, writes the same logged rows (raw features, customer_id and
+target_offer) as one CSV file (the legacy prediction_buffer.csv) and as
+columnar segments of ``--segment-rows`` rows, then reports:
+
+- disk size of each
+- load time: ``pd.read_csv`` of the CSV, ``load_prediction_buffer`` of
+  every column, and of the columns a retrain reads (``BUFFER_TRAINING_COLUMNS``)
+- seal time of one segment in the writer (NDJSON active file -> columnar)
+
+Rows are generated in chunks of one million so 10M rows fit in memory
+next to the loaded frame.
+
+    python -m benchmarks.bench_buffer_format [--sizes 100000 10000000] [--segment-rows 50000]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import synthetic_raw_frame
+
+CHUNK_ROWS = 1_000_000
+
+
+def dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-``repeat`` wall time in seconds (large loads are too slow for percentiles)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 10_000_000])
+    parser.add_argument("--segment-rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    import pandas as pd
+
+    from src.data_ingestion.buffer import PredictionBufferWriter
+    from src.data_ingestion.columnar import write_columnar_segment
+    from src.data_ingestion.repository import DataRepository
+    from src.services.retraining_service import BUFFER_TRAINING_COLUMNS
+
+    print(f"{'rows':>10} {'csv MB':>8} {'cols MB':>8} {'csv load s':>11} {'cols load s':>12} "
+          f"{'train cols s':>13} {'speedup':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            csv_path = tmp / "prediction_buffer.csv"
+            repo = DataRepository(data_buffer_path=tmp / "absent.csv", processed_data_dir=tmp,
+                                  buffer_dir=tmp / "segments")
+            segment = 0
+            for start in range(0, size, CHUNK_ROWS):
+                chunk = synthetic_raw_frame(min(CHUNK_ROWS, size - start), seed=start)
+                chunk.to_csv(csv_path, mode="a", header=start == 0, index=False)
+                for offset in range(0, len(chunk), args.segment_rows):
+                    segment += 1
+                    part = chunk.iloc[offset:offset + args.segment_rows].reset_index(drop=True)
+                    write_columnar_segment(part, repo.buffer_dir / f"{segment:020d}.columns")
+
+            csv_s = timed(lambda: pd.read_csv(csv_path), args.repeat)
+            cols_s = timed(lambda: repo.load_prediction_buffer(), args.repeat)
+            train_s = timed(lambda: repo.load_prediction_buffer(columns=BUFFER_TRAINING_COLUMNS), args.repeat)
+            print(f"{size:>10} {csv_path.stat().st_size / 2**20:>8.1f} {dir_size(repo.buffer_dir) / 2**20:>8.1f} "
+                  f"{csv_s:>11.3f} {cols_s:>12.3f} {train_s:>13.3f} {csv_s / train_s:>7.1f}x")
+
+    # Sealing converts the NDJSON active file to columns under the writer lock
+    rows = synthetic_raw_frame(args.segment_rows, seed=7).to_dict(orient="records")
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = PredictionBufferWriter(tmp, flush_interval=0, segment_rows=10 ** 9, fsync="never")
+
+        def fill_and_seal():
+            writer.extend(rows)
+            writer.flush()
+            start = time.perf_counter()
+            writer.seal()
+            return time.perf_counter() - start
+
+        seal_s = min(fill_and_seal() for _ in range(args.repeat))
+        writer.close()
+    print(f"seal of a {args.segment_rows}-row segment: {seal_s * 1000:.0f} ms "
+          f"({seal_s / args.segment_rows * 1e6:.1f} us/row)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: /predict with JSON vs binary and columnar request bodies
+
+Runs the real app in-process (SERVING_MODE=inference, synthetic artifacts)
+and times a full POST /predict for each wire format:
+
+- scaled inputs: JSON ``inputs``, ``.npy`` (``Accept: application/x-npy``),
+  raw float32 bytes
+- raw features: JSON ``raw_features``, ``.npz`` columns, Arrow IPC stream
+  and msgpack (the last two only when pyarrow / msgpack are installed)
+
+``body KB`` is the request size; ``vs json`` compares against the JSON body
+of the same kind.
+
+    python -m benchmarks.bench_codecs [--rows 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import write_artifacts
+
+PROBE = """
+import asyncio, importlib.util, io, json, sys, time
+import numpy as np
+import httpx
+import src.app as api
+from benchmarks.common import synthetic_raw_frame
+
+rows, repeat = int(sys.argv[1]), int(sys.argv[2])
+frame = synthetic_raw_frame(rows, seed=1).drop(columns=["customer_id", "target_offer"])
+columns = {c: frame[c].to_numpy(dtype=None if frame[c].dtype.kind in "fiu" else str) for c in frame}
+
+async def main():
+    await api.startup_event()
+    X = api.state.preprocessing.encoder.encode_records(frame.to_dict(orient="records"))
+    bodies = {}
+    bodies["json inputs"] = ("inputs", json.dumps({"inputs": X.tolist()}).encode(), {"Content-Type": "application/json"})
+    buffer = io.BytesIO(); np.save(buffer, X)
+    bodies["npy"] = ("inputs", buffer.getvalue(), {"Content-Type": "application/x-npy", "Accept": "application/x-npy"})
+    bodies["float32"] = ("inputs", X.tobytes(), {"Content-Type": "application/octet-stream"})
+    bodies["json raw"] = ("raw", json.dumps({"raw_features": frame.to_dict(orient="records")}).encode(),
+                          {"Content-Type": "application/json"})
+    buffer = io.BytesIO(); np.savez(buffer, **columns)
+    bodies["npz"] = ("raw", buffer.getvalue(), {"Content-Type": "application/x-npz"})
+    if importlib.util.find_spec("pyarrow"):
+        import pyarrow as pa
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        bodies["arrow"] = ("raw", sink.getvalue(), {"Content-Type": "application/vnd.apache.arrow.stream"})
+    if importlib.util.find_spec("msgpack"):
+        import msgpack
+        payload = {c: v.astype("<f8").tobytes() if v.dtype.kind in "fiu" else v.tolist() for c, v in columns.items()}
+        bodies["msgpack"] = ("raw", msgpack.packb(payload), {"Content-Type": "application/msgpack"})
+
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, (kind, body, headers) in bodies.items():
+            (await client.post("/predict", content=body, headers=headers)).raise_for_status()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = await client.post("/predict", content=body, headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+                response.raise_for_status()
+            results[name] = {"kind": kind, "ms": float(np.median(timings)), "kb": len(body) / 1024}
+    await api.shutdown_event()
+    print(json.dumps(results))
+
+asyncio.run(main())
+"""
+
+
+def probe(rows: int, repeat: int, env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE, str(rows), str(repeat)], check=True,
+                         capture_output=True, text=True, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, model_dir = write_artifacts(tmp)
+        env = {**os.environ, "DATA_DIR": str(data_dir), "MODEL_DIR": str(model_dir), "SERVING_MODE": "inference",
+               "MODEL_WATCH_INTERVAL": "0", "LOG_LEVEL": "WARNING",
+               "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+
+        print(f"{'rows':>7} {'format':>12} {'body KB':>9} {'ms':>9} {'vs json':>8}")
+        for rows in args.rows:
+            results = probe(rows, args.repeat, env)
+            baseline = {"inputs": results["json inputs"]["ms"], "raw": results["json raw"]["ms"]}
+            for name, result in results.items():
+                print(f"{rows:>7} {name:>12} {result['kb']:>9.0f} {result['ms']:>9.2f} "
+                      f"{baseline[result['kind']] / result['ms']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark: DataFrame inference path vs. compiled raw-feature encoder
+
+    python -m benchmarks.bench_encoder [--batch-sizes 1 32 1024]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import synthetic_pipeline, synthetic_raw_frame, time_call
+
+
+def dataframe_path(pipeline, records):
+    """The pre-encoder implementation of prepare_inference_features"""
+    df = pd.DataFrame(records).drop(columns=["customer_id", "target_offer"], errors="ignore")
+    return pipeline.scale_features(pipeline.encode_categorical(df)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1024])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    pipeline = synthetic_pipeline()
+    frame = synthetic_raw_frame(max(args.batch_sizes), seed=1)
+
+    print(f"{'batch':>6} {'pandas p50 ms':>14} {'compiled p50 ms':>16} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        records = frame.head(batch_size).to_dict(orient="records")
+        repeat = max(10, args.repeat // max(1, batch_size // 32))
+        baseline = time_call(lambda: dataframe_path(pipeline, records), repeat=repeat)
+        compiled = time_call(lambda: pipeline.prepare_inference_features(records), repeat=repeat)
+        speedup = baseline["p50_ms"] / compiled["p50_ms"]
+        print(f"{batch_size:>6} {baseline['p50_ms']:>14.3f} {compiled['p50_ms']:>16.3f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: /health latency while /predict is saturated
+
+Runs the app in-process against synthetic artifacts. ``--predict-clients``
+coroutines post raw_features batches back to back while a prober hits
+/health. ``inline`` runs inference and buffer logging on the event loop
+(the previous behaviour); ``executors`` uses the inference / logging
+thread pools.
+
+    python -m benchmarks.bench_event_loop [--seconds 5] [--rows 8]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_raw_frame, write_artifacts
+
+
+async def run_mode(app_module, mode, args, payload):
+    import httpx
+
+    state = app_module.state
+    await app_module.startup_event()
+    if mode == "inline":
+        for executor in (state.inference_executor, state.logging_executor):
+            executor.shutdown(wait=False)
+        state.inference_executor = state.logging_executor = None
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop_at = time.perf_counter() + args.seconds
+        predictions = 0
+        health_ms = []
+
+        async def predict_client():
+            nonlocal predictions
+            while time.perf_counter() < stop_at:
+                response = await client.post("/predict", json=payload)
+                response.raise_for_status()
+                predictions += 1
+
+        async def health_prober():
+            # Latency is measured from the scheduled probe time, so time spent
+            # waiting for a blocked event loop is counted too
+            scheduled = time.perf_counter()
+            while scheduled < stop_at:
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                (await client.get("/health")).raise_for_status()
+                health_ms.append((time.perf_counter() - scheduled) * 1000)
+                scheduled = max(scheduled + args.probe_interval / 1000, time.perf_counter())
+
+        await asyncio.gather(health_prober(), *(predict_client() for _ in range(args.predict_clients)))
+
+    await app_module.shutdown_event()
+    state.retraining_service.data_repo.clear_buffer()
+    state.retraining_service.counter.reset()
+    health = np.asarray(health_ms)
+    print(f"{mode:>10} {predictions / args.seconds:>12.1f} {np.percentile(health, 50):>10.2f} "
+          f"{np.percentile(health, 99):>10.2f} {health.max():>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rows", type=int, default=8, help="raw_features rows per /predict call")
+    parser.add_argument("--probe-interval", type=float, default=10.0, help="/health probe interval (ms)")
+    parser.add_argument("--predict-clients", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, model_dir = write_artifacts(tmp)
+        os.environ.update({
+            "DATA_DIR": str(data_dir),
+            "MODEL_DIR": str(model_dir),
+            "RETRAIN_THRESHOLD": str(10 ** 9),
+            "LOG_LEVEL": "WARNING",
+        })
+        import src.app as app_module
+
+        records = synthetic_raw_frame(args.rows, seed=3).drop(columns=["target_offer"])
+        payload = {"raw_features": records.to_dict(orient="records")}
+
+        print(f"{'mode':>10} {'predict/s':>12} {'health p50':>10} {'health p99':>10} {'health max':>10}")
+        for mode in ("inline", "executors"):
+            asyncio.run(run_mode(app_module, mode, args, payload))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark: warm-start incremental retraining vs a full rebuild every cycle
+
+Simulates ``--cycles`` retrains on ``--rows`` seed rows, each adding
+``--batch`` new rows whose class centers drift a little further
+(``--drift`` per cycle). Both policies start from the same model trained
+on the seed rows, then per cycle:
+
+- ``full``: ``ModelTrainer.train_and_evaluate`` on every stored row plus
+  the new ones (RETRAIN_MODE=full)
+- ``incremental``: ``ModelTrainer.train_incremental`` continues the current
+  model on the new rows plus a stratified replay sample of
+  ``--replay`` stored rows, with a full rebuild every ``--full-every``
+  cycles or when validation F1 drops by more than ``--tolerance``
+  (RETRAIN_MODE=incremental)
+
+Reported per cycle: wall time of the training step (split, SMOTE, fit and
+validation), the model's tree count and weighted F1 on ``--test`` fresh rows
+from that cycle's distribution. Trainer parameters are the production ones
+unless ``--iterations`` is given.
+
+    python -m benchmarks.bench_incremental_retrain [--rows 20000] [--batch 1000] [--cycles 6]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import OFFERS, synthetic_training_rows
+
+
+def run(policy: str, args, trainer, label_encoder, initial_model) -> list:
+    from sklearn.metrics import f1_score
+
+    from src.data_ingestion.training_store import TrainingDataStore
+    from src.data_ingestion.training_window import TrainingWindow
+
+    replay = TrainingWindow(max_samples=args.replay, stratified=True)
+    model, since_full, rows = initial_model, 0, []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        X_seed, y_seed = synthetic_training_rows(args.rows, args.features, seed=0)
+        np.save(tmp / "X_train_original.npy", X_seed)
+        np.save(tmp / "y_train_original.npy", y_seed)
+        store = TrainingDataStore(tmp / "store", tmp / "X_train_original.npy", tmp / "y_train_original.npy")
+        for cycle in range(1, args.cycles + 1):
+            drift = cycle * args.drift
+            X_new, y_new = synthetic_training_rows(args.batch, args.features, seed=cycle, drift=drift)
+            mode = "full" if policy == "full" or since_full >= args.full_every else "incremental"
+            started = time.perf_counter()
+            if mode == "incremental":
+                X_replay, y_replay, _ = replay.select(store)
+                candidate, metrics = trainer.train_incremental(model, X_new, y_new, label_encoder,
+                                                               X_replay=X_replay, y_replay=y_replay)
+                if metrics["f1_weighted"] < metrics["baseline_f1_weighted"] - args.tolerance:
+                    mode = "fallback"
+                else:
+                    model, since_full = candidate, since_full + 1
+            if mode != "incremental":
+                X_all, y_all = store.materialize(extra=[(X_new, y_new)])
+                model, _ = trainer.train_and_evaluate(X_all, y_all, label_encoder)
+                since_full = 0
+            seconds = time.perf_counter() - started
+            store.append(X_new, y_new, source=f"cycle {cycle}")
+
+            X_test, y_test = synthetic_training_rows(args.test, args.features, seed=1000 + cycle, drift=drift)
+            f1 = f1_score(y_test, model.predict(X_test).ravel(), average="weighted")
+            rows.append((cycle, mode, seconds, model.tree_count_, f1))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--features", type=int, default=13)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--cycles", type=int, default=6)
+    parser.add_argument("--drift", type=float, default=0.1)
+    parser.add_argument("--replay", type=int, default=5000)
+    parser.add_argument("--full-every", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    parser.add_argument("--test", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=None)
+    args = parser.parse_args()
+
+    from sklearn.preprocessing import LabelEncoder
+
+    from src.training.trainer import ModelTrainer
+
+    trainer = ModelTrainer()
+    if args.iterations:
+        trainer.model_params["iterations"] = args.iterations
+    label_encoder = LabelEncoder().fit(OFFERS)
+    X_seed, y_seed = synthetic_training_rows(args.rows, args.features, seed=0)
+    initial_model, _ = trainer.train_and_evaluate(X_seed, y_seed, label_encoder)
+
+    results = {policy: run(policy, args, trainer, label_encoder, initial_model) for policy in ("full", "incremental")}
+    print(f"seed {args.rows} rows, +{args.batch} per cycle, drift {args.drift}/cycle, "
+          f"initial model {initial_model.tree_count_} trees")
+    print(f"{'cycle':>5} {'full s':>7} {'full F1':>8} {'incr mode':>11} {'incr s':>7} {'incr F1':>8} {'trees':>6}")
+    for (cycle, _, full_s, _, full_f1), (_, mode, incr_s, trees, incr_f1) in zip(results["full"],
+                                                                                results["incremental"]):
+        print(f"{cycle:>5} {full_s:>7.2f} {full_f1:>8.4f} {mode:>11} {incr_s:>7.2f} {incr_f1:>8.4f} {trees:>6}")
+    totals = {policy: sum(row[2] for row in rows) for policy, rows in results.items()}
+    means = {policy: np.mean([row[4] for row in rows]) for policy, rows in results.items()}
+    print(f"total  {totals['full']:>7.2f} {means['full']:>8.4f} {'':>11} "
+          f"{totals['incremental']:>7.2f} {means['incremental']:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: overhead of the /metrics instrumentation on POST /predict
+
+Runs the real app in-process (SERVING_MODE=inference, synthetic artifacts)
+with METRICS_ENABLED=true and false, alternating ``--rounds`` times, and
+reports the p50 of a single-row JSON /predict. A difference under 1% is
+within run-to-run noise, so the instrumentation is also timed directly:
+the exact updates one request makes (stage timer with five stages, total,
+rows counter, session.run and batch-size histograms) in a tight loop.
+``scrape`` is the time to render /metrics with ``--workers`` process files.
+
+    python -m benchmarks.bench_metrics [--requests 2000] [--rounds 3] [--workers 8]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.common import time_call, write_artifacts
+
+PROBE = """
+import asyncio, json, sys, time
+import numpy as np
+import httpx
+import src.app as api
+
+requests = int(sys.argv[1])
+
+async def main():
+    await api.startup_event()
+    X = np.zeros((1, api.state.registry.current.n_features), dtype=np.float32)
+    body = json.dumps({"inputs": X.tolist()}).encode()
+    headers = {"Content-Type": "application/json"}
+    timings = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(requests + 50):
+            start = time.perf_counter()
+            response = await client.post("/predict", content=body, headers=headers)
+            if i >= 50:
+                timings.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+    await api.shutdown_event()
+    print(json.dumps({"p50_ms": float(np.median(timings)), "mean_ms": float(np.mean(timings))}))
+
+asyncio.run(main())
+"""
+
+
+def probe(requests: int, env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE, str(requests)], check=True,
+                         capture_output=True, text=True, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def instrumentation_us() -> float:
+    """Cost of the metric updates one /predict makes, in microseconds"""
+    from src.serving.metrics import (
+        INFERENCE_BATCH_ROWS,
+        INFERENCE_RUN_SECONDS,
+        PREDICT_DURATION_SECONDS,
+        PREDICT_ROWS_TOTAL,
+        PREDICT_STAGE_SECONDS,
+        StageTimer,
+    )
+
+    def request():
+        timer = StageTimer(PREDICT_STAGE_SECONDS)
+        timer.mark("parse")
+        timer.mark("prepare")
+        INFERENCE_RUN_SECONDS.observe(0.0004)
+        INFERENCE_BATCH_ROWS.observe(1)
+        timer.mark("inference")
+        timer.mark("counter")
+        timer.mark("output")
+        timer.finish(PREDICT_DURATION_SECONDS)
+        PREDICT_ROWS_TOTAL.inc(1)
+
+    def thousand():
+        for _ in range(1000):
+            request()
+
+    return time_call(thousand, repeat=20)["p50_ms"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    from src.serving.metrics import METRICS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, model_dir = write_artifacts(tmp)
+        env = {**os.environ, "DATA_DIR": str(data_dir), "MODEL_DIR": str(model_dir), "SERVING_MODE": "inference",
+               "MODEL_WATCH_INTERVAL": "0", "LOG_LEVEL": "WARNING",
+               "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+
+        p50 = {"on": [], "off": []}
+        for _ in range(args.rounds):
+            for mode, enabled in (("on", "true"), ("off", "false")):
+                p50[mode].append(probe(args.requests, {**env, "METRICS_ENABLED": enabled})["p50_ms"])
+        on, off = float(np.median(p50["on"])), float(np.median(p50["off"]))
+        cost_us = instrumentation_us()
+
+        print(f"/predict p50 (1 row, {args.requests} requests x {args.rounds} rounds): "
+              f"metrics on {on:.3f} ms, off {off:.3f} ms ({(on / off - 1) * 100:+.1f}%)")
+        print(f"instrumentation per request: {cost_us:.2f} us = {cost_us / 1000 / off * 100:.2f}% of /predict p50")
+
+        # Scrape: one file per simulated worker
+        metrics_dir = data_dir / "metrics-bench"
+        METRICS.attach(metrics_dir)
+        METRICS.flush()
+        for worker in range(args.workers - 1):
+            shutil.copyfile(METRICS.path, metrics_dir / f"metrics-{METRICS.layout}-{10**6 + worker}.db")
+        scrape = time_call(METRICS.render, repeat=50)
+        print(f"scrape with {args.workers} process files: {scrape['p50_ms']:.2f} ms "
+              f"({len(METRICS.render()) / 1024:.0f} KB, {len(METRICS.metrics)} metrics)")
+
+
+if __name__ == "__main__":
+    main()
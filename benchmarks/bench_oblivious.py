@@ -0,0 +1,59 @@
+"""
+Benchmark: NumPy oblivious-tree backend vs ONNX Runtime
+
+Trains a synthetic CatBoost model (depth 6), exports it with tensor
+probabilities, and times ``session.run`` for both backends at 1, 100 and
+10k rows. Also reports the max absolute difference of each backend's
+probabilities against CatBoost's own predict_proba.
+
+    python -m benchmarks.bench_oblivious [--rows 1 100 10000] [--iterations 600] [--repeat 30]
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import synthetic_model, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--iterations", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    from src.serialization.onnx_exporter import ONNXExporter
+    from src.serving.oblivious import ObliviousTreeEnsemble, ObliviousTreeSession
+    from src.serving.session import create_session
+
+    model, pipeline, X, _ = synthetic_model(max(max(args.rows), 2000), iterations=args.iterations)
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        onnx_path = Path(tmp) / "model.onnx"
+        ONNXExporter.export_to_onnx(model, str(onnx_path), pipeline.feature_names)
+        sessions = {"onnx": create_session(onnx_path), "numpy": ObliviousTreeSession(ObliviousTreeEnsemble.from_catboost(model))}
+
+    expected = model.predict_proba(X)
+    for name, session in sessions.items():
+        probabilities = session.run(None, {session.get_inputs()[0].name: X})[1]
+        print(f"{name:>5}: max |p - predict_proba| = {np.abs(probabilities - expected).max():.2e}")
+
+    print(f"trees={args.iterations}")
+    print(f"{'rows':>6} {'onnx p50 ms':>12} {'numpy p50 ms':>13} {'onnx rows/s':>12} {'numpy rows/s':>13} {'speedup':>8}")
+    for rows in args.rows:
+        batch = X[:rows]
+        repeat = max(3, args.repeat if rows < 1000 else args.repeat // 5)
+        timings = {
+            name: time_call(lambda s=session: s.run(None, {s.get_inputs()[0].name: batch}), repeat=repeat)["p50_ms"]
+            for name, session in sessions.items()
+        }
+        onnx_ms, numpy_ms = timings["onnx"], timings["numpy"]
+        print(f"{rows:>6} {onnx_ms:>12.3f} {numpy_ms:>13.3f} {rows / onnx_ms * 1000:>12,.0f} "
+              f"{rows / numpy_ms * 1000:>13,.0f} {onnx_ms / numpy_ms:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
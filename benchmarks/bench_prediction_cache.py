@@ -0,0 +1,88 @@
+"""
+Benchmark: per-row prediction cache vs running the model
+
+- ``lookup``: digesting the rows and reading them back from a warm cache
+  (``keys_for`` + ``get_many`` + stacking), against ``session.run`` for the
+  same rows, at 1, 16 and 256 rows
+- ``replay``: single-row requests for a population of customers drawn with a
+  Zipf-like popularity (some customers are asked for many times a day),
+  through the same code the API uses (``infer_cached`` vs ``infer``);
+  reports the hit rate and mean latency per request
+
+    python -m benchmarks.bench_prediction_cache [--iterations 600] [--customers 5000] [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import synthetic_model, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 16, 256])
+    parser.add_argument("--iterations", type=int, default=600)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    args = parser.parse_args()
+
+    from src.app import infer, infer_cached, run_model
+    from src.serialization.onnx_exporter import ONNXExporter
+    from src.serving.registry import ModelHandle
+    from src.serving.result_cache import PredictionCache
+    from src.serving.session import create_session
+
+    model, pipeline, X, _ = synthetic_model(max(args.customers, 2000), iterations=args.iterations)
+    X = np.ascontiguousarray(X[:args.customers], dtype=np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        onnx_path = Path(tmp) / "model.onnx"
+        ONNXExporter.export_to_onnx(model, str(onnx_path), pipeline.feature_names)
+        session = create_session(onnx_path)
+    handle = ModelHandle(session=session, generation=1, version="bench",
+                         input_name=session.get_inputs()[0].name, n_features=X.shape[1])
+
+    print(f"trees={args.iterations}")
+    print(f"{'rows':>5} {'model p50 ms':>13} {'lookup p50 ms':>14} {'ratio':>7}")
+    for rows in args.rows:
+        batch = X[:rows]
+        cache = PredictionCache(max_rows=rows)
+        cache.put_many(cache.keys_for(batch), *map(np.asarray, run_model(session, batch).values()), generation=1)
+
+        def lookup():
+            entries = cache.get_many(cache.keys_for(batch), 1)
+            return np.stack([entry.probabilities for entry in entries])
+
+        model_ms = time_call(lambda: run_model(session, batch), repeat=200)["p50_ms"]
+        lookup_ms = time_call(lookup, repeat=200)["p50_ms"]
+        print(f"{rows:>5} {model_ms:>13.4f} {lookup_ms:>14.4f} {model_ms / lookup_ms:>6.0f}x")
+
+    # Zipf-like customer popularity: rank r is requested with probability ~ r^-s
+    rng = np.random.default_rng(0)
+    weights = 1.0 / np.arange(1, args.customers + 1) ** args.zipf
+    customers = rng.choice(args.customers, size=args.requests, p=weights / weights.sum())
+
+    async def replay(cache):
+        start = time.perf_counter()
+        for i in customers:
+            row = X[i:i + 1]
+            await (infer_cached(cache, handle, row) if cache is not None else infer(session, row))
+        return (time.perf_counter() - start) * 1000 / len(customers)
+
+    cache = PredictionCache(max_entries=args.customers // 2, ttl_seconds=0)
+    uncached_ms, cached_ms = asyncio.run(replay(None)), asyncio.run(replay(cache))
+    stats = cache.stats()
+    print(f"\nreplay: {args.requests} requests over {args.customers} customers (zipf s={args.zipf}, "
+          f"cache capacity {cache.max_entries})")
+    print(f"  no cache {uncached_ms:.4f} ms/request, cache {cached_ms:.4f} ms/request "
+          f"({uncached_ms / cached_ms:.1f}x), hit rate {stats['hit_rate']:.1%}, "
+          f"evictions {stats['evictions']}, memory {stats['memory_bytes'] / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
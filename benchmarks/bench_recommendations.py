@@ -0,0 +1,85 @@
+"""
+Benchmark: precomputed recommendation table vs live inference
+
+Writes synthetic artifacts, a customer file of ``--customers`` rows, and:
+
+- times a full table build, an incremental rebuild after ``--changed`` of
+  the customers changed features, and a no-op rebuild
+- reports the on-disk size with float16 and float32 probabilities
+- times one customer's lookup from the memory-mapped table (dict lookup +
+  row read) against a single-row ``session.run`` of the same model
+
+    python -m benchmarks.bench_recommendations [--customers 200000] [--changed 0.01] [--iterations 600]
+"""
+
+import argparse
+import tempfile
+
+import numpy as np
+
+from benchmarks.common import synthetic_raw_frame, time_call, write_artifacts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=200_000)
+    parser.add_argument("--changed", type=float, default=0.01)
+    parser.add_argument("--iterations", type=int, default=600)
+    args = parser.parse_args()
+
+    from src.build_recommendations import build_recommendation_table
+    from src.serving.recommendations import RecommendationTable
+    from src.serving.session import create_session
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, model_dir = write_artifacts(tmp, iterations=args.iterations)
+        model_path, processed = model_dir / "best_model.onnx", data_dir / "processed"
+        frame = synthetic_raw_frame(args.customers, seed=1).drop(columns=["target_offer"])
+        source = data_dir / "customers.csv"
+        frame.to_csv(source, index=False)
+
+        def build(table_dir, **kwargs):
+            return build_recommendation_table(source, table_dir, model_path=model_path,
+                                              processed_dir=processed, verbose=False, **kwargs)
+
+        print(f"customers={args.customers} trees={args.iterations}")
+        print(f"{'build':>24} {'scored':>8} {'reused':>8} {'seconds':>8}")
+        table_dir = data_dir / "recommendations"
+        results = {"full": build(table_dir)}
+        changed = np.random.default_rng(0).choice(len(frame), int(len(frame) * args.changed), replace=False)
+        frame.loc[changed, "monthly_spend"] += 1000
+        frame.to_csv(source, index=False)
+        results[f"incremental ({args.changed:.0%} changed)"] = build(table_dir)
+        results["no-op"] = build(table_dir)
+        for name, manifest in results.items():
+            print(f"{name:>24} {manifest['rescored']:>8} {manifest['reused']:>8} {manifest['elapsed_s']:>8.2f}")
+
+        float32_dir = data_dir / "recommendations-f32"
+        build(float32_dir, probability_dtype="float32")
+        for label, path in (("float16", table_dir), ("float32", float32_dir)):
+            print(f"table size ({label}): {RecommendationTable.open(path).stats()['size_bytes'] / 2**20:.1f} MB")
+
+        table = RecommendationTable.open(table_dir)
+        session = create_session(model_path)
+        input_name = session.get_inputs()[0].name
+        ids = table.customer_ids[:1000].tolist()
+        rows = [np.array(table.features[i:i + 1]) for i in range(len(ids))]
+        state = {"i": 0}
+
+        def lookup():
+            state["i"] = (state["i"] + 1) % len(ids)
+            row = table.row(ids[state["i"]])
+            return int(table.labels[row]), np.asarray(table.probabilities[row], dtype=np.float32)
+
+        def live():
+            state["i"] = (state["i"] + 1) % len(ids)
+            return session.run(None, {input_name: rows[state["i"]]})
+
+        lookup_ms = time_call(lookup, repeat=2000)["p50_ms"]
+        live_ms = time_call(live, repeat=2000)["p50_ms"]
+        print(f"lookup {lookup_ms * 1000:.1f} us vs live inference {live_ms * 1000:.1f} us "
+              f"({live_ms / lookup_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
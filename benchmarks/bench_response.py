@@ -0,0 +1,114 @@
+"""
+Benchmark: /predict response construction, ZipMap vs tensor probabilities
+
+For 1, 100 and 10k rows, times what happens after preprocessing:
+
+- ``zipmap``: ZipMap model, seq_map_to_probs, PredictResponse returned to
+  FastAPI (validated and serialized by the framework)
+- ``tensor``: ZipMap stripped at export, ndarray.tolist(), response
+  rendered once with render_predict_response
+
+Both run through a minimal FastAPI app in-process, so the numbers include
+FastAPI's serialization but not the HTTP server. ``post`` is the request
+time minus the median session.run() time, i.e. the cost of turning model
+outputs into the JSON response.
+
+    python -m benchmarks.bench_response [--rows 1 100 10000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import synthetic_model
+
+
+def build_app(sessions, X):
+    from fastapi import FastAPI
+
+    from src.app import extract_predictions, render_predict_response, run_model
+    from src.schemas.model_schemas import PredictResponse
+
+    app = FastAPI()
+
+    @app.get("/zipmap", response_model=PredictResponse)
+    async def zipmap(n: int):
+        labels, probabilities = extract_predictions(run_model(sessions["zipmap"], X[:n]))
+        return PredictResponse(labels=labels, probabilities=probabilities, prediction_count=0)
+
+    @app.get("/tensor", response_model=PredictResponse)
+    async def tensor(n: int):
+        labels, probabilities = extract_predictions(run_model(sessions["tensor"], X[:n]))
+        return render_predict_response(labels=labels, probabilities=probabilities, prediction_count=0)
+
+    return app
+
+
+async def measure(app, rows, repeat):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("zipmap", "tensor"):
+            (await client.get(f"/{path}", params={"n": rows})).raise_for_status()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = await client.get(f"/{path}", params={"n": rows})
+                timings.append((time.perf_counter() - start) * 1000)
+                response.raise_for_status()
+            results[path] = (float(np.median(timings)), response.content)
+    return results
+
+
+def median_run_ms(session, X, repeat):
+    input_name = session.get_inputs()[0].name
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        session.run(None, {input_name: X})
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    import onnxruntime as ort
+
+    from src.serialization.onnx_exporter import ONNXExporter
+
+    model, pipeline, X, _ = synthetic_model(max(args.rows), iterations=100)
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    with tempfile.TemporaryDirectory() as tmp:
+        zipmap_path, tensor_path = Path(tmp) / "zipmap.onnx", Path(tmp) / "tensor.onnx"
+        model.save_model(str(zipmap_path), format="onnx", export_parameters={"feature_names": pipeline.feature_names})
+        ONNXExporter.convert_to_tensor_probabilities(str(zipmap_path), str(tensor_path))
+        sessions = {
+            name: ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+            for name, path in (("zipmap", zipmap_path), ("tensor", tensor_path))
+        }
+
+    app = build_app(sessions, X)
+    print(f"{'rows':>6} {'zipmap ms':>10} {'post':>8} {'tensor ms':>10} {'post':>8} {'post speedup':>13}  identical")
+    for rows in args.rows:
+        results = asyncio.run(measure(app, rows, args.repeat))
+        (zip_ms, zip_body), (ten_ms, ten_body) = results["zipmap"], results["tensor"]
+        zip_post = zip_ms - median_run_ms(sessions["zipmap"], X[:rows], args.repeat)
+        ten_post = ten_ms - median_run_ms(sessions["tensor"], X[:rows], args.repeat)
+        identical = json.loads(zip_body) == json.loads(ten_body)
+        print(f"{rows:>6} {zip_ms:>10.2f} {zip_post:>8.2f} {ten_ms:>10.2f} {ten_post:>8.2f} "
+              f"{zip_post / ten_post:>12.1f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
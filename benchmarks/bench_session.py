@@ -0,0 +1,76 @@
+"""
+Benchmark: ONNX session cold start with and without the optimized-model cache
+
+For each graph optimization level, times in a fresh subprocess (so nothing
+is shared between runs):
+
+- ``build``: InferenceSession creation from best_model.onnx (cache miss,
+  writes the ORT-format file)
+- ``cached``: creation from the cached ``.ort`` file (cache hit)
+- ``first run`` / ``steady run``: latency of the first and of later
+  single-row predictions, i.e. what the registry warmup moves off the
+  first real request
+
+    python -m benchmarks.bench_session [--iterations 600] [--levels disable extended all]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import synthetic_model
+
+PROBE = """
+import json, sys, time
+import numpy as np
+from src.serving.session import OptimizedModelCache, create_session
+
+model_bytes = open(sys.argv[1], "rb").read()
+cache = OptimizedModelCache(sys.argv[2])
+start = time.perf_counter()
+session = create_session(model_bytes, optimization_level=sys.argv[3], cache=cache)
+create_ms = (time.perf_counter() - start) * 1000
+feed = {session.get_inputs()[0].name: np.zeros((1, session.get_inputs()[0].shape[1]), dtype=np.float32)}
+runs = []
+for _ in range(20):
+    start = time.perf_counter()
+    session.run(None, feed)
+    runs.append((time.perf_counter() - start) * 1000)
+print(json.dumps({"hit": cache.last_hit, "create_ms": create_ms, "first_ms": runs[0],
+                  "steady_ms": float(np.median(runs[1:]))}))
+"""
+
+
+def probe(model_path: Path, cache_dir: Path, level: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE, str(model_path), str(cache_dir), level],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=600)
+    parser.add_argument("--levels", nargs="+", default=["disable", "basic", "extended", "all"])
+    args = parser.parse_args()
+
+    from src.serialization.onnx_exporter import ONNXExporter
+
+    model, pipeline, _, _ = synthetic_model(2000, iterations=args.iterations)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / "best_model.onnx"
+        ONNXExporter.export_to_onnx(model, str(model_path), pipeline.feature_names)
+        print(f"trees={args.iterations} model={model_path.stat().st_size / 1e6:.1f} MB")
+        print(f"{'level':>9} {'build ms':>9} {'cached ms':>10} {'first run ms':>13} {'steady run ms':>14}")
+        for level in args.levels:
+            cache_dir = Path(tmp) / f"optimized-{level}"
+            miss, hit = probe(model_path, cache_dir, level), probe(model_path, cache_dir, level)
+            assert (miss["hit"], hit["hit"]) == (False, True)
+            print(f"{level:>9} {miss['create_ms']:>9.1f} {hit['create_ms']:>10.1f} "
+                  f"{hit['first_ms']:>13.3f} {hit['steady_ms']:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: API cold start in SERVING_MODE=full vs SERVING_MODE=inference
+
+Each mode runs in a fresh interpreter against synthetic artifacts and reports:
+
+- ``import s``: ``import src.app``
+- ``ready s``: import + startup (preprocessing, model load + warmup,
+  retrain runner in full mode)
+- ``RSS MB``: resident memory once ready
+- which training-side packages ended up imported
+
+    python -m benchmarks.bench_startup [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.common import write_artifacts
+
+PROBE = """
+import asyncio, json, resource, sys, time
+start = time.perf_counter()
+import src.app as api
+imported = time.perf_counter() - start
+asyncio.run(api.startup_event())
+ready = time.perf_counter() - start
+with open("/proc/self/statm") as f:
+    rss_mb = int(f.read().split()[1]) * resource.getpagesize() / 2**20
+heavy = [m for m in ("catboost", "imblearn", "sklearn", "onnx", "pandas", "scipy") if m in sys.modules]
+asyncio.run(api.shutdown_event())
+print(json.dumps({"import_s": imported, "ready_s": ready, "rss_mb": rss_mb, "heavy": heavy}))
+"""
+
+
+def probe(mode: str, env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE], check=True, capture_output=True, text=True,
+                         env={**env, "SERVING_MODE": mode}).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, model_dir = write_artifacts(tmp)
+        from src.preprocessing.artifacts import export_serving_artifacts
+        export_serving_artifacts(data_dir / "processed")
+        env = {**os.environ, "DATA_DIR": str(data_dir), "MODEL_DIR": str(model_dir),
+               "MODEL_WATCH_INTERVAL": "0", "LOG_LEVEL": "WARNING", "RETRAIN_WORKER_MODE": "thread",
+               "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+
+        print(f"{'mode':>9} {'import s':>9} {'ready s':>8} {'RSS MB':>7}  training imports")
+        for mode in ("full", "inference"):
+            runs = [probe(mode, env) for _ in range(args.repeat)]
+            med = {key: float(np.median([r[key] for r in runs])) for key in ("import_s", "ready_s", "rss_mb")}
+            print(f"{mode:>9} {med['import_s']:>9.2f} {med['ready_s']:>8.2f} {med['rss_mb']:>7.0f}  "
+                  f"{', '.join(runs[-1]['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: bulk scoring through POST /predict/stream vs one /predict per customer
+
+Runs the app in-process against synthetic artifacts, uploads a synthetic
+customer file as a chunked CSV stream and compares the throughput with
+single-row /predict calls (raw_features, logging disabled).
+
+    python -m benchmarks.bench_stream [--rows 50000] [--chunk-rows 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.common import synthetic_raw_frame, write_artifacts
+
+
+async def run(app_module, args):
+    import httpx
+
+    frame = synthetic_raw_frame(args.rows, seed=1).drop(columns=["target_offer"])
+    payload = frame.to_csv(index=False).encode()
+    records = frame.head(args.single_calls).to_dict(orient="records")
+
+    await app_module.startup_event()
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def upload():
+            for i in range(0, len(payload), 64 * 1024):
+                yield payload[i:i + 64 * 1024]
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        rows, summary = 0, None
+        async with client.stream("POST", f"/predict/stream?chunk_rows={args.chunk_rows}",
+                                 content=upload(), headers={"Content-Type": "text/csv"}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith('{"summary"'):
+                    summary = json.loads(line)["summary"]
+                elif line:
+                    rows += 1
+        stream_s = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.perf_counter()
+        for record in records:
+            (await client.post("/predict", json={"raw_features": [record]})).raise_for_status()
+        single_s = time.perf_counter() - start
+
+    await app_module.shutdown_event()
+
+    print(f"rows={args.rows} chunk_rows={args.chunk_rows} input={len(payload) / 1e6:.1f} MB")
+    print(f"/predict/stream : {rows} rows in {stream_s:.2f}s -> {rows / stream_s:,.0f} rows/s "
+          f"(server summary: {summary['rows_per_sec']:,.0f} rows/s, peak RSS growth {(rss_after - rss_before) / 1024:.0f} MB)")
+    print(f"/predict x{len(records)}  : {single_s:.2f}s -> {len(records) / single_s:,.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--chunk-rows", type=int, default=2000)
+    parser.add_argument("--single-calls", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, model_dir = write_artifacts(tmp)
+        os.environ.update({
+            "DATA_DIR": str(data_dir),
+            "MODEL_DIR": str(model_dir),
+            "AUTO_RETRAIN_ENABLED": "false",
+            "MODEL_WATCH_INTERVAL": "0",
+        })
+        import src.app as app_module
+
+        asyncio.run(run(app_module, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: top-k offer responses vs the full probability matrix
+
+For 1k, 10k and 100k rows of 9-class probabilities, times building the
+/predict JSON body:
+
+- ``full``: labels + full probability matrix (render_predict_response)
+- ``top-k``: eligibility mask (two rules), ``top_k`` ranking, offer name
+  decoding and the top-k body
+
+and reports the body sizes. The last two columns compare ``top_k`` alone
+against a full ``np.argsort``.
+
+    python -m benchmarks.bench_topk [--rows 1000 10000 100000] [--k 3]
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.common import OFFERS, synthetic_pipeline, synthetic_raw_frame, time_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    from src.app import render_predict_response
+    from src.serving.ranking import OfferEligibility, decode_top_k, top_k
+
+    pipeline = synthetic_pipeline()
+    eligibility = OfferEligibility([
+        {"when": {"plan_type": "Prepaid"}, "exclude": ["Family Plan Offer", "Device Upgrade Offer"]},
+        {"when": {"device_brand": "Apple"}, "exclude": ["Top-up Promo"]},
+    ], pipeline.encoder, OFFERS)
+    frame = synthetic_raw_frame(max(args.rows), seed=1)
+    X_all = pipeline.encoder.encode_columns({c: frame[c].to_numpy() for c in frame.columns})
+    P_all = np.random.default_rng(0).dirichlet(np.ones(len(OFFERS)), size=len(X_all)).astype(np.float32)
+
+    print(f"{'rows':>7} {'full ms':>9} {'full KB':>9} {'top-k ms':>9} {'top-k KB':>9} "
+          f"{'argsort ms':>11} {'top_k ms':>11}")
+    for rows in args.rows:
+        X, P = X_all[:rows], P_all[:rows]
+        labels = P.argmax(axis=1).tolist()
+
+        def full():
+            return render_predict_response(labels=labels, probabilities=P.tolist(), prediction_count=0)
+
+        def ranked():
+            indices, scores = top_k(P, args.k, eligibility.mask(X))
+            top_labels, top_offers, top_probabilities = decode_top_k(indices, scores, OFFERS)
+            return render_predict_response(labels=labels, top_labels=top_labels, top_offers=top_offers,
+                                           top_probabilities=top_probabilities, prediction_count=0)
+
+        full_ms = time_call(full, repeat=args.repeat)["p50_ms"]
+        ranked_ms = time_call(ranked, repeat=args.repeat)["p50_ms"]
+        argsort_ms = time_call(lambda: np.argsort(-P, axis=1)[:, :args.k], repeat=args.repeat)["p50_ms"]
+        rank_ms = time_call(lambda: top_k(P, args.k), repeat=args.repeat)["p50_ms"]
+        print(f"{rows:>7} {full_ms:>9.2f} {len(full().body) / 1024:>9.0f} {ranked_ms:>9.2f} "
+              f"{len(ranked().body) / 1024:>9.0f} {argsort_ms:>11.2f} {rank_ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: retrain data handling, rewrite-everything vs the append-only store
+
+Simulates ``--cycles`` retrains, each adding ``--batch`` preprocessed rows
+to ``--rows`` rows of history (``--features`` float64 columns):
+
+- ``rewrite``: the previous path. np.load of X/y_train_original.npy,
+  np.vstack with the new rows, np.save of the combined matrix
+- ``store``: TrainingDataStore. The stored shards are read into a single
+  training array together with the new rows, and the new rows are
+  appended as a shard
+
+Each mode runs in a fresh subprocess and reports the time per cycle, the
+bytes written per cycle and the peak RSS above the process baseline
+(Linux /proc/self/status). The combined training array (what the trainer
+gets) is ``(rows + cycles * batch) * features * 8`` bytes.
+
+    python -m benchmarks.bench_training_store [--rows 2000000] [--batch 1000] [--cycles 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CHILD = """
+import json, sys, time
+from pathlib import Path
+import numpy as np
+from src.data_ingestion.training_store import TrainingDataStore
+
+def status_mb(field):
+    # VmHWM starts fresh at exec, unlike ru_maxrss which inherits the parent's peak
+    for line in open("/proc/self/status"):
+        if line.startswith(field + ":"):
+            return int(line.split()[1]) / 1024
+
+mode, root, rows, features, batch, cycles = sys.argv[1], Path(sys.argv[2]), *map(int, sys.argv[3:])
+X_path, y_path = root / "X_train_original.npy", root / "y_train_original.npy"
+rng = np.random.default_rng(0)
+baseline = status_mb("VmRSS")
+written, seconds = 0, []
+for cycle in range(cycles):
+    X_new, y_new = rng.normal(size=(batch, features)), rng.integers(0, 9, batch)
+    start = time.perf_counter()
+    if mode == "rewrite":
+        X_combined = np.vstack([np.load(X_path), X_new])
+        y_combined = np.concatenate([np.load(y_path), y_new])
+        np.save(X_path, X_combined)
+        np.save(y_path, y_combined)
+        written += X_combined.nbytes + y_combined.nbytes
+    else:
+        store = TrainingDataStore(root / "training_store", X_path, y_path)
+        X_combined, y_combined = store.materialize(extra=[(X_new, y_new)])
+        store.append(X_new, y_new, source=f"cycle {cycle}")
+        written += X_new.nbytes + y_new.nbytes
+    seconds.append(time.perf_counter() - start)
+    del X_combined, y_combined
+print(json.dumps({"seconds": seconds, "written": written / cycles, "peak_mb": status_mb("VmHWM") - baseline}))
+"""
+
+
+def run(mode: str, args) -> dict:
+    import numpy as np
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = np.random.default_rng(1)
+        np.save(os.path.join(tmp, "X_train_original.npy"), rng.normal(size=(args.rows, args.features)))
+        np.save(os.path.join(tmp, "y_train_original.npy"), rng.integers(0, 9, args.rows))
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))}
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, mode, tmp, str(args.rows), str(args.features), str(args.batch),
+             str(args.cycles)],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--features", type=int, default=13)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--cycles", type=int, default=5)
+    args = parser.parse_args()
+
+    training_mb = (args.rows + args.cycles * args.batch) * args.features * 8 / 2**20
+    print(f"history {args.rows} x {args.features}, +{args.batch} rows per cycle, {args.cycles} cycles "
+          f"(training array ~{training_mb:.0f} MB)")
+    print(f"{'mode':>8} {'mean s/cycle':>13} {'last s':>8} {'MB written/cycle':>17} {'peak RSS MB':>12}")
+    for mode in ("rewrite", "store"):
+        result = run(mode, args)
+        seconds = result["seconds"]
+        print(f"{mode:>8} {sum(seconds) / len(seconds):>13.3f} {seconds[-1]:>8.3f} "
+              f"{result['written'] / 2**20:>17.2f} {result['peak_mb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
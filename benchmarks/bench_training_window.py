@@ -0,0 +1,85 @@
+"""
+Benchmark: retrain cost per cycle, growing history vs a bounded training window
+
+Simulates ``--cycles`` retrains on a TrainingDataStore seeded with ``--rows``
+preprocessed rows (``--features`` float64 columns, imbalanced labels over
+nine offers), each adding ``--batch`` rows:
+
+- ``all``: every stored row plus the new ones (the default policy)
+- ``window``: ``TrainingWindow(max_samples=--window, stratified)``, and
+  ``--half-life`` days of decay when given (shard ages are simulated one
+  day apart)
+
+Per cycle it reports the rows handed to the trainer, the time to select
+and load them, and the fit time of a ``--iterations``-round CatBoost on
+them (single thread; the production trainer fits more rounds on the same
+rows, so its time scales the same way).
+
+    python -m benchmarks.bench_training_window [--rows 50000] [--batch 20000] [--cycles 6] [--window 50000]
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import synthetic_training_rows
+
+
+def run(policy: str, args) -> list:
+    from catboost import CatBoostClassifier
+
+    from src.data_ingestion.training_store import TrainingDataStore
+    from src.data_ingestion.training_window import TrainingWindow
+
+    window = TrainingWindow(max_samples=args.window if policy == "window" else None,
+                            half_life_days=args.half_life)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        X_seed, y_seed = synthetic_training_rows(args.rows, args.features, seed=0)
+        np.save(tmp / "X_train_original.npy", X_seed)
+        np.save(tmp / "y_train_original.npy", y_seed)
+        store = TrainingDataStore(tmp / "store", tmp / "X_train_original.npy", tmp / "y_train_original.npy")
+        start_day = datetime.now() - timedelta(days=args.cycles)
+        for cycle in range(args.cycles):
+            X_new, y_new = synthetic_training_rows(args.batch, args.features, seed=cycle + 1)
+            started = time.perf_counter()
+            X, y, summary = window.select(store, extra=[(X_new, y_new)], now=start_day + timedelta(days=cycle))
+            load_s = time.perf_counter() - started
+
+            started = time.perf_counter()
+            CatBoostClassifier(iterations=args.iterations, depth=6, loss_function="MultiClass",
+                               thread_count=1, random_seed=42, verbose=False).fit(X, y)
+            fit_s = time.perf_counter() - started
+
+            store.append(X_new, y_new, source=f"cycle {cycle}")
+            rows.append((cycle, summary["available"], len(X), min(summary["class_counts"].values()),
+                         load_s, fit_s))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--features", type=int, default=13)
+    parser.add_argument("--batch", type=int, default=20_000)
+    parser.add_argument("--cycles", type=int, default=6)
+    parser.add_argument("--window", type=int, default=50_000)
+    parser.add_argument("--half-life", type=float, default=None)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'policy':>7} {'cycle':>6} {'available':>10} {'trained':>8} {'min class':>10} "
+          f"{'load s':>7} {'fit s':>7}")
+    for policy in ("all", "window"):
+        for cycle, available, trained, min_class, load_s, fit_s in run(policy, args):
+            print(f"{policy:>7} {cycle:>6} {available:>10} {trained:>8} {min_class:>10} "
+                  f"{load_s:>7.3f} {fit_s:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Shared helpers for the benchmark scripts: synthetic artifacts and timing
+"""
+
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from src.preprocessing.pipeline import PreprocessingPipeline
+
+PLAN_TYPES = ["Postpaid", "Prepaid"]
+DEVICE_BRANDS = ["Apple", "Huawei", "Oppo", "Realme", "Samsung", "Vivo", "Xiaomi"]
+OFFERS = [
+    "Data Booster", "Device Upgrade Offer", "Family Plan Offer", "General Offer", "Retention Offer",
+    "Roaming Pass", "Streaming Partner Pack", "Top-up Promo", "Voice Bundle",
+]
+
+# Offer frequencies of synthetic training rows: a few large classes and a long tail of small ones
+OFFER_WEIGHTS = np.array([0.30, 0.22, 0.15, 0.12, 0.09, 0.06, 0.04, 0.015, 0.005])
+
+
+def synthetic_raw_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """Raw customer frame shaped like data/raw/data_capstone.csv"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "customer_id": [f"C{i:05d}" for i in range(1, n + 1)],
+        "plan_type": rng.choice(PLAN_TYPES, n, p=[0.39, 0.61]),
+        "device_brand": rng.choice(DEVICE_BRANDS, n),
+        "avg_data_usage_gb": rng.gamma(2.0, 4.0, n).round(2),
+        "pct_video_usage": rng.uniform(0, 1, n),
+        "avg_call_duration": rng.gamma(2.0, 5.0, n).round(2),
+        "sms_freq": rng.poisson(10, n),
+        "monthly_spend": rng.gamma(3.0, 35000, n).round(-3),
+        "topup_freq": rng.poisson(3, n),
+        "travel_score": rng.uniform(0, 1, n),
+        "complaint_count": rng.poisson(0.8, n),
+    })
+    df["target_offer"] = np.array(OFFERS)[rng.integers(0, len(OFFERS), n)]
+    # Make sure every level and offer is present so drop_first drops the training baseline
+    df.loc[: len(PLAN_TYPES) - 1, "plan_type"] = PLAN_TYPES
+    df.loc[: len(DEVICE_BRANDS) - 1, "device_brand"] = DEVICE_BRANDS
+    df.loc[: len(OFFERS) - 1, "target_offer"] = OFFERS
+    return df
+
+
+def synthetic_training_rows(n: int, features: int = 13, seed: int = 0,
+                            drift: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Preprocessed (X, y) rows: imbalanced labels over the nine offers, Gaussian features
+    around per-class centers; ``drift`` moves the centers along a fixed direction
+    """
+    centers_rng = np.random.default_rng(12345)
+    centers = centers_rng.normal(scale=0.5, size=(len(OFFER_WEIGHTS), features))
+    centers += drift * centers_rng.normal(scale=0.5, size=centers.shape)
+    rng = np.random.default_rng(seed)
+    y = rng.choice(len(OFFER_WEIGHTS), size=n, p=OFFER_WEIGHTS / OFFER_WEIGHTS.sum())
+    return rng.normal(size=(n, features)) + centers[y], y
+
+
+def synthetic_pipeline(n: int = 2000, seed: int = 0) -> PreprocessingPipeline:
+    """PreprocessingPipeline fitted like notebook/preposesingData.ipynb on synthetic data"""
+    df = synthetic_raw_frame(n, seed)
+    X = df.drop(columns=["customer_id", "target_offer", "avg_call_duration", "sms_freq"])
+    X = pd.get_dummies(X, columns=["plan_type", "device_brand"], drop_first=True)
+    scaler = StandardScaler().fit(X)
+    label_encoder = LabelEncoder().fit(df["target_offer"])
+    return PreprocessingPipeline(scaler, label_encoder, X.columns.tolist())
+
+
+def time_call(fn: Callable[[], object], repeat: int = 50, warmup: int = 3) -> Dict[str, float]:
+    """Run fn repeatedly and return latency percentiles in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    arr = np.asarray(samples)
+    return {
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p99_ms": float(np.percentile(arr, 99)),
+    }
+
+
+def synthetic_model(n: int = 2000, iterations: int = 100, seed: int = 0):
+    """
+    Train a small CatBoost model on synthetic data
+
+    Returns:
+        Tuple of (model, pipeline, X_scaled, y)
+    """
+    from catboost import CatBoostClassifier
+
+    pipeline = synthetic_pipeline(n, seed)
+    df = synthetic_raw_frame(n, seed)
+    X = pipeline.prepare_inference_features(df.to_dict(orient="records"))
+    y = pipeline.encode_target(df["target_offer"])
+    model = CatBoostClassifier(iterations=iterations, depth=6, loss_function="MultiClass",
+                               random_seed=seed, verbose=False)
+    model.fit(X, y)
+    return model, pipeline, X, y
+
+
+def synthetic_onnx_session(path, n: int = 2000, iterations: int = 100):
+    """Export a synthetic CatBoost model to ``path`` and open it with ONNX Runtime"""
+    import onnxruntime as ort
+
+    model, pipeline, X, _ = synthetic_model(n, iterations)
+    model.save_model(str(path), format="onnx",
+                     export_parameters={"feature_names": pipeline.feature_names})
+    return ort.InferenceSession(str(path), providers=["CPUExecutionProvider"]), pipeline, X
+
+
+def write_artifacts(root, n: int = 2000, iterations: int = 100):
+    """
+    Write a complete synthetic DATA_DIR/MODEL_DIR layout under ``root``
+
+    Point DATA_DIR and MODEL_DIR at the returned paths *before* importing
+    ``src.config`` to run the app against it.
+
+    Returns:
+        Tuple of (data_dir, model_dir)
+    """
+    import pickle
+    from pathlib import Path
+
+    import joblib
+
+    root = Path(root)
+    data_dir, model_dir = root / "data", root / "model"
+    processed = data_dir / "processed"
+    for path in (processed, data_dir / "raw", data_dir / "retrain", model_dir):
+        path.mkdir(parents=True, exist_ok=True)
+
+    model, pipeline, X, y = synthetic_model(n, iterations)
+    synthetic_raw_frame(n).to_csv(data_dir / "raw" / "data_capstone.csv", index=False)
+    np.save(processed / "X_train_original.npy", X.astype(np.float64))
+    np.save(processed / "y_train_original.npy", y)
+    np.save(processed / "X_test.npy", X[:200].astype(np.float64))
+    for name, obj in (("scaler", pipeline.scaler), ("label_encoder", pipeline.label_encoder),
+                      ("feature_names", pipeline.feature_names)):
+        with open(processed / f"{name}.pkl", "wb") as f:
+            pickle.dump(obj, f)
+    joblib.dump(model, model_dir / "best_model.pkl")
+    from src.serialization.onnx_exporter import ONNXExporter
+    ONNXExporter.export_to_onnx(model, str(model_dir / "best_model.onnx"), pipeline.feature_names)
+    return data_dir, model_dir
@@ -0,0 +1,346 @@
+"""
+Load test: throughput and latency percentiles of POST /predict
+
+Customers are synthesized field by field from ``FeatureData``
+(src/schemas/model_schemas.py). Values come from ``--source`` (default
+data/raw/data_capstone.csv, falling back to the benchmark generator when
+the file is missing): whole rows are resampled so correlations such as
+monthly_spend vs avg_data_usage_gb survive, float fields get a small
+multiplicative jitter so no two payloads are identical, and plan_type is
+redrawn from the mix in data/plot/eda_summary.json (EDA found it
+independent of spend and brand).
+
+Targets:
+
+- ``inprocess``: the app in this process through ``httpx.ASGITransport``
+- ``uvicorn``: a local ``uvicorn src.app:app`` subprocess with
+  ``--uvicorn-workers`` workers; the client shares the machine's CPUs
+- ``--url``: an already running server instead of either of the above
+
+For every target, payload kind (``inputs``, ``raw_features``), ``--batch``
+size and ``--concurrency`` level, closed-loop clients send ``--requests``
+requests (after ``--warmup``) drawn from a pool of ``--pool`` distinct
+bodies, and throughput plus p50/p95/p99 latency are reported. Unless
+``--data-dir``/``--model-dir`` are given, synthetic artifacts are written
+to a temporary directory; auto-retraining and the prediction cache are
+off so every request runs inference.
+
+Results go to ``--output`` (default benchmarks/results/loadtest-<time>.json);
+``--compare`` prints the change against an earlier result file.
+
+    python -m benchmarks.loadtest [--targets inprocess uvicorn] [--payloads inputs raw_features]
+        [--batch 1 32] [--concurrency 1 8] [--requests 500] [--compare OLD.json]
+"""
+
+import argparse
+import ast
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import synthetic_raw_frame, write_artifacts
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_SOURCE = ROOT_DIR / "data" / "raw" / "data_capstone.csv"
+DEFAULT_EDA_SUMMARY = ROOT_DIR / "data" / "plot" / "eda_summary.json"
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+
+# Relative standard deviation of the jitter applied to float fields
+JITTER = 0.02
+
+
+class CustomerSampler:
+    """Synthetic ``FeatureData`` records drawn from observed value distributions"""
+
+    def __init__(self,
+                 reference: pd.DataFrame,
+                 plan_mix: Optional[Dict[str, float]] = None,
+                 seed: int = 0,
+                 source: str = "synthetic"):
+        from src.schemas.model_schemas import FeatureData
+
+        self.fields = {name: info.annotation for name, info in FeatureData.model_fields.items()}
+        missing = [name for name in self.fields if name not in reference.columns]
+        if missing:
+            raise ValueError(f"Reference data lacks FeatureData fields {missing}")
+        self.reference = reference[list(self.fields)].dropna().reset_index(drop=True)
+        self.plan_mix = plan_mix
+        self.source = source
+        self.rng = np.random.default_rng(seed)
+        self._bounds = {name: (float(self.reference[name].min()), float(self.reference[name].max()))
+                        for name, kind in self.fields.items() if kind is float}
+
+    @classmethod
+    def from_sources(cls,
+                     source: Optional[Path] = DEFAULT_SOURCE,
+                     eda_summary: Optional[Path] = DEFAULT_EDA_SUMMARY,
+                     seed: int = 0) -> "CustomerSampler":
+        """Use the raw CSV when it exists, else the benchmark generator; plan_type mix from the EDA summary"""
+        if source is not None and Path(source).exists():
+            reference, origin = pd.read_csv(source), str(source)
+        else:
+            reference, origin = synthetic_raw_frame(10_000, seed=seed), "synthetic"
+        plan_mix = None
+        if eda_summary is not None and Path(eda_summary).exists():
+            with open(eda_summary, "r") as f:
+                summary = json.loads(f.read().replace("NaN", "null"))
+            # Stored as the repr of a dict of percentages
+            plan_mix = ast.literal_eval(summary["plan_type_dist"]) if "plan_type_dist" in summary else None
+        return cls(reference, plan_mix, seed=seed, source=origin)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"source": self.source, "reference_rows": len(self.reference), "plan_mix": self.plan_mix}
+
+    def sample(self, n: int) -> List[Dict[str, Any]]:
+        """``n`` raw feature records with the FeatureData field types"""
+        frame = self.reference.iloc[self.rng.integers(0, len(self.reference), n)].reset_index(drop=True)
+        for name, (low, high) in self._bounds.items():
+            jittered = frame[name].to_numpy(dtype=np.float64) * self.rng.normal(1.0, JITTER, n)
+            frame[name] = np.clip(jittered, low, high)
+        if self.plan_mix:
+            levels = list(self.plan_mix)
+            weights = np.asarray([self.plan_mix[level] for level in levels], dtype=np.float64)
+            frame["plan_type"] = np.asarray(levels)[self.rng.choice(len(levels), n, p=weights / weights.sum())]
+        for name, kind in self.fields.items():
+            if kind is int:
+                frame[name] = frame[name].round().astype(np.int64)
+        return frame.to_dict(orient="records")
+
+
+def build_bodies(sampler: CustomerSampler, pipeline, payload: str, batch: int, pool: int) -> List[bytes]:
+    """``pool`` distinct JSON bodies of ``batch`` customers each"""
+    bodies = []
+    for _ in range(pool):
+        records = sampler.sample(batch)
+        if payload == "inputs":
+            body = {"inputs": pipeline.prepare_inference_features(records).tolist()}
+        else:
+            body = {"raw_features": records}
+        bodies.append(json.dumps(body).encode())
+    return bodies
+
+
+async def drive(client, bodies: List[bytes], concurrency: int, requests: int, warmup: int) -> Dict[str, Any]:
+    """Send ``requests`` bodies from ``concurrency`` closed-loop clients"""
+    headers = {"Content-Type": "application/json"}
+    for i in range(warmup):
+        await client.post("/predict", content=bodies[i % len(bodies)], headers=headers)
+
+    latencies: List[float] = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < requests:
+            body = bodies[issued % len(bodies)]
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await client.post("/predict", content=body, headers=headers)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    arr = np.asarray(latencies) if latencies else np.zeros(1)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "requests_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": float(arr.mean()),
+        "max_ms": float(arr.max()),
+    }
+
+
+async def run_target(target: str, client, pools: Dict, args) -> List[Dict[str, Any]]:
+    results = []
+    for (payload, batch), bodies in pools.items():
+        for concurrency in args.concurrency:
+            result = await drive(client, bodies, concurrency, args.requests, args.warmup)
+            result = {"target": target, "payload": payload, "batch": batch, "concurrency": concurrency,
+                      **result, "rows_per_s": result["requests_per_s"] * batch}
+            results.append(result)
+            print(f"{target:>9} {payload:>12} {batch:>5} {concurrency:>5} {result['requests_per_s']:>9.1f} "
+                  f"{result['rows_per_s']:>10.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                  f"{result['p99_ms']:>8.2f} {result['errors']:>6}")
+    return results
+
+
+async def run_inprocess(pools: Dict, args) -> List[Dict[str, Any]]:
+    import httpx
+
+    import src.app as app_module
+
+    await app_module.startup_event()
+    try:
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            return await run_target("inprocess", client, pools, args)
+    finally:
+        await app_module.shutdown_event()
+
+
+async def run_remote(target: str, url: str, pools: Dict, args) -> List[Dict[str, Any]]:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        return await run_target(target, client, pools, args)
+
+
+def start_uvicorn(workers: int, env: Dict[str, str]):
+    """Start ``uvicorn src.app:app`` on a free port and wait for /health"""
+    import httpx
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 120s")
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: Path) -> None:
+    """Print throughput and latency changes against an earlier result file"""
+    with open(baseline_path, "r") as f:
+        baseline = {(r["target"], r["payload"], r["batch"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path}")
+    print(f"{'target':>9} {'payload':>12} {'batch':>5} {'conc':>5} {'req/s':>9} {'p50':>8} {'p99':>8}")
+    for result in results:
+        old = baseline.get((result["target"], result["payload"], result["batch"], result["concurrency"]))
+        if old is None:
+            continue
+        change = {key: (result[key] / old[key] - 1) * 100 if old[key] else float("nan")
+                  for key in ("requests_per_s", "p50_ms", "p99_ms")}
+        print(f"{result['target']:>9} {result['payload']:>12} {result['batch']:>5} {result['concurrency']:>5} "
+              f"{change['requests_per_s']:>+8.1f}% {change['p50_ms']:>+7.1f}% {change['p99_ms']:>+7.1f}%")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=["inprocess", "uvicorn"], default=["inprocess", "uvicorn"])
+    parser.add_argument("--url", help="Load test a running server instead of --targets")
+    parser.add_argument("--payloads", nargs="+", choices=["inputs", "raw_features"], default=["inputs", "raw_features"])
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 32])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--pool", type=int, default=256, help="Distinct bodies per payload/batch")
+    parser.add_argument("--uvicorn-workers", type=int, default=1)
+    parser.add_argument("--source", type=Path, default=DEFAULT_SOURCE)
+    parser.add_argument("--eda-summary", type=Path, default=DEFAULT_EDA_SUMMARY)
+    parser.add_argument("--data-dir", type=Path, help="Existing DATA_DIR (default: synthetic artifacts)")
+    parser.add_argument("--model-dir", type=Path, help="Existing MODEL_DIR (default: synthetic artifacts)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path, help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.data_dir and args.model_dir:
+            data_dir, model_dir = args.data_dir, args.model_dir
+        else:
+            data_dir, model_dir = write_artifacts(tmp)
+        env = {
+            "DATA_DIR": str(data_dir),
+            "MODEL_DIR": str(model_dir),
+            "AUTO_RETRAIN_ENABLED": "false",
+            "RETRAIN_THRESHOLD": str(10 ** 9),
+            "PREDICTION_CACHE_ENABLED": "false",
+            "MODEL_WATCH_INTERVAL": "0",
+            "LOG_LEVEL": "WARNING",
+        }
+        os.environ.update(env)
+
+        from src.data_ingestion.repository import DataRepository
+        from src.preprocessing.pipeline import PreprocessingPipeline
+
+        repository = DataRepository(processed_data_dir=data_dir / "processed", buffer_dir=Path(tmp) / "buffer")
+        pipeline = PreprocessingPipeline(*repository.load_preprocessing_artifacts())
+        sampler = CustomerSampler.from_sources(args.source, args.eda_summary, seed=args.seed)
+        pools = {(payload, batch): build_bodies(sampler, pipeline, payload, batch, args.pool)
+                 for payload in args.payloads for batch in args.batch}
+
+        print(f"customers from {sampler.source}, {args.requests} requests per run")
+        print(f"{'target':>9} {'payload':>12} {'batch':>5} {'conc':>5} {'req/s':>9} {'rows/s':>10} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+        results = []
+        if args.url:
+            results += asyncio.run(run_remote("remote", args.url, pools, args))
+        else:
+            if "inprocess" in args.targets:
+                results += asyncio.run(run_inprocess(pools, args))
+            if "uvicorn" in args.targets:
+                process, url = start_uvicorn(args.uvicorn_workers, {**os.environ, **env})
+                try:
+                    results += asyncio.run(run_remote("uvicorn", url, pools, args))
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "customers": sampler.describe(),
+        "settings": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
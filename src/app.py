@@ -1,15 +1,63 @@
 """FastAPI application for serving ML model predictions and retraining."""
 
+import time
+
+# Taken before the heavy imports below so startup timings include them
+APP_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import functools
+import json
 import logging
-from typing import Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import onnxruntime as ort
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from src.schemas.model_schemas import PredictRequest, PredictResponse
-from src.services.retraining_service import RetrainingService
-from src.preprocessing.pipeline import PreprocessingPipeline
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from src.schemas.model_schemas import (
+    PredictRequest,
+    PredictResponse,
+    RecommendationRequest,
+    RecommendationResponse,
+    RetrainJob,
+)
+from src.serving.batcher import MicroBatcher, BatcherOverloadedError
+from src.serving.codecs import (
+    ARROW_MEDIA_TYPE,
+    BODY_FORMATS,
+    FLOAT32_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPES,
+    NPY_MEDIA_TYPE,
+    NPZ_MEDIA_TYPE,
+    DecodedBody,
+    UnsupportedMediaTypeError,
+    decode_body,
+    detect_body_format,
+    encode_msgpack_response,
+    encode_npy,
+    negotiate_response_format,
+)
+from src.serving.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    INFERENCE_BATCH_ROWS,
+    INFERENCE_RUN_SECONDS,
+    METRICS,
+    PREDICT_DURATION_SECONDS,
+    PREDICT_ROWS_TOTAL,
+    PREDICT_STAGE_SECONDS,
+    StageTimer,
+)
+from src.serving.ranking import OfferEligibility, decode_top_k, top_k as rank_top_k
+from src.serving.recommendations import RecommendationTable, read_manifest
+from src.serving.registry import INFERENCE_BACKENDS, ModelHandle, ModelRegistry
+from src.serving.result_cache import PredictionCache
+from src.serving.session import OptimizedModelCache, create_session
+from src.serving.stream import Predictions, RequestStreamingResponse, StreamScorer, detect_stream_format, iter_line_chunks
 from src.config import (
     MODEL_ONNX_PATH,
     MODEL_PKL_PATH,
@@ -17,17 +65,81 @@ from src.config import (
     LOG_LEVEL,
     LOG_FORMAT,
     AUTO_RETRAIN_ENABLED,
+    RETRAIN_WORKER_MODE,
     API_HOST,
     API_PORT,
     API_WORKERS,
+    BATCHING_ENABLED,
+    BATCH_WINDOW_MS,
+    BATCH_MAX_SIZE,
+    BATCH_QUEUE_DEPTH,
+    INFERENCE_WORKERS,
+    MODEL_WATCH_INTERVAL,
+    MODEL_WARMUP_RUNS,
+    STREAM_CHUNK_ROWS,
+    STREAM_MAX_LINE_BYTES,
+    PREDICTION_CACHE_ENABLED,
+    PREDICTION_CACHE_MAX_ENTRIES,
+    PREDICTION_CACHE_TTL_SECONDS,
+    PREDICTION_CACHE_MAX_ROWS,
+    RECOMMENDATION_TABLE_DIR,
+    OFFER_ELIGIBILITY_PATH,
+    INFERENCE_BACKEND,
+    ORT_MODEL_CACHE_ENABLED,
+    ORT_MODEL_CACHE_DIR,
+    SERVING_MODE,
+    PROCESSED_DATA_DIR,
+    METRICS_ENABLED,
+    METRICS_DIR,
 )
 
+if TYPE_CHECKING:
+    # Training-side modules are only imported at startup in SERVING_MODE=full
+    from src.preprocessing.artifacts import ServingPreprocessor
+    from src.preprocessing.pipeline import PreprocessingPipeline
+    from src.services.retraining_service import RetrainingService
+    from src.services.retrain_worker import RetrainJobRunner
+
 # App state
 class AppState:
     def __init__(self):
-        self.session: Optional[ort.InferenceSession] = None
-        self.retraining_service: Optional[RetrainingService] = None
-        self.preprocessing: Optional[PreprocessingPipeline] = None
+        self.registry: Optional[ModelRegistry] = None
+        self.retraining_service: Optional["RetrainingService"] = None
+        self.retrain_runner: Optional["RetrainJobRunner"] = None
+        self.preprocessing: Optional[Union["PreprocessingPipeline", "ServingPreprocessor"]] = None
+        self.batcher: Optional[MicroBatcher] = None
+        self.prediction_cache: Optional[PredictionCache] = None
+        self.recommendations: Optional[RecommendationTable] = None
+        self.eligibility: Optional[OfferEligibility] = None
+        self.recommendations_checked_at = 0.0
+        # Blocking work runs here so the event loop keeps serving other requests
+        self.inference_executor: Optional[Executor] = None
+        self.logging_executor: Optional[Executor] = None
+        self.session_cache: Optional[OptimizedModelCache] = None
+        # Milliseconds since APP_IMPORT_STARTED: startup finished / first /predict answered
+        self.ready_ms: Optional[float] = None
+        self.first_prediction_ms: Optional[float] = None
+
+    def startup_stats(self) -> Dict[str, Any]:
+        """Cold-start timings reported under ``startup`` in /health"""
+        model = self.registry.stats() if self.registry else {}
+        return {
+            "ready_ms": self.ready_ms,
+            "time_to_first_prediction_ms": self.first_prediction_ms,
+            "model_load_ms": model.get('last_load_ms'),
+            "warmup_ms": model.get('last_warmup_ms'),
+            "session_cache": self.session_cache.stats() if self.session_cache else None,
+        }
+
+    def mark_first_prediction(self):
+        if self.first_prediction_ms is None:
+            self.first_prediction_ms = round((time.perf_counter() - APP_IMPORT_STARTED) * 1000, 1)
+
+    @property
+    def session(self) -> Optional[ort.InferenceSession]:
+        """Live ONNX session (capture it once per request; it may be swapped at any time)"""
+        handle = self.registry.current if self.registry else None
+        return handle.session if handle else None
 
 LOG_FORMAT_MAP = {
     "json": "{\"timestamp\":\"%(asctime)s\",\"level\":\"%(levelname)s\",\"name\":\"%(name)s\",\"message\":\"%(message)s\"}"
@@ -47,18 +159,144 @@ logger = logging.getLogger("telco-model.api")
 
 @app.on_event("startup")
 async def startup_event():
-    """Load ONNX model and initialize retraining service on startup"""
-    model_path = str(MODEL_ONNX_PATH)
-    logger.info("Loading ONNX model from %s", model_path)
-    state.session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
-    logger.info("Initializing retraining service (threshold=%s)", RETRAIN_THRESHOLD)
-    state.retraining_service = RetrainingService(
-        model_path=MODEL_PKL_PATH,
-        onnx_path=MODEL_ONNX_PATH,
-        retrain_threshold=RETRAIN_THRESHOLD
-    )
-    state.preprocessing = state.retraining_service.preprocessing
-    logger.info("Startup complete")
+    """Load the serving model and initialize retraining service on startup"""
+    if INFERENCE_BACKEND not in INFERENCE_BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND must be one of {INFERENCE_BACKENDS}, got {INFERENCE_BACKEND!r}")
+    if METRICS_ENABLED:
+        METRICS.attach(METRICS_DIR)
+    else:
+        METRICS.disable()
+    if SERVING_MODE == "inference":
+        from src.preprocessing.artifacts import load_serving_preprocessor
+        logger.info("Inference-only mode: retraining and prediction logging are disabled")
+        state.preprocessing = load_serving_preprocessor(PROCESSED_DATA_DIR)
+    else:
+        from src.services.retraining_service import RetrainingService
+        state.retraining_service = RetrainingService(
+            model_path=MODEL_PKL_PATH,
+            onnx_path=MODEL_ONNX_PATH,
+            retrain_threshold=RETRAIN_THRESHOLD,
+            on_threshold=lambda: state.retrain_runner.submit_threadsafe("threshold")
+        )
+        state.preprocessing = state.retraining_service.preprocessing
+    feature_names = state.preprocessing.feature_names if state.preprocessing else None
+    if state.preprocessing is not None and OFFER_ELIGIBILITY_PATH.exists():
+        state.eligibility = OfferEligibility.from_file(
+            OFFER_ELIGIBILITY_PATH, state.preprocessing.encoder, state.preprocessing.classes
+        )
+        logger.info("Loaded %s offer eligibility rules from %s", len(state.eligibility.rules), OFFER_ELIGIBILITY_PATH)
+    if INFERENCE_BACKEND == "numpy":
+        from src.serving.oblivious import create_oblivious_session
+        logger.info("Loading CatBoost model from %s (NumPy oblivious-tree backend)", MODEL_PKL_PATH)
+        state.registry = ModelRegistry(
+            MODEL_PKL_PATH, warmup_runs=MODEL_WARMUP_RUNS, feature_names=feature_names,
+            session_factory=create_oblivious_session, backend="numpy"
+        )
+    else:
+        logger.info("Loading ONNX model from %s", MODEL_ONNX_PATH)
+        state.session_cache = OptimizedModelCache(ORT_MODEL_CACHE_DIR) if ORT_MODEL_CACHE_ENABLED else None
+        state.registry = ModelRegistry(
+            MODEL_ONNX_PATH, warmup_runs=MODEL_WARMUP_RUNS, feature_names=feature_names,
+            session_factory=functools.partial(create_session, cache=state.session_cache)
+        )
+    await state.registry.load()
+    state.registry.start_watching(MODEL_WATCH_INTERVAL)
+    await reload_recommendations()
+    state.inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+    # Single worker: buffer/counter writes stay sequential within the process
+    state.logging_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="buffer-log")
+    if state.retraining_service is not None:
+        from src.services.retrain_worker import RetrainJobRunner, create_retrain_executor
+        logger.info("Initializing retraining service (threshold=%s, worker=%s)", RETRAIN_THRESHOLD, RETRAIN_WORKER_MODE)
+        state.retrain_runner = RetrainJobRunner(
+            job_args=(str(MODEL_PKL_PATH), str(MODEL_ONNX_PATH), RETRAIN_THRESHOLD),
+            executor_factory=lambda: create_retrain_executor(RETRAIN_WORKER_MODE),
+            on_success=reload_model,
+            on_failure=rearm_retrain_trigger
+        )
+        await state.retrain_runner.start()
+    if BATCHING_ENABLED:
+        logger.info(
+            "Micro-batching enabled (window=%sms, max_batch=%s, queue_depth=%s)",
+            BATCH_WINDOW_MS, BATCH_MAX_SIZE, BATCH_QUEUE_DEPTH
+        )
+        state.batcher = MicroBatcher(
+            lambda batch, session: run_model(session, batch),
+            window_ms=BATCH_WINDOW_MS,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_queue_depth=BATCH_QUEUE_DEPTH,
+            executor=state.inference_executor
+        )
+        await state.batcher.start()
+    if PREDICTION_CACHE_ENABLED:
+        state.prediction_cache = PredictionCache(
+            max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+            max_rows=PREDICTION_CACHE_MAX_ROWS
+        )
+    state.ready_ms = round((time.perf_counter() - APP_IMPORT_STARTED) * 1000, 1)
+    logger.info("Startup complete in %.0f ms (model load %s ms, warmup %s ms)",
+                state.ready_ms, state.registry.last_load_ms, state.registry.last_warmup_ms)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the micro-batcher, retrain worker and model watcher, then drain the executors"""
+    if state.batcher is not None:
+        await state.batcher.stop()
+        state.batcher = None
+    if state.retrain_runner is not None:
+        await state.retrain_runner.stop()
+        state.retrain_runner = None
+    if state.registry is not None:
+        await state.registry.stop_watching()
+    if state.retraining_service is not None:
+        await run_blocking(state.logging_executor, state.retraining_service.data_repo.close_buffer)
+        await run_blocking(state.logging_executor, state.retraining_service.counter.close)
+    for executor in (state.inference_executor, state.logging_executor):
+        if executor is not None:
+            executor.shutdown(wait=True)
+    state.inference_executor = None
+    state.logging_executor = None
+    METRICS.flush()
+
+
+async def run_blocking(executor: Optional[Executor], fn: Callable, *args):
+    """Run a blocking call on the given executor (inline when none is configured)."""
+    if executor is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+async def reload_model(job: Optional[RetrainJob] = None):
+    """Load, warm up and swap in the freshly exported model; requests keep the old one until then."""
+    if state.registry is not None:
+        await state.registry.load()
+    await reload_recommendations()
+
+
+async def reload_recommendations():
+    """Open the live recommendation table build if it differs from the one being served."""
+    state.recommendations_checked_at = time.monotonic()
+    try:
+        manifest = read_manifest(RECOMMENDATION_TABLE_DIR)
+        current = state.recommendations
+        if manifest is None or (current is not None and current.build_dir.name == manifest["build"]):
+            return
+        # Building the id index is O(customers): keep it off the event loop
+        state.recommendations = await asyncio.get_running_loop().run_in_executor(
+            None, RecommendationTable, RECOMMENDATION_TABLE_DIR / manifest["build"], manifest
+        )
+        logger.info("Serving recommendation table %s (%s customers, model %s)",
+                    manifest["build"], len(state.recommendations), state.recommendations.model_version)
+    except Exception:
+        logger.exception("Cannot open recommendation table in %s", RECOMMENDATION_TABLE_DIR)
+
+
+async def rearm_retrain_trigger(job: Optional[RetrainJob] = None):
+    """Let the next logged prediction trigger another retrain after a failed job."""
+    if state.retraining_service is not None:
+        await run_blocking(state.logging_executor, state.retraining_service.counter.rearm)
 
 
 @app.get("/")
@@ -69,8 +307,14 @@ async def root():
         "version": "2.0.0",
         "endpoints": {
             "POST /predict": "Get prediction for customer features",
+            "POST /predict/stream": "Score a chunked CSV/NDJSON upload, streamed back as NDJSON",
+            "GET /recommendation/{customer_id}": "Precomputed recommendation of a known customer",
+            "POST /recommendation/{customer_id}": "Recommendation for the given current raw features",
             "GET /health": "Check API health",
-            "GET /retrain/status": "Get retraining status"
+            "GET /metrics": "Prometheus metrics (all worker processes)",
+            "GET /retrain/status": "Get retraining status",
+            "POST /retrain": "Start a background retrain",
+            "GET /retrain/jobs/{job_id}": "Get background retrain job status"
         }
     }
 
@@ -85,17 +329,55 @@ async def health():
         "preprocessing_loaded": state.preprocessing is not None,
         "prediction_count": status.get('current_count', 0),
         "model_version": status.get('model_version', 'unknown'),
-        "auto_retrain_enabled": AUTO_RETRAIN_ENABLED,
+        "auto_retrain_enabled": AUTO_RETRAIN_ENABLED and state.retraining_service is not None,
+        "serving_mode": SERVING_MODE,
+        "model": state.registry.stats() if state.registry else None,
+        "batching": state.batcher.stats() if state.batcher else None,
+        "prediction_cache": state.prediction_cache.stats() if state.prediction_cache else None,
+        "recommendations": state.recommendations.stats() if state.recommendations else None,
+        "startup": state.startup_stats(),
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics, aggregated over every API worker and the retrain process"""
+    if not METRICS.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    body = await asyncio.get_running_loop().run_in_executor(None, METRICS.render)
+    return Response(content=body, media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/retrain/status")
 async def retrain_status():
     """Get current retraining status"""
     if state.retraining_service is None:
         raise HTTPException(status_code=503, detail="Retraining service not initialized")
     
-    return state.retraining_service.get_status()
+    status = await run_blocking(state.logging_executor, state.retraining_service.get_status)
+    active = state.retrain_runner.active_job if state.retrain_runner else None
+    status['active_job'] = active.model_dump() if active else None
+    return status
+
+
+@app.post("/retrain", response_model=RetrainJob, status_code=202)
+async def start_retrain():
+    """Start a background retrain (returns the running job if one is in flight)"""
+    if state.retrain_runner is None:
+        raise HTTPException(status_code=503, detail="Retraining service not initialized")
+    if state.retrain_runner.active_job is None and state.retraining_service is not None:
+        # Make rows still batched in this process visible to the retrain
+        await run_blocking(state.logging_executor, state.retraining_service.data_repo.seal_buffer)
+    return state.retrain_runner.submit("manual")
+
+
+@app.get("/retrain/jobs/{job_id}", response_model=RetrainJob)
+async def retrain_job(job_id: str):
+    """Get status of a background retrain job"""
+    job = state.retrain_runner.get_job(job_id) if state.retrain_runner else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Retrain job '{job_id}' not found")
+    return job
 
 def prepare_input_matrix(request: PredictRequest) -> np.ndarray:
     """Resolve correct feature matrix from scaled inputs or raw feature payloads."""
@@ -113,6 +395,120 @@ def prepare_input_matrix(request: PredictRequest) -> np.ndarray:
     raise HTTPException(status_code=400, detail="Either 'inputs' or 'raw_features' must be provided")
 
 
+def run_model(session: ort.InferenceSession, input_data: np.ndarray) -> Dict[str, Any]:
+    """Run the ONNX session and return outputs keyed by output name."""
+    input_name = session.get_inputs()[0].name
+    started = time.perf_counter()
+    raw_out = session.run(None, {input_name: input_data})
+    INFERENCE_RUN_SECONDS.observe(time.perf_counter() - started)
+    INFERENCE_BATCH_ROWS.observe(input_data.shape[0])
+    
+    outs = {}
+    if isinstance(raw_out, (list, tuple)):
+        for meta, val in zip(session.get_outputs(), raw_out):
+            outs[meta.name] = val
+    elif isinstance(raw_out, dict):
+        outs = raw_out
+    return outs
+
+
+async def infer(session: ort.InferenceSession, input_data: np.ndarray) -> Dict[str, Any]:
+    """Run ``session`` off the event loop, coalesced with concurrent requests on the same session when batching is enabled."""
+    if state.batcher is not None:
+        try:
+            return await state.batcher.submit(input_data, session)
+        except BatcherOverloadedError as exc:
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+    return await run_blocking(state.inference_executor, run_model, session, input_data)
+
+
+def output_arrays(outs: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Labels and an [N, n_classes] probability matrix from either output layout."""
+    probabilities = outs.get("probabilities")
+    if not isinstance(probabilities, np.ndarray):
+        probabilities = np.asarray(seq_map_to_probs(probabilities), dtype=np.float32)
+    labels = outs.get("label")
+    labels = probabilities.argmax(axis=1) if labels is None else np.asarray(labels)
+    return labels, probabilities
+
+
+async def infer_cached(cache: PredictionCache, handle: ModelHandle, input_data: np.ndarray) -> Dict[str, Any]:
+    """
+    Serve cached rows and run the model on the rest only
+    
+    Rows are cached under the generation of the handle the request captured,
+    so results never mix models across a hot swap.
+    """
+    keys = cache.keys_for(input_data)
+    entries = cache.get_many(keys, handle.generation)
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+    if not missing:
+        return {
+            "label": np.array([entry.label for entry in entries]),
+            "probabilities": np.stack([entry.probabilities for entry in entries]),
+        }
+    
+    batch = input_data if len(missing) == len(entries) else input_data[missing]
+    labels, probabilities = output_arrays(await infer(handle.session, batch))
+    cache.put_many([keys[i] for i in missing], labels, probabilities, handle.generation)
+    if len(missing) == len(entries):
+        return {"label": labels, "probabilities": probabilities}
+    
+    merged_labels = np.empty(len(entries), dtype=labels.dtype)
+    merged = np.empty((len(entries), probabilities.shape[1]), dtype=probabilities.dtype)
+    hit = [i for i, entry in enumerate(entries) if entry is not None]
+    merged_labels[missing], merged[missing] = labels, probabilities
+    merged_labels[hit] = [entries[i].label for i in hit]
+    merged[hit] = [entries[i].probabilities for i in hit]
+    return {"label": merged_labels, "probabilities": merged}
+
+
+async def score(handle: ModelHandle, input_data: np.ndarray) -> Dict[str, Any]:
+    """Model outputs for ``input_data``, through the prediction cache for small requests when enabled."""
+    cache = state.prediction_cache
+    if cache is not None and cache.accepts(input_data):
+        return await infer_cached(cache, handle, input_data)
+    return await infer(handle.session, input_data)
+
+
+def extract_predictions(outs: Dict[str, Any]) -> Predictions:
+    """Pull class labels and per-class probabilities out of the ONNX outputs."""
+    labels = None
+    if "label" in outs:
+        labels = np.array(outs["label"]).astype(int).tolist()
+    else:
+        for v in outs.values():
+            if isinstance(v, np.ndarray):
+                labels = np.array(v).astype(int).tolist()
+                break
+    
+    probabilities = None
+    if "probabilities" in outs:
+        probs_raw = outs["probabilities"]
+        if isinstance(probs_raw, np.ndarray):
+            # Tensor output (ZipMap stripped at export): columns are already in class order
+            probabilities = probs_raw.tolist()
+        else:
+            probabilities = seq_map_to_probs(probs_raw)
+    return labels, probabilities
+
+
+def render_predict_response(**fields: Any) -> Response:
+    """
+    Serialize a PredictResponse in one pydantic-core pass
+    
+    The fields come straight from ndarray.tolist(), so re-validating every
+    probability (what returning the model would do) is skipped.
+    """
+    body = PredictResponse.model_construct(**fields).model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+def log_raw_features(request: PredictRequest) -> bool:
+    """Append raw_features rows to the retrain buffer; returns True if a retrain was requested."""
+    return state.retraining_service.log_predictions_batch(request.raw_features, request.true_labels)
+
+
 def seq_map_to_probs(seq_map):
     """Convert sequence map to probability array"""
     probs = []
@@ -122,98 +518,333 @@ def seq_map_to_probs(seq_map):
     return probs
 
 
-@app.post("/predict", response_model=PredictResponse)
-async def predict(request: PredictRequest):
+PREDICT_OPENAPI_EXTRA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            JSON_MEDIA_TYPE: {"schema": PredictRequest.model_json_schema()},
+            NPY_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            FLOAT32_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            NPZ_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            ARROW_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            MSGPACK_MEDIA_TYPES[0]: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+def decode_binary_request(body_format: str, body: bytes, n_features: int) -> Tuple[np.ndarray, DecodedBody]:
+    """Decode a binary/columnar /predict body into the model input matrix (runs in the inference pool)."""
+    decoded = decode_body(body_format, body, n_features)
+    if decoded.X is not None:
+        return decoded.X, decoded
+    pipeline = state.preprocessing
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Preprocessing pipeline not available")
+    return pipeline.encoder.encode_columns(decoded.columns), decoded
+
+
+def log_raw_columns(decoded: DecodedBody) -> bool:
+    """Append columnar raw features to the retrain buffer; returns True if a retrain was requested."""
+    return state.retraining_service.log_predictions_batch(decoded.records(), decoded.true_labels)
+
+
+def render_binary_response(response_format: str, outs: Dict[str, Any], **fields: Any) -> Response:
+    """.npy probability matrix (counters in headers) or msgpack map, straight from the output arrays."""
+    labels, probabilities = output_arrays(outs)
+    if response_format == "npy":
+        headers = {f"X-{name.replace('_', '-').title()}": str(value)
+                   for name, value in fields.items() if value is not None}
+        return Response(content=encode_npy(probabilities.astype(np.float32, copy=False)),
+                        media_type=NPY_MEDIA_TYPE, headers=headers)
+    return Response(content=encode_msgpack_response(labels, probabilities, **fields),
+                    media_type=MSGPACK_MEDIA_TYPES[0])
+
+
+def render_top_k_response(outs: Dict[str, Any], input_data: np.ndarray, k: int, eligibility: bool,
+                           **fields: Any) -> Response:
+    """PredictResponse with the k best offers per row instead of the probability matrix."""
+    labels, probabilities = output_arrays(outs)
+    eligible = state.eligibility.mask(input_data) if eligibility and state.eligibility is not None else None
+    indices, scores = rank_top_k(probabilities, k, eligible)
+    top_labels, top_offers, top_probabilities = decode_top_k(indices, scores, state.preprocessing.classes)
+    return render_predict_response(
+        labels=np.asarray(labels).astype(int).tolist(),
+        top_labels=top_labels,
+        top_offers=top_offers,
+        top_probabilities=top_probabilities,
+        **fields
+    )
+
+
+@app.post("/predict", response_model=PredictResponse, openapi_extra=PREDICT_OPENAPI_EXTRA)
+async def predict(request: Request,
+                  top_k: Optional[int] = Query(None, ge=1, description="Return the k best offers per row "
+                                               "(names and probabilities) instead of the probability matrix"),
+                  eligibility: bool = Query(True, description="Apply the offer eligibility rules to top_k")):
     """
     Predict customer offer preferences
     
-    Args:
-        request: PredictRequest with scaled inputs and optional raw features + labels
-        
+    The body is a JSON PredictRequest (scaled inputs and/or raw features + labels),
+    or a binary body selected by Content-Type: .npy / raw float32 scaled inputs, or
+    columnar raw features as .npz, Arrow IPC or msgpack (see src/serving/codecs.py).
+    The response is JSON, or .npy / msgpack when the Accept header asks for it.
+    With ``top_k`` the response lists the k best offers per row, ranked after the
+    offer eligibility rules are applied (JSON only).
+    
     Returns:
         PredictResponse with predictions and current count
     """
-    if state.session is None:
+    timer = StageTimer(PREDICT_STAGE_SECONDS)
+    handle = state.registry.current if state.registry else None
+    if handle is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
+    body_format = detect_body_format(request.headers.get("content-type"))
+    if body_format is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported Content-Type; use one of {', '.join(BODY_FORMATS)}"
+        )
+    response_format = negotiate_response_format(request.headers.get("accept"))
+    if top_k is not None and response_format != "json":
+        raise HTTPException(status_code=406, detail="top_k responses are only available as JSON")
+    if top_k is not None and state.preprocessing is None:
+        raise HTTPException(status_code=503, detail="Offer names not available (preprocessing not loaded)")
+    body = await request.body()
+    
+    payload: Optional[PredictRequest] = None
+    decoded: Optional[DecodedBody] = None
     try:
         # Prepare input
-        input_data = prepare_input_matrix(request)
-        input_name = state.session.get_inputs()[0].name
-        
-        # Run inference
-        raw_out = state.session.run(None, {input_name: input_data})
-        
-        # Map outputs
-        outs = {}
-        out_meta = state.session.get_outputs()
-        if isinstance(raw_out, (list, tuple)):
-            for meta, val in zip(out_meta, raw_out):
-                outs[meta.name] = val
-        elif isinstance(raw_out, dict):
-            outs = raw_out
-        
-        # Extract labels
-        labels = None
-        if "label" in outs:
-            labels = np.array(outs["label"]).astype(int).tolist()
+        if body_format == "json":
+            try:
+                payload = PredictRequest.model_validate_json(body)
+            except ValidationError as exc:
+                raise RequestValidationError(exc.errors(include_url=False), body=body) from exc
+            timer.mark("parse")
+            input_data = await run_blocking(state.inference_executor, prepare_input_matrix, payload)
         else:
-            for v in outs.values():
-                if isinstance(v, np.ndarray):
-                    labels = np.array(v).astype(int).tolist()
-                    break
+            # Binary bodies are decoded and encoded in one step, recorded as "prepare"
+            timer.mark("parse")
+            try:
+                input_data, decoded = await run_blocking(
+                    state.inference_executor, decode_binary_request, body_format, body, handle.n_features
+                )
+            except UnsupportedMediaTypeError as exc:
+                raise HTTPException(status_code=415, detail=str(exc)) from exc
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
+        timer.mark("prepare")
         
-        # Extract probabilities
-        probabilities = None
-        if "probabilities" in outs:
-            probs_raw = outs["probabilities"]
-            if isinstance(probs_raw, np.ndarray):
-                probabilities = np.array(probs_raw).tolist()
-            else:
-                probabilities = seq_map_to_probs(probs_raw)
+        # Run inference (repeated rows served from the cache when enabled)
+        outs = await score(handle, input_data)
+        timer.mark("inference")
         
         # Log predictions for retraining (if raw features provided)
         retrain_triggered = False
-        if request.raw_features:
-            if len(request.raw_features) != input_data.shape[0]:
+        has_raw = bool(payload.raw_features) if payload is not None else decoded.columns is not None
+        if has_raw:
+            if payload is not None and len(payload.raw_features) != input_data.shape[0]:
                 raise HTTPException(status_code=400, detail="raw_features length must match number of samples")
-            if not AUTO_RETRAIN_ENABLED:
-                logger.debug("raw_features provided but AUTO_RETRAIN_ENABLED is false; skipping logging")
+            if not AUTO_RETRAIN_ENABLED or SERVING_MODE == "inference":
+                logger.debug("raw_features provided but prediction logging is disabled; skipping logging")
             elif state.retraining_service:
-                for i, features_dict in enumerate(request.raw_features):
-                    true_label = None
-                    if request.true_labels and i < len(request.true_labels):
-                        true_label = request.true_labels[i]
-                    triggered = state.retraining_service.log_prediction(features_dict, true_label)
-                    if triggered:
-                        retrain_triggered = True
+                if payload is not None:
+                    retrain_triggered = await run_blocking(state.logging_executor, log_raw_features, payload)
+                else:
+                    retrain_triggered = await run_blocking(state.logging_executor, log_raw_columns, decoded)
+                timer.mark("logging")
             else:
                 logger.warning("Retraining service unavailable; cannot log raw_features payload")
         
-        # Reload model if retrain was triggered
-        if retrain_triggered:
-            logger.info("Retrain triggered. Reloading ONNX model")
-            state.session = ort.InferenceSession(str(MODEL_ONNX_PATH), providers=["CPUExecutionProvider"])
-            logger.info("Model reloaded successfully")
+        # Retraining runs in the background; this request keeps the current model
+        retrain_job_id = None
+        if retrain_triggered and state.retrain_runner is not None:
+            active = state.retrain_runner.active_job
+            retrain_job_id = active.job_id if active else None
         
         # Get current prediction count
         prediction_count = None
         if state.retraining_service:
-            status = state.retraining_service.get_status()
+            status = await run_blocking(state.logging_executor, state.retraining_service.get_status)
             prediction_count = status['current_count']
+            timer.mark("counter")
         
-        return PredictResponse(
-            labels=labels,
-            probabilities=probabilities,
-            prediction_count=prediction_count
-        )
+        state.mark_first_prediction()
+        if top_k is not None:
+            response = render_top_k_response(
+                outs, input_data, top_k, eligibility,
+                prediction_count=prediction_count, retrain_job_id=retrain_job_id
+            )
+        elif response_format != "json":
+            response = render_binary_response(
+                response_format, outs, prediction_count=prediction_count, retrain_job_id=retrain_job_id
+            )
+        else:
+            labels, probabilities = extract_predictions(outs)
+            response = render_predict_response(
+                labels=labels,
+                probabilities=probabilities,
+                prediction_count=prediction_count,
+                retrain_job_id=retrain_job_id
+            )
+        timer.mark("output")
+        timer.finish(PREDICT_DURATION_SECONDS)
+        PREDICT_ROWS_TOTAL.inc(input_data.shape[0])
+        return response
         
-    except HTTPException:
+    except (HTTPException, RequestValidationError):
         raise
     except Exception as e:
         logger.exception("Prediction failed")
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
 
+@app.post("/predict/stream")
+async def predict_stream(request: Request,
+                         chunk_rows: int = Query(STREAM_CHUNK_ROWS, ge=1, le=100_000)):
+    """
+    Score a chunked CSV (text/csv) or NDJSON (application/x-ndjson) upload
+    
+    Rows are parsed, encoded and scored ``chunk_rows`` at a time and streamed back
+    as NDJSON (customer_id if present, label, probabilities). The last line is
+    {"summary": {...}} with rows/sec, or {"error": ...} if a chunk could not be scored.
+    Rows are scored with the model that was live when the upload started and are
+    not logged to the retrain buffer.
+    """
+    session = state.session
+    if session is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    pipeline = state.preprocessing
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Preprocessing pipeline not available")
+    stream_format = detect_stream_format(request.headers.get("content-type"))
+    if stream_format is None:
+        raise HTTPException(status_code=415, detail="Content-Type must be text/csv or application/x-ndjson")
+    
+    scorer = StreamScorer(
+        pipeline.encoder,
+        lambda X: extract_predictions(run_model(session, X)),
+        stream_format
+    )
+    
+    async def results():
+        try:
+            async for lines in iter_line_chunks(request.stream(), chunk_rows, STREAM_MAX_LINE_BYTES):
+                yield await run_blocking(state.inference_executor, scorer.score_chunk, lines)
+        except Exception as exc:
+            # Bad input is the client's problem; anything else deserves a traceback
+            log = logger.warning if isinstance(exc, ValueError) else logger.exception
+            log("Stream scoring stopped after %s rows: %s", scorer.rows, exc)
+            yield (json.dumps({"error": str(exc), "summary": scorer.summary()}) + "\n").encode("utf-8")
+            return
+        summary = scorer.summary()
+        logger.info("Stream scoring finished: %s rows in %ss (%s rows/sec)",
+                    summary["rows"], summary["elapsed_s"], summary["rows_per_sec"])
+        yield (json.dumps({"summary": summary}) + "\n").encode("utf-8")
+    
+    return RequestStreamingResponse(results(), media_type="application/x-ndjson")
+
+
+def render_recommendation(customer_id: str, label: Any, probabilities: np.ndarray, classes: List[str],
+                          source: str, model_version: Optional[str]) -> Response:
+    """Serialize a RecommendationResponse in one pass (see render_predict_response)."""
+    label = int(label)
+    probabilities = np.asarray(probabilities, dtype=np.float32)
+    body = RecommendationResponse.model_construct(
+        customer_id=customer_id,
+        label=label,
+        offer=classes[label] if 0 <= label < len(classes) else None,
+        confidence=float(probabilities[label]),
+        probabilities=probabilities.tolist(),
+        source=source,
+        model_version=model_version,
+    ).model_dump_json()
+    return Response(content=body, media_type="application/json")
+
+
+async def live_recommendation(customer_id: str, handle: ModelHandle, X: np.ndarray) -> Response:
+    """Score one customer with the live model."""
+    labels, probabilities = output_arrays(await score(handle, X))
+    pipeline = state.preprocessing
+    classes = [str(c) for c in pipeline.classes] if pipeline is not None else []
+    return render_recommendation(customer_id, labels[0], probabilities[0], classes, "live", handle.version)
+
+
+def fresh_table_row(customer_id: str, handle: ModelHandle) -> Tuple[Optional[RecommendationTable], Optional[int]]:
+    """The recommendation table and the customer's row in it; the table is None if it was scored by another model."""
+    table = state.recommendations
+    row = table.row(customer_id) if table is not None else None
+    if table is not None and not table.scored_by(handle.version, INFERENCE_BACKEND):
+        table = None
+    return table, row
+
+
+async def lookup_recommendation(customer_id: str, handle: ModelHandle) -> Tuple[Optional[RecommendationTable], Optional[int]]:
+    """fresh_table_row, re-reading the table manifest (at most every MODEL_WATCH_INTERVAL seconds) on a miss."""
+    table, row = fresh_table_row(customer_id, handle)
+    if (table is None or row is None) and MODEL_WATCH_INTERVAL > 0 \
+            and time.monotonic() - state.recommendations_checked_at >= MODEL_WATCH_INTERVAL:
+        await reload_recommendations()
+        table, row = fresh_table_row(customer_id, handle)
+    return table, row
+
+
+@app.get("/recommendation/{customer_id}", response_model=RecommendationResponse)
+async def recommendation(customer_id: str):
+    """
+    Recommendation of a known customer from the precomputed table
+    
+    Served from the memory-mapped table when it was scored by the live model;
+    otherwise (the table is stale after a model swap) the customer's stored
+    features are scored live. Customers missing from the table get 404: use
+    POST with their raw features instead.
+    """
+    handle = state.registry.current if state.registry else None
+    if handle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    table, row = await lookup_recommendation(customer_id, handle)
+    if table is not None and row is not None:
+        return render_recommendation(customer_id, table.labels[row], table.probabilities[row],
+                                     table.classes, "table", handle.version)
+    
+    stale = state.recommendations
+    stale_row = stale.row(customer_id) if stale is not None else None
+    if stale_row is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Customer '{customer_id}' is not in the recommendation table; POST its raw_features instead"
+        )
+    return await live_recommendation(customer_id, handle, np.array(stale.features[stale_row:stale_row + 1]))
+
+
+@app.post("/recommendation/{customer_id}", response_model=RecommendationResponse)
+async def recommendation_for_features(customer_id: str, request: RecommendationRequest):
+    """
+    Recommendation for a customer's current raw features
+    
+    Served from the table when the customer is in it, the table was scored by the
+    live model and the encoded features are unchanged; scored live otherwise
+    (new customers, changed features, stale table).
+    """
+    handle = state.registry.current if state.registry else None
+    if handle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    pipeline = state.preprocessing
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Preprocessing pipeline not available")
+    try:
+        X = await run_blocking(state.inference_executor, pipeline.prepare_inference_features, [request.raw_features])
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    
+    table, row = await lookup_recommendation(customer_id, handle)
+    if table is not None and row is not None and np.array_equal(table.features[row], X[0]):
+        return render_recommendation(customer_id, table.labels[row], table.probabilities[row],
+                                     table.classes, "table", handle.version)
+    return await live_recommendation(customer_id, handle, X)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host=API_HOST, port=API_PORT, workers=API_WORKERS)
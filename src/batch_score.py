@@ -0,0 +1,362 @@
+"""
+Offline batch scoring - scores a large raw CSV/Parquet file with a process pool
+
+Each worker process holds its own ONNX Runtime session and compiled feature
+encoder, reads its chunk of the input straight from disk and writes labels and
+class probabilities into memory-mapped .npy files at the chunk's row offset,
+so the output is in input order no matter which worker finishes first.
+
+Progress is checkpointed per chunk; rerunning the same command resumes where
+an interrupted run stopped.
+
+    python -m src.batch_score data/raw/data_capstone.csv --output data/result/scores --workers 8
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import MODEL_ONNX_PATH, PROCESSED_DATA_DIR
+
+LABELS_FILE = "labels.npy"
+PROBABILITIES_FILE = "probabilities.npy"
+MANIFEST_FILE = "manifest.json"
+SUMMARY_FILE = "summary.json"
+PARQUET_FILE = "predictions.parquet"
+DONE_DIR = "done"
+
+
+@dataclass(frozen=True)
+class ChunkTask:
+    """One unit of work: rows [start_row, start_row + n_rows) of the input"""
+    index: int
+    start_row: int
+    n_rows: int
+    byte_start: int = 0   # CSV: byte range of the chunk's lines
+    byte_end: int = 0
+    row_group: int = -1   # Parquet: row group holding the chunk
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet input/output requires pyarrow (pip install pyarrow)") from exc
+    return pq
+
+
+def plan_csv_chunks(path: Union[str, Path], chunk_rows: int) -> Tuple[List[ChunkTask], int]:
+    """
+    Split a CSV into chunks of ``chunk_rows`` lines by scanning for newlines
+
+    Expects one record per line (no newlines inside quoted fields).
+
+    Returns:
+        (chunk tasks, total number of data rows)
+    """
+    tasks: List[ChunkTask] = []
+    with open(path, 'rb') as f:
+        f.readline()  # header
+        chunk_start = pos = f.tell()
+        rows = 0
+        ends_with_newline = True
+        while True:
+            block = f.read(1 << 24)
+            if not block:
+                break
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == 10)
+            # Newline number k (1-based, across the file) ends a chunk when k % chunk_rows == 0
+            first = chunk_rows - rows % chunk_rows - 1
+            for nl in newlines[first::chunk_rows]:
+                end = pos + int(nl) + 1
+                tasks.append(ChunkTask(len(tasks), len(tasks) * chunk_rows, chunk_rows, chunk_start, end))
+                chunk_start = end
+            rows += len(newlines)
+            pos += len(block)
+            ends_with_newline = block.endswith(b"\n")
+        if not ends_with_newline:
+            rows += 1
+    if rows > len(tasks) * chunk_rows:
+        start_row = len(tasks) * chunk_rows
+        tasks.append(ChunkTask(len(tasks), start_row, rows - start_row, chunk_start, pos))
+    return tasks, rows
+
+
+def plan_parquet_chunks(path: Union[str, Path]) -> Tuple[List[ChunkTask], int]:
+    """
+    One chunk per Parquet row group
+
+    Returns:
+        (chunk tasks, total number of rows)
+    """
+    pq = _require_pyarrow()
+    metadata = pq.ParquetFile(path).metadata
+    tasks, start = [], 0
+    for i in range(metadata.num_row_groups):
+        n_rows = metadata.row_group(i).num_rows
+        tasks.append(ChunkTask(i, start, n_rows, row_group=i))
+        start += n_rows
+    return tasks, start
+
+
+# Per-worker state, set by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(input_path: str, output_dir: str, model_path: str, processed_dir: str, ort_threads: int):
+    """Load the model, the encoder and the output memmaps once per worker process"""
+    from src.data_ingestion.repository import DataRepository
+    from src.preprocessing.encoder import CompiledFeatureEncoder
+    from src.serving.session import create_session
+
+    scaler, _, feature_names = DataRepository(processed_data_dir=Path(processed_dir)).load_preprocessing_artifacts()
+    session = create_session(model_path, intra_op_threads=ort_threads, inter_op_threads=1)
+    output_dir = Path(output_dir)
+    _worker.update(
+        input_path=input_path,
+        session=session,
+        input_name=session.get_inputs()[0].name,
+        encoder=CompiledFeatureEncoder(feature_names, scaler),
+        labels=np.load(output_dir / LABELS_FILE, mmap_mode='r+'),
+        probabilities=np.load(output_dir / PROBABILITIES_FILE, mmap_mode='r+'),
+    )
+    if input_path.lower().endswith('.csv'):
+        with open(input_path, 'rb') as f:
+            _worker['header'] = f.readline()
+
+
+def _read_chunk(task: ChunkTask) -> pd.DataFrame:
+    if task.row_group >= 0:
+        pq = _require_pyarrow()
+        return pq.ParquetFile(_worker['input_path']).read_row_group(task.row_group).to_pandas()
+    with open(_worker['input_path'], 'rb') as f:
+        f.seek(task.byte_start)
+        data = f.read(task.byte_end - task.byte_start)
+    return pd.read_csv(io.BytesIO(_worker['header'] + data))
+
+
+def dense_probabilities(raw: Any, n_classes: int) -> np.ndarray:
+    """ONNX probabilities (tensor or sequence of {class: prob} maps) as an (n, n_classes) array"""
+    if isinstance(raw, np.ndarray):
+        return raw.astype(np.float32, copy=False)
+    dense = np.zeros((len(raw), n_classes), dtype=np.float32)
+    for i, row in enumerate(raw):
+        for k, v in row.items():
+            dense[i, int(k)] = v
+    return dense
+
+
+def _score_chunk(task: ChunkTask) -> Tuple[int, int, float]:
+    """Score one chunk and write it into the output memmaps; returns (index, rows, seconds)"""
+    start = time.perf_counter()
+    df = _read_chunk(task)
+    if len(df) != task.n_rows:
+        raise ValueError(f"Chunk {task.index}: expected {task.n_rows} rows, parsed {len(df)} "
+                         "(blank lines or newlines inside quoted fields?)")
+    X = _worker['encoder'].encode_columns({col: df[col].to_numpy() for col in df.columns})
+    label, probabilities = _worker['session'].run(None, {_worker['input_name']: X})[:2]
+
+    rows = slice(task.start_row, task.start_row + task.n_rows)
+    labels_mm, probs_mm = _worker['labels'], _worker['probabilities']
+    labels_mm[rows] = np.asarray(label).reshape(-1)
+    probs_mm[rows] = dense_probabilities(probabilities, probs_mm.shape[1])
+    labels_mm.flush()
+    probs_mm.flush()
+    return task.index, task.n_rows, time.perf_counter() - start
+
+
+def _fingerprint(input_path: Path, model_path: Path, chunk_rows: int) -> Dict[str, Any]:
+    """Identifies a run; a checkpoint is only resumed if this matches"""
+    stat = input_path.stat()
+    return {
+        "input": str(input_path.resolve()),
+        "input_size": stat.st_size,
+        "input_mtime_ns": stat.st_mtime_ns,
+        "model_sha256": hashlib.sha256(model_path.read_bytes()).hexdigest()[:12],
+        "chunk_rows": chunk_rows,
+    }
+
+
+def _prepare_output(output_dir: Path, fingerprint: Dict[str, Any], n_rows: int, n_classes: int,
+                    restart: bool) -> set:
+    """
+    Create (or reopen) the output memmaps and return the indices of finished chunks
+    """
+    manifest_path = output_dir / MANIFEST_FILE
+    done_dir = output_dir / DONE_DIR
+    if manifest_path.exists() and not restart:
+        manifest = json.loads(manifest_path.read_text())
+        if manifest.get("fingerprint") != fingerprint:
+            raise ValueError(f"{output_dir} holds a run for a different input/model/chunk size; "
+                             "use --restart to overwrite it")
+        return {int(p.name) for p in done_dir.glob("*")}
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    done_dir.mkdir(exist_ok=True)
+    for marker in done_dir.glob("*"):
+        marker.unlink()
+    np.lib.format.open_memmap(output_dir / LABELS_FILE, mode='w+', dtype=np.int32, shape=(n_rows,)).flush()
+    np.lib.format.open_memmap(output_dir / PROBABILITIES_FILE, mode='w+', dtype=np.float32,
+                              shape=(n_rows, n_classes)).flush()
+    tmp_path = manifest_path.with_name(f"{MANIFEST_FILE}.tmp")
+    tmp_path.write_text(json.dumps({"fingerprint": fingerprint, "rows": n_rows, "classes": n_classes}, indent=2))
+    os.replace(tmp_path, manifest_path)
+    return set()
+
+
+def _write_parquet(output_dir: Path, class_names: List[str], chunk_rows: int):
+    """Convert the memmapped output into predictions.parquet, one row group per chunk"""
+    import pyarrow as pa
+    pq = _require_pyarrow()
+
+    labels = np.load(output_dir / LABELS_FILE, mmap_mode='r')
+    probabilities = np.load(output_dir / PROBABILITIES_FILE, mmap_mode='r')
+    names = ["label"] + [f"prob_{name}" for name in class_names]
+    schema = pa.schema([("label", pa.int32())] + [(name, pa.float32()) for name in names[1:]])
+    tmp_path = output_dir / f"{PARQUET_FILE}.tmp"
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for start in range(0, len(labels), chunk_rows):
+            stop = start + chunk_rows
+            columns = [pa.array(labels[start:stop])] + [
+                pa.array(probabilities[start:stop, j]) for j in range(probabilities.shape[1])
+            ]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+    os.replace(tmp_path, output_dir / PARQUET_FILE)
+
+
+def batch_score(input_path: Union[str, Path],
+                output_dir: Union[str, Path],
+                workers: Optional[int] = None,
+                chunk_rows: int = 50000,
+                model_path: Union[str, Path] = MODEL_ONNX_PATH,
+                processed_dir: Union[str, Path] = PROCESSED_DATA_DIR,
+                output_format: str = "npy",
+                ort_threads: int = 1,
+                restart: bool = False,
+                verbose: bool = True) -> Dict[str, Any]:
+    """
+    Score ``input_path`` into ``output_dir``
+
+    Args:
+        input_path: Raw customer file (.csv or .parquet)
+        output_dir: Directory for labels.npy / probabilities.npy (+ predictions.parquet)
+        workers: Worker processes (default: CPU count)
+        chunk_rows: Rows per CSV chunk (Parquet uses its row groups)
+        model_path: ONNX model to score with
+        processed_dir: Directory with scaler.pkl / label_encoder.pkl / feature_names.pkl
+        output_format: "npy" or "parquet" (Parquet is written from the .npy files at the end)
+        ort_threads: ONNX Runtime intra-op threads per worker
+        restart: Ignore an existing checkpoint in output_dir
+        verbose: Print progress
+
+    Returns:
+        Throughput summary (also written to output_dir/summary.json)
+    """
+    from src.data_ingestion.repository import DataRepository
+
+    input_path, output_dir, model_path = Path(input_path), Path(output_dir), Path(model_path)
+    if output_format not in ("npy", "parquet"):
+        raise ValueError(f"output_format must be 'npy' or 'parquet', got {output_format!r}")
+    if output_format == "parquet":
+        _require_pyarrow()
+    workers = workers or os.cpu_count() or 1
+
+    suffix = input_path.suffix.lower()
+    if suffix == ".csv":
+        tasks, n_rows = plan_csv_chunks(input_path, chunk_rows)
+    elif suffix == ".parquet":
+        tasks, n_rows = plan_parquet_chunks(input_path)
+    else:
+        raise ValueError(f"Unsupported input format '{suffix}', expected .csv or .parquet")
+
+    _, label_encoder, _ = DataRepository(processed_data_dir=Path(processed_dir)).load_preprocessing_artifacts()
+    class_names = [str(c) for c in label_encoder.classes_]
+    fingerprint = _fingerprint(input_path, model_path, chunk_rows)
+    finished = _prepare_output(output_dir, fingerprint, n_rows, len(class_names), restart)
+    pending = [task for task in tasks if task.index not in finished]
+    if verbose:
+        print(f"📊 {n_rows} rows in {len(tasks)} chunks; {len(finished)} already done, "
+              f"{len(pending)} to score with {workers} workers")
+
+    start = time.perf_counter()
+    scored_rows = 0
+    worker_seconds = 0.0
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(input_path), str(output_dir), str(model_path), str(processed_dir), ort_threads)
+        ) as pool:
+            futures = [pool.submit(_score_chunk, task) for task in pending]
+            for future in as_completed(futures):
+                index, rows, seconds = future.result()
+                (output_dir / DONE_DIR / f"{index:06d}").touch()
+                scored_rows += rows
+                worker_seconds += seconds
+                if verbose:
+                    print(f"✓ chunk {index} ({rows} rows, {seconds:.2f}s)")
+    elapsed = time.perf_counter() - start
+
+    if output_format == "parquet":
+        _write_parquet(output_dir, class_names, chunk_rows)
+
+    summary = {
+        "rows": n_rows,
+        "scored_rows": scored_rows,
+        "resumed_chunks": len(finished),
+        "chunks": len(tasks),
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "rows_per_sec": round(scored_rows / elapsed, 1) if elapsed > 0 and scored_rows else None,
+        "rows_per_worker_sec": round(scored_rows / worker_seconds, 1) if worker_seconds > 0 else None,
+        "output": str(output_dir),
+        "classes": class_names,
+    }
+    (output_dir / SUMMARY_FILE).write_text(json.dumps(summary, indent=2))
+    if verbose:
+        print(f"✓ Scored {scored_rows} rows in {elapsed:.2f}s ({summary['rows_per_sec']} rows/s, "
+              f"{summary['rows_per_worker_sec']} rows/s per worker)")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.batch_score", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Raw customer file (.csv or .parquet)")
+    parser.add_argument("--output", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-rows", type=int, default=50000, help="Rows per CSV chunk")
+    parser.add_argument("--format", choices=("npy", "parquet"), default="npy", dest="output_format")
+    parser.add_argument("--model", default=str(MODEL_ONNX_PATH), help="ONNX model path")
+    parser.add_argument("--processed-dir", default=str(PROCESSED_DATA_DIR),
+                        help="Directory with the preprocessing artifacts")
+    parser.add_argument("--ort-threads", type=int, default=1, help="ONNX Runtime threads per worker")
+    parser.add_argument("--restart", action="store_true", help="Discard an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    try:
+        batch_score(args.input, args.output, workers=args.workers, chunk_rows=args.chunk_rows,
+                    model_path=args.model, processed_dir=args.processed_dir,
+                    output_format=args.output_format, ort_threads=args.ort_threads, restart=args.restart)
+    except (ValueError, RuntimeError, FileNotFoundError) as exc:
+        print(f"❌ {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Recommendation table builder - scores every known customer into the memory-mapped table
+
+Reads the customer file (one row per ``customer_id``, raw features as in
+data/raw/data_capstone.csv), scores it with the serving model and writes a
+new build of the table served by ``GET /recommendation/{customer_id}``
+(see src/serving/recommendations.py).
+
+Rebuilds are incremental: a customer keeps its previous row when the model
+version is unchanged and its encoded features are identical; only new or
+changed customers are scored. ``--full`` rescores everything.
+
+    python -m src.build_recommendations data/raw/data_capstone.csv [--dtype float16] [--full]
+"""
+
+import argparse
+import hashlib
+import shutil
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.batch_score import dense_probabilities
+from src.config import (
+    MODEL_ONNX_PATH,
+    PROCESSED_DATA_DIR,
+    RECOMMENDATION_PROBABILITY_DTYPE,
+    RECOMMENDATION_SOURCE_PATH,
+    RECOMMENDATION_TABLE_DIR,
+)
+from src.serving.recommendations import (
+    CUSTOMER_IDS_FILE,
+    FEATURES_FILE,
+    LABELS_FILE,
+    PROBABILITIES_FILE,
+    RecommendationTable,
+    read_manifest,
+    write_manifest,
+)
+
+PROBABILITY_DTYPES = ("float16", "float32")
+ID_COLUMN = "customer_id"
+
+
+def _read_customers(input_path: Path) -> pd.DataFrame:
+    if input_path.suffix.lower() == ".parquet":
+        df = pd.read_parquet(input_path)
+    else:
+        df = pd.read_csv(input_path)
+    if ID_COLUMN not in df.columns:
+        raise ValueError(f"{input_path} has no '{ID_COLUMN}' column")
+    df[ID_COLUMN] = df[ID_COLUMN].astype(str)
+    # The last row of a customer holds its most recent features
+    return df.drop_duplicates(subset=ID_COLUMN, keep="last").reset_index(drop=True)
+
+
+def _reusable_rows(previous: Optional[RecommendationTable],
+                   customer_ids: List[str],
+                   X: np.ndarray,
+                   model_version: str,
+                   classes: List[str],
+                   probability_dtype: str) -> np.ndarray:
+    """Row of each customer in ``previous`` if it can be copied as is, else -1"""
+    reuse = np.full(len(customer_ids), -1, dtype=np.int64)
+    if (previous is None or previous.model_version != model_version or previous.classes != classes
+            or previous.features.shape[1] != X.shape[1]
+            or str(previous.probabilities.dtype) != probability_dtype):
+        return reuse
+    rows = np.array([previous.row(cid) if cid in previous else -1 for cid in customer_ids], dtype=np.int64)
+    known = np.flatnonzero(rows >= 0)
+    unchanged = (previous.features[rows[known]] == X[known]).all(axis=1)
+    reuse[known[unchanged]] = rows[known[unchanged]]
+    return reuse
+
+
+def _prune_builds(table_dir: Path, live: str, keep: int, previous: Optional[str] = None):
+    """
+    Delete old builds, keeping the live one and the ``keep - 1`` most recent others
+
+    The ``previous`` live build is never deleted: API workers only reopen the
+    table on a miss, so they may still be mapping it.
+    """
+    protected = {live, previous}
+    builds = sorted((p for p in table_dir.glob("build-*") if p.is_dir() and p.name not in protected), reverse=True)
+    for stale in builds[max(keep - 1 - (previous is not None), 0):]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def build_recommendation_table(input_path: Union[str, Path] = RECOMMENDATION_SOURCE_PATH,
+                               table_dir: Union[str, Path] = RECOMMENDATION_TABLE_DIR,
+                               model_path: Union[str, Path] = MODEL_ONNX_PATH,
+                               pkl_path: Union[str, Path, None] = None,
+                               processed_dir: Union[str, Path] = PROCESSED_DATA_DIR,
+                               probability_dtype: str = RECOMMENDATION_PROBABILITY_DTYPE,
+                               chunk_rows: int = 50000,
+                               full: bool = False,
+                               keep: int = 2,
+                               verbose: bool = True) -> Dict[str, Any]:
+    """
+    Score ``input_path`` into a new build of the recommendation table
+
+    Args:
+        input_path: Customer file (.csv or .parquet) with a customer_id column
+        table_dir: Table directory (manifest.json + build-* directories)
+        model_path: ONNX model to score with
+        pkl_path: CatBoost pickle the ONNX model was exported from (default: ``model_path``
+            with a .pkl suffix); its version is recorded too, for INFERENCE_BACKEND=numpy
+        processed_dir: Directory with the preprocessing artifacts
+        probability_dtype: "float16" (half the size) or "float32"
+        chunk_rows: Rows per session.run call
+        full: Rescore every customer even if its previous row is still valid
+        keep: Builds to keep on disk, including the live one
+        verbose: Print progress
+
+    Returns:
+        Build summary (also stored in manifest.json)
+    """
+    from src.preprocessing.artifacts import load_serving_preprocessor
+    from src.serving.session import create_session
+
+    input_path, table_dir, model_path = Path(input_path), Path(table_dir), Path(model_path)
+    if probability_dtype not in PROBABILITY_DTYPES:
+        raise ValueError(f"probability_dtype must be one of {PROBABILITY_DTYPES}, got {probability_dtype!r}")
+
+    start = time.perf_counter()
+    df = _read_customers(input_path)
+    preprocessor = load_serving_preprocessor(processed_dir)
+    classes = [str(c) for c in preprocessor.classes]
+    customer_ids = df[ID_COLUMN].tolist()
+    X = preprocessor.encoder.encode_columns({col: df[col].to_numpy() for col in df.columns})
+
+    model_bytes = model_path.read_bytes()
+    # Same version string as the API's ModelRegistry, so the API can tell stale tables apart.
+    # The numpy backend serves (and versions) the pickle, so its hash is kept alongside
+    model_version = hashlib.sha256(model_bytes).hexdigest()[:12]
+    model_versions = {"onnx": model_version}
+    pkl_path = Path(pkl_path) if pkl_path is not None else model_path.with_suffix(".pkl")
+    if pkl_path.exists():
+        model_versions["numpy"] = hashlib.sha256(pkl_path.read_bytes()).hexdigest()[:12]
+    previous_manifest = read_manifest(table_dir)
+    previous = None if full or previous_manifest is None else RecommendationTable(
+        table_dir / previous_manifest["build"], previous_manifest)
+    reuse = _reusable_rows(previous, customer_ids, X, model_version, classes, probability_dtype)
+    reused = np.flatnonzero(reuse >= 0)
+    rescore = np.flatnonzero(reuse < 0)
+
+    labels = np.empty(len(customer_ids), dtype=np.int16)
+    probabilities = np.empty((len(customer_ids), len(classes)), dtype=probability_dtype)
+    if reused.size:
+        labels[reused] = previous.labels[reuse[reused]]
+        probabilities[reused] = previous.probabilities[reuse[reused]]
+    if rescore.size:
+        session = create_session(model_bytes)
+        input_name = session.get_inputs()[0].name
+        for chunk in np.array_split(rescore, max(1, -(-rescore.size // chunk_rows))):
+            label, probs = session.run(None, {input_name: X[chunk]})[:2]
+            labels[chunk] = np.asarray(label).reshape(-1)
+            probabilities[chunk] = dense_probabilities(probs, len(classes))
+
+    built_at = datetime.now()
+    build = f"build-{built_at.strftime('%Y%m%dT%H%M%S%f')}"
+    build_dir = table_dir / build
+    build_dir.mkdir(parents=True)
+    np.save(build_dir / CUSTOMER_IDS_FILE, np.array(customer_ids, dtype=str))
+    np.save(build_dir / LABELS_FILE, labels)
+    np.save(build_dir / PROBABILITIES_FILE, probabilities)
+    np.save(build_dir / FEATURES_FILE, X)
+
+    manifest = {
+        "build": build,
+        "model_version": model_version,
+        "model_versions": model_versions,
+        "classes": classes,
+        "built_at": built_at.isoformat(timespec='seconds'),
+        "source": str(input_path),
+        "customers": len(customer_ids),
+        "rescored": int(rescore.size),
+        "reused": int(reused.size),
+        "probability_dtype": probability_dtype,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+    }
+    write_manifest(table_dir, manifest)
+    _prune_builds(table_dir, build, keep, previous_manifest["build"] if previous_manifest else None)
+    if verbose:
+        print(f"✓ {build}: {manifest['customers']} customers ({manifest['rescored']} scored, "
+              f"{manifest['reused']} reused) with model {model_version} in {manifest['elapsed_s']}s")
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.build_recommendations", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", default=str(RECOMMENDATION_SOURCE_PATH),
+                        help="Customer file (.csv or .parquet) with a customer_id column")
+    parser.add_argument("--table-dir", default=str(RECOMMENDATION_TABLE_DIR), help="Table directory")
+    parser.add_argument("--model", default=str(MODEL_ONNX_PATH), help="ONNX model path")
+    parser.add_argument("--pkl", default=None,
+                        help="CatBoost pickle the ONNX model was exported from (default: --model with .pkl)")
+    parser.add_argument("--processed-dir", default=str(PROCESSED_DATA_DIR),
+                        help="Directory with the preprocessing artifacts")
+    parser.add_argument("--dtype", choices=PROBABILITY_DTYPES, default=RECOMMENDATION_PROBABILITY_DTYPE,
+                        help="Stored probability precision")
+    parser.add_argument("--full", action="store_true", help="Rescore every customer")
+    args = parser.parse_args(argv)
+
+    try:
+        build_recommendation_table(args.input, args.table_dir, model_path=args.model, pkl_path=args.pkl,
+                                   processed_dir=args.processed_dir, probability_dtype=args.dtype, full=args.full)
+    except (ValueError, FileNotFoundError) as exc:
+        print(f"❌ {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
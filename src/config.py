@@ -28,19 +28,110 @@ RETRAIN_DATA_DIR: Final[Path] = DATA_DIR / "retrain"
 # Artifact paths
 MODEL_PKL_PATH: Final[Path] = MODEL_DIR / "best_model.pkl"
 MODEL_ONNX_PATH: Final[Path] = MODEL_DIR / "best_model.onnx"
-PREDICTION_BUFFER_PATH: Final[Path] = RETRAIN_DATA_DIR / "prediction_buffer.csv"
+PREDICTION_BUFFER_PATH: Final[Path] = RETRAIN_DATA_DIR / "prediction_buffer.csv"  # legacy CSV buffer
+PREDICTION_BUFFER_DIR: Final[Path] = RETRAIN_DATA_DIR / "prediction_buffer"
 PREDICTION_COUNTER_PATH: Final[Path] = RETRAIN_DATA_DIR / "prediction_counter.txt"
+PREDICTION_COUNTER_DB_PATH: Final[Path] = RETRAIN_DATA_DIR / "prediction_counter.db"
 BACKUP_DIR: Final[Path] = RETRAIN_DATA_DIR / "backups"
 LOG_DIR: Final[Path] = RETRAIN_DATA_DIR / "logs"
+RETRAIN_LOCK_PATH: Final[Path] = RETRAIN_DATA_DIR / "retrain.lock"
+RETRAIN_STATE_PATH: Final[Path] = RETRAIN_DATA_DIR / "retrain_state.json"
+# Model search output (see src/training/search.py): ranked comparison and the winning config
+MODEL_COMPARISON_PATH: Final[Path] = _resolve_path(
+    "MODEL_COMPARISON_PATH", DATA_DIR / "result" / "model_comparison_search.csv"
+)
+TRAINING_CONFIG_PATH: Final[Path] = _resolve_path("TRAINING_CONFIG_PATH", MODEL_DIR / "training_config.json")
+
+# Precomputed per-customer recommendations (see src/build_recommendations.py)
+RECOMMENDATION_TABLE_DIR: Final[Path] = _resolve_path("RECOMMENDATION_TABLE_DIR", DATA_DIR / "recommendations")
+RECOMMENDATION_SOURCE_PATH: Final[Path] = _resolve_path(
+    "RECOMMENDATION_SOURCE_PATH", DATA_DIR / "raw" / "data_capstone.csv"
+)
+# Offer eligibility rules applied to top_k rankings (see src/serving/ranking.py); unused if missing
+OFFER_ELIGIBILITY_PATH: Final[Path] = _resolve_path("OFFER_ELIGIBILITY_PATH", DATA_DIR / "offer_eligibility.json")
 
 # Runtime configuration
 API_HOST: Final[str] = os.getenv("API_HOST", "0.0.0.0")
 API_PORT: Final[int] = int(os.getenv("API_PORT", "8000"))
 API_WORKERS: Final[int] = int(os.getenv("API_WORKERS", "1"))
+# "full": API + prediction logging + retraining; "inference": slim replica that only
+# serves predictions (no training imports, preprocessing from serving_preprocessing.json)
+SERVING_MODE: Final[str] = os.getenv("SERVING_MODE", "full").lower()
+# Opt-in micro-batching of concurrent /predict calls into one ONNX run
+BATCHING_ENABLED: Final[bool] = os.getenv("BATCHING_ENABLED", "false").lower() == "true"
+BATCH_WINDOW_MS: Final[float] = float(os.getenv("BATCH_WINDOW_MS", "2"))
+BATCH_MAX_SIZE: Final[int] = int(os.getenv("BATCH_MAX_SIZE", "64"))
+BATCH_QUEUE_DEPTH: Final[int] = int(os.getenv("BATCH_QUEUE_DEPTH", "1024"))
+# Thread pools that keep inference and buffer logging off the event loop
+INFERENCE_WORKERS: Final[int] = int(os.getenv("INFERENCE_WORKERS", "2"))
+ORT_INTRA_OP_THREADS: Final[int] = int(os.getenv("ORT_INTRA_OP_THREADS", "0"))
+ORT_INTER_OP_THREADS: Final[int] = int(os.getenv("ORT_INTER_OP_THREADS", "0"))
+# Session build: graph optimization level (disable|basic|extended|all) and memory arena options
+ORT_GRAPH_OPTIMIZATION: Final[str] = os.getenv("ORT_GRAPH_OPTIMIZATION", "extended").lower()
+ORT_ENABLE_CPU_MEM_ARENA: Final[bool] = os.getenv("ORT_ENABLE_CPU_MEM_ARENA", "true").lower() == "true"
+ORT_ENABLE_MEM_PATTERN: Final[bool] = os.getenv("ORT_ENABLE_MEM_PATTERN", "true").lower() == "true"
+# Optimized ORT-format copies of best_model.onnx, keyed by model hash, reused on restart
+ORT_MODEL_CACHE_ENABLED: Final[bool] = os.getenv("ORT_MODEL_CACHE_ENABLED", "true").lower() == "true"
+ORT_MODEL_CACHE_DIR: Final[Path] = _resolve_path("ORT_MODEL_CACHE_DIR", MODEL_DIR / "optimized")
+# Inference backend: "onnx" (ONNX Runtime on MODEL_ONNX_PATH) or "numpy"
+# (vectorized oblivious-tree evaluator on MODEL_PKL_PATH, no onnxruntime in the hot path); any other value fails startup
+INFERENCE_BACKEND: Final[str] = os.getenv("INFERENCE_BACKEND", "onnx").lower()
+# Per-row prediction cache for small /predict requests (keyed by encoded feature row,
+# invalidated on model swap); TTL in seconds, 0 = no expiry
+PREDICTION_CACHE_ENABLED: Final[bool] = os.getenv("PREDICTION_CACHE_ENABLED", "false").lower() == "true"
+PREDICTION_CACHE_MAX_ENTRIES: Final[int] = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "100000"))
+PREDICTION_CACHE_TTL_SECONDS: Final[float] = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300"))
+PREDICTION_CACHE_MAX_ROWS: Final[int] = int(os.getenv("PREDICTION_CACHE_MAX_ROWS", "256"))
+# Recommendation table: stored probability precision (float16|float32) and whether a
+# successful retrain rescores the existing table (changed customers / new model only)
+RECOMMENDATION_PROBABILITY_DTYPE: Final[str] = os.getenv("RECOMMENDATION_PROBABILITY_DTYPE", "float16").lower()
+RECOMMENDATION_REBUILD_ON_RETRAIN: Final[bool] = (
+    os.getenv("RECOMMENDATION_REBUILD_ON_RETRAIN", "true").lower() == "true"
+)
+# Model hot-swap: poll the serving model file every N seconds (0 disables) and warm up new sessions
+MODEL_WATCH_INTERVAL: Final[float] = float(os.getenv("MODEL_WATCH_INTERVAL", "5"))
+MODEL_WARMUP_RUNS: Final[int] = int(os.getenv("MODEL_WARMUP_RUNS", "2"))
+# Prometheus metrics at GET /metrics; every process writes its own memory-mapped file in METRICS_DIR
+METRICS_ENABLED: Final[bool] = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_DIR: Final[Path] = _resolve_path("METRICS_DIR", DATA_DIR / "metrics")
+# Rows per chunk for POST /predict/stream (bounds memory per upload)
+STREAM_CHUNK_ROWS: Final[int] = int(os.getenv("STREAM_CHUNK_ROWS", "2000"))
+# Longest accepted line of a /predict/stream upload; longer lines end the stream with an error
+STREAM_MAX_LINE_BYTES: Final[int] = int(os.getenv("STREAM_MAX_LINE_BYTES", str(1 << 20)))
 LOG_LEVEL: Final[str] = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT: Final[str] = os.getenv("LOG_FORMAT", "text")
 RETRAIN_THRESHOLD: Final[int] = int(os.getenv("RETRAIN_THRESHOLD", "1000"))
 AUTO_RETRAIN_ENABLED: Final[bool] = os.getenv("AUTO_RETRAIN_ENABLED", "true").lower() == "true"
+# Append-only prediction buffer: flush after N rows or N seconds, rotate segments, fsync policy
+BUFFER_FLUSH_ROWS: Final[int] = int(os.getenv("BUFFER_FLUSH_ROWS", "64"))
+BUFFER_FLUSH_INTERVAL: Final[float] = float(os.getenv("BUFFER_FLUSH_INTERVAL", "1.0"))
+BUFFER_SEGMENT_ROWS: Final[int] = int(os.getenv("BUFFER_SEGMENT_ROWS", "50000"))
+BUFFER_FSYNC: Final[str] = os.getenv("BUFFER_FSYNC", "always").lower()
+# Sealed segments: "columnar" (typed per-column .npy) or "ndjson"
+BUFFER_SEGMENT_FORMAT: Final[str] = os.getenv("BUFFER_SEGMENT_FORMAT", "columnar").lower()
+# Prediction counter: "sqlite" (shared by all API workers) or "file" (legacy text file);
+# the SQLite WAL is checkpointed and mirrored to the text file every N seconds
+COUNTER_BACKEND: Final[str] = os.getenv("COUNTER_BACKEND", "sqlite").lower()
+COUNTER_CHECKPOINT_INTERVAL: Final[float] = float(os.getenv("COUNTER_CHECKPOINT_INTERVAL", "10"))
+# Where background retrains run: "process" (separate interpreter) or "thread"
+RETRAIN_WORKER_MODE: Final[str] = os.getenv("RETRAIN_WORKER_MODE", "process").lower()
+# Training window: cap on rows fed to each retrain (0 = all stored rows), sampling-weight
+# half-life of older rows in days (0 = no decay), per-class sampling that keeps minority offers
+TRAINING_WINDOW_MAX_SAMPLES: Final[int] = int(os.getenv("TRAINING_WINDOW_MAX_SAMPLES", "0"))
+TRAINING_WINDOW_HALF_LIFE_DAYS: Final[float] = float(os.getenv("TRAINING_WINDOW_HALF_LIFE_DAYS", "0"))
+TRAINING_WINDOW_STRATIFIED: Final[bool] = os.getenv("TRAINING_WINDOW_STRATIFIED", "true").lower() == "true"
+# Retrain mode: "full" (new model every cycle) or "incremental" (continue best_model.pkl with
+# extra trees on the new rows plus a stratified replay sample of stored rows); incremental
+# cycles fall back to a full rebuild every N cycles or when validation F1 drops by > tolerance
+RETRAIN_MODE: Final[str] = os.getenv("RETRAIN_MODE", "full").lower()
+INCREMENTAL_ITERATIONS: Final[int] = int(os.getenv("INCREMENTAL_ITERATIONS", "100"))
+INCREMENTAL_LEARNING_RATE: Final[float] = float(os.getenv("INCREMENTAL_LEARNING_RATE", "0.03"))
+INCREMENTAL_REPLAY_SAMPLES: Final[int] = int(os.getenv("INCREMENTAL_REPLAY_SAMPLES", "5000"))
+FULL_RETRAIN_EVERY: Final[int] = int(os.getenv("FULL_RETRAIN_EVERY", "5"))
+INCREMENTAL_F1_TOLERANCE: Final[float] = float(os.getenv("INCREMENTAL_F1_TOLERANCE", "0.01"))
+# Model search: worker processes (0 = CPU count) and seconds after which no candidate is started
+SEARCH_WORKERS: Final[int] = int(os.getenv("SEARCH_WORKERS", "0"))
+SEARCH_TIME_BUDGET_SECONDS: Final[float] = float(os.getenv("SEARCH_TIME_BUDGET_SECONDS", "1800"))
 
 __all__ = [
     "ROOT_DIR",
@@ -53,14 +144,68 @@ __all__ = [
     "MODEL_PKL_PATH",
     "MODEL_ONNX_PATH",
     "PREDICTION_BUFFER_PATH",
+    "PREDICTION_BUFFER_DIR",
     "PREDICTION_COUNTER_PATH",
+    "PREDICTION_COUNTER_DB_PATH",
     "BACKUP_DIR",
     "LOG_DIR",
+    "RETRAIN_LOCK_PATH",
+    "RETRAIN_STATE_PATH",
+    "MODEL_COMPARISON_PATH",
+    "TRAINING_CONFIG_PATH",
+    "RECOMMENDATION_TABLE_DIR",
+    "RECOMMENDATION_SOURCE_PATH",
+    "OFFER_ELIGIBILITY_PATH",
     "API_HOST",
     "API_PORT",
     "API_WORKERS",
+    "SERVING_MODE",
+    "BATCHING_ENABLED",
+    "BATCH_WINDOW_MS",
+    "BATCH_MAX_SIZE",
+    "BATCH_QUEUE_DEPTH",
+    "INFERENCE_WORKERS",
+    "ORT_INTRA_OP_THREADS",
+    "ORT_INTER_OP_THREADS",
+    "ORT_GRAPH_OPTIMIZATION",
+    "ORT_ENABLE_CPU_MEM_ARENA",
+    "ORT_ENABLE_MEM_PATTERN",
+    "ORT_MODEL_CACHE_ENABLED",
+    "ORT_MODEL_CACHE_DIR",
+    "INFERENCE_BACKEND",
+    "PREDICTION_CACHE_ENABLED",
+    "PREDICTION_CACHE_MAX_ENTRIES",
+    "PREDICTION_CACHE_TTL_SECONDS",
+    "PREDICTION_CACHE_MAX_ROWS",
+    "RECOMMENDATION_PROBABILITY_DTYPE",
+    "RECOMMENDATION_REBUILD_ON_RETRAIN",
+    "MODEL_WATCH_INTERVAL",
+    "MODEL_WARMUP_RUNS",
+    "METRICS_ENABLED",
+    "METRICS_DIR",
+    "STREAM_CHUNK_ROWS",
+    "STREAM_MAX_LINE_BYTES",
     "LOG_LEVEL",
     "LOG_FORMAT",
     "RETRAIN_THRESHOLD",
     "AUTO_RETRAIN_ENABLED",
+    "BUFFER_FLUSH_ROWS",
+    "BUFFER_FLUSH_INTERVAL",
+    "BUFFER_SEGMENT_ROWS",
+    "BUFFER_FSYNC",
+    "BUFFER_SEGMENT_FORMAT",
+    "COUNTER_BACKEND",
+    "COUNTER_CHECKPOINT_INTERVAL",
+    "RETRAIN_WORKER_MODE",
+    "TRAINING_WINDOW_MAX_SAMPLES",
+    "TRAINING_WINDOW_HALF_LIFE_DAYS",
+    "TRAINING_WINDOW_STRATIFIED",
+    "RETRAIN_MODE",
+    "INCREMENTAL_ITERATIONS",
+    "INCREMENTAL_LEARNING_RATE",
+    "INCREMENTAL_REPLAY_SAMPLES",
+    "FULL_RETRAIN_EVERY",
+    "INCREMENTAL_F1_TOLERANCE",
+    "SEARCH_WORKERS",
+    "SEARCH_TIME_BUDGET_SECONDS",
 ]
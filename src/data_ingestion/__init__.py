@@ -3,6 +3,6 @@ Data ingestion module - handles data fetching and prediction counting
 """
 
 from .repository import DataRepository
-from .stats import PredictionCounter
+from .stats import PredictionCounter, SQLitePredictionCounter, create_prediction_counter
 
-__all__ = ["DataRepository", "PredictionCounter"]
+__all__ = ["DataRepository", "PredictionCounter", "SQLitePredictionCounter", "create_prediction_counter"]
@@ -0,0 +1,286 @@
+"""
+Prediction Buffer Writer - Append-only, batched storage for logged predictions
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: orphaned active segments are not adopted
+    fcntl = None
+
+from .columnar import COLUMNAR_SUFFIX, ColumnarSegmentBuilder, normalize_record
+
+SEGMENT_SUFFIX = ".ndjson"
+ACTIVE_SUFFIX = ".ndjson.active"
+SEGMENT_FORMATS = ("columnar", "ndjson")
+# Touched to ask every writer sharing the directory (one per API worker) to seal
+SEAL_REQUEST_NAME = ".seal-request"
+
+
+def request_seal(buffer_dir: Union[str, Path]):
+    """Ask every writer on ``buffer_dir`` to seal its active segment within its flush interval"""
+    (Path(buffer_dir) / SEAL_REQUEST_NAME).touch()
+
+
+def _seal_requested_at(buffer_dir: Path) -> int:
+    try:
+        return (buffer_dir / SEAL_REQUEST_NAME).stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def adopt_orphaned_segments(buffer_dir: Union[str, Path]) -> List[Path]:
+    """
+    Seal active segments left behind by writers that are no longer running
+
+    A killed API worker leaves its ``*.ndjson.active`` file, whose rows were
+    already counted. Every writer holds an exclusive ``flock`` on its active
+    file for as long as it appends to it, so a file whose lock can be taken
+    has no writer, whatever process (or container) created it. A torn last
+    line is cut off and the file is renamed to a sealed ``*.ndjson`` segment
+    so the next retrain reads it; if its columnar segment was already
+    written (a crash while sealing), the file is deleted instead.
+
+    Returns:
+        Paths of the adopted segments
+    """
+    if fcntl is None:  # Windows: a live writer's segment cannot be told apart from an orphan
+        return []
+    adopted = []
+    for path in sorted(Path(buffer_dir).glob(f"*{ACTIVE_SUFFIX}")):
+        try:
+            f = open(path, 'rb+')
+        except FileNotFoundError:
+            continue
+        with f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            try:
+                # The writer may have sealed it between the glob and the lock
+                if os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                    continue
+            except FileNotFoundError:
+                continue
+            stem = path.name[:-len(ACTIVE_SUFFIX)]
+            if path.with_name(stem + COLUMNAR_SUFFIX).exists():
+                path.unlink()
+                continue
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if not end:
+                path.unlink()
+                continue
+            f.truncate(end)
+            target = path.with_name(stem + SEGMENT_SUFFIX)
+            os.replace(path, target)
+            adopted.append(target)
+    return adopted
+
+
+class PredictionBufferWriter:
+    """
+    Appends logged predictions to rotating NDJSON segment files
+
+    - Rows are batched in memory and flushed after ``flush_rows`` rows or
+      ``flush_interval`` seconds, whichever comes first
+    - Flushes append to one open segment file (``*.ndjson.active``); the
+      segment is sealed once it holds ``segment_rows`` rows or when
+      ``seal()`` is called: written as a typed columnar segment
+      (``*.columns/``, see columnar.py) or, with ``segment_format="ndjson"``,
+      renamed to ``*.ndjson``
+    - In columnar format the active segment's values are also accumulated
+      column by column in memory (~5 MB per 50k rows), so sealing writes
+      arrays instead of re-parsing the NDJSON; the NDJSON file is what
+      survives a crash
+    - Aliased feature names are normalized before a row is written
+    - Sealed segments are immutable, so a retrain can consume and delete
+      them while this writer keeps appending to a fresh segment
+    - ``fsync`` policy: "always" (fsync every flush) or "never" (leave it to the OS)
+    - The active file is ``flock``-ed while it is written, which is how
+      ``adopt_orphaned_segments`` tells a crashed writer's file apart
+    - Several API workers each run a writer on the same directory. A retrain
+      trigger seals its own segment and calls ``request_seal``; the other
+      writers' flushers seal theirs within ``flush_interval``. Rows a retrain
+      misses stay buffered and counted for the next one
+
+    The cost of an append does not depend on how many rows the buffer holds.
+    """
+
+    def __init__(self,
+                 buffer_dir: Union[str, Path],
+                 flush_rows: int = 64,
+                 flush_interval: float = 1.0,
+                 segment_rows: int = 50000,
+                 fsync: str = "always",
+                 segment_format: str = "columnar"):
+        if fsync not in ("always", "never"):
+            raise ValueError(f"fsync must be 'always' or 'never', got {fsync!r}")
+        if segment_format not in SEGMENT_FORMATS:
+            raise ValueError(f"segment_format must be one of {SEGMENT_FORMATS}, got {segment_format!r}")
+        self.buffer_dir = Path(buffer_dir)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.segment_rows = max(1, segment_rows)
+        self.fsync = fsync
+        self.segment_format = segment_format
+
+        self.buffer_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._pending_rows: List[Dict[str, Any]] = []
+        self._columns: Optional[ColumnarSegmentBuilder] = None
+        self._oldest_pending: Optional[float] = None
+        self._file = None
+        self._active_path: Optional[Path] = None
+        self._segment_row_count = 0
+        self._segment_seq = 0
+        self._closed = False
+        self._seal_seen = _seal_requested_at(self.buffer_dir)
+
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="buffer-flusher", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+
+    def append(self, row: Dict[str, Any]):
+        """
+        Queue one row; flushes when the batch is full
+
+        Args:
+            row: Raw features (and optional target_offer) for one prediction
+        """
+        self.extend([row])
+
+    def extend(self, rows: List[Dict[str, Any]]):
+        """
+        Queue several rows with a single lock acquisition
+
+        Args:
+            rows: Rows to append
+        """
+        rows = [normalize_record(row) for row in rows]
+        lines = [json.dumps(row, separators=(',', ':'), default=str) for row in rows]
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("PredictionBufferWriter is closed")
+            if not self._pending:
+                self._oldest_pending = time.monotonic()
+            self._pending.extend(lines)
+            if self.segment_format == "columnar":
+                self._pending_rows.extend(rows)
+            if len(self._pending) >= self.flush_rows:
+                self._flush_locked()
+
+    def flush(self):
+        """Write pending rows to the active segment"""
+        with self._lock:
+            self._flush_locked()
+
+    def seal(self):
+        """Flush and seal the active segment so it becomes visible to readers"""
+        with self._lock:
+            self._flush_locked()
+            self._seal_locked()
+
+    def discard(self):
+        """Drop pending rows and the active segment (used when the buffer is cleared)"""
+        with self._lock:
+            self._pending.clear()
+            self._pending_rows.clear()
+            self._oldest_pending = None
+            if self._file is not None:
+                self._active_path.unlink(missing_ok=True)
+                self._file.close()
+                self._file = None
+                self._active_path = None
+                self._segment_row_count = 0
+                self._columns = None
+
+    def close(self):
+        """Flush, seal and stop the background flusher"""
+        self._stop.set()
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._seal_locked()
+            self._closed = True
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._pending)
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        name = f"{time.time_ns():020d}-{os.getpid()}-{self._segment_seq:06d}"
+        self._active_path = self.buffer_dir / f"{name}{ACTIVE_SUFFIX}"
+        # Locked before it gets its active name, so it is never adopted while in use
+        staging = self._active_path.with_name(self._active_path.name + ".tmp")
+        self._file = open(staging, 'a', encoding='utf-8')
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        os.replace(staging, self._active_path)
+        self._segment_row_count = 0
+        if self.segment_format == "columnar":
+            self._columns = ColumnarSegmentBuilder()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        while self._pending:
+            if self._file is None:
+                self._open_segment()
+            room = self.segment_rows - self._segment_row_count
+            chunk, self._pending = self._pending[:room], self._pending[room:]
+            self._file.write('\n'.join(chunk) + '\n')
+            self._file.flush()
+            if self.fsync == "always":
+                os.fsync(self._file.fileno())
+            if self._columns is not None:
+                self._columns.extend(self._pending_rows[:room])
+                del self._pending_rows[:room]
+            self._segment_row_count += len(chunk)
+            if self._segment_row_count >= self.segment_rows:
+                self._seal_locked()
+        self._oldest_pending = None
+
+    def _seal_locked(self):
+        if self._file is None:
+            return
+        stem = self._active_path.name[:-len(ACTIVE_SUFFIX)]
+        # The lock is held until the active file is gone
+        if self._columns is not None:
+            # The active file is removed only once the columnar segment is in place
+            self._columns.write(self._active_path.with_name(stem + COLUMNAR_SUFFIX))
+            self._active_path.unlink()
+            self._columns = None
+        else:
+            os.replace(self._active_path, self._active_path.with_name(stem + SEGMENT_SUFFIX))
+        self._file.close()
+        self._file = None
+        self._active_path = None
+        self._segment_row_count = 0
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval):
+            requested_at = _seal_requested_at(self.buffer_dir)
+            with self._lock:
+                if requested_at != self._seal_seen:
+                    self._seal_seen = requested_at
+                    self._flush_locked()
+                    self._seal_locked()
+                    continue
+                if (self._pending and self._oldest_pending is not None
+                        and time.monotonic() - self._oldest_pending >= self.flush_interval):
+                    self._flush_locked()
@@ -0,0 +1,279 @@
+"""
+Columnar Buffer Segments - Typed, schema-normalized storage for sealed buffer segments
+
+A sealed segment is a directory ``<name>.columns/`` holding one ``.npy``
+file per column plus ``schema.json``:
+
+- Numeric ``FeatureData`` fields are float64 / int64 (an int field with a
+  missing value falls back to float64 with NaN, as CSV parsing would)
+- String columns (plan_type, device_brand, target_offer, customer_id, ...)
+  are dictionary-encoded: the smallest signed integer codes that fit, -1 for
+  missing, with the sorted levels in ``schema.json``
+- Other numeric extras are stored as parsed (float64 / int64)
+
+Known aliases (``FEATURE_ALIASES``) are renamed to their ``FeatureData``
+field before anything is written, so every segment has one column per
+field. Columns are opened with ``np.load(mmap_mode='r')``; loading a subset
+of columns touches only those files.
+"""
+
+import json
+import math
+import os
+import shutil
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.schemas.model_schemas import FeatureData
+
+COLUMNAR_SUFFIX = ".columns"
+SCHEMA_FILE = "schema.json"
+
+# Client spellings seen in the legacy buffer -> FeatureData field
+FEATURE_ALIASES: Dict[str, str] = {
+    "sms_frequency": "sms_freq",
+    "complain_count": "complaint_count",
+}
+
+# Dictionary columns with more levels than this (and than half the rows) are merged as strings
+_MAX_SHARED_LEVELS = 2 ** 15
+
+FEATURE_TYPES: Dict[str, Any] = {name: info.annotation for name, info in FeatureData.model_fields.items()}
+FEATURE_COLUMNS: List[str] = list(FEATURE_TYPES)
+
+
+def normalize_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Rename aliased keys to their FeatureData field (the canonical key wins if both are set)"""
+    if not any(alias in row for alias in FEATURE_ALIASES):
+        return row
+    normalized = {key: value for key, value in row.items() if key not in FEATURE_ALIASES}
+    for alias, canonical in FEATURE_ALIASES.items():
+        if alias in row and normalized.get(canonical) is None:
+            normalized[canonical] = row[alias]
+    return normalized
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """``normalize_record`` for frames read from CSV / NDJSON segments written before normalization"""
+    for alias, canonical in FEATURE_ALIASES.items():
+        if alias not in df.columns:
+            continue
+        if canonical in df.columns:
+            df[canonical] = df[canonical].fillna(df[alias])
+        else:
+            df[canonical] = df[alias]
+        df = df.drop(columns=alias)
+    return df
+
+
+def _code_dtype(n_levels: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_levels < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _encode_column(name: str, values: pd.Series) -> Dict[str, Any]:
+    """Typed array (and dictionary levels) for one column"""
+    kind = FEATURE_TYPES.get(name)
+    numeric_extra = (kind is None and pd.api.types.is_numeric_dtype(values)
+                     and not pd.api.types.is_bool_dtype(values))
+    if kind in (int, float) or numeric_extra:
+        numeric = pd.to_numeric(values, errors='coerce').astype(np.float64)
+        integral = kind is int or (kind is None and pd.api.types.is_integer_dtype(values))
+        if integral and numeric.notna().all() and (numeric == numeric.round()).all():
+            return {"array": numeric.to_numpy(dtype=np.int64), "kind": "int64"}
+        return {"array": numeric.to_numpy(dtype=np.float64), "kind": "float64"}
+    present = values.notna()
+    strings = values[present].astype(str)
+    levels = sorted(strings.unique().tolist())
+    codes = np.full(len(values), -1, dtype=_code_dtype(len(levels)))
+    codes[present.to_numpy()] = pd.Categorical(strings, categories=levels).codes
+    return {"array": codes, "kind": "dictionary", "levels": levels}
+
+
+def _write_segment(path: Union[str, Path], n_rows: int, columns: Dict[str, Dict[str, Any]]) -> Path:
+    """Write encoded columns to ``<path>.tmp`` and rename it into place, so readers never see a partial segment"""
+    path = Path(path)
+    staging = path.with_name(path.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    schema: Dict[str, Any] = {"rows": n_rows, "columns": {}}
+    for i, (name, encoded) in enumerate(columns.items()):
+        filename = f"{i:03d}.npy"
+        np.save(staging / filename, encoded["array"])
+        schema["columns"][name] = {"file": filename, "kind": encoded["kind"]}
+        if "levels" in encoded:
+            schema["columns"][name]["levels"] = encoded["levels"]
+    with open(staging / SCHEMA_FILE, 'w', encoding='utf-8') as f:
+        json.dump(schema, f)
+    os.replace(staging, path)
+    return path
+
+
+def write_columnar_segment(rows: Union[Sequence[Dict[str, Any]], pd.DataFrame], path: Union[str, Path]) -> Path:
+    """
+    Write rows as a columnar segment directory
+
+    Args:
+        rows: Normalized row dictionaries (or a frame of them)
+        path: Target directory (``*.columns``)
+
+    Returns:
+        The segment path
+    """
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+    return _write_segment(path, len(frame), {name: _encode_column(name, frame[name]) for name in frame.columns})
+
+
+class ColumnarSegmentBuilder:
+    """
+    Accumulates rows column by column for ``write_columnar_segment``-equivalent output
+
+    Used by the buffer writer so sealing a segment does not re-parse its
+    NDJSON: numeric FeatureData fields go to float64 arrays, string values
+    are dictionary-encoded as they arrive, and anything else is kept as-is
+    and typed at ``write`` time like a DataFrame column would be.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self._numeric: Dict[str, array] = {}
+        self._codes: Dict[str, array] = {}
+        self._levels: Dict[str, Dict[str, int]] = {}
+        self._other: Dict[str, List[Any]] = {}
+        self._order: List[str] = []
+
+    def _new_column(self, key: str, value: Any):
+        kind = FEATURE_TYPES.get(key)
+        if kind in (int, float):
+            self._numeric[key] = array('d')
+        elif kind is str or isinstance(value, str):
+            self._codes[key] = array('i')
+            self._levels[key] = {}
+        else:
+            self._other[key] = []
+        self._order.append(key)
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        """Append normalized rows; keys missing from a row are recorded as missing"""
+        for row in rows:
+            for key, value in row.items():
+                if key not in self._numeric and key not in self._codes and key not in self._other:
+                    self._new_column(key, value)
+                if key in self._numeric:
+                    column = self._numeric[key]
+                    if len(column) < self.rows:
+                        column.extend([math.nan] * (self.rows - len(column)))
+                    try:
+                        column.append(float(value))
+                    except (TypeError, ValueError):
+                        column.append(math.nan)
+                elif key in self._codes:
+                    column = self._codes[key]
+                    if len(column) < self.rows:
+                        column.extend([-1] * (self.rows - len(column)))
+                    if value is None:
+                        column.append(-1)
+                    else:
+                        levels = self._levels[key]
+                        column.append(levels.setdefault(str(value), len(levels)))
+                else:
+                    column = self._other[key]
+                    if len(column) < self.rows:
+                        column.extend([None] * (self.rows - len(column)))
+                    column.append(value)
+            self.rows += 1
+
+    def write(self, path: Union[str, Path]) -> Path:
+        """Write the accumulated rows as a columnar segment"""
+        columns: Dict[str, Dict[str, Any]] = {}
+        for name in self._order:
+            if name in self._numeric:
+                values = np.frombuffer(self._numeric[name], dtype=np.float64)
+                values = np.concatenate([values, np.full(self.rows - len(values), np.nan)])
+                integral = not np.isnan(values).any() and np.array_equal(values, np.round(values))
+                if FEATURE_TYPES[name] is int and integral:
+                    columns[name] = {"array": values.astype(np.int64), "kind": "int64"}
+                else:
+                    columns[name] = {"array": values, "kind": "float64"}
+            elif name in self._codes:
+                # Re-code so levels are sorted, as in write_columnar_segment
+                levels = sorted(self._levels[name])
+                position = {level: i for i, level in enumerate(levels)}
+                # Last entry maps the missing code -1 to itself
+                rank = np.asarray([position[level] for level in self._levels[name]] + [-1], dtype=np.int64)
+                codes = np.frombuffer(self._codes[name], dtype=np.int32)
+                codes = np.concatenate([codes, np.full(self.rows - len(codes), -1, dtype=np.int32)])
+                columns[name] = {"array": rank[codes].astype(_code_dtype(len(levels))),
+                                 "kind": "dictionary", "levels": levels}
+            else:
+                values = self._other[name] + [None] * (self.rows - len(self._other[name]))
+                columns[name] = _encode_column(name, pd.Series(values))
+        return _write_segment(path, self.rows, columns)
+
+
+def read_segment_schema(path: Union[str, Path]) -> Dict[str, Any]:
+    """Row count and column descriptions of a columnar segment"""
+    with open(Path(path) / SCHEMA_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_columnar_segment(path: Union[str, Path], columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Load a columnar segment
+
+    Args:
+        path: Segment directory
+        columns: Columns to load (default all); columns the segment lacks are skipped
+
+    Returns:
+        DataFrame over memory-mapped numeric columns; dictionary columns are
+        pandas Categoricals over the mapped codes
+    """
+    path = Path(path)
+    schema = read_segment_schema(path)
+    wanted = schema["columns"] if columns is None else [c for c in columns if c in schema["columns"]]
+    data = {}
+    for name in wanted:
+        column = schema["columns"][name]
+        array = np.load(path / column["file"], mmap_mode='r')
+        if column["kind"] == "dictionary":
+            data[name] = pd.Categorical.from_codes(array, categories=column["levels"], validate=False)
+        else:
+            data[name] = array
+    return pd.DataFrame(data, index=pd.RangeIndex(schema["rows"]), copy=False)
+
+
+def concat_segments(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate segment frames, keeping dictionary columns categorical
+
+    Each segment has its own dictionary; categoricals are re-coded against
+    the sorted union of levels so ``pd.concat`` does not fall back to object.
+    Near-unique columns (customer_id) are decoded to strings instead, where
+    a shared dictionary would cost more than it saves.
+    """
+    categorical = {name for df in frames for name in df.columns if isinstance(df[name].dtype, pd.CategoricalDtype)}
+    if len(frames) > 1:
+        n_rows = sum(len(df) for df in frames)
+        for name in categorical:
+            columns = [df[name] for df in frames if name in df.columns]
+            if any(not isinstance(column.dtype, pd.CategoricalDtype) for column in columns):
+                continue
+            if sum(len(column.cat.categories) for column in columns) > max(n_rows // 2, _MAX_SHARED_LEVELS):
+                frames = [df.assign(**{name: df[name].astype(object)}) if name in df.columns else df
+                          for df in frames]
+                continue
+            levels = sorted(set().union(*(column.cat.categories for column in columns)))
+            frames = [
+                df.assign(**{name: df[name].cat.set_categories(levels) if name in df.columns
+                             else pd.Categorical([None] * len(df), categories=levels)})
+                for df in frames
+            ]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
@@ -1,11 +1,26 @@
 """
 Data Repository - Handles fetching data from various sources
 """
-from typing import Tuple, Optional
+import json
+import shutil
+from typing import Any, Dict, Iterable, Sequence, Tuple, Optional, List
 from pathlib import Path
 import pandas as pd
 import numpy as np
-from src.config import PROCESSED_DATA_DIR, PREDICTION_BUFFER_PATH
+from src.config import (
+    PROCESSED_DATA_DIR,
+    PREDICTION_BUFFER_PATH,
+    PREDICTION_BUFFER_DIR,
+    BUFFER_FLUSH_ROWS,
+    BUFFER_FLUSH_INTERVAL,
+    BUFFER_SEGMENT_ROWS,
+    BUFFER_FSYNC,
+    BUFFER_SEGMENT_FORMAT,
+)
+from .buffer import PredictionBufferWriter, SEGMENT_SUFFIX, adopt_orphaned_segments, request_seal
+from .columnar import COLUMNAR_SUFFIX, concat_segments, normalize_frame, read_columnar_segment
+from .training_store import TrainingDataStore
+from .training_window import TrainingWindow
 
 
 
@@ -17,43 +32,137 @@ class DataRepository:
     
     def __init__(self,
                  data_buffer_path: Path = PREDICTION_BUFFER_PATH,
-                 processed_data_dir: Path = PROCESSED_DATA_DIR):
+                 processed_data_dir: Path = PROCESSED_DATA_DIR,
+                 buffer_dir: Path = PREDICTION_BUFFER_DIR):
+        # data_buffer_path is the legacy single-CSV buffer; it is still read
+        # (and consumed) so rows logged before the segment format are not lost
         self.data_buffer_path = Path(data_buffer_path)
         self.processed_data_dir = Path(processed_data_dir)
+        self.buffer_dir = Path(buffer_dir)
+        self._buffer_writer: Optional[PredictionBufferWriter] = None
+        # Seeded with the notebook's X/y_train_original.npy; retrains append shards
+        self.training_store = TrainingDataStore(
+            self.processed_data_dir / 'training_store',
+            seed_X_path=self.processed_data_dir / 'X_train_original.npy',
+            seed_y_path=self.processed_data_dir / 'y_train_original.npy'
+        )
         
         # Create buffer directory if not exists
-        self.data_buffer_path.parent.mkdir(parents=True, exist_ok=True)
+        self.buffer_dir.mkdir(parents=True, exist_ok=True)
+        # Segments still open when their worker died hold counted rows
+        adopt_orphaned_segments(self.buffer_dir)
+    
+    @property
+    def buffer_writer(self) -> PredictionBufferWriter:
+        """Append-only writer, created on first use (readers such as the retrain worker never need it)"""
+        if self._buffer_writer is None:
+            self._buffer_writer = PredictionBufferWriter(
+                self.buffer_dir,
+                flush_rows=BUFFER_FLUSH_ROWS,
+                flush_interval=BUFFER_FLUSH_INTERVAL,
+                segment_rows=BUFFER_SEGMENT_ROWS,
+                fsync=BUFFER_FSYNC,
+                segment_format=BUFFER_SEGMENT_FORMAT
+            )
+        return self._buffer_writer
     
     def load_original_training_data(self) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Load original training data from processed files
+        Load all stored training data (original rows and every appended batch)
         
         Returns:
             X_train: Training features
             y_train: Training labels
         """
-        X_path = self.processed_data_dir / 'X_train_original.npy'
-        y_path = self.processed_data_dir / 'y_train_original.npy'
+        return self.training_store.materialize()
+    
+    def load_training_data(self,
+                           extra: Sequence[Tuple[np.ndarray, np.ndarray]] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Stored training data plus uncommitted batches, built as a single array
         
-        if not X_path.exists() or not y_path.exists():
-            raise FileNotFoundError(f"Training data not found in {self.processed_data_dir}")
+        Shards are read through memory maps straight into the result, so the
+        history is copied once instead of being loaded and then stacked.
         
-        X_train = np.load(X_path)
-        y_train = np.load(y_path)
+        Args:
+            extra: (X, y) batches appended after the stored rows
         
-        return X_train, y_train
+        Returns:
+            X_train: Training features
+            y_train: Training labels
+        """
+        return self.training_store.materialize(extra)
     
-    def load_prediction_buffer(self) -> Optional[pd.DataFrame]:
+    def load_training_window(self,
+                             window: TrainingWindow,
+                             extra: Sequence[Tuple[np.ndarray, np.ndarray]] = ()
+                             ) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Stored training data plus uncommitted batches, reduced by a retention policy
+        
+        Args:
+            window: Retention policy (an unbounded window returns every row)
+            extra: (X, y) batches appended after the stored rows
+        
+        Returns:
+            X_train: Training features
+            y_train: Training labels
+            summary: Policy applied, available / selected rows and selected rows per class
+        """
+        return window.select(self.training_store, extra)
+    
+    def training_data_stats(self) -> Dict[str, Any]:
+        """Rows, shards and width of the stored training data"""
+        return self.training_store.stats()
+    
+    def list_buffer_segments(self) -> List[Path]:
+        """
+        List sealed buffer segments in write order
+        
+        Returns:
+            Segment paths (legacy CSV buffer first, if present)
+        """
+        # Both formats share the time-ordered name stem, so sorting keeps write order
+        segments = sorted([*self.buffer_dir.glob(f"*{SEGMENT_SUFFIX}"), *self.buffer_dir.glob(f"*{COLUMNAR_SUFFIX}")])
+        if self.data_buffer_path.exists():
+            segments.insert(0, self.data_buffer_path)
+        return segments
+    
+    def load_prediction_buffer(self,
+                               segments: Optional[List[Path]] = None,
+                               columns: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
         """
         Load accumulated predictions from buffer
         
+        Args:
+            segments: Segments to read (defaults to every sealed segment)
+            columns: Columns to load (defaults to all); columnar segments read only these files
+        
         Returns:
-            DataFrame with logged predictions or None if buffer doesn't exist
+            DataFrame with logged predictions or None if buffer is empty
         """
-        if not self.data_buffer_path.exists():
+        if segments is None:
+            segments = self.list_buffer_segments()
+        columns = list(columns) if columns is not None else None
+        
+        frames = []
+        for segment in segments:
+            if segment.suffix == COLUMNAR_SUFFIX:
+                frames.append(read_columnar_segment(segment, columns))
+                continue
+            if segment.suffix == '.csv':
+                df = pd.read_csv(segment)
+            else:
+                with open(segment, 'r', encoding='utf-8') as f:
+                    df = pd.DataFrame([json.loads(line) for line in f if line.strip()])
+            # Legacy segments were written before aliases were normalized
+            df = normalize_frame(df)
+            frames.append(df if columns is None else df[[c for c in columns if c in df.columns]])
+        frames = [df for df in frames if not df.empty]
+        if not frames:
             return None
         
-        return pd.read_csv(self.data_buffer_path)
+        return concat_segments(frames)
     
     def append_to_buffer(self, features_dict: dict, true_label: Optional[str] = None):
         """
@@ -63,36 +172,81 @@ class DataRepository:
             features_dict: Dictionary of raw features
             true_label: Ground truth label (if available)
         """
-        df_new = pd.DataFrame([features_dict])
+        row = dict(features_dict)
         if true_label is not None:
-            df_new['target_offer'] = true_label
+            row['target_offer'] = true_label
+        self.buffer_writer.append(row)
+    
+    def append_batch_to_buffer(self,
+                               features_list: List[dict],
+                               labels: Optional[List[Optional[str]]] = None):
+        """
+        Append several predictions to the buffer in one operation
         
-        if self.data_buffer_path.exists():
-            df_buffer = pd.read_csv(self.data_buffer_path)
-            df_buffer = pd.concat([df_buffer, df_new], ignore_index=True)
-        else:
-            df_buffer = df_new
+        Args:
+            features_list: Raw feature dictionaries, one per prediction
+            labels: Ground truth labels aligned with features_list (missing or None entries are unlabeled)
+        """
+        labels = labels or []
+        rows = []
+        for i, features_dict in enumerate(features_list):
+            row = dict(features_dict)
+            if i < len(labels) and labels[i] is not None:
+                row['target_offer'] = labels[i]
+            rows.append(row)
+        self.buffer_writer.extend(rows)
+    
+    def seal_buffer(self):
+        """
+        Flush buffered rows and seal the active segment so a retrain can read it
         
-        df_buffer.to_csv(self.data_buffer_path, index=False)
+        Writers in other API worker processes are asked to seal theirs too;
+        they do so within BUFFER_FLUSH_INTERVAL, usually before a background
+        retrain lists the segments.
+        """
+        if self._buffer_writer is not None:
+            self._buffer_writer.seal()
+        request_seal(self.buffer_dir)
     
-    def clear_buffer(self):
-        """Remove the prediction buffer file"""
-        if self.data_buffer_path.exists():
-            self.data_buffer_path.unlink()
+    def close_buffer(self):
+        """Flush and close the buffer writer"""
+        if self._buffer_writer is not None:
+            self._buffer_writer.close()
+            self._buffer_writer = None
     
-    def save_training_data(self, X: np.ndarray, y: np.ndarray):
+    def remove_buffer_segments(self, segments: List[Path]):
         """
-        Save training data for next retraining cycle
+        Delete consumed segments; rows logged after they were listed are kept
         
         Args:
-            X: Training features
-            y: Training labels
+            segments: Segments returned by list_buffer_segments
         """
-        X_path = self.processed_data_dir / 'X_train_original.npy'
-        y_path = self.processed_data_dir / 'y_train_original.npy'
+        for segment in segments:
+            segment = Path(segment)
+            if segment.is_dir():
+                shutil.rmtree(segment, ignore_errors=True)
+            else:
+                segment.unlink(missing_ok=True)
+    
+    def clear_buffer(self):
+        """Remove every buffered prediction"""
+        if self._buffer_writer is not None:
+            self._buffer_writer.discard()
+        self.remove_buffer_segments(self.list_buffer_segments())
+    
+    def append_training_data(self, X: np.ndarray, y: np.ndarray, source: str = "") -> Dict[str, Any]:
+        """
+        Add a preprocessed batch to the training data for the next retraining cycle
+        
+        Args:
+            X: New training features
+            y: New training labels
+            source: Origin recorded in the store manifest
         
-        np.save(X_path, X)
-        np.save(y_path, y)
+        Returns:
+            Manifest entry of the new shard
+        """
+        return self.training_store.append(X, y, source)
     
     def load_preprocessing_artifacts(self) -> Tuple:
         """
@@ -2,15 +2,37 @@
 Prediction Counter - Manages prediction counting for retrain triggers
 """
 
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from src.config import PREDICTION_COUNTER_PATH
+from typing import Iterator, Tuple, Union
+from src.config import (
+    PREDICTION_COUNTER_PATH,
+    PREDICTION_COUNTER_DB_PATH,
+    COUNTER_BACKEND,
+    COUNTER_CHECKPOINT_INTERVAL,
+)
 
 
 class PredictionCounter:
     """
     Manages the prediction counter for determining when to retrain
+    
+    Plain-text file backend: every call reads or rewrites the file, and
+    concurrent processes can lose increments. Use SQLitePredictionCounter
+    when more than one API worker is running.
+    
+    The file holds the count on its first line, followed by a "disarmed"
+    line while a threshold crossing awaits its retrain. The flag lives in
+    the file so a decrement by the retrain worker process rearms the API
+    process's counter.
     """
     
+    _DISARMED = "disarmed"
+    
     def __init__(self, counter_path: Path = PREDICTION_COUNTER_PATH):
         self.counter_path = Path(counter_path)
         self._init_counter()
@@ -19,8 +41,20 @@ class PredictionCounter:
         """Initialize counter file if it doesn't exist"""
         self.counter_path.parent.mkdir(parents=True, exist_ok=True)
         if not self.counter_path.exists():
-            with open(self.counter_path, 'w') as f:
-                f.write('0')
+            self._write(0)
+    
+    def _read(self) -> Tuple[int, bool]:
+        """(count, armed) from the counter file"""
+        with open(self.counter_path, 'r') as f:
+            lines = f.read().split()
+        return int(lines[0]), self._DISARMED not in lines[1:]
+    
+    def _write(self, value: int, armed: bool = True):
+        """Atomically replace the counter file so concurrent readers never see it empty"""
+        tmp_path = self.counter_path.with_name(f".{self.counter_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(str(value) if armed else f"{value}\n{self._DISARMED}")
+        os.replace(tmp_path, self.counter_path)
     
     def get_count(self) -> int:
         """
@@ -29,8 +63,7 @@ class PredictionCounter:
         Returns:
             Current count
         """
-        with open(self.counter_path, 'r') as f:
-            return int(f.read().strip())
+        return self._read()[0]
     
     def increment(self, count: int = 1) -> int:
         """
@@ -42,16 +75,28 @@ class PredictionCounter:
         Returns:
             New count value
         """
-        current = self.get_count()
+        current, armed = self._read()
         new_count = current + count
-        with open(self.counter_path, 'w') as f:
-            f.write(str(new_count))
+        self._write(new_count, armed)
+        return new_count
+    
+    def decrement(self, count: int) -> int:
+        """
+        Decrement counter by specified amount (never below zero) and rearm the threshold
+        
+        Args:
+            count: Amount to decrement
+            
+        Returns:
+            New count value
+        """
+        new_count = max(0, self.get_count() - count)
+        self._write(new_count)
         return new_count
     
     def reset(self):
         """Reset counter to zero"""
-        with open(self.counter_path, 'w') as f:
-            f.write('0')
+        self._write(0)
     
     def should_retrain(self, threshold: int) -> bool:
         """
@@ -64,3 +109,248 @@ class PredictionCounter:
             True if threshold reached
         """
         return self.get_count() >= threshold
+    
+    def increment_and_check(self, count: int, threshold: int) -> Tuple[int, bool]:
+        """
+        Increment counter and report whether this call crossed the threshold
+        
+        The crossing is reported once, then disarmed until the counter is
+        decremented, reset or rearm() is called (by any process). Concurrent
+        processes can both see the same crossing.
+        
+        Args:
+            count: Amount to increment
+            threshold: Number of predictions before retraining
+            
+        Returns:
+            (new count, True if this call crossed the threshold)
+        """
+        current, armed = self._read()
+        new_count = current + count
+        crossed = armed and new_count >= threshold
+        self._write(new_count, armed and not crossed)
+        return new_count, crossed
+    
+    def rearm(self):
+        """Allow the next increment at or above the threshold to fire again"""
+        self._write(self.get_count())
+    
+    def close(self):
+        """Nothing to release; every call already wrote the file"""
+
+
+class SQLitePredictionCounter:
+    """
+    Prediction counter shared by every API worker process through a SQLite file
+    
+    - Every update is one short transaction serialized by SQLite's write lock,
+      so concurrent processes never lose increments
+    - WAL journal with synchronous=NORMAL: a commit appends to the WAL without
+      an fsync; the WAL is checkpointed into the database (and the count
+      mirrored to the plain-text counter file) every ``checkpoint_interval`` seconds
+    - Threshold crossings are stored in the database, so exactly one caller
+      across all processes sees each crossing
+    - A new database is seeded from the plain-text counter file if one exists
+    """
+    
+    _NAME = "predictions"
+    
+    def __init__(self,
+                 db_path: Union[str, Path] = PREDICTION_COUNTER_DB_PATH,
+                 snapshot_path: Union[str, Path, None] = PREDICTION_COUNTER_PATH,
+                 checkpoint_interval: float = COUNTER_CHECKPOINT_INTERVAL):
+        self.db_path = Path(db_path)
+        self.snapshot_path = Path(snapshot_path) if snapshot_path is not None else None
+        self.checkpoint_interval = checkpoint_interval
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._init_counter()
+        
+        self._stop = threading.Event()
+        if checkpoint_interval > 0:
+            threading.Thread(target=self._checkpoint_periodically, name="counter-checkpoint", daemon=True).start()
+        atexit.register(self.close)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per process (reopened after a fork)"""
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(
+                self.db_path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._pid = os.getpid()
+        return self._conn
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database lock from the first statement"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+    
+    def _init_counter(self):
+        """Create the counter row, seeded from the plain-text counter file"""
+        seed = 0
+        if self.snapshot_path is not None and self.snapshot_path.exists():
+            try:
+                seed = int((self.snapshot_path.read_text().split() or [0])[0])
+            except ValueError:
+                seed = 0
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "name TEXT PRIMARY KEY, value INTEGER NOT NULL, armed INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO counters (name, value, armed) VALUES (?, ?, 1)",
+                (self._NAME, seed)
+            )
+    
+    def get_count(self) -> int:
+        """
+        Get current prediction count
+        
+        Returns:
+            Current count
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM counters WHERE name = ?", (self._NAME,)
+            ).fetchone()
+        return row[0]
+    
+    def increment(self, count: int = 1) -> int:
+        """
+        Increment counter by specified amount
+        
+        Args:
+            count: Amount to increment
+            
+        Returns:
+            New count value
+        """
+        with self._transaction() as conn:
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (count, self._NAME))
+            return conn.execute("SELECT value FROM counters WHERE name = ?", (self._NAME,)).fetchone()[0]
+    
+    def increment_and_check(self, count: int, threshold: int) -> Tuple[int, bool]:
+        """
+        Increment counter and report whether this call crossed the threshold
+        
+        The crossing is reported to exactly one caller across all processes,
+        then disarmed until the counter is decremented, reset or rearm() is called.
+        
+        Args:
+            count: Amount to increment
+            threshold: Number of predictions before retraining
+            
+        Returns:
+            (new count, True if this call crossed the threshold)
+        """
+        with self._transaction() as conn:
+            conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (count, self._NAME))
+            new_count, armed = conn.execute(
+                "SELECT value, armed FROM counters WHERE name = ?", (self._NAME,)
+            ).fetchone()
+            crossed = bool(armed) and new_count >= threshold
+            if crossed:
+                conn.execute("UPDATE counters SET armed = 0 WHERE name = ?", (self._NAME,))
+        return new_count, crossed
+    
+    def decrement(self, count: int) -> int:
+        """
+        Decrement counter by specified amount (never below zero) and rearm the threshold
+        
+        Args:
+            count: Amount to decrement
+            
+        Returns:
+            New count value
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE counters SET value = MAX(0, value - ?), armed = 1 WHERE name = ?",
+                (count, self._NAME)
+            )
+            return conn.execute("SELECT value FROM counters WHERE name = ?", (self._NAME,)).fetchone()[0]
+    
+    def reset(self):
+        """Reset counter to zero"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE counters SET value = 0, armed = 1 WHERE name = ?", (self._NAME,))
+    
+    def rearm(self):
+        """Allow the next increment at or above the threshold to fire again"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE counters SET armed = 1 WHERE name = ?", (self._NAME,))
+    
+    def should_retrain(self, threshold: int) -> bool:
+        """
+        Check if retrain threshold is reached
+        
+        Args:
+            threshold: Number of predictions before retraining
+            
+        Returns:
+            True if threshold reached
+        """
+        return self.get_count() >= threshold
+    
+    def checkpoint(self):
+        """Fold the WAL into the database and mirror the count to the plain-text file"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            value = conn.execute("SELECT value FROM counters WHERE name = ?", (self._NAME,)).fetchone()[0]
+        if self.snapshot_path is not None:
+            tmp_path = self.snapshot_path.with_name(f".{self.snapshot_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(str(value))
+            os.replace(tmp_path, self.snapshot_path)
+    
+    def close(self):
+        """Stop the checkpoint thread, checkpoint once more and close the connection"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        try:
+            self.checkpoint()
+        except (sqlite3.Error, OSError):
+            pass
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+    
+    def _checkpoint_periodically(self):
+        while not self._stop.wait(self.checkpoint_interval):
+            try:
+                self.checkpoint()
+            except (sqlite3.Error, OSError):
+                continue
+
+
+def create_prediction_counter(backend: str = COUNTER_BACKEND):
+    """
+    Create the prediction counter for the configured backend
+    
+    Args:
+        backend: "sqlite" (safe across API worker processes) or "file" (legacy text file)
+        
+    Returns:
+        PredictionCounter or SQLitePredictionCounter
+    """
+    if backend == "file":
+        return PredictionCounter()
+    if backend == "sqlite":
+        return SQLitePredictionCounter()
+    raise ValueError(f"Unknown counter backend {backend!r}, expected 'sqlite' or 'file'")
@@ -0,0 +1,204 @@
+"""
+Training Data Store - Append-only, memory-mapped shards of preprocessed training data
+
+Layout (``data/processed/training_store/``)::
+
+    manifest.json
+    shard-000001.X.npy   shard-000001.y.npy
+    shard-000002.X.npy   shard-000002.y.npy
+    ...
+
+- The seed shard is the notebook's ``X_train_original.npy`` /
+  ``y_train_original.npy``, referenced in place rather than copied
+- ``append`` writes a new shard and commits it by atomically replacing the
+  manifest; shards are never rewritten, and a shard missing from the
+  manifest (a crash before the commit) is ignored and later overwritten
+- ``materialize`` reads every shard straight into one preallocated array
+  (``readinto``, no intermediate array or mapping), together with rows not
+  committed yet, so a retrain holds a single copy of the history
+- ``iter_shards`` yields ``np.load(mmap_mode='r')`` views for streaming
+  consumers that never need the whole history in memory
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _save_durable(path: Path, array: np.ndarray):
+    """np.save to a temporary file, fsync, then rename into place"""
+    staging = path.with_name(path.name + ".tmp")
+    with open(staging, 'wb') as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staging, path)
+
+
+def _read_into(path: str, out: np.ndarray) -> bool:
+    """Read a C-ordered .npy of out's dtype and shape directly into ``out``; False if it is not one"""
+    with open(path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        else:
+            return False
+        if fortran_order or dtype != out.dtype or tuple(shape) != out.shape:
+            return False
+        view = memoryview(out).cast('B')
+        filled = 0
+        while filled < len(view):
+            n = f.readinto(view[filled:])
+            if not n:
+                raise ValueError(f"{path} is truncated")
+            filled += n
+    return True
+
+
+class TrainingDataStore:
+    """
+    Preprocessed training rows (X, y) stored as immutable shards plus a manifest
+
+    Appending costs the new rows only; the history is never loaded or
+    rewritten to add a batch.
+    """
+
+    def __init__(self,
+                 directory: Union[str, Path],
+                 seed_X_path: Optional[Union[str, Path]] = None,
+                 seed_y_path: Optional[Union[str, Path]] = None):
+        self.directory = Path(directory)
+        self.seed_X_path = Path(seed_X_path) if seed_X_path is not None else None
+        self.seed_y_path = Path(seed_y_path) if seed_y_path is not None else None
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / MANIFEST_FILE
+
+    def manifest(self) -> Dict[str, Any]:
+        """
+        Current manifest; before the first append it describes the seed files alone
+
+        Raises:
+            FileNotFoundError: Neither a manifest nor the seed files exist
+        """
+        if self.manifest_path.exists():
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        if self.seed_X_path is None or not self.seed_X_path.exists() or not self.seed_y_path.exists():
+            raise FileNotFoundError(f"Training data not found in {self.directory} or {self.seed_X_path}")
+        X = np.load(self.seed_X_path, mmap_mode='r')
+        y = np.load(self.seed_y_path, mmap_mode='r')
+        if len(X) != len(y):
+            raise ValueError(f"Seed X has {len(X)} rows but y has {len(y)}")
+        return {
+            "n_features": int(X.shape[1]),
+            "x_dtype": X.dtype.str,
+            "y_dtype": y.dtype.str,
+            "shards": [{
+                "id": 0,
+                "rows": int(len(X)),
+                "x": os.path.relpath(self.seed_X_path, self.directory),
+                "y": os.path.relpath(self.seed_y_path, self.directory),
+                "source": "seed",
+            }],
+        }
+
+    def iter_shards(self, manifest: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yield each shard's (X, y) as read-only memory maps, oldest first"""
+        manifest = manifest or self.manifest()
+        for shard in manifest["shards"]:
+            X = np.load(self._path(shard["x"]), mmap_mode='r')
+            y = np.load(self._path(shard["y"]), mmap_mode='r')
+            if len(X) != shard["rows"] or len(y) != shard["rows"]:
+                raise ValueError(f"Shard {shard['id']} does not match the manifest ({len(X)} rows stored)")
+            yield X, y
+
+    def _path(self, name: str) -> str:
+        # normpath: the seed is referenced as ../X_train_original.npy, possibly before the directory exists
+        return os.path.normpath(self.directory / name)
+
+    def materialize(self,
+                    extra: Sequence[Tuple[np.ndarray, np.ndarray]] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Copy every shard, then ``extra`` batches, into one training array
+
+        Args:
+            extra: Uncommitted (X, y) batches appended after the stored rows
+
+        Returns:
+            (X, y) with the stored dtypes
+        """
+        manifest = self.manifest()
+        n_rows = sum(shard["rows"] for shard in manifest["shards"]) + sum(len(X) for X, _ in extra)
+        X_all = np.empty((n_rows, manifest["n_features"]), dtype=np.dtype(manifest["x_dtype"]))
+        y_all = np.empty(n_rows, dtype=np.dtype(manifest["y_dtype"]))
+        offset = 0
+        for shard in manifest["shards"]:
+            rows = slice(offset, offset + shard["rows"])
+            if not _read_into(self._path(shard["x"]), X_all[rows]):
+                X_all[rows] = np.load(self._path(shard["x"]), mmap_mode='r')
+            y_all[rows] = np.load(self._path(shard["y"]))
+            offset += shard["rows"]
+        for X, y in extra:
+            X_all[offset:offset + len(X)] = X
+            y_all[offset:offset + len(X)] = y
+            offset += len(X)
+        return X_all, y_all
+
+    def append(self, X: np.ndarray, y: np.ndarray, source: str = "") -> Dict[str, Any]:
+        """
+        Write (X, y) as a new shard and commit it to the manifest
+
+        Args:
+            X: Preprocessed features, same width as the stored rows
+            y: Encoded labels
+            source: Free-form origin recorded in the manifest (e.g. the retrain timestamp)
+
+        Returns:
+            The manifest entry of the new shard
+        """
+        manifest = self.manifest()
+        if X.ndim != 2 or X.shape[1] != manifest["n_features"]:
+            raise ValueError(f"Expected {manifest['n_features']} features, got shape {X.shape}")
+        if len(X) != len(y):
+            raise ValueError(f"X has {len(X)} rows but y has {len(y)}")
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        shard_id = max(shard["id"] for shard in manifest["shards"]) + 1
+        entry = {
+            "id": shard_id,
+            "rows": int(len(X)),
+            "x": f"shard-{shard_id:06d}.X.npy",
+            "y": f"shard-{shard_id:06d}.y.npy",
+            "source": source,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        _save_durable(self.directory / entry["x"], np.ascontiguousarray(X, dtype=np.dtype(manifest["x_dtype"])))
+        _save_durable(self.directory / entry["y"], np.asarray(y, dtype=np.dtype(manifest["y_dtype"])))
+
+        manifest["shards"].append(entry)
+        staging = self.manifest_path.with_name(MANIFEST_FILE + ".tmp")
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging, self.manifest_path)
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        manifest = self.manifest()
+        return {
+            "rows": sum(shard["rows"] for shard in manifest["shards"]),
+            "shards": len(manifest["shards"]),
+            "n_features": manifest["n_features"],
+        }
+
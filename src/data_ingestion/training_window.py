@@ -0,0 +1,189 @@
+"""
+Training Window - Bounded retention policy for the rows fed to the trainer
+
+The training store only grows, so by default every retrain trains on more
+rows than the one before. A ``TrainingWindow`` with ``max_samples`` caps
+that at a fixed size:
+
+- Reservoir sampling: each row gets a random key and the ``max_samples``
+  highest keys are kept. Keys are drawn shard by shard while running
+  top-k reservoirs are merged, so the history is streamed once and only
+  (key, index) pairs for the current candidates are held in memory
+- Time decay (``half_life_days``): weighted reservoir sampling
+  (Efraimidis-Spirakis, key = log(u) / w), with a row's weight halving
+  every ``half_life_days`` of its shard's age. New rows have weight 1
+- Stratified (``stratified``): one reservoir per ``target_offer`` class,
+  and the cap is split across classes by water-filling. A class smaller
+  than its fair share is kept whole, and the rest of its share goes to the
+  larger classes, so minority offers are not sampled away
+
+The selection pass reads only the labels. Selected feature rows are then
+gathered from the memory-mapped shards in index order.
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .training_store import TrainingDataStore
+
+
+class TrainingWindow:
+    """
+    Retention policy applied when the stored training data is loaded for a retrain
+
+    Args:
+        max_samples: Upper bound on the rows returned (None or 0 = every row)
+        half_life_days: Age at which a row's sampling weight halves (None or 0 = no decay);
+            only used when ``max_samples`` is set
+        stratified: Sample each target class separately and keep small classes whole
+        seed: Random seed for the sampling keys
+    """
+
+    def __init__(self,
+                 max_samples: Optional[int] = None,
+                 half_life_days: Optional[float] = None,
+                 stratified: bool = True,
+                 seed: int = 42):
+        if max_samples is not None and max_samples < 0:
+            raise ValueError(f"max_samples must be >= 0, got {max_samples}")
+        if half_life_days is not None and half_life_days < 0:
+            raise ValueError(f"half_life_days must be >= 0, got {half_life_days}")
+        self.max_samples = max_samples or None
+        self.half_life_days = half_life_days or None
+        self.stratified = stratified
+        self.seed = seed
+
+    @property
+    def bounded(self) -> bool:
+        return self.max_samples is not None
+
+    def describe(self) -> str:
+        """Policy summary for retrain logs"""
+        if not self.bounded:
+            return "all rows (no training window)"
+        parts = [f"max_samples={self.max_samples}"]
+        if self.half_life_days:
+            parts.append(f"half_life_days={self.half_life_days:g}")
+        parts.append("stratified by class" if self.stratified else "not stratified")
+        return f"{'time-decayed' if self.half_life_days else 'uniform'} reservoir ({', '.join(parts)})"
+
+    def select(self,
+               store: TrainingDataStore,
+               extra: Sequence[Tuple[np.ndarray, np.ndarray]] = (),
+               now: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Training rows under this policy
+
+        Args:
+            store: Stored training data
+            extra: Uncommitted (X, y) batches, treated as the newest rows (age 0)
+            now: Reference time for shard ages (default: now)
+
+        Returns:
+            (X, y, summary) where summary holds the policy description, the
+            available and selected row counts and the selected rows per class
+        """
+        manifest = store.manifest()
+        available = sum(shard["rows"] for shard in manifest["shards"]) + sum(len(X) for X, _ in extra)
+        if not self.bounded or available <= self.max_samples:
+            X, y = store.materialize(extra)
+            return X, y, self._summary(available, y)
+
+        now = now or datetime.now()
+        sources = [(X, y, self._age_days(store, shard, now))
+                   for shard, (X, y) in zip(manifest["shards"], store.iter_shards(manifest))]
+        sources += [(X, y, 0.0) for X, y in extra]
+
+        rng = np.random.default_rng(self.seed)
+        reservoirs: Dict[Any, Tuple[np.ndarray, np.ndarray]] = {}
+        class_rows: Dict[Any, int] = {}
+        offset = 0
+        for _, y, age_days in sources:
+            keys = np.log1p(-rng.random(len(y)))  # log(u), u in (0, 1]
+            if self.half_life_days:
+                keys /= 0.5 ** (age_days / self.half_life_days)
+            index = np.arange(offset, offset + len(y))
+            offset += len(y)
+            if not self.stratified:
+                reservoirs[None] = self._keep_top(reservoirs.get(None), keys, index, self.max_samples)
+                continue
+            labels = np.asarray(y)
+            for label in np.unique(labels):
+                in_class = labels == label
+                label = label.item()
+                class_rows[label] = class_rows.get(label, 0) + int(in_class.sum())
+                reservoirs[label] = self._keep_top(reservoirs.get(label), keys[in_class], index[in_class],
+                                                   self.max_samples)
+
+        if self.stratified:
+            quotas = self._class_quotas(class_rows, self.max_samples)
+            chosen = [self._keep_top(None, *reservoirs[label], quotas[label])[1] for label in reservoirs]
+            selected = np.sort(np.concatenate(chosen))
+        else:
+            selected = np.sort(reservoirs[None][1])
+
+        X, y = self._gather(manifest, sources, selected)
+        return X, y, self._summary(available, y)
+
+    @staticmethod
+    def _age_days(store: TrainingDataStore, shard: Dict[str, Any], now: datetime) -> float:
+        # The seed shard has no created_at; its file time stands in
+        if "created_at" in shard:
+            created = datetime.fromisoformat(shard["created_at"])
+        else:
+            created = datetime.fromtimestamp(os.path.getmtime(store._path(shard["x"])))
+        return max((now - created).total_seconds() / 86400, 0.0)
+
+    @staticmethod
+    def _keep_top(reservoir: Optional[Tuple[np.ndarray, np.ndarray]],
+                  keys: np.ndarray,
+                  index: np.ndarray,
+                  capacity: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Merge candidates into a reservoir and keep the ``capacity`` highest keys"""
+        if reservoir is not None:
+            keys = np.concatenate([reservoir[0], keys])
+            index = np.concatenate([reservoir[1], index])
+        if len(keys) > capacity:
+            top = np.argpartition(-keys, capacity - 1)[:capacity] if capacity else np.empty(0, dtype=np.intp)
+            keys, index = keys[top], index[top]
+        return keys, index
+
+    @staticmethod
+    def _class_quotas(class_rows: Dict[Any, int], max_samples: int) -> Dict[Any, int]:
+        """Split max_samples across classes; classes below the fair share keep every row"""
+        quotas = {}
+        remaining = max_samples
+        ordered = sorted(class_rows, key=class_rows.get)
+        for i, label in enumerate(ordered):
+            quotas[label] = min(class_rows[label], remaining // (len(ordered) - i))
+            remaining -= quotas[label]
+        return quotas
+
+    @staticmethod
+    def _gather(manifest: Dict[str, Any],
+                sources: List[Tuple[np.ndarray, np.ndarray, float]],
+                selected: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Copy the selected global row indices out of the sources, in order"""
+        X_out = np.empty((len(selected), manifest["n_features"]), dtype=np.dtype(manifest["x_dtype"]))
+        y_out = np.empty(len(selected), dtype=np.dtype(manifest["y_dtype"]))
+        start, filled = 0, 0
+        for X, y, _ in sources:
+            lo, hi = np.searchsorted(selected, [start, start + len(y)])
+            rows = selected[lo:hi] - start
+            X_out[filled:filled + len(rows)] = X[rows]
+            y_out[filled:filled + len(rows)] = y[rows]
+            filled += len(rows)
+            start += len(y)
+        return X_out, y_out
+
+    def _summary(self, available: int, y: np.ndarray) -> Dict[str, Any]:
+        labels, counts = np.unique(y, return_counts=True)
+        return {
+            "policy": self.describe(),
+            "available": available,
+            "selected": int(len(y)),
+            "class_counts": {label.item(): int(count) for label, count in zip(labels, counts)},
+        }
@@ -1,7 +1,24 @@
 """
 Preprocessing module - handles data cleaning and transformation
+
+Submodules are imported on first attribute access, so the inference API can
+use the encoder and serving artifacts without importing pandas/scikit-learn.
 """
 
-from .pipeline import PreprocessingPipeline
+import importlib
+
+_EXPORTS = {
+    "PreprocessingPipeline": ".pipeline",
+    "CompiledFeatureEncoder": ".encoder",
+    "ServingPreprocessor": ".artifacts",
+    "load_serving_preprocessor": ".artifacts",
+    "export_serving_artifacts": ".artifacts",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ["PreprocessingPipeline"]
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
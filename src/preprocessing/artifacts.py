@@ -0,0 +1,159 @@
+"""
+Serving Artifacts - Inference-only preprocessing loaded without scikit-learn
+
+The fitted scaler, label encoder and feature names are pickled scikit-learn
+objects, so unpickling them imports scikit-learn (and with it SciPy). The
+API only needs plain arrays from them, which are kept in a JSON sidecar:
+
+    data/processed/serving_preprocessing.json
+
+The sidecar records the sha256 of the pickles it was derived from and is
+rebuilt whenever they change. Build it ahead of deployment with
+
+    python -m src.preprocessing.artifacts [--processed-dir data/processed]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.config import PROCESSED_DATA_DIR
+from .encoder import CompiledFeatureEncoder
+
+logger = logging.getLogger("telco-model.artifacts")
+
+SERVING_ARTIFACTS_FILE = "serving_preprocessing.json"
+SOURCE_FILES = ("scaler.pkl", "label_encoder.pkl", "feature_names.pkl")
+
+
+class ScalerParams:
+    """Fitted StandardScaler reduced to the ``mean_`` / ``scale_`` arrays the encoder reads"""
+
+    def __init__(self, mean: Sequence[float], scale: Sequence[float]):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, X: Any) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class ServingPreprocessor:
+    """
+    Inference-only counterpart of PreprocessingPipeline
+
+    Exposes the attributes the API uses (``feature_names``, ``encoder``,
+    ``prepare_inference_features``) plus the class names in label order.
+    """
+
+    def __init__(self,
+                 feature_names: List[str],
+                 mean: Sequence[float],
+                 scale: Sequence[float],
+                 classes: Sequence[Any]):
+        self.feature_names = list(feature_names)
+        self.classes = list(classes)
+        self.scaler = ScalerParams(mean, scale)
+        self.encoder = CompiledFeatureEncoder(self.feature_names, self.scaler)
+
+    def prepare_inference_features(self, raw_records: List[Dict[str, Any]]) -> np.ndarray:
+        """Convert raw feature dictionaries into the scaled float32 matrix"""
+        if not raw_records:
+            raise ValueError("raw_records must contain at least one feature payload")
+        return self.encoder.encode_records(raw_records)
+
+
+def _source_hashes(processed_dir: Path) -> Dict[str, str]:
+    hashes = {}
+    for name in SOURCE_FILES:
+        path = processed_dir / name
+        if path.exists():
+            hashes[name] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return hashes
+
+
+def _payload_from_pickles(processed_dir: Path) -> Dict[str, Any]:
+    import pickle
+
+    loaded = {}
+    for name in SOURCE_FILES:
+        with open(processed_dir / name, 'rb') as f:
+            loaded[name] = pickle.load(f)
+    scaler, label_encoder = loaded["scaler.pkl"], loaded["label_encoder.pkl"]
+    feature_names = list(loaded["feature_names.pkl"])
+    return {
+        "feature_names": feature_names,
+        "mean": np.asarray(getattr(scaler, 'mean_', np.zeros(len(feature_names))), dtype=np.float64).tolist(),
+        "scale": np.asarray(getattr(scaler, 'scale_', np.ones(len(feature_names))), dtype=np.float64).tolist(),
+        "classes": np.asarray(label_encoder.classes_).tolist(),
+        "sources": _source_hashes(processed_dir),
+    }
+
+
+def _write_payload(path: Path, payload: Dict[str, Any]):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def export_serving_artifacts(processed_dir: Union[str, Path] = PROCESSED_DATA_DIR) -> Path:
+    """
+    Write the JSON sidecar from the pickled artifacts (imports scikit-learn)
+
+    Returns:
+        Path of the written sidecar
+    """
+    processed_dir = Path(processed_dir)
+    path = processed_dir / SERVING_ARTIFACTS_FILE
+    _write_payload(path, _payload_from_pickles(processed_dir))
+    return path
+
+
+def load_serving_preprocessor(processed_dir: Union[str, Path] = PROCESSED_DATA_DIR) -> ServingPreprocessor:
+    """
+    Load preprocessing for inference from the JSON sidecar
+
+    The sidecar is (re)built from the pickles when it is missing or was
+    derived from different pickles; only then is scikit-learn imported.
+
+    Returns:
+        ServingPreprocessor
+    """
+    processed_dir = Path(processed_dir)
+    path = processed_dir / SERVING_ARTIFACTS_FILE
+    payload: Optional[Dict[str, Any]] = None
+    if path.exists():
+        with open(path, 'r') as f:
+            payload = json.load(f)
+        sources = _source_hashes(processed_dir)
+        if sources and payload.get("sources") != sources:
+            logger.info("Preprocessing pickles changed since %s was written; rebuilding it", path.name)
+            payload = None
+
+    if payload is None:
+        logger.info("Building %s from the pickled preprocessing artifacts", path.name)
+        payload = _payload_from_pickles(processed_dir)
+        try:
+            _write_payload(path, payload)
+        except OSError:
+            # Read-only data directory: still serve, just rebuild on every start
+            logger.warning("Cannot write %s", path, exc_info=True)
+
+    return ServingPreprocessor(payload["feature_names"], payload["mean"], payload["scale"], payload["classes"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the JSON preprocessing sidecar used by the inference API")
+    parser.add_argument("--processed-dir", type=Path, default=PROCESSED_DATA_DIR)
+    args = parser.parse_args()
+    print(f"✓ Wrote {export_serving_artifacts(args.processed_dir)}")
+
+
+if __name__ == "__main__":
+    main()
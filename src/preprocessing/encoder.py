@@ -0,0 +1,196 @@
+"""
+Compiled Feature Encoder - pandas-free encoding and scaling for inference
+"""
+
+import numpy as np
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence
+from src.schemas.model_schemas import FeatureData
+
+if TYPE_CHECKING:
+    from sklearn.preprocessing import StandardScaler
+
+
+# Raw columns that are one-hot encoded (string fields of the raw schema)
+CATEGORICAL_FEATURES: List[str] = [
+    name for name, field in FeatureData.model_fields.items() if field.annotation is str
+]
+
+# Every level of each categorical feature in the raw data. The fitted
+# feature_names only hold the levels get_dummies(drop_first=True) kept, so the
+# dropped baseline is recovered from this list when the encoder is compiled
+KNOWN_CATEGORICAL_LEVELS: Dict[str, List[str]] = {
+    "plan_type": ["Postpaid", "Prepaid"],
+    "device_brand": ["Apple", "Huawei", "Oppo", "Realme", "Samsung", "Vivo", "Xiaomi"],
+}
+
+
+def dropped_baseline(encoded_levels: Sequence[str], known_levels: Sequence[str]) -> Optional[str]:
+    """
+    Level that drop_first removed, given the levels that kept a one-hot column
+
+    drop_first drops the first level in sort order, so the baseline is the known
+    level without a column that sorts before all of them. None if that is not
+    exactly one level (e.g. the training data also lacked a smaller level).
+    """
+    first = min(encoded_levels)
+    candidates = [level for level in known_levels if level not in encoded_levels and level < first]
+    return candidates[0] if len(candidates) == 1 else None
+
+
+class CompiledFeatureEncoder:
+    """
+    Maps raw feature payloads straight into the scaled float32 matrix
+    expected by the model, without building a DataFrame.
+
+    Everything that only depends on the fitted artifacts is resolved once:
+    - Column index of every numeric feature
+    - (column, level) -> column index lookup for one-hot features, and the
+      full level list including the dropped baseline (``baseline_levels``,
+      default: derived from the one-hot columns, see ``dropped_baseline``)
+    - Scaled value of 0 and 1 for every output column
+
+    Scaling uses the scaler's mean_/scale_ in float64 before the result is
+    stored as float32, so the output is identical to
+    ``scaler.transform(encoded_df).astype(np.float32)``.
+    """
+
+    def __init__(self,
+                 feature_names: List[str],
+                 scaler: "StandardScaler",
+                 categorical_columns: Optional[Sequence[str]] = None,
+                 baseline_levels: Optional[Mapping[str, str]] = None):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        categorical_columns = list(CATEGORICAL_FEATURES if categorical_columns is None else categorical_columns)
+
+        mean = getattr(scaler, 'mean_', None)
+        scale = getattr(scaler, 'scale_', None)
+        self.mean = np.zeros(self.n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = np.ones(self.n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+        if self.mean.shape != (self.n_features,) or self.scale.shape != (self.n_features,):
+            raise ValueError(
+                f"Scaler was fitted on {self.mean.shape[0]} features, expected {self.n_features}"
+            )
+
+        # Scaled value of a raw 0 / 1 for every output column
+        self.zero_row = ((0.0 - self.mean) / self.scale).astype(np.float32)
+        self.one_row = ((1.0 - self.mean) / self.scale).astype(np.float32)
+
+        # Resolve output columns into categorical levels and numeric features
+        self.categorical_index: Dict[str, Dict[str, int]] = {}
+        claimed = set()
+        for col in categorical_columns:
+            prefix = f"{col}_"
+            levels = {
+                name[len(prefix):]: j
+                for j, name in enumerate(self.feature_names)
+                if name.startswith(prefix)
+            }
+            if levels:
+                self.categorical_index[col] = levels
+                claimed.update(levels.values())
+
+        # Dropped baseline per categorical feature (None if it cannot be told)
+        # and every level with a known encoding, the baseline first
+        self.baseline_levels: Dict[str, Optional[str]] = {
+            col: (baseline_levels.get(col) if baseline_levels is not None
+                  else dropped_baseline(list(levels), KNOWN_CATEGORICAL_LEVELS.get(col, [])))
+            for col, levels in self.categorical_index.items()
+        }
+        self.categorical_levels: Dict[str, List[str]] = {}
+        for col, levels in self.categorical_index.items():
+            baseline = self.baseline_levels[col]
+            self.categorical_levels[col] = ([baseline] if baseline is not None and baseline not in levels else []) \
+                + list(levels)
+
+        self.numeric_index: Dict[str, int] = {
+            name: j for j, name in enumerate(self.feature_names) if j not in claimed
+        }
+
+    def _allocate(self, n_rows: int, out: Optional[np.ndarray]) -> np.ndarray:
+        """Return a float32 (n_rows, n_features) matrix filled with the scaled zero row"""
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=np.float32)
+        elif out.shape != (n_rows, self.n_features) or out.dtype != np.float32:
+            raise ValueError(f"out must be a float32 array of shape ({n_rows}, {self.n_features})")
+        out[:] = self.zero_row
+        return out
+
+    def _fill_numeric(self, out: np.ndarray, j: int, values: Any):
+        """Scale one numeric column into out[:, j]"""
+        if isinstance(values, np.ndarray) and values.dtype.kind in 'biuf':
+            column = values.astype(np.float64, copy=False)
+        else:
+            # A column that is missing everywhere keeps the padded zero,
+            # partially missing values become NaN (same as the DataFrame path)
+            if all(v is None for v in values):
+                return
+            try:
+                column = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"Feature '{self.feature_names[j]}' must be numeric") from exc
+        out[:, j] = (column - self.mean[j]) / self.scale[j]
+
+    def _fill_categorical(self, out: np.ndarray, levels: Dict[str, int], values: Any):
+        """Set the one-hot column of every known level; unknown levels stay at baseline"""
+        hits = np.fromiter(
+            (levels.get(v if isinstance(v, str) else str(v), -1) for v in values),
+            dtype=np.intp,
+            count=out.shape[0]
+        )
+        rows = np.flatnonzero(hits >= 0)
+        if rows.size:
+            cols = hits[rows]
+            out[rows, cols] = self.one_row[cols]
+
+    def encode_columns(self,
+                       columns: Mapping[str, Sequence[Any]],
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode a columnar batch (one sequence per raw feature)
+
+        Args:
+            columns: Mapping of raw feature name to its values
+            out: Optional preallocated float32 matrix to write into
+
+        Returns:
+            Scaled float32 feature matrix
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("All feature columns must have the same length")
+        n_rows = lengths.pop()
+        if n_rows == 0:
+            raise ValueError("columns must contain at least one row")
+
+        out = self._allocate(n_rows, out)
+        for col, j in self.numeric_index.items():
+            if col in columns:
+                self._fill_numeric(out, j, columns[col])
+        for col, levels in self.categorical_index.items():
+            if col in columns:
+                self._fill_categorical(out, levels, columns[col])
+        return out
+
+    def encode_records(self,
+                       records: Sequence[Mapping[str, Any]],
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encode a list of raw feature dictionaries (one per customer)
+
+        Args:
+            records: Raw feature dictionaries
+            out: Optional preallocated float32 matrix to write into
+
+        Returns:
+            Scaled float32 feature matrix
+        """
+        if not records:
+            raise ValueError("raw_records must contain at least one feature payload")
+
+        out = self._allocate(len(records), out)
+        for col, j in self.numeric_index.items():
+            self._fill_numeric(out, j, [r.get(col) for r in records])
+        for col, levels in self.categorical_index.items():
+            self._fill_categorical(out, levels, [r.get(col) for r in records])
+        return out
@@ -6,6 +6,7 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, Optional, List, Dict, Any
 from sklearn.preprocessing import StandardScaler, LabelEncoder
+from .encoder import CompiledFeatureEncoder
 
 
 class PreprocessingPipeline:
@@ -24,6 +25,12 @@ class PreprocessingPipeline:
         self.scaler = scaler
         self.label_encoder = label_encoder
         self.feature_names = feature_names
+        self.encoder = CompiledFeatureEncoder(feature_names, scaler)
+    
+    @property
+    def classes(self) -> List[Any]:
+        """Class names in label order"""
+        return list(self.label_encoder.classes_)
     
     def remove_outliers_iqr(self, df: pd.DataFrame, y: Optional[pd.Series] = None) -> Tuple[pd.DataFrame, Optional[pd.Series]]:
         """
@@ -161,12 +168,14 @@ class PreprocessingPipeline:
         return X_scaled, y_encoded
 
     def prepare_inference_features(self, raw_records: List[Dict[str, Any]]) -> np.ndarray:
-        """Convert raw feature dictionaries into scaled numpy arrays for inference."""
+        """
+        Convert raw feature dictionaries into scaled float32 arrays for inference.
+
+        Uses the compiled encoder instead of the DataFrame path: categorical
+        levels are always encoded against the training columns, so a
+        single-row payload keeps its plan_type/device_brand information.
+        """
         if not raw_records:
             raise ValueError("raw_records must contain at least one feature payload")
         
-        df = pd.DataFrame(raw_records)
-        df = df.drop(columns=['customer_id', 'target_offer'], errors='ignore')
-        df_encoded = self.encode_categorical(df)
-        X_scaled = self.scale_features(df_encoded)
-        return X_scaled
+        return self.encoder.encode_records(raw_records)
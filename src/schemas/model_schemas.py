@@ -26,7 +26,27 @@ class PredictResponse(BaseModel):
     """Response schema for prediction endpoint"""
     labels: Optional[List[int]] = Field(None, description="Predicted class labels")
     probabilities: Optional[List[List[float]]] = Field(None, description="Prediction probabilities")
+    top_labels: Optional[List[List[int]]] = Field(None, description="Labels of the top_k offers, best first")
+    top_offers: Optional[List[List[str]]] = Field(None, description="Names of the top_k offers, best first")
+    top_probabilities: Optional[List[List[float]]] = Field(None, description="Probabilities of the top_k offers")
     prediction_count: Optional[int] = Field(None, description="Current prediction count")
+    retrain_job_id: Optional[str] = Field(None, description="Background retrain job started by this request")
+
+
+class RecommendationRequest(BaseModel):
+    """Request schema for a live recommendation of one customer"""
+    raw_features: Dict[str, Any] = Field(..., description="Current raw features of the customer")
+
+
+class RecommendationResponse(BaseModel):
+    """Response schema for the recommendation endpoints"""
+    customer_id: str
+    label: int = Field(..., description="Predicted class label")
+    offer: Optional[str] = Field(None, description="Offer name of the predicted label")
+    confidence: float = Field(..., description="Probability of the predicted label")
+    probabilities: List[float] = Field(..., description="Per-class probabilities")
+    source: str = Field(..., description="table | live")
+    model_version: Optional[str] = Field(None, description="Version of the model that produced the scores")
 
 
 class TrainingData(BaseModel):
@@ -64,3 +84,16 @@ class RetrainResult(BaseModel):
     roc_auc: Optional[float] = None
     model_path: str
     onnx_path: str
+    mode: Optional[str] = Field(None, description="full | incremental")
+
+
+class RetrainJob(BaseModel):
+    """State of a background retraining job"""
+    job_id: str
+    status: str = Field("queued", description="queued | running | succeeded | failed | skipped")
+    trigger: str = Field("manual", description="manual | threshold")
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    result: Optional[RetrainResult] = None
+    error: Optional[str] = None
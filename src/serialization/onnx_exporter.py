@@ -2,8 +2,10 @@
 ONNX Exporter - Converts models to ONNX format
 """
 
+import os
 import onnx
-from typing import List
+from onnx import TensorProto, helper
+from typing import List, Optional
 from catboost import CatBoostClassifier
 
 
@@ -15,28 +17,112 @@ class ONNXExporter:
     @staticmethod
     def export_to_onnx(model: CatBoostClassifier,
                        onnx_path: str,
-                       feature_names: List[str]) -> bool:
+                       feature_names: List[str],
+                       tensor_probabilities: bool = True) -> bool:
         """
         Export CatBoost model to ONNX format
         
+        The file is written next to ``onnx_path`` and moved into place
+        atomically, so readers never see a partially written model.
+        
         Args:
             model: Trained CatBoost model
             onnx_path: Path to save ONNX file
             feature_names: List of feature names
+            tensor_probabilities: Replace the ZipMap output with a plain
+                [N, n_classes] float tensor (see strip_zipmap)
             
         Returns:
             True if successful
         """
+        tmp_path = f"{onnx_path}.tmp"
         try:
             model.save_model(
-                onnx_path,
+                tmp_path,
                 format='onnx',
                 export_parameters={'feature_names': feature_names}
             )
+            if tensor_probabilities:
+                onnx_model = onnx.load(tmp_path)
+                if ONNXExporter.strip_zipmap(onnx_model):
+                    onnx.save(onnx_model, tmp_path)
+            os.replace(tmp_path, onnx_path)
             return True
         except Exception as e:
             print(f"ONNX export failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+    
+    @staticmethod
+    def strip_zipmap(onnx_model: onnx.ModelProto) -> bool:
+        """
+        Drop ZipMap nodes so probabilities are returned as a [N, n_classes] float tensor
+        
+        CatBoost's graph ends in ZipMap, which turns the probability tensor into a
+        sequence of {class: probability} maps. The tensor feeding it is renamed to
+        the ZipMap output name, so the model keeps its "probabilities" output with
+        columns in class order. Graphs whose class labels are not 0..n-1 in order
+        are left untouched.
+        
+        Args:
+            onnx_model: Model to modify in place
+            
+        Returns:
+            True if the graph was changed
+        """
+        graph = onnx_model.graph
+        outputs = {o.name: o for o in graph.output}
+        changed = False
+        for node in list(graph.node):
+            if node.op_type != 'ZipMap' or node.output[0] not in outputs:
+                continue
+            attrs = {a.name: helper.get_attribute_value(a) for a in node.attribute}
+            class_labels = list(attrs.get('classlabels_int64s', []))
+            if class_labels != list(range(len(class_labels))):
+                continue
+            
+            tensor_name, output_name = node.input[0], node.output[0]
+            graph.node.remove(node)
+            for other in graph.node:
+                for i, name in enumerate(other.output):
+                    if name == tensor_name:
+                        other.output[i] = output_name
+                for i, name in enumerate(other.input):
+                    if name == tensor_name:
+                        other.input[i] = output_name
+            
+            old_output = outputs[output_name]
+            new_output = helper.make_tensor_value_info(
+                output_name, TensorProto.FLOAT, ['N', len(class_labels)]
+            )
+            index = list(graph.output).index(old_output)
+            graph.output.remove(old_output)
+            graph.output.insert(index, new_output)
+            changed = True
+        return changed
+    
+    @staticmethod
+    def convert_to_tensor_probabilities(onnx_path: str, output_path: Optional[str] = None) -> bool:
+        """
+        Rewrite an existing ONNX file so it outputs tensor probabilities
+        
+        Args:
+            onnx_path: Model exported with ZipMap
+            output_path: Where to write the result (defaults to onnx_path, replaced atomically)
+            
+        Returns:
+            True if the graph was changed
+        """
+        output_path = output_path or onnx_path
+        onnx_model = onnx.load(onnx_path)
+        if not ONNXExporter.strip_zipmap(onnx_model):
             return False
+        onnx.checker.check_model(onnx_model)
+        tmp_path = f"{output_path}.tmp"
+        onnx.save(onnx_model, tmp_path)
+        os.replace(tmp_path, output_path)
+        return True
     
     @staticmethod
     def validate_onnx(onnx_path: str) -> bool:
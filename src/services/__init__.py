@@ -1,7 +1,21 @@
 """
 Services module - orchestrates business logic
+
+Submodules are imported on first attribute access, so importing the job
+runner does not pull in the training stack.
 """
 
-from .retraining_service import RetrainingService
+import importlib
+
+_EXPORTS = {
+    "RetrainingService": ".retraining_service",
+    "RetrainJobRunner": ".retrain_worker",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ["RetrainingService"]
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
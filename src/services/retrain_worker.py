@@ -0,0 +1,248 @@
+"""
+Retrain Worker - Runs retraining jobs in the background, one at a time
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import uuid
+from collections import OrderedDict
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from src.schemas.model_schemas import RetrainJob, RetrainResult
+from src.config import (
+    MODEL_PKL_PATH,
+    MODEL_ONNX_PATH,
+    RETRAIN_LOCK_PATH,
+    RETRAIN_THRESHOLD,
+    RECOMMENDATION_REBUILD_ON_RETRAIN,
+    RECOMMENDATION_SOURCE_PATH,
+    RECOMMENDATION_TABLE_DIR,
+    METRICS_ENABLED,
+    METRICS_DIR,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, in-process single-flight still applies
+    fcntl = None
+
+logger = logging.getLogger("telco-model.retrain-worker")
+
+
+class RetrainInProgressError(RuntimeError):
+    """Raised when another process already holds the retrain lock"""
+
+
+@contextmanager
+def retrain_lock(lock_path: Union[str, Path] = RETRAIN_LOCK_PATH):
+    """Exclusive, non-blocking lock shared by every API worker process"""
+    if fcntl is None:
+        yield
+        return
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'w') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as exc:
+            raise RetrainInProgressError("Another retrain is already running") from exc
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def run_retrain_job(model_path: str = str(MODEL_PKL_PATH),
+                    onnx_path: str = str(MODEL_ONNX_PATH),
+                    retrain_threshold: int = RETRAIN_THRESHOLD) -> Dict[str, Any]:
+    """
+    Entry point executed inside the worker process
+
+    Imports the training stack lazily so the API process never pays for it.
+    After a successful retrain an existing recommendation table is rescored
+    here too, before the API is told to swap models.
+
+    Returns:
+        RetrainResult as a plain dict (picklable across processes)
+    """
+    from src.serving.metrics import METRICS
+    from src.services.retraining_service import RetrainingService
+
+    # Retrain step timings land in this process's own file, read by every API worker's /metrics
+    if METRICS_ENABLED:
+        METRICS.attach(METRICS_DIR)
+    with retrain_lock():
+        service = RetrainingService(
+            model_path=model_path,
+            onnx_path=onnx_path,
+            retrain_threshold=retrain_threshold
+        )
+        result = service.retrain()
+        if result.success and RECOMMENDATION_REBUILD_ON_RETRAIN:
+            refresh_recommendation_table(onnx_path)
+        METRICS.flush()
+        return result.model_dump()
+
+
+def refresh_recommendation_table(onnx_path: str = str(MODEL_ONNX_PATH)):
+    """Incrementally rebuild the recommendation table, if one has been built; failures are only logged"""
+    from src.serving.recommendations import read_manifest
+
+    if read_manifest(RECOMMENDATION_TABLE_DIR) is None or not RECOMMENDATION_SOURCE_PATH.exists():
+        return
+    try:
+        from src.build_recommendations import build_recommendation_table
+        build_recommendation_table(RECOMMENDATION_SOURCE_PATH, RECOMMENDATION_TABLE_DIR,
+                                   model_path=onnx_path, verbose=False)
+    except Exception:
+        logger.exception("Recommendation table rebuild failed; the API falls back to live inference")
+
+
+def create_retrain_executor(mode: str = "process") -> Executor:
+    """
+    Create the executor retrain jobs run on
+
+    Args:
+        mode: "process" for a dedicated spawned interpreter (CatBoost does not
+              compete with the API for the GIL), "thread" for an in-process thread
+
+    Returns:
+        Single-worker executor
+    """
+    if mode == "thread":
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrain")
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class RetrainJobRunner:
+    """
+    Background job runner for retraining
+
+    - Jobs run on a single-worker executor (a separate process by default),
+      recreated if the worker process dies
+    - Single-flight: while a job is queued or running, new requests return it
+    - Keeps a bounded history of finished jobs for status lookups
+    - Calls ``on_success`` on the event loop once a new model is ready,
+      ``on_failure`` when a job fails
+    """
+
+    def __init__(self,
+                 job_fn: Callable[..., Dict[str, Any]] = run_retrain_job,
+                 job_args: tuple = (),
+                 executor_factory: Callable[[], Executor] = create_retrain_executor,
+                 on_success: Optional[Callable[[RetrainJob], Union[None, Awaitable[None]]]] = None,
+                 on_failure: Optional[Callable[[RetrainJob], Union[None, Awaitable[None]]]] = None,
+                 history_size: int = 50):
+        self.job_fn = job_fn
+        self.job_args = job_args
+        self.executor_factory = executor_factory
+        self.executor: Optional[Executor] = None
+        self.on_success = on_success
+        self.on_failure = on_failure
+        self.history_size = history_size
+
+        self.jobs: "OrderedDict[str, RetrainJob]" = OrderedDict()
+        self._active: Optional[RetrainJob] = None
+        self._tasks: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        """Bind the runner to the running event loop"""
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        """Wait for the running job and shut the executor down"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    @property
+    def active_job(self) -> Optional[RetrainJob]:
+        return self._active
+
+    def get_job(self, job_id: str) -> Optional[RetrainJob]:
+        return self.jobs.get(job_id)
+
+    def submit(self, trigger: str = "manual") -> RetrainJob:
+        """
+        Queue a retrain unless one is already queued or running
+
+        Must be called from the event loop thread.
+
+        Args:
+            trigger: What requested the retrain ("manual" or "threshold")
+
+        Returns:
+            The new job, or the job that is already in flight
+        """
+        if self._loop is None:
+            raise RuntimeError("RetrainJobRunner.start() has not been called")
+        if self._active is not None:
+            return self._active
+
+        job = RetrainJob(job_id=uuid.uuid4().hex, trigger=trigger, created_at=_now())
+        self._active = job
+        self.jobs[job.job_id] = job
+        while len(self.jobs) > self.history_size:
+            self.jobs.popitem(last=False)
+
+        task = self._loop.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info("Queued retrain job %s (trigger=%s)", job.job_id, trigger)
+        return job
+
+    def submit_threadsafe(self, trigger: str = "threshold"):
+        """Request a retrain from a worker thread (e.g. the buffer logging executor)"""
+        if self._loop is None:
+            raise RuntimeError("RetrainJobRunner.start() has not been called")
+        self._loop.call_soon_threadsafe(self.submit, trigger)
+
+    async def _run(self, job: RetrainJob):
+        if self.executor is None:
+            self.executor = self.executor_factory()
+
+        job.status = "running"
+        job.started_at = _now()
+        try:
+            result = await self._loop.run_in_executor(self.executor, self.job_fn, *self.job_args)
+            job.result = RetrainResult(**result)
+            job.status = "succeeded" if job.result.success else "failed"
+        except RetrainInProgressError as exc:
+            job.status = "skipped"
+            job.error = str(exc)
+        except BrokenExecutor as exc:
+            logger.error("Retrain worker died during job %s; it will be restarted", job.job_id)
+            self.executor.shutdown(wait=False)
+            self.executor = None
+            job.status = "failed"
+            job.error = f"Retrain worker died: {exc}"
+        except Exception as exc:
+            logger.exception("Retrain job %s crashed", job.job_id)
+            job.status = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = _now()
+            self._active = None
+
+        logger.info("Retrain job %s finished with status %s", job.job_id, job.status)
+        hooks = {"succeeded": ("on_success", self.on_success), "failed": ("on_failure", self.on_failure)}
+        hook_name, hook = hooks.get(job.status, (None, None))
+        if hook is not None:
+            try:
+                outcome = hook(job)
+                if asyncio.iscoroutine(outcome):
+                    await outcome
+            except Exception:
+                logger.exception("%s hook failed for retrain job %s", hook_name, job.job_id)
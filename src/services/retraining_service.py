@@ -3,18 +3,44 @@ Retraining Service - Orchestrates the entire retraining workflow
 This is the GLUE that connects all modules
 """
 
-import numpy as np
+import json
+import os
+import shutil
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple, Union, Callable
+import numpy as np
+from src.data_ingestion.columnar import FEATURE_COLUMNS
 from src.data_ingestion.repository import DataRepository
-from src.data_ingestion.stats import PredictionCounter
+from src.data_ingestion.training_window import TrainingWindow
+from src.data_ingestion.stats import create_prediction_counter
 from src.preprocessing.pipeline import PreprocessingPipeline
-from src.training.trainer import ModelTrainer
-from src.serialization.onnx_exporter import ONNXExporter
 from src.storage.artifact_manager import ArtifactManager
 from src.schemas.model_schemas import RetrainResult
-from src.config import MODEL_PKL_PATH, MODEL_ONNX_PATH
+from src.serving.metrics import RETRAIN_RUNS_TOTAL, RETRAIN_STEP_SECONDS
+from src.config import (
+    MODEL_PKL_PATH,
+    MODEL_ONNX_PATH,
+    TRAINING_WINDOW_MAX_SAMPLES,
+    TRAINING_WINDOW_HALF_LIFE_DAYS,
+    TRAINING_WINDOW_STRATIFIED,
+    RETRAIN_MODE,
+    RETRAIN_STATE_PATH,
+    TRAINING_CONFIG_PATH,
+    INCREMENTAL_ITERATIONS,
+    INCREMENTAL_LEARNING_RATE,
+    INCREMENTAL_REPLAY_SAMPLES,
+    FULL_RETRAIN_EVERY,
+    INCREMENTAL_F1_TOLERANCE,
+)
+
+if TYPE_CHECKING:
+    from src.training.trainer import ModelTrainer
+    from src.serialization.onnx_exporter import ONNXExporter
+
+# Buffer columns a retrain reads: the FeatureData fields and the label
+BUFFER_TRAINING_COLUMNS = [*FEATURE_COLUMNS, 'target_offer']
 
 
 class RetrainingService:
@@ -26,26 +52,68 @@ class RetrainingService:
     def __init__(self,
                  model_path: Union[str, Path] = MODEL_PKL_PATH,
                  onnx_path: Union[str, Path] = MODEL_ONNX_PATH,
-                 retrain_threshold: int = 1000):
+                 retrain_threshold: int = 1000,
+                 on_threshold: Optional[Callable[[], Any]] = None,
+                 training_window: Optional[TrainingWindow] = None,
+                 retrain_mode: str = RETRAIN_MODE,
+                 state_path: Union[str, Path] = RETRAIN_STATE_PATH,
+                 training_config_path: Union[str, Path] = TRAINING_CONFIG_PATH):
         
         self.model_path = Path(model_path)
         self.onnx_path = Path(onnx_path)
         self.retrain_threshold = retrain_threshold
+        # When set, reaching the threshold hands off to this hook (e.g. a background
+        # job runner) instead of retraining inline
+        self.on_threshold = on_threshold
+        # Retention policy for the rows each retrain trains on (default: TRAINING_WINDOW_* settings)
+        self.training_window = training_window or TrainingWindow(
+            max_samples=TRAINING_WINDOW_MAX_SAMPLES,
+            half_life_days=TRAINING_WINDOW_HALF_LIFE_DAYS,
+            stratified=TRAINING_WINDOW_STRATIFIED
+        )
+        # "incremental" warm-starts from model_path between full rebuilds; the
+        # cycle count since the last full rebuild is kept in state_path
+        self.retrain_mode = retrain_mode
+        self.state_path = Path(state_path)
+        self.full_retrain_every = FULL_RETRAIN_EVERY
+        self.f1_tolerance = INCREMENTAL_F1_TOLERANCE
+        self.replay_samples = INCREMENTAL_REPLAY_SAMPLES
+        # CatBoost config saved by the model search (src/training/search.py), re-read every retrain
+        self.training_config_path = Path(training_config_path)
+        self.apply_balancing = True
         
         # Initialize all components
         self.data_repo = DataRepository()
-        self.counter = PredictionCounter()
+        self.counter = create_prediction_counter()
         self.artifact_manager = ArtifactManager()
         
         # Load preprocessing artifacts
         scaler, label_encoder, feature_names = self.data_repo.load_preprocessing_artifacts()
         self.preprocessing = PreprocessingPipeline(scaler, label_encoder, feature_names)
-        self.trainer = ModelTrainer()
-        self.onnx_exporter = ONNXExporter()
+        # Created on first retrain: CatBoost, imbalanced-learn and onnx are only imported then
+        self._trainer: Optional["ModelTrainer"] = None
+        self._onnx_exporter: Optional["ONNXExporter"] = None
         
         self.label_encoder = label_encoder
         self.feature_names = feature_names
     
+    @property
+    def trainer(self) -> "ModelTrainer":
+        if self._trainer is None:
+            from src.training.trainer import ModelTrainer
+            self._trainer = ModelTrainer(incremental_params={
+                'iterations': INCREMENTAL_ITERATIONS,
+                'learning_rate': INCREMENTAL_LEARNING_RATE
+            })
+        return self._trainer
+    
+    @property
+    def onnx_exporter(self) -> "ONNXExporter":
+        if self._onnx_exporter is None:
+            from src.serialization.onnx_exporter import ONNXExporter
+            self._onnx_exporter = ONNXExporter()
+        return self._onnx_exporter
+    
     def log_prediction(self, features_dict: dict, true_label: Optional[str] = None) -> bool:
         """
         Log a new prediction and check if retraining should be triggered
@@ -57,16 +125,46 @@ class RetrainingService:
         Returns:
             True if retraining was triggered
         """
+        return self.log_predictions_batch([features_dict], [true_label])
+    
+    def log_predictions_batch(self,
+                              features_list: List[dict],
+                              labels: Optional[List[Optional[str]]] = None) -> bool:
+        """
+        Log several predictions with one buffer write, one counter update and one threshold check
+        
+        A batch is never split: if it crosses the threshold partway through,
+        all of its rows are logged and counted first, and the single retrain it
+        triggers sees every row of the batch.
+        
+        Args:
+            features_list: Raw feature dictionaries, one per prediction
+            labels: Ground truth labels aligned with features_list (may be shorter)
+            
+        Returns:
+            True if retraining was triggered
+        """
+        if not features_list:
+            return False
+        
         # Append to buffer
-        self.data_repo.append_to_buffer(features_dict, true_label)
+        self.data_repo.append_batch_to_buffer(features_list, labels)
         
-        # Increment counter
-        new_count = self.counter.increment()
+        # Increment counter; only the call that crosses the threshold triggers a retrain
+        new_count, crossed = self.counter.increment_and_check(len(features_list), self.retrain_threshold)
         
         # Check threshold
-        if self.counter.should_retrain(self.retrain_threshold):
+        if crossed:
+            # Make every logged row visible to the retrain
+            self.data_repo.seal_buffer()
+            if self.on_threshold is not None:
+                self.on_threshold()
+                return True
             print(f"🔄 Retrain threshold reached ({new_count} predictions). Starting retraining...")
             result = self.retrain()
+            if not result.success:
+                # Try again on the next logged prediction
+                self.counter.rearm()
             return result.success
         
         return False
@@ -87,23 +185,26 @@ class RetrainingService:
             if backup_path:
                 print(f"✓ Backup saved: {backup_path}")
             
-            # Step 2: Load original training data
-            print("📊 Loading original training data...")
-            X_train_original, y_train_original = self.data_repo.load_original_training_data()
-            print(f"✓ Loaded {len(X_train_original)} original samples")
+            # Step 2: Inspect stored training data (read in step 5, together with the new rows)
+            load_started = time.perf_counter()
+            print("📊 Checking stored training data...")
+            stored = self.data_repo.training_data_stats()
+            print(f"✓ {stored['rows']} stored samples in {stored['shards']} shards")
             
             # Step 3: Load new data from buffer
             print("📥 Loading prediction buffer...")
-            df_new = self.data_repo.load_prediction_buffer()
+            buffer_segments = self.data_repo.list_buffer_segments()
+            df_new = self.data_repo.load_prediction_buffer(buffer_segments, columns=BUFFER_TRAINING_COLUMNS)
             
             if df_new is None:
                 error_msg = "⚠️ No new data found in buffer. Skipping retrain."
                 print(error_msg)
+                RETRAIN_RUNS_TOTAL.inc(label="skipped")
                 return RetrainResult(
                     success=False,
                     timestamp=timestamp,
                     new_samples=0,
-                    total_samples=len(X_train_original),
+                    total_samples=stored['rows'],
                     f1_weighted=0.0,
                     f1_macro=0.0,
                     model_path=str(self.model_path),
@@ -113,11 +214,12 @@ class RetrainingService:
             if 'target_offer' not in df_new.columns:
                 error_msg = "⚠️ No target labels in buffer. Cannot retrain without ground truth."
                 print(error_msg)
+                RETRAIN_RUNS_TOTAL.inc(label="skipped")
                 return RetrainResult(
                     success=False,
                     timestamp=timestamp,
                     new_samples=len(df_new),
-                    total_samples=len(X_train_original),
+                    total_samples=stored['rows'],
                     f1_weighted=0.0,
                     f1_macro=0.0,
                     model_path=str(self.model_path),
@@ -133,11 +235,12 @@ class RetrainingService:
             if X_new is None or y_new is None or len(X_new) == 0:
                 error_msg = "⚠️ No valid data after preprocessing. Skipping retrain."
                 print(error_msg)
+                RETRAIN_RUNS_TOTAL.inc(label="skipped")
                 return RetrainResult(
                     success=False,
                     timestamp=timestamp,
                     new_samples=0,
-                    total_samples=len(X_train_original),
+                    total_samples=stored['rows'],
                     f1_weighted=0.0,
                     f1_macro=0.0,
                     model_path=str(self.model_path),
@@ -146,20 +249,49 @@ class RetrainingService:
             
             print(f"✓ Preprocessed {len(X_new)} valid samples")
             
-            # Step 5: Combine data
-            print("🔗 Combining original and new data...")
-            X_combined = np.vstack([X_train_original, X_new])
-            y_combined = np.concatenate([y_train_original, y_new])
-            print(f"✓ Combined dataset: {len(X_combined)} samples")
+            # Step 5-6: Warm-start from the current model when the schedule allows,
+            # otherwise (or if the update regresses) train a new model
+            model_config = self._apply_training_config()
+            mode, mode_reason = self._choose_retrain_mode()
+            new_model = None
+            if mode == "incremental":
+                X_replay, y_replay, replay_window = self._load_replay_data()
+                RETRAIN_STEP_SECONDS.observe(time.perf_counter() - load_started, "load")
+                new_model, metrics, mode_reason = self._train_incremental(X_new, y_new, X_replay, y_replay,
+                                                                          mode_reason)
+                class_counts = dict(replay_window["class_counts"])
+                for label, count in zip(*np.unique(y_new, return_counts=True)):
+                    class_counts[label.item()] = class_counts.get(label.item(), 0) + int(count)
+                window = {
+                    "policy": f"{len(X_new)} new rows + replay of {replay_window['policy']}",
+                    "available": replay_window["available"] + len(X_new),
+                    "selected": replay_window["selected"] + len(X_new),
+                    "class_counts": class_counts,
+                }
+                if new_model is None:
+                    mode = "full"
+                    load_started = time.perf_counter()
             
-            # Step 6: Train new model
-            print("🚀 Training new model with SMOTE balancing...")
-            new_model, metrics = self.trainer.train_and_evaluate(
-                X_combined,
-                y_combined,
-                self.label_encoder,
-                apply_balancing=True
-            )
+            if new_model is None:
+                # Step 5: Combine data under the training window (stored shards are memory-mapped,
+                # only the selected rows are copied)
+                print(f"🔗 Combining stored and new data: {self.training_window.describe()}...")
+                X_combined, y_combined, window = self.data_repo.load_training_window(
+                    self.training_window, extra=[(X_new, y_new)]
+                )
+                print(f"✓ Combined dataset: {window['selected']} of {window['available']} samples")
+                RETRAIN_STEP_SECONDS.observe(time.perf_counter() - load_started, "load")
+                
+                # Step 6: Train new model
+                print(f"🚀 Training new model, {model_config} ({mode_reason})...")
+                new_model, metrics = self.trainer.train_and_evaluate(
+                    X_combined,
+                    y_combined,
+                    self.label_encoder,
+                    apply_balancing=self.apply_balancing
+                )
+                for step, seconds in self.trainer.last_step_seconds.items():
+                    RETRAIN_STEP_SECONDS.observe(seconds, step)
             
             print(f"\n📈 Training Results:")
             print(f"   F1-Weighted: {metrics['f1_weighted']:.4f}")
@@ -169,32 +301,54 @@ class RetrainingService:
             
             # Step 7: Save new model
             print("\n💾 Saving new model...")
-            save_success = self.artifact_manager.save_model(new_model, self.model_path)
-            if save_success:
-                print(f"✓ Model saved: {self.model_path}")
+            with RETRAIN_STEP_SECONDS.time("save"):
+                save_success = self.artifact_manager.save_model(new_model, self.model_path)
+            if not save_success:
+                # Nothing was replaced: the buffer stays in place for the next attempt
+                raise RuntimeError(f"Could not save the new model to {self.model_path}")
+            print(f"✓ Model saved: {self.model_path}")
             
             # Step 8: Export to ONNX
             print("📤 Exporting to ONNX...")
-            onnx_success = self.onnx_exporter.export_to_onnx(
-                new_model,
-                str(self.onnx_path),
-                self.feature_names
-            )
-            if onnx_success:
-                print(f"✓ ONNX model saved: {self.onnx_path}")
+            with RETRAIN_STEP_SECONDS.time("onnx_export"):
+                onnx_success = self.onnx_exporter.export_to_onnx(
+                    new_model,
+                    str(self.onnx_path),
+                    self.feature_names
+                )
+            if not onnx_success:
+                # Put the previous pickle back so it matches the ONNX model that is still served
+                if backup_path:
+                    self._restore_model(backup_path)
+                raise RuntimeError(f"Could not export the new model to {self.onnx_path}")
+            print(f"✓ ONNX model saved: {self.onnx_path}")
             
-            # Step 9: Update training data for next cycle
+            # Step 9: Update training data for next cycle (new rows only; history is not rewritten)
             print("💾 Updating training data for next cycle...")
-            self.data_repo.save_training_data(X_combined, y_combined)
-            print("✓ Training data updated")
+            shard = self.data_repo.append_training_data(X_new, y_new, source=f"retrain {timestamp}")
+            print(f"✓ Training data updated (shard {shard['id']}, {shard['rows']} rows)")
+            state = self._load_retrain_state()
+            self._save_retrain_state({
+                "last_mode": mode,
+                "last_retrain": timestamp,
+                "incremental_cycles": state.get("incremental_cycles", 0) + 1 if mode == "incremental" else 0,
+            })
             
             # Step 10: Log results
+            roc_auc_str = f"{metrics['roc_auc']:.4f}" if metrics['roc_auc'] else 'N/A'
+            baseline_str = (f" (previous model on the same validation rows: {metrics['baseline_f1_weighted']:.4f})"
+                            if mode == "incremental" else "")
             log_content = f"""Retrain Timestamp: {timestamp}
 New samples added: {len(X_new)}
-Total training samples: {len(X_combined)}
-F1-Weighted: {metrics['f1_weighted']:.4f}
+Retrain mode: {mode} ({mode_reason})
+Model config: {model_config}
+Training window: {window['policy']}
+Available samples: {window['available']}
+Total training samples: {window['selected']}
+Samples per class: {window['class_counts']}
+F1-Weighted: {metrics['f1_weighted']:.4f}{baseline_str}
 F1-Macro: {metrics['f1_macro']:.4f}
-ROC-AUC: {metrics['roc_auc']:.4f if metrics['roc_auc'] else 'N/A'}
+ROC-AUC: {roc_auc_str}
 
 Classification Report:
 {metrics['classification_report']}
@@ -202,30 +356,33 @@ Classification Report:
             log_path = self.artifact_manager.save_log(log_content, timestamp)
             print(f"✓ Log saved: {log_path}")
             
-            # Step 11: Cleanup
+            # Step 11: Cleanup (keep rows logged while this retrain was running)
             print("\n🧹 Cleaning up...")
-            self.data_repo.clear_buffer()
-            self.counter.reset()
+            self.data_repo.remove_buffer_segments(buffer_segments)
+            self.counter.decrement(len(df_new))
             self.artifact_manager.cleanup_old_backups(keep_latest=5)
-            print("✓ Buffer cleared, counter reset, old backups cleaned")
+            print("✓ Consumed buffer rows removed, counter updated, old backups cleaned")
             
             print("\n🎉 Retraining completed successfully!")
+            RETRAIN_RUNS_TOTAL.inc(label="success")
             
             return RetrainResult(
                 success=True,
                 timestamp=timestamp,
                 new_samples=len(X_new),
-                total_samples=len(X_combined),
+                total_samples=window['selected'],
                 f1_weighted=metrics['f1_weighted'],
                 f1_macro=metrics['f1_macro'],
                 roc_auc=metrics['roc_auc'],
                 model_path=str(self.model_path),
-                onnx_path=str(self.onnx_path)
+                onnx_path=str(self.onnx_path),
+                mode=mode
             )
             
         except Exception as e:
             error_msg = f"❌ Retraining failed: {str(e)}"
             print(error_msg)
+            RETRAIN_RUNS_TOTAL.inc(label="failed")
             
             # Log error
             error_log = f"""Retrain Failed: {timestamp}
@@ -244,6 +401,99 @@ Error: {str(e)}
                 onnx_path=str(self.onnx_path)
             )
     
+    def _restore_model(self, backup_path: str):
+        """Atomically copy a backup over the current model"""
+        tmp_path = self.model_path.with_name(f"{self.model_path.name}.tmp")
+        shutil.copy2(backup_path, tmp_path)
+        os.replace(tmp_path, self.model_path)
+        print(f"↩️ Restored previous model from {backup_path}")
+    
+    def _apply_training_config(self) -> str:
+        """Use the searched CatBoost config, if a model search saved one; returns a description for the log"""
+        from src.training.search import load_retrain_config
+        
+        searched = load_retrain_config(self.training_config_path)
+        if searched is None:
+            self.apply_balancing = True
+            return "default parameters with SMOTE balancing"
+        from src.training.trainer import DEFAULT_MODEL_PARAMS
+        
+        self.trainer.model_params = {**DEFAULT_MODEL_PARAMS, **searched['params']}
+        self.apply_balancing = searched['balanced']
+        return f"searched config {searched['model']}"
+    
+    def _choose_retrain_mode(self) -> Tuple[str, str]:
+        """Retrain mode for this cycle and why"""
+        if self.retrain_mode != "incremental":
+            return "full", f"RETRAIN_MODE={self.retrain_mode}"
+        if not self.model_path.exists():
+            return "full", "no current model to continue from"
+        cycles = self._load_retrain_state().get("incremental_cycles", 0)
+        if cycles >= self.full_retrain_every:
+            return "full", f"scheduled rebuild after {cycles} incremental cycles"
+        return "incremental", f"cycle {cycles + 1} of {self.full_retrain_every} before a full rebuild"
+    
+    def _load_replay_data(self) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        """Stratified sample of stored rows trained on with the new ones, so every class is present"""
+        replay = TrainingWindow(
+            max_samples=self.replay_samples,
+            half_life_days=self.training_window.half_life_days,
+            stratified=True
+        )
+        print(f"🔗 Sampling stored rows to replay with the new data: {replay.describe()}...")
+        X_replay, y_replay, window = self.data_repo.load_training_window(replay)
+        print(f"✓ Replay sample: {window['selected']} of {window['available']} stored samples")
+        return X_replay, y_replay, window
+    
+    def _train_incremental(self,
+                           X_new: np.ndarray,
+                           y_new: np.ndarray,
+                           X_replay: np.ndarray,
+                           y_replay: np.ndarray,
+                           reason: str) -> Tuple[Any, Optional[Dict[str, Any]], str]:
+        """
+        Continue the current model on the new and replayed rows
+        
+        Returns:
+            (model, metrics, reason), or (None, None, fallback reason) when the
+            model cannot be continued or the update lowers validation F1 by
+            more than f1_tolerance
+        """
+        print(f"🚀 Continuing current model ({reason})...")
+        try:
+            current = self.artifact_manager.load_model(self.model_path)
+            model, metrics = self.trainer.train_incremental(
+                current, X_new, y_new, self.label_encoder,
+                X_replay=X_replay, y_replay=y_replay, apply_balancing=self.apply_balancing
+            )
+        except ValueError as e:
+            print(f"⚠️ Incremental update not possible: {e}. Falling back to a full rebuild.")
+            return None, None, f"fallback: {e}"
+        for step, seconds in self.trainer.last_step_seconds.items():
+            RETRAIN_STEP_SECONDS.observe(seconds, step)
+        
+        previous = metrics['baseline_f1_weighted']
+        if metrics['f1_weighted'] < previous - self.f1_tolerance:
+            print(f"⚠️ Validation F1 regressed ({metrics['f1_weighted']:.4f} < {previous:.4f}). "
+                  "Falling back to a full rebuild.")
+            return None, None, (f"fallback: incremental F1-weighted {metrics['f1_weighted']:.4f} "
+                                f"regressed from {previous:.4f}")
+        return model, metrics, reason
+    
+    def _load_retrain_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+    
+    def _save_retrain_state(self, state: Dict[str, Any]):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        staging = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(staging, self.state_path)
+    
     def get_status(self) -> Dict[str, Any]:
         """
         Get current retraining status
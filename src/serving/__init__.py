@@ -0,0 +1,31 @@
+"""
+Serving module - online inference helpers used by the API
+
+Submodules are imported on first attribute access (the NumPy backend needs
+SciPy, the ONNX backend does not).
+"""
+
+import importlib
+
+_EXPORTS = {
+    "MicroBatcher": ".batcher",
+    "BatcherOverloadedError": ".batcher",
+    "create_session": ".session",
+    "OptimizedModelCache": ".session",
+    "ModelRegistry": ".registry",
+    "ModelHandle": ".registry",
+    "PredictionCache": ".result_cache",
+    "RecommendationTable": ".recommendations",
+    "OfferEligibility": ".ranking",
+    "ObliviousTreeEnsemble": ".oblivious",
+    "ObliviousTreeSession": ".oblivious",
+    "create_oblivious_session": ".oblivious",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,236 @@
+"""
+Micro Batcher - Coalesces concurrent predict calls into one model run
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from .metrics import BATCH_QUEUE_DEPTH, BATCH_QUEUE_WAIT_SECONDS, BATCH_REJECTED_TOTAL
+
+logger = logging.getLogger("telco-model.batcher")
+
+# Model runner: (stacked float32 matrix, model the rows were submitted for) -> {output name: per-row values}
+RunFn = Callable[[np.ndarray, Any], Dict[str, Any]]
+
+
+class BatcherOverloadedError(RuntimeError):
+    """Raised when the batching queue is full"""
+
+
+@dataclass
+class _PendingRequest:
+    inputs: np.ndarray
+    model: Any
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rows(self) -> int:
+        return self.inputs.shape[0]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent inference requests and runs them as a single batch
+
+    - Waits up to ``window_ms`` (or until ``max_batch_size`` rows) once
+      concurrent traffic is observed; a lone request is dispatched at once
+    - Stacks inputs into one tensor, runs the model once and scatters the
+      per-row outputs back to each caller
+    - Only requests submitted for the same model share a batch, so a request
+      runs on the model it captured even across a hot swap
+    - Bounded queue (``max_queue_depth``) so overload fails fast
+    - Records queue-wait time and batch sizes for tuning the window
+    - Runs the model on ``executor`` (inline when None) so the event loop
+      keeps collecting the next batch meanwhile
+    """
+
+    def __init__(self,
+                 run_fn: RunFn,
+                 window_ms: float = 2.0,
+                 max_batch_size: int = 64,
+                 max_queue_depth: int = 1024,
+                 stats_window: int = 2048,
+                 executor: Optional[Executor] = None):
+        self.run_fn = run_fn
+        self.executor = executor
+        self.window = window_ms / 1000.0
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.max_queue_depth = max_queue_depth
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._carry: Optional[_PendingRequest] = None
+        self._batch_ema = 1.0
+
+        self._wait_ms = deque(maxlen=stats_window)
+        self._batch_rows = deque(maxlen=stats_window)
+        self.total_batches = 0
+        self.total_requests = 0
+        self.rejected_requests = 0
+
+    async def start(self):
+        """Start the dispatch loop on the running event loop"""
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_depth)
+            self._task = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        """Stop the dispatch loop, failing any request still queued"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        pending = [self._carry] if self._carry else []
+        self._carry = None
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for item in pending:
+            if not item.future.done():
+                item.future.set_exception(BatcherOverloadedError("Batcher stopped"))
+
+    async def submit(self, inputs: np.ndarray, model: Any = None) -> Dict[str, Any]:
+        """
+        Queue a request and wait for its slice of the batched outputs
+
+        Args:
+            inputs: float32 feature matrix for this request
+            model: Model (e.g. ONNX session) to run it on, passed through to ``run_fn``
+
+        Returns:
+            Dict of output name -> values for this request's rows
+        """
+        if self._task is None:
+            raise RuntimeError("MicroBatcher.start() has not been called")
+        item = _PendingRequest(inputs, model, asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.rejected_requests += 1
+            BATCH_REJECTED_TOTAL.inc()
+            raise BatcherOverloadedError(f"Batch queue full ({self.max_queue_depth} pending requests)")
+        BATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        return await item.future
+
+    async def _next_batch(self) -> List[_PendingRequest]:
+        """Collect the next batch according to the window / size policy"""
+        first = self._carry or await self._queue.get()
+        self._carry = None
+        batch, rows = [first], first.rows
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while rows < self.max_batch_size:
+            if not self._queue.empty():
+                item = self._queue.get_nowait()
+            elif len(batch) == 1 and self._batch_ema < 1.5:
+                # No concurrency observed recently: don't add latency
+                break
+            else:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if rows + item.rows > self.max_batch_size or item.model is not first.model:
+                self._carry = item
+                break
+            batch.append(item)
+            rows += item.rows
+        return batch
+
+    async def _dispatch_loop(self):
+        while True:
+            batch = await self._next_batch()
+            await self._run_batch(batch)
+
+    async def _run_model(self, inputs: np.ndarray, model: Any) -> Dict[str, Any]:
+        if self.executor is None:
+            return self.run_fn(inputs, model)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.run_fn, inputs, model)
+
+    async def _run_batch(self, batch: List[_PendingRequest]):
+        """Run one stacked inference and resolve every waiting future"""
+        dispatched_at = time.perf_counter()
+        for item in batch:
+            self._wait_ms.append((dispatched_at - item.enqueued_at) * 1000)
+            BATCH_QUEUE_WAIT_SECONDS.observe(dispatched_at - item.enqueued_at)
+        BATCH_QUEUE_DEPTH.set(self._queue.qsize())
+        rows = sum(item.rows for item in batch)
+        self._batch_rows.append(rows)
+        self._batch_ema = 0.8 * self._batch_ema + 0.2 * len(batch)
+        self.total_batches += 1
+        self.total_requests += len(batch)
+
+        try:
+            stacked = batch[0].inputs if len(batch) == 1 else np.concatenate([i.inputs for i in batch])
+            outs = await self._run_model(stacked, batch[0].model)
+        except Exception as exc:
+            if len(batch) == 1:
+                self._resolve(batch[0], error=exc)
+                return
+            # One malformed request must not fail its neighbours: retry each alone
+            logger.warning("Batched inference failed for %d requests; retrying individually", len(batch))
+            for item in batch:
+                try:
+                    self._resolve(item, await self._run_model(item.inputs, item.model))
+                except Exception as exc:
+                    self._resolve(item, error=exc)
+            return
+
+        offset = 0
+        for item in batch:
+            end = offset + item.rows
+            self._resolve(item, {name: values[offset:end] for name, values in outs.items()})
+            offset = end
+
+    @staticmethod
+    def _resolve(item: _PendingRequest,
+                 outs: Optional[Dict[str, Any]] = None,
+                 error: Optional[BaseException] = None):
+        if item.future.done():
+            return
+        if error is not None:
+            item.future.set_exception(error)
+        else:
+            item.future.set_result(outs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get batching statistics
+
+        Returns:
+            Dictionary with queue depth, batch sizes and queue-wait percentiles
+        """
+        waits = np.asarray(self._wait_ms) if self._wait_ms else np.zeros(1)
+        rows = np.asarray(self._batch_rows) if self._batch_rows else np.zeros(1)
+        return {
+            'window_ms': self.window_ms,
+            'max_batch_size': self.max_batch_size,
+            'max_queue_depth': self.max_queue_depth,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'total_batches': self.total_batches,
+            'total_requests': self.total_requests,
+            'rejected_requests': self.rejected_requests,
+            'avg_batch_rows': round(float(rows.mean()), 2),
+            'queue_wait_ms': {
+                'p50': round(float(np.percentile(waits, 50)), 3),
+                'p95': round(float(np.percentile(waits, 95)), 3),
+                'p99': round(float(np.percentile(waits, 99)), 3),
+                'max': round(float(waits.max()), 3),
+            },
+        }
@@ -0,0 +1,249 @@
+"""
+Wire Formats - Binary and columnar request/response bodies for /predict
+
+Request bodies (``Content-Type``):
+
+- ``application/json``: PredictRequest (unchanged)
+- ``application/x-npy``: one .npy array of scaled inputs, shape (n_rows, n_features)
+- ``application/octet-stream``: raw little-endian float32 scaled inputs, row-major
+- ``application/x-npz``: columnar raw features, one array per feature (``np.savez``);
+  string columns must be unicode (``dtype=str``) arrays, object arrays are rejected
+- ``application/vnd.apache.arrow.stream``: columnar raw features as an Arrow IPC stream (pyarrow)
+- ``application/msgpack``: columnar raw features as a map of feature -> list, or
+  -> bin holding little-endian float64 values (msgpack)
+
+Columnar bodies may carry a ``true_label`` column, which is logged like
+``true_labels`` in a JSON request.
+
+Scaled-input bodies are decoded with ``np.frombuffer`` straight over the request
+bytes: when they already are C-ordered little-endian float32 the array handed
+to ``session.run`` shares memory with the body.
+
+Responses (``Accept``): JSON by default, ``application/x-npy`` for the float32
+probability matrix alone (labels are its argmax), or ``application/msgpack``
+for ``{labels, probabilities, shape, prediction_count, retrain_job_id}`` with
+int32/float32 little-endian buffers.
+"""
+
+import importlib.util
+import io
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+JSON_MEDIA_TYPE = "application/json"
+NPY_MEDIA_TYPE = "application/x-npy"
+FLOAT32_MEDIA_TYPE = "application/octet-stream"
+NPZ_MEDIA_TYPE = "application/x-npz"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+BODY_FORMATS = {
+    JSON_MEDIA_TYPE: "json",
+    NPY_MEDIA_TYPE: "npy",
+    FLOAT32_MEDIA_TYPE: "float32",
+    NPZ_MEDIA_TYPE: "npz",
+    ARROW_MEDIA_TYPE: "arrow",
+    **{media_type: "msgpack" for media_type in MSGPACK_MEDIA_TYPES},
+}
+
+LABEL_COLUMN = "true_label"
+
+_F32 = np.dtype('<f4')
+_HAS_MSGPACK = importlib.util.find_spec("msgpack") is not None
+
+
+class UnsupportedMediaTypeError(ValueError):
+    """Raised for a content type /predict cannot decode (HTTP 415)"""
+
+
+@dataclass
+class DecodedBody:
+    """Scaled inputs (``X``) or raw feature columns (``columns``) decoded from a binary body"""
+    X: Optional[np.ndarray] = None
+    columns: Optional[Dict[str, np.ndarray]] = None
+    true_labels: Optional[List[Any]] = None
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Columns as one dict per row (for the retrain buffer)"""
+        names = list(self.columns)
+        values = [np.asarray(self.columns[name]).tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or "").split(";")[0].strip().lower()
+
+
+def detect_body_format(content_type: Optional[str]) -> Optional[str]:
+    """
+    Map a Content-Type header to a body format name
+
+    Returns:
+        "json", "npy", "float32", "npz", "arrow" or "msgpack"; "json" when the
+        header is missing, None when the media type is not supported
+    """
+    media_type = _media_type(content_type)
+    if not media_type:
+        return "json"
+    return BODY_FORMATS.get(media_type)
+
+
+def negotiate_response_format(accept: Optional[str]) -> str:
+    """Pick "npy", "msgpack" (if installed) or "json" from an Accept header (first supported type wins)"""
+    for part in (accept or "").split(","):
+        media_type = _media_type(part)
+        if media_type == NPY_MEDIA_TYPE:
+            return "npy"
+        if media_type in MSGPACK_MEDIA_TYPES and _HAS_MSGPACK:
+            return "msgpack"
+        if media_type in (JSON_MEDIA_TYPE, "*/*", "application/*"):
+            return "json"
+    return "json"
+
+
+def _as_model_input(X: np.ndarray) -> np.ndarray:
+    # No copy when X is already C-ordered little-endian float32
+    if X.dtype != _F32 or not X.flags.c_contiguous:
+        X = np.ascontiguousarray(X, dtype=_F32)
+    return X
+
+
+def decode_npy(body: bytes) -> np.ndarray:
+    """
+    Decode a .npy body without copying its data
+
+    Raises:
+        ValueError: If the body is not a 2D numeric .npy array
+    """
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as exc:
+        raise ValueError(f"Invalid .npy body: {exc}") from exc
+    if dtype.hasobject or dtype.kind not in "fiu":
+        raise ValueError(f".npy body must hold numbers, got dtype {dtype}")
+    if len(shape) != 2:
+        raise ValueError(f".npy body must be 2D (rows, features), got shape {shape}")
+    count = int(np.prod(shape))
+    offset = stream.tell()
+    if len(body) - offset < count * dtype.itemsize:
+        raise ValueError(".npy body is truncated")
+    X = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+    return _as_model_input(X.reshape(shape, order='F' if fortran_order else 'C'))
+
+
+def decode_float32(body: bytes, n_features: int) -> np.ndarray:
+    """Decode a raw little-endian float32 row-major body into (n_rows, n_features)"""
+    if len(body) == 0 or len(body) % (4 * n_features):
+        raise ValueError(f"Body length {len(body)} is not a whole number of {n_features}-feature float32 rows")
+    return np.frombuffer(body, dtype=_F32).reshape(-1, n_features)
+
+
+def _split_labels(columns: Dict[str, Any]) -> DecodedBody:
+    labels = columns.pop(LABEL_COLUMN, None)
+    if not columns:
+        raise ValueError("Columnar body has no feature columns")
+    return DecodedBody(columns=columns, true_labels=None if labels is None else np.asarray(labels).tolist())
+
+
+def decode_npz_columns(body: bytes) -> DecodedBody:
+    """Decode an ``np.savez`` archive with one array per raw feature"""
+    try:
+        with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+            columns = {name: archive[name] for name in archive.files}
+    except (ValueError, OSError) as exc:
+        raise ValueError(f"Invalid .npz body: {exc}") from exc
+    return _split_labels(columns)
+
+
+def decode_arrow_columns(body: bytes) -> DecodedBody:
+    """Decode an Arrow IPC stream; numeric columns without nulls are not copied"""
+    try:
+        import pyarrow as pa
+    except ImportError as exc:
+        raise UnsupportedMediaTypeError("Arrow bodies require pyarrow (pip install pyarrow)") from exc
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as exc:
+        raise ValueError(f"Invalid Arrow stream: {exc}") from exc
+    columns = {
+        name: table.column(name).combine_chunks().to_numpy(zero_copy_only=False)
+        for name in table.column_names
+    }
+    return _split_labels(columns)
+
+
+def decode_msgpack_columns(body: bytes) -> DecodedBody:
+    """Decode a msgpack map of feature -> list of values, or -> bin of little-endian float64"""
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise UnsupportedMediaTypeError("msgpack bodies require msgpack (pip install msgpack)") from exc
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+        raise ValueError(f"Invalid msgpack body: {exc}") from exc
+    if not isinstance(payload, dict):
+        raise ValueError("msgpack body must be a map of feature name to values")
+    columns = {}
+    for name, values in payload.items():
+        if isinstance(values, bytes):
+            if len(values) % 8:
+                raise ValueError(f"Column '{name}': bin length must be a multiple of 8 (float64)")
+            values = np.frombuffer(values, dtype='<f8')
+        columns[name] = values
+    return _split_labels(columns)
+
+
+def decode_body(body_format: str, body: bytes, n_features: int) -> DecodedBody:
+    """
+    Decode a non-JSON /predict body
+
+    Raises:
+        ValueError: Malformed body (HTTP 400)
+        UnsupportedMediaTypeError: Format whose optional dependency is missing (HTTP 415)
+    """
+    if body_format == "npy":
+        X = decode_npy(body)
+    elif body_format == "float32":
+        X = decode_float32(body, n_features)
+    elif body_format == "npz":
+        return decode_npz_columns(body)
+    elif body_format == "arrow":
+        return decode_arrow_columns(body)
+    elif body_format == "msgpack":
+        return decode_msgpack_columns(body)
+    else:
+        raise UnsupportedMediaTypeError(f"Unsupported body format: {body_format}")
+    if X.shape[0] == 0:
+        raise ValueError("Body contains no rows")
+    if X.shape[1] != n_features:
+        raise ValueError(f"Expected {n_features} features per row, got {X.shape[1]}")
+    return DecodedBody(X=X)
+
+
+def encode_npy(array: np.ndarray) -> bytes:
+    """Serialize an array as .npy bytes (header + raw data)"""
+    array = np.ascontiguousarray(array)
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, np.lib.format.header_data_from_array_1_0(array))
+    return b"".join([header.getvalue(), array.data])
+
+
+def encode_msgpack_response(labels: np.ndarray, probabilities: np.ndarray, **fields: Any) -> bytes:
+    """msgpack map with int32 labels and float32 probabilities as little-endian buffers"""
+    import msgpack
+
+    probabilities = np.ascontiguousarray(probabilities, dtype=_F32)
+    return msgpack.packb({
+        "labels": np.ascontiguousarray(labels, dtype='<i4').tobytes(),
+        "probabilities": probabilities.tobytes(),
+        "shape": list(probabilities.shape),
+        **fields,
+    })
@@ -0,0 +1,492 @@
+"""
+Metrics - Prometheus text-format counters, gauges and histograms shared across processes
+
+Every process writes its values into its own memory-mapped file in
+METRICS_DIR (``metrics-<layout>-<pid>.db``, one float64 slot per counter,
+gauge, histogram bucket and sum). ``GET /metrics`` reads the files of all
+processes, so any API worker reports the totals of every worker and of the
+retrain process:
+
+- counters and histograms are summed over all files, including processes
+  that have exited (totals never go backwards when a worker restarts)
+- gauges are summed (or maxed) over live processes only
+- ``attach`` folds the counters and histograms of exited processes into one
+  ``metrics-<layout>-archive.db`` and deletes their files, so restarts and
+  retrain jobs do not leave a file each behind. Folding holds an exclusive
+  ``flock`` on ``metrics-<layout>.lock``; scrapes hold it shared
+
+Counter increments and histogram observations are appended to a
+per-metric list (one list extend, no lock, no bisect on the request path)
+and folded into the slots with NumPy by a background thread every
+``FLUSH_INTERVAL_SECONDS``, before a scrape, and inline only once
+``MAX_PENDING`` updates are waiting. Another worker's values are therefore
+up to a second old. Gauges are written straight to the file. Until
+``attach`` is called, values live in process memory only; after
+``disable`` updates are dropped.
+
+The metrics of the service are defined at the bottom of this module.
+"""
+
+import atexit
+import hashlib
+import mmap
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: files of exited processes are kept (and still summed)
+    fcntl = None
+
+FILE_PREFIX = "metrics"
+ARCHIVE = "archive"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+FLUSH_INTERVAL_SECONDS = 1.0
+MAX_PENDING = 65536
+
+# Seconds; sub-millisecond resolution for the hot path, minutes for retrain steps
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RETRAIN_BUCKETS = (0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+ROW_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+
+_FILE_PATTERN = re.compile(rf"^{FILE_PREFIX}-([0-9a-f]+)-(\d+|{ARCHIVE})\.db$")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    """One metric family: ``width`` slots per label value, starting at ``offset``"""
+
+    kind = ""
+    width = 1
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str,
+                 label: Optional[Tuple[str, Sequence[str]]] = None):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.label_name, self.label_values = (label[0], tuple(label[1])) if label else (None, ("",))
+        self.enabled = True
+        # Flat [slot, value, ...] pairs not yet folded into the slots;
+        # ``pending += (slot, value)`` is one atomic list extend under the GIL
+        self._pending: List[float] = []
+        self.offset = registry._allocate(self, self.width * len(self.label_values))
+        self._offsets: Dict[str, int] = {value: self.offset + i * self.width
+                                         for i, value in enumerate(self.label_values)}
+
+    def _labels(self, value: str, extra: str = "") -> str:
+        pairs = [f'{self.label_name}="{value}"'] if self.label_name else []
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _record(self, slot: int, value: float):
+        pending = self._pending
+        pending += (slot, value)
+        if len(pending) >= 2 * MAX_PENDING:
+            self.flush()
+
+    def flush(self):
+        """Fold pending updates into this process's slots"""
+        pending = self._pending
+        if not pending:
+            return
+        registry = self.registry
+        with registry._lock:
+            n = len(pending)
+            # Only the first n entries are taken: pairs added by other threads land after them
+            batch = np.array(pending[:n], dtype=np.float64).reshape(-1, 2)
+            del pending[:n]
+            if registry._array is not None and n:
+                self._fold(registry._array, batch[:, 0].astype(np.intp), batch[:, 1])
+
+    def _fold(self, values: np.ndarray, slots: np.ndarray, updates: np.ndarray):
+        np.add.at(values, slots, updates)
+
+    def render(self, values: np.ndarray) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for label_value, start in self._offsets.items():
+            lines.append(f"{self.name}{self._labels(label_value)} {_format_value(values[start])}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic total (summed over all processes)"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, label: str = ""):
+        if self.enabled:
+            self._record(self._offsets[label], amount)
+
+
+class Gauge(_Metric):
+    """Current value per process, summed (``aggregate="sum"``) or maxed over live processes"""
+
+    kind = "gauge"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str,
+                 label: Optional[Tuple[str, Sequence[str]]] = None, aggregate: str = "sum"):
+        if aggregate not in ("sum", "max"):
+            raise ValueError(f"aggregate must be 'sum' or 'max', got {aggregate!r}")
+        self.aggregate = aggregate
+        super().__init__(registry, name, documentation, label)
+
+    def set(self, value: float, label: str = ""):
+        values = self.registry._array
+        if values is not None:
+            values[self._offsets[label]] = value
+
+
+class Histogram(_Metric):
+    """Bucketed observations: one slot per bucket (incl. +Inf) plus the sum"""
+
+    kind = "histogram"
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str,
+                 label: Optional[Tuple[str, Sequence[str]]] = None,
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(float(b) for b in buckets)
+        self.width = len(self.buckets) + 2
+        self._bounds = np.array(self.buckets)
+        super().__init__(registry, name, documentation, label)
+
+    def observe(self, value: float, label: str = ""):
+        if self.enabled:
+            self._record(self._offsets[label], value)
+
+    def _fold(self, values: np.ndarray, starts: np.ndarray, observed: np.ndarray):
+        # Bucket i counts observations <= buckets[i]; index len(buckets) is +Inf
+        np.add.at(values, starts + np.searchsorted(self._bounds, observed, side='left'), 1.0)
+        np.add.at(values, starts + self.width - 1, observed)
+
+    def time(self, label: str = "") -> "_Timer":
+        """Context manager observing the duration of its block"""
+        return _Timer(self, label)
+
+    def render(self, values: np.ndarray) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for label_value, start in self._offsets.items():
+            cumulative = np.cumsum(values[start:start + len(bounds)])
+            for bound, count in zip(bounds, cumulative):
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{self._labels(label_value, le)} {_format_value(count)}")
+            lines.append(f"{self.name}_sum{self._labels(label_value)} {_format_value(values[start + self.width - 1])}")
+            lines.append(f"{self.name}_count{self._labels(label_value)} {_format_value(cumulative[-1])}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "label", "started")
+
+    def __init__(self, histogram: Histogram, label: str):
+        self.histogram = histogram
+        self.label = label
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.label)
+
+
+class StageTimer:
+    """
+    Times consecutive stages of one request into a labelled histogram
+
+        timer = StageTimer(PREDICT_STAGE_SECONDS)
+        ...parse...
+        timer.mark("parse")
+        ...run the model...
+        timer.mark("inference")
+        timer.finish(PREDICT_DURATION_SECONDS)
+    """
+
+    __slots__ = ("histogram", "pending", "offsets", "started", "last")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+        # Same as histogram.observe, minus a call per stage
+        self.pending = histogram._pending if histogram.enabled else None
+        self.offsets = histogram._offsets
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, stage: str):
+        """Record ``stage``: the time since the previous mark (or the start)"""
+        now = time.perf_counter()
+        pending = self.pending
+        if pending is not None:
+            pending += (self.offsets[stage], now - self.last)
+            if len(pending) >= 2 * MAX_PENDING:
+                self.histogram.flush()
+        self.last = now
+
+    def finish(self, total: Optional[Histogram] = None) -> float:
+        """Seconds since the timer was created, also observed into ``total`` when given"""
+        elapsed = time.perf_counter() - self.started
+        if total is not None:
+            total.observe(elapsed)
+        return elapsed
+
+
+class MetricsRegistry:
+    """
+    Metric definitions plus this process's float64 slots
+
+    Define every metric at import time (each process must compute the same
+    layout), then ``attach(directory)`` to move the slots into a shared file.
+    A process forked after ``attach`` gets a file of its own.
+    """
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.size = 0
+        self.directory: Optional[Path] = None
+        self.path: Optional[Path] = None
+        self._lock = threading.Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._array: Optional[np.ndarray] = np.zeros(0)
+        self._flusher: Optional[threading.Thread] = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    # Definitions
+
+    def counter(self, name: str, documentation: str, label: Optional[Tuple[str, Sequence[str]]] = None) -> Counter:
+        return Counter(self, name, documentation, label)
+
+    def gauge(self, name: str, documentation: str, label: Optional[Tuple[str, Sequence[str]]] = None,
+              aggregate: str = "sum") -> Gauge:
+        return Gauge(self, name, documentation, label, aggregate)
+
+    def histogram(self, name: str, documentation: str, label: Optional[Tuple[str, Sequence[str]]] = None,
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return Histogram(self, name, documentation, label, buckets)
+
+    def _allocate(self, metric: _Metric, width: int) -> int:
+        if self.path is not None:
+            raise RuntimeError("Metrics must be defined before the registry is attached to a directory")
+        offset = self.size
+        self.metrics.append(metric)
+        self.size += width
+        if self._array is not None:
+            self._array = np.concatenate([self._array, np.zeros(width)])
+        else:
+            metric.enabled = False
+        return offset
+
+    @property
+    def layout(self) -> str:
+        """Digest of the metric definitions; files with another layout are ignored"""
+        spec = "|".join(f"{m.name}:{m.kind}:{m.label_values}:{getattr(m, 'buckets', '')}" for m in self.metrics)
+        return hashlib.blake2b(spec.encode(), digest_size=4).hexdigest()
+
+    # Storage
+
+    @property
+    def enabled(self) -> bool:
+        return self._array is not None
+
+    def attach(self, directory: Union[str, Path], flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        """Move this process's slots into ``<directory>/metrics-<layout>-<pid>.db`` (exited processes are compacted first)"""
+        directory = Path(directory)
+        path = directory / f"{FILE_PREFIX}-{self.layout}-{os.getpid()}.db"
+        if path == self.path or not self.enabled:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        self._compact(directory)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != self.size * 8:
+                os.ftruncate(fd, self.size * 8)
+            mapped = mmap.mmap(fd, self.size * 8)
+        finally:
+            os.close(fd)
+        values = np.frombuffer(mapped, dtype=np.float64)
+        self.flush()
+        with self._lock:
+            # Keep what was recorded before attaching (a reused pid's file keeps its totals too)
+            values += self._array
+            self._array, self._mmap = values, mapped
+        self.directory, self.path = directory, path
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, args=(flush_interval,),
+                                             name="metrics-flush", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def disable(self):
+        """Drop all updates from now on (METRICS_ENABLED=false)"""
+        for metric in self.metrics:
+            metric.enabled = False
+            metric._pending.clear()
+        self._array = None
+
+    def flush(self):
+        """Fold every metric's pending updates into the slots"""
+        for metric in self.metrics:
+            metric.flush()
+
+    def _flush_loop(self, interval: float):
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def _after_fork(self):
+        # The parent flushes what was pending at fork time; the child starts from zero
+        self._lock = threading.Lock()
+        self._flusher, self._mmap, self.path = None, None, None
+        for metric in self.metrics:
+            metric._pending.clear()
+        if self.enabled:
+            self._array = np.zeros(self.size)
+            if self.directory is not None:
+                self.attach(self.directory)
+
+    @contextmanager
+    def _directory_lock(self, directory: Path, exclusive: bool) -> Iterator[None]:
+        """flock on the layout's lock file: exclusive while compacting, shared while reading"""
+        if fcntl is None:
+            yield
+            return
+        with open(directory / f"{FILE_PREFIX}-{self.layout}.lock", 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _gauge_slots(self) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        for metric in self.metrics:
+            if isinstance(metric, Gauge):
+                mask[metric.offset:metric.offset + metric.width * len(metric.label_values)] = True
+        return mask
+
+    def _compact(self, directory: Path):
+        """Fold the counter and histogram slots of exited processes into the archive file and delete their files"""
+        if fcntl is None:
+            return
+        layout = self.layout
+        archive = directory / f"{FILE_PREFIX}-{layout}-{ARCHIVE}.db"
+        with self._directory_lock(directory, exclusive=True):
+            dead = []
+            for path in directory.glob(f"{FILE_PREFIX}-{layout}-*.db"):
+                match = _FILE_PATTERN.match(path.name)
+                if match is None or match.group(2) == ARCHIVE:
+                    continue
+                pid = int(match.group(2))
+                if pid != os.getpid() and not _pid_alive(pid):
+                    dead.append(path)
+            if not dead:
+                return
+            totals = np.fromfile(archive, dtype=np.float64) if archive.exists() else np.zeros(self.size)
+            if totals.size != self.size:
+                totals = np.zeros(self.size)
+            for path in dead:
+                values = np.fromfile(path, dtype=np.float64)
+                if values.size == self.size:
+                    totals += values
+            # Gauges of exited processes are never reported
+            totals[self._gauge_slots()] = 0
+            staging = archive.with_name(f".{archive.name}.{os.getpid()}.tmp")
+            totals.tofile(staging)
+            os.replace(staging, archive)
+            for path in dead:
+                path.unlink(missing_ok=True)
+
+    # Exposition
+
+    def collect(self) -> np.ndarray:
+        """Slot values aggregated over every process writing to the attached directory"""
+        self.flush()
+        own = self._array.copy() if self._array is not None else np.zeros(self.size)
+        if self.directory is None:
+            return own
+        totals, gauges_sum, gauges_max = np.zeros(self.size), np.zeros(self.size), np.zeros(self.size)
+        layout = self.layout
+        with self._directory_lock(self.directory, exclusive=False):
+            for path in self.directory.glob(f"{FILE_PREFIX}-{layout}-*.db"):
+                match = _FILE_PATTERN.match(path.name)
+                if match is None:
+                    continue
+                values = own if path == self.path else np.fromfile(path, dtype=np.float64)
+                if values.size != self.size:
+                    continue
+                totals += values
+                pid = None if match.group(2) == ARCHIVE else int(match.group(2))
+                if pid is not None and (pid == os.getpid() or _pid_alive(pid)):
+                    gauges_sum += values
+                    np.maximum(gauges_max, values, out=gauges_max)
+        for metric in self.metrics:
+            if isinstance(metric, Gauge):
+                span = slice(metric.offset, metric.offset + metric.width * len(metric.label_values))
+                totals[span] = (gauges_max if metric.aggregate == "max" else gauges_sum)[span]
+        return totals
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        values = self.collect()
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+PREDICT_STAGES = ("parse", "prepare", "inference", "logging", "counter", "output")
+RETRAIN_STEPS = ("load", "smote", "fit", "evaluate", "save", "onnx_export")
+
+PREDICT_STAGE_SECONDS = METRICS.histogram(
+    "telco_predict_stage_seconds",
+    "POST /predict time per stage: body read + validation (parse), feature matrix (prepare), "
+    "model incl. batching/cache (inference), buffer logging, prediction count read (counter), response (output)",
+    label=("stage", PREDICT_STAGES),
+)
+PREDICT_DURATION_SECONDS = METRICS.histogram(
+    "telco_predict_duration_seconds", "Total handler time of successful POST /predict calls"
+)
+PREDICT_ROWS_TOTAL = METRICS.counter("telco_predict_rows_total", "Rows scored by POST /predict")
+INFERENCE_RUN_SECONDS = METRICS.histogram(
+    "telco_inference_run_seconds", "session.run time per model call (one call per micro-batch)"
+)
+INFERENCE_BATCH_ROWS = METRICS.histogram(
+    "telco_inference_batch_rows", "Rows per model call", buckets=ROW_BUCKETS
+)
+BATCH_QUEUE_DEPTH = METRICS.gauge("telco_batch_queue_depth", "Requests waiting in the micro-batch queue")
+BATCH_QUEUE_WAIT_SECONDS = METRICS.histogram(
+    "telco_batch_queue_wait_seconds", "Time requests wait in the micro-batch queue"
+)
+BATCH_REJECTED_TOTAL = METRICS.counter("telco_batch_rejected_total", "Requests rejected because the queue was full")
+MODEL_SWAPS_TOTAL = METRICS.counter("telco_model_swaps_total", "Models loaded, warmed up and swapped in")
+MODEL_LOAD_FAILURES_TOTAL = METRICS.counter(
+    "telco_model_load_failures_total", "Candidate models rejected (the live model was kept)"
+)
+RETRAIN_STEP_SECONDS = METRICS.histogram(
+    "telco_retrain_step_seconds", "Retrain time per step", label=("step", RETRAIN_STEPS), buckets=RETRAIN_BUCKETS
+)
+RETRAIN_RUNS_TOTAL = METRICS.counter(
+    "telco_retrain_runs_total", "Retrain runs by outcome", label=("outcome", ("success", "skipped", "failed"))
+)
@@ -0,0 +1,235 @@
+"""
+Oblivious Tree Backend - Vectorized NumPy evaluation of CatBoost SymmetricTree models
+"""
+
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+from scipy import sparse
+
+# Mirrors onnxruntime's NodeArg (name, shape, type) so the registry can treat both backends alike
+TensorInfo = namedtuple("TensorInfo", ["name", "shape", "type"])
+
+# Upper bound on rows x trees handled at once (bounds memory per call)
+_CHUNK_BUDGET = 1 << 22
+# Below this many rows x trees, gathering leaf rows beats building the sparse one-hot matrix
+_GATHER_MAX_HITS = 1 << 14
+
+
+class ObliviousTreeEnsemble:
+    """
+    CatBoost oblivious-tree ensemble stored as contiguous arrays
+
+    Every tree of depth d applies the same d splits to all rows, so a leaf
+    index is just the d split bits of a row read as an integer. Scoring a
+    batch is a few whole-batch operations, whatever the number of trees:
+
+    1. Binarize each distinct (feature, border) pair once: X[:, f] > border
+    2. Leaf index of every (row, tree): one sparse product of the bits with
+       a (trees x splits) matrix holding 2^level for each split a tree uses
+    3. Sum of the selected leaf values: one sparse product of a
+       (rows x leaves) one-hot matrix with the leaf-value table (small
+       batches gather the leaf rows directly instead)
+    4. Scale/bias, then softmax (MultiClass) or sigmoid (Logloss)
+
+    All arithmetic on leaf values is float64, like CatBoost's own predict_proba.
+    """
+
+    def __init__(self, model_json: Dict[str, Any]):
+        params = model_json.get("model_info", {}).get("params", {})
+        self.loss_function = params.get("loss_function", {}).get("type", "MultiClass")
+        if self.loss_function not in ("MultiClass", "Logloss"):
+            raise ValueError(f"Unsupported loss function for the NumPy backend: {self.loss_function}")
+
+        if set(model_json["features_info"]) - {"float_features"}:
+            raise ValueError("The NumPy backend only supports float features")
+        float_features = model_json["features_info"].get("float_features", [])
+        self.n_features = max((f["flat_feature_index"] for f in float_features), default=-1) + 1
+        flat_index = {f["feature_index"]: f["flat_feature_index"] for f in float_features}
+        # NaN fails "x > border" (goes left) unless the feature was trained with nan_mode='Max'
+        nan_as_max = {f["flat_feature_index"] for f in float_features if f.get("nan_value_treatment") == "Max"}
+
+        scale, bias = model_json.get("scale_and_bias", [1.0, [0.0]])
+        self.scale = float(scale)
+        self.bias = np.atleast_1d(np.asarray(bias, dtype=np.float64))
+        self.n_outputs = len(self.bias)
+
+        # Distinct (feature, border) pairs; tree levels refer to them by index
+        split_ids: Dict[tuple, int] = {}
+        rows, cols, weights, offsets, leaves = [], [], [], [], []
+        n_leaves = 0
+        for t, tree in enumerate(model_json["oblivious_trees"]):
+            for level, split in enumerate(tree["splits"]):
+                if split.get("split_type", "FloatFeature") != "FloatFeature":
+                    raise ValueError(f"Unsupported split type for the NumPy backend: {split['split_type']}")
+                key = (flat_index[split["float_feature_index"]], float(split["border"]))
+                rows.append(t)
+                cols.append(split_ids.setdefault(key, len(split_ids)))
+                weights.append(float(1 << level))
+            offsets.append(n_leaves)
+            n_leaves += 1 << len(tree["splits"])
+            leaves.append(np.asarray(tree["leaf_values"], dtype=np.float64).reshape(-1, self.n_outputs))
+
+        pairs = sorted(split_ids, key=split_ids.get)
+        self.n_trees = len(offsets)
+        self.split_features = np.array([f for f, _ in pairs], dtype=np.intp)
+        self.split_borders = np.array([b for _, b in pairs], dtype=np.float64)
+        self.split_nan_as_max = np.array([f in nan_as_max for f, _ in pairs], dtype=bool)
+        self.level_weights = sparse.csr_matrix(
+            (np.array(weights, dtype=np.float32), (rows, cols)), shape=(self.n_trees, len(pairs))
+        )
+        self.leaf_offsets = np.array(offsets, dtype=np.int32)
+        self.leaf_values = np.ascontiguousarray(
+            np.concatenate(leaves) if leaves else np.zeros((0, self.n_outputs))
+        )
+        # Shared read-only vector of ones, only ever replaced by a longer one (under the lock);
+        # each call keeps its own reference, so concurrent INFERENCE_WORKERS threads are safe
+        self._ones = np.ones(self.n_trees)
+        self._ones_lock = threading.Lock()
+
+    @classmethod
+    def from_json(cls, path: Union[str, Path]) -> "ObliviousTreeEnsemble":
+        """Load CatBoost's JSON export (``model.save_model(path, format='json')``)"""
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_catboost(cls, model: Any) -> "ObliviousTreeEnsemble":
+        """Convert a trained CatBoostClassifier (e.g. loaded from best_model.pkl)"""
+        fd, tmp_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            model.save_model(tmp_path, format="json")
+            return cls.from_json(tmp_path)
+        finally:
+            os.remove(tmp_path)
+
+    @classmethod
+    def from_bytes(cls, model_bytes: bytes) -> "ObliviousTreeEnsemble":
+        """Load from the bytes of a JSON export or a joblib-pickled CatBoostClassifier"""
+        if model_bytes.lstrip()[:1] == b"{":
+            return cls(json.loads(model_bytes))
+        import joblib
+        return cls.from_catboost(joblib.load(io.BytesIO(model_bytes)))
+
+    def _raw_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows = X.shape[0]
+        values = X[:, self.split_features]
+        bits = values > self.split_borders
+        if self.split_nan_as_max.any():
+            bits |= np.isnan(values) & self.split_nan_as_max
+
+        # (trees x splits) @ (splits x rows) -> exact small integers in float32
+        leaf = np.asarray((self.level_weights @ bits.T.astype(np.float32)).T, dtype=np.int32, order='C')
+        leaf += self.leaf_offsets
+
+        n_hits = n_rows * self.n_trees
+        if n_hits <= _GATHER_MAX_HITS:
+            # (trees,) @ (rows, trees, outputs): the sum over trees runs in BLAS
+            raw = self._ones[:self.n_trees] @ self.leaf_values.take(leaf, axis=0)
+            return raw * self.scale + self.bias
+        one_hot = sparse.csr_matrix(
+            (self._ones_for(n_hits)[:n_hits], leaf.ravel(), np.arange(0, n_hits + 1, self.n_trees, dtype=np.int64)),
+            shape=(n_rows, self.leaf_values.shape[0])
+        )
+        raw = one_hot @ self.leaf_values
+        return raw * self.scale + self.bias
+
+    def _ones_for(self, n: int) -> np.ndarray:
+        """At least ``n`` ones; grows the shared vector to the largest chunk seen, once"""
+        ones = self._ones
+        if ones.size < n:
+            with self._ones_lock:
+                if self._ones.size < n:
+                    self._ones = np.ones(n)
+                ones = self._ones
+        return ones
+
+    def predict_raw(self, X: np.ndarray) -> np.ndarray:
+        """
+        Raw formula values (CatBoost's RawFormulaVal)
+
+        Args:
+            X: (n_rows, n_features) feature matrix
+
+        Returns:
+            (n_rows, n_outputs) float64 array
+        """
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected a 2D input with {self.n_features} features, got shape {X.shape}")
+        step = max(1, _CHUNK_BUDGET // max(1, self.n_trees))
+        if X.shape[0] <= step:
+            return self._raw_chunk(X)
+        return np.concatenate([self._raw_chunk(X[i:i + step]) for i in range(0, X.shape[0], step)])
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities, same as ``CatBoostClassifier.predict_proba``
+
+        Returns:
+            (n_rows, n_classes) float64 array
+        """
+        raw = self.predict_raw(X)
+        if self.loss_function == "Logloss":
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        raw -= raw.max(axis=1, keepdims=True)
+        np.exp(raw, out=raw)
+        raw /= raw.sum(axis=1, keepdims=True)
+        return raw
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Class indices (argmax of predict_proba)"""
+        return self.predict_proba(X).argmax(axis=1).astype(np.int64)
+
+
+class ObliviousTreeSession:
+    """
+    Exposes an ObliviousTreeEnsemble through the subset of the
+    ``onnxruntime.InferenceSession`` API the serving layer uses, with the
+    same outputs as a tensor-probability ONNX export: ``label`` and
+    ``probabilities``
+    """
+
+    def __init__(self, ensemble: ObliviousTreeEnsemble, input_name: str = "features"):
+        self.ensemble = ensemble
+        n_classes = 2 if ensemble.loss_function == "Logloss" else ensemble.n_outputs
+        self._inputs = [TensorInfo(input_name, ["N", ensemble.n_features], "tensor(float)")]
+        self._outputs = [
+            TensorInfo("label", ["N"], "tensor(int64)"),
+            TensorInfo("probabilities", ["N", n_classes], "tensor(double)"),
+        ]
+
+    def get_inputs(self) -> List[TensorInfo]:
+        return list(self._inputs)
+
+    def get_outputs(self) -> List[TensorInfo]:
+        return list(self._outputs)
+
+    def run(self, output_names: Optional[Sequence[str]], input_feed: Dict[str, np.ndarray]) -> List[np.ndarray]:
+        probabilities = self.ensemble.predict_proba(input_feed[self._inputs[0].name])
+        outputs = {"label": probabilities.argmax(axis=1).astype(np.int64), "probabilities": probabilities}
+        return [outputs[name] for name in (output_names or [o.name for o in self._outputs])]
+
+
+def create_oblivious_session(model: Union[str, Path, bytes]) -> ObliviousTreeSession:
+    """
+    Create a NumPy-backed session from a pickled CatBoostClassifier or its JSON export
+
+    Args:
+        model: Path to best_model.pkl / a .json export, or the file's bytes
+
+    Returns:
+        ObliviousTreeSession
+    """
+    if not isinstance(model, bytes):
+        model = Path(model).read_bytes()
+    return ObliviousTreeSession(ObliviousTreeEnsemble.from_bytes(model))
@@ -0,0 +1,122 @@
+"""
+Recommendation Table - Precomputed per-customer predictions, memory-mapped
+
+Built by ``python -m src.build_recommendations`` (and after every retrain)
+into RECOMMENDATION_TABLE_DIR:
+
+    manifest.json                  live build: model version, classes, row count
+    build-<timestamp>/
+        customer_ids.npy           fixed-width unicode ids, row order
+        labels.npy                 int16 top class per customer
+        probabilities.npy          float16/float32 [n_customers, n_classes]
+        features.npy               float32 encoded features the row was scored from
+
+Every build goes into a fresh directory and ``manifest.json`` is replaced
+atomically, so readers never see a half-written table. The arrays are
+opened with ``mmap_mode='r'``: memory is shared between API workers through
+the page cache and only rows that are read are paged in.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger("telco-model.recommendations")
+
+MANIFEST_FILE = "manifest.json"
+CUSTOMER_IDS_FILE = "customer_ids.npy"
+LABELS_FILE = "labels.npy"
+PROBABILITIES_FILE = "probabilities.npy"
+FEATURES_FILE = "features.npy"
+TABLE_FILES = (CUSTOMER_IDS_FILE, LABELS_FILE, PROBABILITIES_FILE, FEATURES_FILE)
+
+
+def read_manifest(table_dir: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Manifest of the live build, or None if no table has been built"""
+    path = Path(table_dir) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_manifest(table_dir: Union[str, Path], manifest: Dict[str, Any]):
+    """Atomically point the table directory at a finished build"""
+    path = Path(table_dir) / MANIFEST_FILE
+    tmp_path = path.with_name(f"{MANIFEST_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RecommendationTable:
+    """
+    Read-only view of one table build
+
+    ``row(customer_id)`` is a dict lookup; the row's label and probabilities
+    are read straight from the memory-mapped arrays.
+    """
+
+    def __init__(self, build_dir: Union[str, Path], manifest: Dict[str, Any]):
+        self.build_dir = Path(build_dir)
+        self.manifest = manifest
+        self.model_version: str = manifest["model_version"]
+        # Version of the scoring model per inference backend (older builds only know the ONNX one)
+        self.model_versions: Dict[str, str] = manifest.get("model_versions", {"onnx": self.model_version})
+        self.classes: List[str] = list(manifest["classes"])
+        self.built_at: Optional[str] = manifest.get("built_at")
+
+        arrays = {name: np.load(self.build_dir / name, mmap_mode='r') for name in TABLE_FILES}
+        self.customer_ids = arrays[CUSTOMER_IDS_FILE]
+        self.labels = arrays[LABELS_FILE]
+        self.probabilities = arrays[PROBABILITIES_FILE]
+        self.features = arrays[FEATURES_FILE]
+        if not (len(self.customer_ids) == len(self.labels) == len(self.probabilities) == len(self.features)):
+            raise ValueError(f"Recommendation table {self.build_dir} has arrays of different lengths")
+        self._index: Dict[str, int] = {cid: i for i, cid in enumerate(self.customer_ids.tolist())}
+        # Measured once: the build directory may be pruned while this view still maps it
+        self.size_bytes = sum((self.build_dir / name).stat().st_size for name in TABLE_FILES)
+
+    @classmethod
+    def open(cls, table_dir: Union[str, Path]) -> Optional["RecommendationTable"]:
+        """Open the live build of ``table_dir`` (None if nothing has been built yet)"""
+        manifest = read_manifest(table_dir)
+        if manifest is None:
+            return None
+        return cls(Path(table_dir) / manifest["build"], manifest)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, customer_id: str) -> bool:
+        return customer_id in self._index
+
+    def scored_by(self, version: str, backend: str = "onnx") -> bool:
+        """Whether the table was scored by the model the ``backend`` serves as ``version``"""
+        return self.model_versions.get(backend) == version
+
+    def row(self, customer_id: str) -> Optional[int]:
+        """Row index of ``customer_id``, None if the customer is not in the table"""
+        return self._index.get(customer_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get table metadata
+
+        Returns:
+            Dictionary with the build, model version, row count and on-disk size
+        """
+        return {
+            'build': self.build_dir.name,
+            'model_version': self.model_version,
+            'built_at': self.built_at,
+            'customers': len(self),
+            'probability_dtype': str(self.probabilities.dtype),
+            'rescored': self.manifest.get('rescored'),
+            'reused': self.manifest.get('reused'),
+            'size_bytes': self.size_bytes,
+        }
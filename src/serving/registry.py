@@ -0,0 +1,254 @@
+"""
+Model Registry - Loads, warms up and atomically swaps ONNX sessions
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import onnxruntime as ort
+
+from .metrics import MODEL_LOAD_FAILURES_TOTAL, MODEL_SWAPS_TOTAL
+from .session import create_session
+
+logger = logging.getLogger("telco-model.registry")
+
+# INFERENCE_BACKEND values: ONNX Runtime on best_model.onnx, or the NumPy evaluator on best_model.pkl
+INFERENCE_BACKENDS = ("onnx", "numpy")
+
+
+class ModelValidationError(RuntimeError):
+    """Raised when a candidate model fails to load or produces invalid outputs"""
+
+
+@dataclass(frozen=True)
+class ModelHandle:
+    """Immutable snapshot of a loaded model; requests hold on to it for their whole run"""
+    session: ort.InferenceSession
+    generation: int
+    version: str
+    input_name: str
+    n_features: int
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec='seconds'))
+
+    @property
+    def tensor_probabilities(self) -> bool:
+        """True if probabilities come out as an [N, n_classes] tensor rather than ZipMap maps"""
+        return any(o.name == 'probabilities' and o.type.startswith('tensor(')
+                   for o in self.session.get_outputs())
+
+
+class ModelRegistry:
+    """
+    Owns the live ONNX session
+
+    - Reads the model file into memory, builds a session and warms it up
+      off the event loop, then validates the outputs
+    - Swaps the new handle in with a single reference assignment and bumps
+      the generation; in-flight requests finish on the handle they captured
+    - Checks the input width against the preprocessing ``feature_names``
+    - Skips files whose content hash matches the live model
+    - Optionally polls the model file and picks up externally produced
+      models once the file has stopped changing
+    - ``session_factory`` turns the model bytes into anything with the
+      InferenceSession run/get_inputs/get_outputs interface (ONNX Runtime by
+      default, or the NumPy oblivious-tree backend)
+    """
+
+    def __init__(self,
+                 model_path: Union[str, Path],
+                 warmup_runs: int = 2,
+                 warmup_rows: int = 8,
+                 session_factory: Callable[[bytes], Any] = create_session,
+                 backend: str = "onnx",
+                 feature_names: Optional[Sequence[str]] = None):
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"backend must be one of {INFERENCE_BACKENDS}, got {backend!r}")
+        self.model_path = Path(model_path)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.session_factory = session_factory
+        self.backend = backend
+        self.warmup_runs = warmup_runs
+        self.warmup_rows = warmup_rows
+
+        self._current: Optional[ModelHandle] = None
+        self._swap_lock = threading.Lock()
+        self._load_lock: Optional[asyncio.Lock] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+        self.swaps = 0
+        self.failed_loads = 0
+        self.last_error: Optional[str] = None
+        self.last_load_ms: Optional[float] = None
+        self.last_warmup_ms: Optional[float] = None
+        self.last_swap_ms: Optional[float] = None
+
+    @property
+    def current(self) -> Optional[ModelHandle]:
+        return self._current
+
+    @property
+    def generation(self) -> int:
+        return self._current.generation if self._current else 0
+
+    def _build(self, model_bytes: bytes, version: str) -> Tuple[ort.InferenceSession, str, int, float, float]:
+        """Create and warm up a session (runs in a worker thread)"""
+        start = time.perf_counter()
+        try:
+            session = self.session_factory(model_bytes)
+        except Exception as exc:
+            raise ModelValidationError(f"Cannot load model {version}: {exc}") from exc
+        load_ms = (time.perf_counter() - start) * 1000
+
+        model_input = session.get_inputs()[0]
+        n_features = model_input.shape[1] if len(model_input.shape) == 2 else None
+        if not isinstance(n_features, int):
+            raise ModelValidationError(f"Model {version} has no fixed feature dimension: {model_input.shape}")
+        if self.feature_names is not None and n_features != len(self.feature_names):
+            raise ModelValidationError(
+                f"Model {version} expects {n_features} features, preprocessing produces {len(self.feature_names)}"
+            )
+
+        # Zeros in the scaled feature space = the training means of every feature
+        start = time.perf_counter()
+        warmup = np.zeros((self.warmup_rows, n_features), dtype=np.float32)
+        output_names = [o.name for o in session.get_outputs()]
+        for _ in range(max(1, self.warmup_runs)):
+            outputs = dict(zip(output_names, session.run(None, {model_input.name: warmup})))
+        warmup_ms = (time.perf_counter() - start) * 1000
+
+        for name, values in outputs.items():
+            if len(values) != self.warmup_rows:
+                raise ModelValidationError(
+                    f"Model {version} output '{name}' has {len(values)} rows, expected {self.warmup_rows}"
+                )
+        return session, model_input.name, n_features, load_ms, warmup_ms
+
+    async def load(self, model_path: Optional[Union[str, Path]] = None, force: bool = False) -> bool:
+        """
+        Load a model in the background and swap it in if it is valid
+
+        Args:
+            model_path: Model to load (defaults to the registry path)
+            force: Reload even if the content matches the live model
+
+        Returns:
+            True if a new model was swapped in
+        """
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        path = Path(model_path or self.model_path)
+        loop = asyncio.get_running_loop()
+
+        async with self._load_lock:
+            try:
+                model_bytes = await loop.run_in_executor(None, path.read_bytes)
+                version = hashlib.sha256(model_bytes).hexdigest()[:12]
+                if not force and self._current is not None and self._current.version == version:
+                    return False
+                session, input_name, n_features, load_ms, warmup_ms = await loop.run_in_executor(
+                    None, self._build, model_bytes, version
+                )
+            except Exception as exc:
+                self.failed_loads += 1
+                MODEL_LOAD_FAILURES_TOTAL.inc()
+                self.last_error = str(exc)
+                logger.error("Keeping generation %s; failed to load %s: %s", self.generation, path, exc)
+                if self._current is None:
+                    raise
+                return False
+
+            start = time.perf_counter()
+            with self._swap_lock:
+                handle = ModelHandle(
+                    session=session,
+                    generation=self.generation + 1,
+                    version=version,
+                    input_name=input_name,
+                    n_features=n_features
+                )
+                self._current = handle
+            self.last_swap_ms = (time.perf_counter() - start) * 1000
+            self.last_load_ms = load_ms
+            self.last_warmup_ms = warmup_ms
+            self.last_error = None
+            self.swaps += 1
+            MODEL_SWAPS_TOTAL.inc()
+            logger.info(
+                "Model generation %s live (version=%s, load=%.1fms, warmup=%.1fms)",
+                handle.generation, version, load_ms, warmup_ms
+            )
+            return True
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.model_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def _watch(self, interval: float, seen: Optional[Tuple[int, int]]):
+        pending = None
+        while True:
+            await asyncio.sleep(interval)
+            signature = self._file_signature()
+            if signature is None or signature == seen:
+                pending = None
+                continue
+            if signature != pending:
+                # Changed since last poll: wait until the writer is done
+                pending = signature
+                continue
+            seen, pending = signature, None
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Model watcher failed to load %s", self.model_path)
+
+    def start_watching(self, interval: float):
+        """Poll the model file every ``interval`` seconds (must run on the event loop)"""
+        if interval > 0 and self._watch_task is None:
+            self._watch_task = asyncio.get_running_loop().create_task(
+                self._watch(interval, self._file_signature())
+            )
+
+    async def stop_watching(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get registry metrics
+
+        Returns:
+            Dictionary with live generation/version and load, warmup and swap timings
+        """
+        handle = self._current
+        return {
+            'backend': self.backend,
+            'generation': self.generation,
+            'version': handle.version if handle else None,
+            'loaded_at': handle.loaded_at if handle else None,
+            'probabilities_output': (
+                ('tensor' if handle.tensor_probabilities else 'zipmap') if handle else None
+            ),
+            'swaps': self.swaps,
+            'failed_loads': self.failed_loads,
+            'last_error': self.last_error,
+            'last_load_ms': self.last_load_ms,
+            'last_warmup_ms': self.last_warmup_ms,
+            'last_swap_ms': self.last_swap_ms,
+            'watching': self._watch_task is not None,
+        }
@@ -0,0 +1,158 @@
+"""
+Prediction Cache - Bounded LRU/TTL cache of per-row predictions
+
+Repeated requests for the same customer produce the same encoded feature
+row, so the row's bytes identify the prediction. Each row is keyed by a
+128-bit blake2b digest of its float32 encoding (scaled ``inputs`` and
+``raw_features`` requests share entries) and stored with the model
+generation that produced it. A model swap bumps the generation, which
+invalidates every entry at once: entries from older generations are
+treated as misses and dropped when they are next looked up or reach the
+LRU end.
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Approximate per-entry bookkeeping beyond the probability row itself:
+# OrderedDict slot + linked-list node, the digest bytes object and the entry tuple
+_ENTRY_OVERHEAD = 200
+
+
+class CachedPrediction(NamedTuple):
+    label: Any
+    probabilities: np.ndarray
+    generation: int
+    expires_at: float
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of ``(label, probability row)`` per encoded feature row
+
+    - At most ``max_entries`` rows; the least recently used row is evicted first
+    - Rows older than ``ttl_seconds`` are misses (0 disables expiry)
+    - Only requests with up to ``max_rows`` rows are meant to be cached, so
+      bulk scoring does not flush the working set
+    """
+
+    def __init__(self,
+                 max_entries: int = 100_000,
+                 ttl_seconds: float = 300.0,
+                 max_rows: int = 256,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.clock = clock
+
+        self._entries: "OrderedDict[bytes, CachedPrediction]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._row_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale = 0
+
+    def accepts(self, X: np.ndarray) -> bool:
+        """True if a request of this size should go through the cache"""
+        return 0 < X.shape[0] <= self.max_rows
+
+    @staticmethod
+    def keys_for(X: np.ndarray) -> List[bytes]:
+        """One digest per row of the float32 model input"""
+        data = np.ascontiguousarray(X, dtype=np.float32).tobytes()
+        step = len(data) // X.shape[0] if X.shape[0] else 0
+        return [hashlib.blake2b(data[start:start + step], digest_size=16).digest()
+                for start in range(0, len(data), step)] if step else []
+
+    def get_many(self, keys: Sequence[bytes], generation: int) -> List[Optional[CachedPrediction]]:
+        """
+        Look up rows for the live model generation
+
+        Returns:
+            One entry per key, None for a miss
+        """
+        now = self.clock()
+        results: List[Optional[CachedPrediction]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry.generation != generation:
+                    self._drop(key, entry)
+                    self.stale += 1
+                    entry = None
+                elif entry is not None and self.ttl_seconds and entry.expires_at <= now:
+                    self._drop(key, entry)
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                results.append(entry)
+        return results
+
+    def put_many(self,
+                 keys: Sequence[bytes],
+                 labels: Sequence[Any],
+                 probabilities: np.ndarray,
+                 generation: int):
+        """Store freshly computed rows (probability rows are copied out of the batch)"""
+        expires_at = self.clock() + self.ttl_seconds
+        with self._lock:
+            for key, label, row in zip(keys, labels, probabilities):
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._row_bytes -= previous.probabilities.nbytes
+                entry = CachedPrediction(label, np.array(row), generation, expires_at)
+                self._entries[key] = entry
+                self._row_bytes += entry.probabilities.nbytes
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._row_bytes -= evicted.probabilities.nbytes
+                self.evictions += 1
+
+    def _drop(self, key: bytes, entry: CachedPrediction):
+        del self._entries[key]
+        self._row_bytes -= entry.probabilities.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._row_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics
+
+        Returns:
+            Dictionary with hit rate, eviction/expiry counts and approximate memory use
+        """
+        lookups = self.hits + self.misses
+        entries = len(self._entries)
+        return {
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'max_rows': self.max_rows,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'stale': self.stale,
+            'memory_bytes': self._row_bytes + entries * (_ENTRY_OVERHEAD + sys.getsizeof(b"\0" * 16)),
+        }
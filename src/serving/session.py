@@ -0,0 +1,166 @@
+"""
+Session Factory - Creates ONNX Runtime sessions from runtime configuration
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import onnxruntime as ort
+from src.config import (
+    ORT_INTRA_OP_THREADS,
+    ORT_INTER_OP_THREADS,
+    ORT_GRAPH_OPTIMIZATION,
+    ORT_ENABLE_CPU_MEM_ARENA,
+    ORT_ENABLE_MEM_PATTERN,
+)
+
+logger = logging.getLogger("telco-model.session")
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+class OptimizedModelCache:
+    """
+    Directory of optimized ORT-format copies of ONNX models
+
+    Files are keyed by the model's content hash, the optimization level and
+    the ONNX Runtime version, so a retrained model or an upgraded runtime
+    never picks up a stale file. Files are written under a temporary name
+    and renamed into place, so concurrent API workers can share the
+    directory. Only the ``keep`` most recent files are kept.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], keep: int = 3):
+        self.cache_dir = Path(cache_dir)
+        self.keep = keep
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.last_path: Optional[Path] = None
+        self.last_hit: Optional[bool] = None
+
+    def path_for(self, model_bytes: bytes, optimization_level: str) -> Path:
+        """Cache file for a model serialized as ``model_bytes``"""
+        digest = hashlib.sha256(model_bytes).hexdigest()[:16]
+        return self.cache_dir / f"model-{digest}-{optimization_level}-ort{ort.__version__}.ort"
+
+    def prune(self):
+        """Delete all but the ``keep`` most recently written cache files"""
+        files = sorted(self.cache_dir.glob("model-*.ort"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in files[self.keep:]:
+            _remove(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics
+
+        Returns:
+            Dictionary with hit/miss counts and the file used by the last load
+        """
+        return {
+            'cache_dir': str(self.cache_dir),
+            'hits': self.hits,
+            'misses': self.misses,
+            'failures': self.failures,
+            'last_hit': self.last_hit,
+            'last_path': self.last_path.name if self.last_path else None,
+        }
+
+
+def _remove(path: Path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def build_session_options(intra_op_threads: int = ORT_INTRA_OP_THREADS,
+                          inter_op_threads: int = ORT_INTER_OP_THREADS,
+                          optimization_level: str = ORT_GRAPH_OPTIMIZATION,
+                          enable_cpu_mem_arena: bool = ORT_ENABLE_CPU_MEM_ARENA,
+                          enable_mem_pattern: bool = ORT_ENABLE_MEM_PATTERN) -> ort.SessionOptions:
+    """
+    SessionOptions with thread pools, graph optimization level and memory arena settings
+
+    Raises:
+        ValueError: If ``optimization_level`` is not one of GRAPH_OPTIMIZATION_LEVELS
+    """
+    if optimization_level not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(
+            f"Unknown graph optimization level {optimization_level!r}, "
+            f"expected one of {sorted(GRAPH_OPTIMIZATION_LEVELS)}"
+        )
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[optimization_level]
+    options.enable_cpu_mem_arena = enable_cpu_mem_arena
+    options.enable_mem_pattern = enable_mem_pattern
+    return options
+
+
+def create_session(model: Union[str, Path, bytes],
+                   intra_op_threads: int = ORT_INTRA_OP_THREADS,
+                   inter_op_threads: int = ORT_INTER_OP_THREADS,
+                   optimization_level: str = ORT_GRAPH_OPTIMIZATION,
+                   cache: Optional[OptimizedModelCache] = None) -> ort.InferenceSession:
+    """
+    Create a CPU inference session with configured thread pools
+
+    Args:
+        model: Path to ONNX model, or the serialized model bytes
+        intra_op_threads: Threads used inside one operator (0 = ONNX Runtime default)
+        inter_op_threads: Threads used across operators (0 = ONNX Runtime default)
+        optimization_level: "disable", "basic", "extended" or "all"
+        cache: Reuse (or write) an optimized ORT-format copy of the model
+
+    Returns:
+        InferenceSession
+    """
+    def options():
+        return build_session_options(intra_op_threads, inter_op_threads, optimization_level)
+
+    providers = ["CPUExecutionProvider"]
+    if cache is None:
+        return ort.InferenceSession(model if isinstance(model, bytes) else str(model),
+                                    sess_options=options(), providers=providers)
+
+    model_bytes = model if isinstance(model, bytes) else Path(model).read_bytes()
+    cached = cache.path_for(model_bytes, optimization_level)
+    cache.last_path = cached
+    if cached.exists():
+        try:
+            session = ort.InferenceSession(str(cached), sess_options=options(), providers=providers)
+            cache.hits += 1
+            cache.last_hit = True
+            return session
+        except Exception:
+            logger.warning("Discarding unreadable optimized model %s", cached, exc_info=True)
+            _remove(cached)
+
+    cache.misses += 1
+    cache.last_hit = False
+    tmp_path = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    sess_options = options()
+    try:
+        cache.cache_dir.mkdir(parents=True, exist_ok=True)
+        sess_options.optimized_model_filepath = str(tmp_path)
+        sess_options.add_session_config_entry("session.save_model_format", "ORT")
+        session = ort.InferenceSession(model_bytes, sess_options=sess_options, providers=providers)
+        os.replace(tmp_path, cached)
+        cache.prune()
+        return session
+    except Exception:
+        # Unwritable cache directory (or an invalid model, which fails again below with the real error)
+        cache.failures += 1
+        logger.warning("Cannot write optimized model to %s; loading without cache", cache.cache_dir, exc_info=True)
+        _remove(tmp_path)
+        return ort.InferenceSession(model_bytes, sess_options=options(), providers=providers)
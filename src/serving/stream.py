@@ -0,0 +1,175 @@
+"""
+Stream Scoring - Chunked CSV/NDJSON bulk scoring with bounded memory
+"""
+
+import io
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from src.preprocessing.encoder import CompiledFeatureEncoder
+
+CSV_MEDIA_TYPES = ("text/csv", "application/csv")
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines")
+
+# (labels, probabilities) for one scored matrix
+Predictions = Tuple[Optional[List[int]], Optional[List[List[float]]]]
+
+
+def detect_stream_format(content_type: Optional[str]) -> Optional[str]:
+    """
+    Map a Content-Type header to "csv" or "ndjson"
+
+    Returns:
+        Format name, or None if the media type is not supported
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CSV_MEDIA_TYPES:
+        return "csv"
+    if media_type in NDJSON_MEDIA_TYPES:
+        return "ndjson"
+    return None
+
+
+async def iter_line_chunks(stream: AsyncIterator[bytes],
+                           chunk_rows: int,
+                           max_line_bytes: int = 1 << 20) -> AsyncIterator[List[bytes]]:
+    """
+    Regroup an arbitrary byte stream into lists of at most ``chunk_rows`` lines
+
+    Only one partial line is carried between network chunks, so memory is
+    bounded by the chunk size, not by the size of the upload. Blank lines
+    are dropped. A line longer than ``max_line_bytes`` raises ValueError
+    instead of being buffered.
+    """
+    partial = b""
+    lines: List[bytes] = []
+    async for data in stream:
+        if not data:
+            continue
+        complete = (partial + data).split(b"\n")
+        partial = complete.pop()
+        if len(partial) > max_line_bytes:
+            raise ValueError(f"Line longer than {max_line_bytes} bytes")
+        for line in complete:
+            if len(line) > max_line_bytes:
+                raise ValueError(f"Line longer than {max_line_bytes} bytes")
+            if line.strip():
+                lines.append(line)
+                if len(lines) >= chunk_rows:
+                    yield lines
+                    lines = []
+    if partial.strip():
+        lines.append(partial)
+    if lines:
+        yield lines
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is still being read
+
+    For ASGI servers below spec 2.4 (uvicorn reports 2.3) StreamingResponse
+    runs a disconnect listener that calls ``receive()`` concurrently and would
+    swallow request body chunks. It is not started here; a client that goes
+    away surfaces as a failed send instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError as exc:
+            raise ClientDisconnect() from exc
+        if self.background is not None:
+            await self.background()
+
+
+class StreamScorer:
+    """
+    Scores one upload chunk at a time and renders NDJSON result lines
+
+    - CSV: the first line is the header; each chunk is parsed with pandas
+      and encoded column-wise
+    - NDJSON: one raw feature object per line
+    - ``customer_id`` is echoed back when the input has it
+
+    Chunks must be fed in order (the CSV header is read from the first one).
+    """
+
+    def __init__(self,
+                 encoder: CompiledFeatureEncoder,
+                 predict_fn: Callable[[np.ndarray], Predictions],
+                 stream_format: str):
+        if stream_format not in ("csv", "ndjson"):
+            raise ValueError(f"stream_format must be 'csv' or 'ndjson', got {stream_format!r}")
+        self.encoder = encoder
+        self.predict_fn = predict_fn
+        self.stream_format = stream_format
+        self.header: Optional[bytes] = None
+        self.rows = 0
+        self.chunks = 0
+        self.started_at = time.perf_counter()
+
+    def _decode_csv(self, lines: List[bytes]) -> Tuple[np.ndarray, Optional[Sequence[Any]]]:
+        if self.header is None:
+            self.header, lines = lines[0], lines[1:]
+        if not lines:
+            return np.empty((0, self.encoder.n_features), dtype=np.float32), None
+        import pandas as pd
+
+        df = pd.read_csv(io.BytesIO(b"\n".join([self.header, *lines])))
+        ids = df["customer_id"].tolist() if "customer_id" in df.columns else None
+        X = self.encoder.encode_columns({col: df[col].to_numpy() for col in df.columns})
+        return X, ids
+
+    def _decode_ndjson(self, lines: List[bytes]) -> Tuple[np.ndarray, Optional[Sequence[Any]]]:
+        try:
+            records = [json.loads(line) for line in lines]
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid NDJSON line: {exc}") from exc
+        if not all(isinstance(record, dict) for record in records):
+            raise ValueError("Every NDJSON line must be a JSON object of raw features")
+        ids = [record.get("customer_id") for record in records]
+        return self.encoder.encode_records(records), ids if any(i is not None for i in ids) else None
+
+    def score_chunk(self, lines: List[bytes]) -> bytes:
+        """
+        Parse, encode and score one chunk
+
+        Args:
+            lines: Raw input lines from iter_line_chunks
+
+        Returns:
+            NDJSON result lines (one per input row)
+        """
+        decode = self._decode_csv if self.stream_format == "csv" else self._decode_ndjson
+        X, ids = decode(lines)
+        if X.shape[0] == 0:
+            return b""
+
+        labels, probabilities = self.predict_fn(X)
+        out = []
+        for i in range(X.shape[0]):
+            row: Dict[str, Any] = {}
+            if ids is not None:
+                row["customer_id"] = ids[i]
+            row["label"] = labels[i] if labels is not None else None
+            row["probabilities"] = probabilities[i] if probabilities is not None else None
+            out.append(json.dumps(row, separators=(',', ':'), default=str))
+        self.rows += X.shape[0]
+        self.chunks += 1
+        return ('\n'.join(out) + '\n').encode('utf-8')
+
+    def summary(self) -> Dict[str, Any]:
+        """Rows scored, elapsed time and throughput so far"""
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_sec": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+        }
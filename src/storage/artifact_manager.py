@@ -1,5 +1,6 @@
 """Artifact Manager - Handles saving, loading, and versioning of models."""
 
+import os
 import joblib
 import shutil
 from datetime import datetime
@@ -26,7 +27,7 @@ class ArtifactManager:
     
     def save_model(self, model, model_path: Union[str, Path]) -> bool:
         """
-        Save model to disk
+        Save model to disk (written to a temp file, then atomically moved into place)
         
         Args:
             model: Model object
@@ -35,8 +36,11 @@ class ArtifactManager:
         Returns:
             True if successful
         """
+        model_path = Path(model_path)
+        tmp_path = model_path.with_name(f"{model_path.name}.tmp")
         try:
-            joblib.dump(model, Path(model_path))
+            joblib.dump(model, tmp_path)
+            os.replace(tmp_path, model_path)
             return True
         except Exception as e:
             print(f"Failed to save model: {e}")
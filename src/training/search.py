@@ -0,0 +1,465 @@
+"""
+Model search - parallel model selection and hyperparameter search
+
+Evaluates candidate configurations of CatBoost, LightGBM, XGBoost,
+GradientBoosting and RandomForest (the families compared in
+data/result/model_comparison*.csv) on a process pool:
+
+- Strategies: ``grid`` (every candidate), ``random`` (``n_candidates``
+  drawn from the grid) and ``halving`` (successive halving: every
+  candidate starts with 1/eta^k of its trees, the best 1/eta of each rung
+  go on with eta times more, the last rung trains the full model)
+- The stratified train / validation split (and its SMOTE-balanced
+  variant) is written once as ``.npy`` files; workers open them with
+  ``np.load(mmap_mode='r')`` instead of receiving pickled copies
+- Workers x threads per candidate never exceed the CPU count; library
+  thread pools inside workers are capped with threadpoolctl
+- No candidate starts after ``time_budget`` seconds; candidates already
+  fitting are finished and reported
+
+Results are ranked by Macro F1 (then F1-Weighted) and written as
+``Model,F1-Weighted,Macro F1,ROC-AUC,Rank``. The winning configuration is
+saved as JSON; its best CatBoost candidate is what ``ModelTrainer`` uses on
+retrain (ONNX export, the numpy backend and warm starts need CatBoost).
+Families whose library is not installed are skipped.
+
+    python -m src.training.search [--strategy halving] [--time-budget 1800] [--workers 4]
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import MODEL_COMPARISON_PATH, SEARCH_TIME_BUDGET_SECONDS, SEARCH_WORKERS, TRAINING_CONFIG_PATH
+
+COMPARISON_COLUMNS = ["Model", "F1-Weighted", "Macro F1", "ROC-AUC", "Rank"]
+
+
+class ModelFamily(NamedTuple):
+    label: str
+    module: str             # import checked before the family is searched
+    resource_param: str     # number of trees / boosting rounds, scaled by successive halving
+    thread_param: Optional[str]
+    base_params: Dict[str, Any]
+    grid: Dict[str, List[Any]]
+
+
+FAMILIES: Dict[str, ModelFamily] = {
+    "catboost": ModelFamily(
+        "CatBoost", "catboost", "iterations", "thread_count",
+        {'iterations': 600, 'loss_function': 'MultiClass', 'random_seed': 42, 'grow_policy': 'SymmetricTree',
+         'random_strength': 1.2, 'colsample_bylevel': 0.8, 'verbose': False, 'allow_writing_files': False},
+        {'depth': [4, 6, 8], 'learning_rate': [0.05, 0.1], 'l2_leaf_reg': [3, 5]},
+    ),
+    "lightgbm": ModelFamily(
+        "LightGBM", "lightgbm", "n_estimators", "n_jobs",
+        {'n_estimators': 600, 'objective': 'multiclass', 'random_state': 42, 'verbose': -1},
+        {'num_leaves': [31, 63], 'learning_rate': [0.05, 0.1]},
+    ),
+    "xgboost": ModelFamily(
+        "XGBoost", "xgboost", "n_estimators", "n_jobs",
+        {'n_estimators': 600, 'objective': 'multi:softprob', 'tree_method': 'hist', 'random_state': 42},
+        {'max_depth': [4, 6, 8], 'learning_rate': [0.05, 0.1]},
+    ),
+    "gradient_boosting": ModelFamily(
+        "Gradient Boosting", "sklearn", "n_estimators", None,
+        {'n_estimators': 200, 'random_state': 42},
+        {'max_depth': [3, 5], 'learning_rate': [0.1]},
+    ),
+    "random_forest": ModelFamily(
+        "Random Forest", "sklearn", "n_estimators", "n_jobs",
+        {'n_estimators': 400, 'random_state': 42},
+        {'max_depth': [None, 12], 'min_samples_leaf': [1, 5]},
+    ),
+}
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One configuration: a model family, the grid parameters and whether SMOTE is applied"""
+    family: str
+    params: Tuple[Tuple[str, Any], ...]
+    balanced: bool
+
+    @property
+    def name(self) -> str:
+        label = f"{FAMILIES[self.family].label} ({'Balanced' if self.balanced else 'Original'})"
+        return f"{label} {', '.join(f'{key}={value}' for key, value in self.params)}"
+
+    def model_params(self, fraction: float = 1.0) -> Dict[str, Any]:
+        """Constructor parameters with ``fraction`` of the family's trees"""
+        family = FAMILIES[self.family]
+        params = {**family.base_params, **dict(self.params)}
+        params[family.resource_param] = max(1, round(params[family.resource_param] * fraction))
+        return params
+
+
+@dataclass
+class SearchResult:
+    candidate: Candidate
+    params: Dict[str, Any]
+    rung: int
+    f1_weighted: float
+    f1_macro: float
+    roc_auc: Optional[float]
+    fit_seconds: float
+
+    @property
+    def fully_trained(self) -> bool:
+        """Whether the candidate was fit with all of its family's trees (the last halving rung)"""
+        resource_param = FAMILIES[self.candidate.family].resource_param
+        return self.params[resource_param] == self.candidate.model_params()[resource_param]
+
+
+def available_families(families: Optional[Sequence[str]] = None) -> List[str]:
+    """Requested families (default all) whose library can be imported"""
+    requested = list(families or FAMILIES)
+    unknown = [name for name in requested if name not in FAMILIES]
+    if unknown:
+        raise ValueError(f"Unknown model families {unknown}, expected some of {list(FAMILIES)}")
+    return [name for name in requested if importlib.util.find_spec(FAMILIES[name].module) is not None]
+
+
+def candidate_grid(families: Sequence[str]) -> List[Candidate]:
+    """Every grid point of every family, with and without SMOTE"""
+    candidates = []
+    for name in families:
+        grid = FAMILIES[name].grid
+        for values in itertools.product(*grid.values()):
+            for balanced in (True, False):
+                candidates.append(Candidate(name, tuple(zip(grid, values)), balanced))
+    return candidates
+
+
+def build_estimator(family: str, params: Dict[str, Any], threads: int):
+    """Instantiate a family's classifier with ``threads`` threads"""
+    if family == "catboost":
+        from catboost import CatBoostClassifier as estimator
+    elif family == "lightgbm":
+        from lightgbm import LGBMClassifier as estimator
+    elif family == "xgboost":
+        from xgboost import XGBClassifier as estimator
+    elif family == "gradient_boosting":
+        from sklearn.ensemble import GradientBoostingClassifier as estimator
+    elif family == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier as estimator
+    else:
+        raise ValueError(f"Unknown model family '{family}'")
+    thread_param = FAMILIES[family].thread_param
+    if thread_param:
+        params = {**params, thread_param: threads}
+    return estimator(**params)
+
+
+def resolve_workers(workers: Optional[int], n_tasks: int) -> Tuple[int, int]:
+    """(worker processes, threads per candidate) so that workers * threads <= CPUs"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, cpus, n_tasks))
+    return workers, max(1, cpus // workers)
+
+
+def prepare_search_data(X: np.ndarray,
+                        y: np.ndarray,
+                        data_dir: Union[str, Path],
+                        test_size: float = 0.2,
+                        balanced: bool = True) -> Dict[str, int]:
+    """
+    Write the train / validation split the workers map
+
+    The split and SMOTE settings match ModelTrainer.train_and_evaluate.
+    SMOTE runs once here rather than in every balanced candidate.
+
+    Returns:
+        Row counts of the written arrays
+    """
+    from sklearn.model_selection import train_test_split
+
+    data_dir = Path(data_dir)
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=test_size, random_state=42, stratify=y)
+    arrays = {"X_train": X_train, "y_train": y_train, "X_val": X_val, "y_val": y_val}
+    if balanced:
+        from imblearn.over_sampling import SMOTE
+        arrays["X_train_balanced"], arrays["y_train_balanced"] = SMOTE(
+            random_state=42, k_neighbors=5).fit_resample(X_train, y_train)
+    for name, array in arrays.items():
+        np.save(data_dir / f"{name}.npy", np.ascontiguousarray(array))
+    return {name: len(array) for name, array in arrays.items() if name.startswith("y_")}
+
+
+# Per-worker state, set by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(data_dir: str, threads: int):
+    """Map the search data once per worker process"""
+    data_dir = Path(data_dir)
+    _worker.update(
+        {path.stem: np.load(path, mmap_mode='r') for path in data_dir.glob("*.npy")},
+        threads=threads,
+    )
+
+
+def _evaluate_candidate(candidate: Candidate, fraction: float, rung: int, deadline: float) -> Optional[SearchResult]:
+    """Fit one candidate on the mapped training rows and score it on the validation rows"""
+    from sklearn.metrics import f1_score, roc_auc_score
+    from threadpoolctl import threadpool_limits
+
+    if time.time() > deadline:
+        return None
+    suffix = "_balanced" if candidate.balanced else ""
+    X_train, y_train = _worker["X_train" + suffix], _worker["y_train" + suffix]
+    X_val, y_val = _worker["X_val"], _worker["y_val"]
+    params = candidate.model_params(fraction)
+    with threadpool_limits(limits=_worker["threads"]):
+        estimator = build_estimator(candidate.family, params, _worker["threads"])
+        started = time.perf_counter()
+        estimator.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - started
+        y_pred = np.asarray(estimator.predict(X_val)).reshape(-1)
+        y_proba = estimator.predict_proba(X_val)
+    try:
+        roc_auc = roc_auc_score(y_val, y_proba, multi_class='ovr')
+    except ValueError:
+        roc_auc = None
+    return SearchResult(
+        candidate=candidate,
+        params=params,
+        rung=rung,
+        f1_weighted=f1_score(y_val, y_pred, average='weighted'),
+        f1_macro=f1_score(y_val, y_pred, average='macro'),
+        roc_auc=roc_auc,
+        fit_seconds=fit_seconds,
+    )
+
+
+def _sort_key(result: SearchResult) -> Tuple[int, float, float]:
+    # Candidates that reached a later halving rung were trained on more trees
+    return result.rung, result.f1_macro, result.f1_weighted
+
+
+def run_search(X: np.ndarray,
+               y: np.ndarray,
+               strategy: str = "halving",
+               families: Optional[Sequence[str]] = None,
+               n_candidates: Optional[int] = None,
+               eta: int = 3,
+               workers: Optional[int] = SEARCH_WORKERS,
+               time_budget: float = SEARCH_TIME_BUDGET_SECONDS,
+               seed: int = 42,
+               verbose: bool = True) -> List[SearchResult]:
+    """
+    Search candidate models on (X, y)
+
+    Args:
+        X: Preprocessed features
+        y: Encoded labels
+        strategy: "grid", "random" or "halving"
+        families: Model families to search (default: every installed one)
+        n_candidates: Random subset of the grid to evaluate (required for "random")
+        eta: Halving factor
+        workers: Worker processes (default: CPU count)
+        time_budget: Seconds after which no further candidate is started (0 = no limit)
+        seed: Seed for the random subset
+        verbose: Print progress
+
+    Returns:
+        Each evaluated candidate's last result, best first
+    """
+    if strategy not in ("grid", "random", "halving"):
+        raise ValueError(f"strategy must be 'grid', 'random' or 'halving', got {strategy!r}")
+    if strategy == "random" and not n_candidates:
+        raise ValueError("strategy 'random' requires n_candidates")
+    if eta < 2:
+        raise ValueError(f"eta must be >= 2, got {eta}")
+    names = available_families(families)
+    if not names:
+        raise ValueError("None of the requested model families is installed")
+    candidates = candidate_grid(names)
+    if n_candidates and n_candidates < len(candidates):
+        rng = np.random.default_rng(seed)
+        candidates = [candidates[i] for i in sorted(rng.choice(len(candidates), n_candidates, replace=False))]
+
+    rungs = 1 + int(math.log(len(candidates), eta) + 1e-9) if strategy == "halving" else 1
+    n_workers, threads = resolve_workers(workers, len(candidates))
+    deadline = time.time() + time_budget if time_budget else math.inf
+    if verbose:
+        skipped = [name for name in (families or FAMILIES) if name not in names]
+        print(f"🔎 {len(candidates)} candidates ({', '.join(names)}), {strategy}, {rungs} rungs, "
+              f"{n_workers} workers x {threads} threads" + (f"; not installed: {skipped}" if skipped else ""))
+
+    latest: Dict[Candidate, SearchResult] = {}
+    with tempfile.TemporaryDirectory(prefix="model-search-") as data_dir:
+        prepare_search_data(X, y, data_dir, balanced=any(c.balanced for c in candidates))
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(data_dir, threads)
+        ) as pool:
+            survivors = candidates
+            for rung in range(rungs):
+                fraction = float(eta) ** (rung - rungs + 1)
+                rung_results = _run_rung(pool, survivors, fraction, rung, deadline, verbose)
+                latest.update((result.candidate, result) for result in rung_results)
+                if time.time() > deadline:
+                    if verbose:
+                        print("⏱️ Time budget reached; remaining candidates skipped")
+                    break
+                ranked = sorted(rung_results, key=_sort_key, reverse=True)
+                survivors = [result.candidate for result in ranked[:math.ceil(len(ranked) / eta)]]
+    return sorted(latest.values(), key=_sort_key, reverse=True)
+
+
+def _run_rung(pool: ProcessPoolExecutor,
+              candidates: Sequence[Candidate],
+              fraction: float,
+              rung: int,
+              deadline: float,
+              verbose: bool) -> List[SearchResult]:
+    """Evaluate one rung; at the deadline, queued candidates are cancelled and running ones collected"""
+    pending = {pool.submit(_evaluate_candidate, candidate, fraction, rung, deadline) for candidate in candidates}
+    results = []
+    while pending:
+        timeout = None if deadline == math.inf else max(deadline - time.time(), 0)
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            for future in pending:
+                future.cancel()
+            done, pending = {future for future in wait(pending).done if not future.cancelled()}, set()
+        for future in done:
+            try:
+                result = future.result()
+            except BrokenExecutor:
+                raise
+            except Exception as exc:
+                print(f"⚠️ A candidate failed and is left out: {exc}", file=sys.stderr)
+                continue
+            if result is None:
+                continue
+            results.append(result)
+            if verbose:
+                print(f"✓ [{rung}] {result.candidate.name}: Macro F1 {result.f1_macro:.4f}, "
+                      f"F1-Weighted {result.f1_weighted:.4f} ({result.fit_seconds:.1f}s)")
+    return results
+
+
+def comparison_frame(results: Sequence[SearchResult]) -> pd.DataFrame:
+    """Ranked results in the data/result/model_comparison*.csv layout"""
+    return pd.DataFrame(
+        [[result.candidate.name, result.f1_weighted, result.f1_macro, result.roc_auc, rank]
+         for rank, result in enumerate(results, start=1)],
+        columns=COMPARISON_COLUMNS,
+    )
+
+
+def _config_entry(result: SearchResult) -> Dict[str, Any]:
+    return {
+        "model": result.candidate.name,
+        "family": result.candidate.family,
+        "balanced": result.candidate.balanced,
+        "params": result.params,
+        "f1_weighted": result.f1_weighted,
+        "f1_macro": result.f1_macro,
+        "roc_auc": result.roc_auc,
+        "fit_seconds": round(result.fit_seconds, 3),
+    }
+
+
+def save_search_results(results: Sequence[SearchResult],
+                        comparison_path: Union[str, Path] = MODEL_COMPARISON_PATH,
+                        config_path: Union[str, Path] = TRAINING_CONFIG_PATH,
+                        strategy: str = "") -> Dict[str, Any]:
+    """
+    Write the ranked comparison CSV and the winning configuration
+
+    The config's "retrain" entry is the best CatBoost candidate fit with
+    all of its trees, or null if there is none (e.g. the time budget ended
+    the search before the last halving rung); ModelTrainer then keeps its
+    defaults.
+
+    Returns:
+        The saved configuration
+    """
+    if not results:
+        raise ValueError("No candidate was evaluated; nothing to save")
+    comparison_path, config_path = Path(comparison_path), Path(config_path)
+    comparison_path.parent.mkdir(parents=True, exist_ok=True)
+    comparison_frame(results).to_csv(comparison_path, index=False)
+
+    # A search stopped by its time budget may not have reached the last rung; a partly
+    # trained candidate's tree count must not become the production one
+    catboost = [r for r in results if r.candidate.family == "catboost" and r.fully_trained]
+    config = {
+        "searched_at": datetime.now().isoformat(timespec="seconds"),
+        "strategy": strategy,
+        "comparison": str(comparison_path),
+        "winner": _config_entry(results[0]),
+        "retrain": _config_entry(catboost[0]) if catboost else None,
+    }
+    config_path.parent.mkdir(parents=True, exist_ok=True)
+    staging = config_path.with_name(config_path.name + ".tmp")
+    staging.write_text(json.dumps(config, indent=2))
+    os.replace(staging, config_path)
+    return config
+
+
+def load_retrain_config(config_path: Union[str, Path] = TRAINING_CONFIG_PATH) -> Optional[Dict[str, Any]]:
+    """The searched CatBoost configuration for retraining, or None if no search has been saved"""
+    config_path = Path(config_path)
+    if not config_path.exists():
+        return None
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("retrain")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.training.search", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strategy", choices=["grid", "random", "halving"], default="halving")
+    parser.add_argument("--families", nargs="+", choices=list(FAMILIES), help="Model families (default: all)")
+    parser.add_argument("--n-candidates", type=int, help="Random subset of the grid")
+    parser.add_argument("--eta", type=int, default=3, help="Successive halving factor")
+    parser.add_argument("--workers", type=int, default=SEARCH_WORKERS or None, help="Worker processes")
+    parser.add_argument("--time-budget", type=float, default=SEARCH_TIME_BUDGET_SECONDS,
+                        help="Seconds after which no candidate is started (0 = no limit)")
+    parser.add_argument("--output", default=str(MODEL_COMPARISON_PATH), help="Ranked comparison CSV")
+    parser.add_argument("--config", default=str(TRAINING_CONFIG_PATH), help="Winning configuration JSON")
+    args = parser.parse_args(argv)
+
+    from src.data_ingestion.repository import DataRepository
+
+    try:
+        X, y = DataRepository().load_training_data()
+        started = time.perf_counter()
+        results = run_search(X, y, strategy=args.strategy, families=args.families, n_candidates=args.n_candidates,
+                             eta=args.eta, workers=args.workers, time_budget=args.time_budget)
+        config = save_search_results(results, args.output, args.config, strategy=args.strategy)
+    except (ValueError, FileNotFoundError) as exc:
+        print(f"❌ {exc}", file=sys.stderr)
+        return 1
+    print(f"✓ {len(results)} candidates ranked in {time.perf_counter() - started:.1f}s: {args.output}")
+    print(f"🏆 {config['winner']['model']} (Macro F1 {config['winner']['f1_macro']:.4f})")
+    if config["retrain"]:
+        print(f"✓ Retrain config: {config['retrain']['model']} -> {args.config}")
+    else:
+        print("⚠️ No fully trained CatBoost candidate; retraining keeps the default parameters")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,31 @@
 Model Trainer - Handles model training and evaluation
 """
 
+import time
 import numpy as np
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, Optional
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import f1_score, classification_report, roc_auc_score
 from imblearn.over_sampling import SMOTE
 from catboost import CatBoostClassifier
 
+# CatBoost parameters used unless a model search has saved a config (see src/training/search.py)
+DEFAULT_MODEL_PARAMS: Dict[str, Any] = {
+    'iterations': 600,
+    'learning_rate': 0.1,
+    'depth': 6,
+    'loss_function': 'MultiClass',
+    'eval_metric': 'TotalF1',
+    'random_seed': 42,
+    'grow_policy': 'SymmetricTree',
+    'early_stopping_rounds': 40,
+    'l2_leaf_reg': 5,
+    'random_strength': 1.2,
+    'colsample_bylevel': 0.8,
+    'task_type': 'CPU',
+    'verbose': False
+}
+
 
 class ModelTrainer:
     """
@@ -17,34 +35,31 @@ class ModelTrainer:
     
     def __init__(self, 
                  model_params: Dict[str, Any] = None,
-                 smote_params: Dict[str, Any] = None):
+                 smote_params: Dict[str, Any] = None,
+                 incremental_params: Dict[str, Any] = None):
         """
         Initialize trainer with model parameters
         
         Args:
             model_params: CatBoost hyperparameters
             smote_params: SMOTE parameters
+            incremental_params: Overrides of model_params for warm-start updates
+                (fewer trees, lower learning rate)
         """
-        self.model_params = model_params or {
-            'iterations': 600,
-            'learning_rate': 0.1,
-            'depth': 6,
-            'loss_function': 'MultiClass',
-            'eval_metric': 'TotalF1',
-            'random_seed': 42,
-            'grow_policy': 'SymmetricTree',
-            'early_stopping_rounds': 40,
-            'l2_leaf_reg': 5,
-            'random_strength': 1.2,
-            'colsample_bylevel': 0.8,
-            'task_type': 'CPU',
-            'verbose': False
-        }
+        self.model_params = model_params or dict(DEFAULT_MODEL_PARAMS)
         
         self.smote_params = smote_params or {
             'random_state': 42,
             'k_neighbors': 5
         }
+        
+        self.incremental_params = incremental_params or {
+            'iterations': 100,
+            'learning_rate': 0.03
+        }
+        
+        # Seconds spent in each step of the last train_and_evaluate call
+        self.last_step_seconds: Dict[str, float] = {}
     
     def apply_smote(self, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -61,19 +76,28 @@ class ModelTrainer:
         X_balanced, y_balanced = smote.fit_resample(X, y)
         return X_balanced, y_balanced
     
-    def train_model(self, X_train: np.ndarray, y_train: np.ndarray) -> CatBoostClassifier:
+    def train_model(self,
+                    X_train: np.ndarray,
+                    y_train: np.ndarray,
+                    init_model: Optional[CatBoostClassifier] = None) -> CatBoostClassifier:
         """
         Train CatBoost model
         
         Args:
             X_train: Training features
             y_train: Training labels
+            init_model: Model to continue from; its trees are kept and
+                incremental_params trees are added on top
             
         Returns:
             Trained model
         """
-        model = CatBoostClassifier(**self.model_params)
-        model.fit(X_train, y_train)
+        if init_model is None:
+            model = CatBoostClassifier(**self.model_params)
+            model.fit(X_train, y_train)
+            return model
+        model = CatBoostClassifier(**{**self.model_params, **self.incremental_params})
+        model.fit(X_train, y_train, init_model=init_model)
         return model
     
     def evaluate_model(self, 
@@ -104,9 +128,12 @@ class ModelTrainer:
         except:
             auc = None
         
+        # labels: a small validation set (warm-start updates) may miss rare classes
         class_report = classification_report(
             y_val, y_pred, 
-            target_names=label_encoder.classes_
+            labels=np.arange(len(label_encoder.classes_)),
+            target_names=label_encoder.classes_,
+            zero_division=0
         )
         
         return {
@@ -143,14 +170,98 @@ class ModelTrainer:
             stratify=y
         )
         
+        step_seconds = {}
+        
         # Apply SMOTE if requested
         if apply_balancing:
+            started = time.perf_counter()
             X_train, y_train = self.apply_smote(X_train, y_train)
+            step_seconds['smote'] = time.perf_counter() - started
         
         # Train model
+        started = time.perf_counter()
         model = self.train_model(X_train, y_train)
+        step_seconds['fit'] = time.perf_counter() - started
         
         # Evaluate
+        started = time.perf_counter()
+        metrics = self.evaluate_model(model, X_val, y_val, label_encoder)
+        step_seconds['evaluate'] = time.perf_counter() - started
+        
+        self.last_step_seconds = step_seconds
+        return model, metrics
+    
+    def train_incremental(self,
+                          init_model: Any,
+                          X_new: np.ndarray,
+                          y_new: np.ndarray,
+                          label_encoder: Any,
+                          X_replay: Optional[np.ndarray] = None,
+                          y_replay: Optional[np.ndarray] = None,
+                          apply_balancing: bool = True,
+                          test_size: float = 0.2) -> Tuple[CatBoostClassifier, Dict[str, Any]]:
+        """
+        Warm-start training: continue boosting init_model on recent rows
+        
+        Validation rows are held out from the new rows only, which neither
+        model has seen, and init_model is scored on them too, so callers can
+        tell whether the update helped. The rest of the new rows and the
+        replayed rows are balanced with SMOTE and fitted on top of init_model.
+        
+        Args:
+            init_model: Current CatBoost model
+            X_new: New feature rows
+            y_new: New labels
+            label_encoder: Label encoder
+            X_replay: Stored rows trained on alongside the new ones, so the
+                training set covers every class
+            y_replay: Labels of X_replay
+            apply_balancing: Whether to apply SMOTE
+            test_size: Share of the new rows held out for validation
+            
+        Returns:
+            Tuple of (updated_model, metrics); metrics also hold
+            'baseline_f1_weighted' and 'baseline_f1_macro' of init_model
+            
+        Raises:
+            ValueError: init_model cannot be continued on this data
+        """
+        if not isinstance(init_model, CatBoostClassifier) or not init_model.is_fitted():
+            raise ValueError(f"Cannot continue from {type(init_model).__name__}; a fitted CatBoostClassifier is required")
+        
+        # Stratify when every class has at least two new rows
+        _, counts = np.unique(y_new, return_counts=True)
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_new, y_new,
+            test_size=test_size,
+            random_state=42,
+            stratify=y_new if counts.min() >= 2 else None
+        )
+        if X_replay is not None and len(X_replay):
+            X_train = np.concatenate([X_train, X_replay.astype(X_train.dtype, copy=False)])
+            y_train = np.concatenate([y_train, np.asarray(y_replay, dtype=y_train.dtype)])
+        missing = set(np.asarray(init_model.classes_).tolist()) - set(np.unique(y_train).tolist())
+        if missing:
+            raise ValueError(f"Classes {sorted(missing)} have no training rows; "
+                             "continuing would change the model's class count")
+        
+        step_seconds = {}
+        
+        if apply_balancing:
+            started = time.perf_counter()
+            X_train, y_train = self.apply_smote(X_train, y_train)
+            step_seconds['smote'] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        model = self.train_model(X_train, y_train, init_model=init_model)
+        step_seconds['fit'] = time.perf_counter() - started
+        
+        started = time.perf_counter()
         metrics = self.evaluate_model(model, X_val, y_val, label_encoder)
+        baseline_pred = init_model.predict(X_val)
+        metrics['baseline_f1_weighted'] = f1_score(y_val, baseline_pred, average='weighted')
+        metrics['baseline_f1_macro'] = f1_score(y_val, baseline_pred, average='macro')
+        step_seconds['evaluate'] = time.perf_counter() - started
         
+        self.last_step_seconds = step_seconds
         return model, metrics
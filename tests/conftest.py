@@ -0,0 +1,49 @@
+"""Shared fixtures built from synthetic artifacts (no data/ or model/ files needed)."""
+
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from benchmarks.common import synthetic_raw_frame
+from src.preprocessing.pipeline import PreprocessingPipeline
+
+
+@pytest.fixture(scope="session")
+def raw_frame() -> pd.DataFrame:
+    return synthetic_raw_frame(500)
+
+
+@pytest.fixture(scope="session")
+def pipeline(raw_frame: pd.DataFrame) -> PreprocessingPipeline:
+    """PreprocessingPipeline fitted the same way notebook/preposesingData.ipynb does it."""
+    X = raw_frame.drop(columns=["customer_id", "target_offer", "avg_call_duration", "sms_freq"])
+    X = pd.get_dummies(X, columns=["plan_type", "device_brand"], drop_first=True)
+    scaler = StandardScaler().fit(X)
+    label_encoder = LabelEncoder().fit(raw_frame["target_offer"])
+    return PreprocessingPipeline(scaler, label_encoder, X.columns.tolist())
+
+
+@pytest.fixture(scope="session")
+def catboost_models(pipeline: PreprocessingPipeline, raw_frame: pd.DataFrame):
+    """Two small, different CatBoost models trained on the synthetic frame."""
+    catboost = pytest.importorskip("catboost")
+    X = pipeline.prepare_inference_features(raw_frame.to_dict(orient="records"))
+    y = pipeline.encode_target(raw_frame["target_offer"])
+    models = []
+    for seed in (0, 1):
+        model = catboost.CatBoostClassifier(iterations=20, depth=4, loss_function="MultiClass",
+                                            random_seed=seed, verbose=False, allow_writing_files=False)
+        model.fit(X, y)
+        models.append(model)
+    return models
+
+
+@pytest.fixture(scope="session")
+def onnx_models(tmp_path_factory, catboost_models, pipeline: PreprocessingPipeline):
+    """Serialized ONNX exports of ``catboost_models``."""
+    blobs = []
+    for i, model in enumerate(catboost_models):
+        path = tmp_path_factory.mktemp("onnx") / f"model_{i}.onnx"
+        model.save_model(str(path), format="onnx", export_parameters={"feature_names": pipeline.feature_names})
+        blobs.append(path.read_bytes())
+    return blobs
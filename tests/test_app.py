@@ -1,22 +1,36 @@
 """Integration-style tests for the FastAPI app."""
 
+import io
+import json
 from pathlib import Path
 from typing import List
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
 import pytest
 from fastapi.testclient import TestClient
 
-from src.app import app
-from src.config import PROCESSED_DATA_DIR, DATA_DIR
+import src.app as api
+from src.app import app, state
+from src.build_recommendations import build_recommendation_table
+from src.serving.ranking import OfferEligibility
+from src.serving.result_cache import PredictionCache
+from src.config import MODEL_ONNX_PATH, PROCESSED_DATA_DIR, DATA_DIR
 
 
 @pytest.fixture(scope="session")
-def client() -> TestClient:
+def client(tmp_path_factory) -> TestClient:
     """Provide a TestClient instance with startup/shutdown lifecycle handling."""
-    with TestClient(app) as test_client:
-        yield test_client
+    import src.services.retrain_worker as retrain_worker
+
+    metrics_dir = tmp_path_factory.mktemp("metrics")
+    # Keep metrics files out of the real data/metrics directory
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(api, "METRICS_DIR", metrics_dir)
+        patch.setattr(retrain_worker, "METRICS_DIR", metrics_dir)
+        with TestClient(app) as test_client:
+            yield test_client
 
 
 def _load_scaled_sample() -> List[float]:
@@ -47,6 +61,8 @@ def test_health_endpoint_reports_model(client: TestClient):
     payload = response.json()
     assert payload["model_loaded"] is True
     assert payload["preprocessing_loaded"] is True
+    assert payload["startup"]["ready_ms"] > 0
+    assert payload["startup"]["warmup_ms"] is not None
 
 
 def test_predict_with_scaled_input(client: TestClient):
@@ -63,4 +79,160 @@ def test_predict_with_raw_features(client: TestClient):
     response = client.post("/predict", json={"raw_features": [raw_sample]})
     assert response.status_code == 200
     body = response.json()
-    assert "prediction_count" in body
\ No newline at end of file
+    assert "prediction_count" in body
+
+def test_predict_binary_inputs_and_columnar_raw_features(client: TestClient):
+    raw_path = DATA_DIR / "raw" / "data_capstone.csv"
+    if not raw_path.exists():
+        pytest.skip("Raw data file not available")
+    df = pd.read_csv(raw_path, nrows=20).drop(columns=["target_offer", "customer_id"], errors="ignore")
+    expected = client.post("/predict", json={"raw_features": df.to_dict(orient="records")}).json()
+
+    # Columnar raw features (.npz), JSON response
+    buffer = io.BytesIO()
+    # String columns go as fixed-width unicode arrays; pickled arrays are rejected
+    np.savez(buffer, **{col: df[col].to_numpy(dtype=None if is_numeric_dtype(df[col]) else str)
+                        for col in df.columns})
+    response = client.post("/predict", content=buffer.getvalue(), headers={"Content-Type": "application/x-npz"})
+    assert response.status_code == 200
+    assert response.json()["labels"] == expected["labels"]
+    np.testing.assert_allclose(response.json()["probabilities"], expected["probabilities"], rtol=1e-6)
+
+    # Scaled inputs (.npy) in, probability matrix (.npy) out
+    X = np.load(PROCESSED_DATA_DIR / "X_test.npy")[:20].astype(np.float32)
+    buffer = io.BytesIO()
+    np.save(buffer, X)
+    response = client.post("/predict", content=buffer.getvalue(),
+                           headers={"Content-Type": "application/x-npy", "Accept": "application/x-npy"})
+    assert response.status_code == 200
+    probabilities = np.load(io.BytesIO(response.content))
+    json_body = client.post("/predict", json={"inputs": X.tolist()}).json()
+    np.testing.assert_allclose(probabilities, json_body["probabilities"], rtol=1e-6)
+    assert probabilities.argmax(axis=1).tolist() == json_body["labels"]
+
+    assert client.post("/predict", content=b"x", headers={"Content-Type": "text/plain"}).status_code == 415
+    assert client.post("/predict", content=X.tobytes()[:-4],
+                       headers={"Content-Type": "application/octet-stream"}).status_code == 400
+
+
+def test_prediction_cache_serves_repeated_rows(client: TestClient):
+    X = np.load(PROCESSED_DATA_DIR / "X_test.npy")[:6].astype(np.float32)
+    expected = client.post("/predict", json={"inputs": X.tolist()}).json()
+    state.prediction_cache = PredictionCache(max_rows=16)
+    try:
+        client.post("/predict", json={"inputs": X[:3].tolist()})
+        mixed = client.post("/predict", json={"inputs": X.tolist()}).json()
+        cached = client.post("/predict", json={"inputs": X.tolist()}).json()
+        stats = client.get("/health").json()["prediction_cache"]
+    finally:
+        state.prediction_cache = None
+    for body in (mixed, cached):
+        assert body["labels"] == expected["labels"]
+        np.testing.assert_allclose(body["probabilities"], expected["probabilities"], rtol=1e-6)
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (9, 6, 6)
+
+
+def test_recommendation_table_lookup_and_live_fallback(client: TestClient, tmp_path, monkeypatch):
+    raw_path = DATA_DIR / "raw" / "data_capstone.csv"
+    if not raw_path.exists():
+        pytest.skip("Raw data file not available")
+    build_recommendation_table(raw_path, tmp_path, model_path=MODEL_ONNX_PATH,
+                               processed_dir=PROCESSED_DATA_DIR, verbose=False)
+    monkeypatch.setattr(api, "RECOMMENDATION_TABLE_DIR", tmp_path)
+    raw = pd.read_csv(raw_path, nrows=1).iloc[0].to_dict()
+    customer_id = str(raw.pop("customer_id"))
+    raw.pop("target_offer", None)
+    expected = client.post("/predict", json={"raw_features": [raw]}).json()
+    try:
+        client.portal.call(api.reload_recommendations)
+        from_table = client.get(f"/recommendation/{customer_id}").json()
+        unchanged = client.post(f"/recommendation/{customer_id}", json={"raw_features": raw}).json()
+        changed = client.post(f"/recommendation/{customer_id}",
+                              json={"raw_features": {**raw, "monthly_spend": raw["monthly_spend"] + 1e5}}).json()
+        missing = client.get("/recommendation/not-a-customer")
+    finally:
+        state.recommendations = None
+
+    assert from_table["source"] == unchanged["source"] == "table"
+    assert from_table["label"] == expected["labels"][0]
+    np.testing.assert_allclose(from_table["probabilities"], expected["probabilities"][0], atol=1e-3)
+    assert from_table["offer"] and from_table["confidence"] == max(from_table["probabilities"])
+    assert changed["source"] == "live"
+    assert missing.status_code == 404
+
+
+def test_predict_top_k_offers_with_eligibility(client: TestClient):
+    X = np.load(PROCESSED_DATA_DIR / "X_test.npy")[:50].astype(np.float32)
+    full = client.post("/predict", json={"inputs": X.tolist()}).json()
+    ranked = client.post("/predict", params={"top_k": 3}, json={"inputs": X.tolist()}).json()
+    classes = [str(c) for c in state.preprocessing.classes]
+    expected = np.argsort(-np.asarray(full["probabilities"]), axis=1, kind="stable")[:, :3]
+    assert ranked["probabilities"] is None
+    assert ranked["labels"] == full["labels"]
+    assert ranked["top_labels"] == expected.tolist()
+    assert ranked["top_offers"] == [[classes[i] for i in row] for row in expected]
+
+    levels = state.preprocessing.encoder.categorical_index["plan_type"]
+    level = next(iter(levels))
+    state.eligibility = OfferEligibility([{"when": {"plan_type": level}, "only": classes[:1]}],
+                                         state.preprocessing.encoder, classes)
+    try:
+        masked = client.post("/predict", params={"top_k": 3}, json={"inputs": X.tolist()}).json()
+        unmasked = client.post("/predict", params={"top_k": 3, "eligibility": "false"},
+                               json={"inputs": X.tolist()}).json()
+    finally:
+        state.eligibility = None
+    assert unmasked["top_labels"] == ranked["top_labels"]
+    restricted = np.isclose(X[:, levels[level]], state.preprocessing.encoder.one_row[levels[level]])
+    assert restricted.any()
+    for row, offers in zip(restricted, masked["top_offers"]):
+        assert offers == classes[:1] if row else len(offers) == 3
+
+    response = client.post("/predict", params={"top_k": 3}, json={"inputs": X.tolist()},
+                           headers={"Accept": "application/x-npy"})
+    assert response.status_code == 406
+
+
+def test_metrics_report_predict_stages(client: TestClient):
+    def count(text: str, series: str) -> float:
+        line = next(line for line in text.splitlines() if line.startswith(series + " "))
+        return float(line.rsplit(" ", 1)[1])
+
+    before = client.get("/metrics").text
+    response = client.post("/predict", json={"inputs": [_load_scaled_sample()] * 3})
+    assert response.status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for stage in ("parse", "prepare", "inference", "output"):
+        series = f'telco_predict_stage_seconds_count{{stage="{stage}"}}'
+        assert count(text, series) == count(before, series) + 1
+    assert count(text, "telco_predict_rows_total") == count(before, "telco_predict_rows_total") + 3
+    assert count(text, "telco_inference_run_seconds_count") >= count(before, "telco_inference_run_seconds_count") + 1
+    assert count(text, "telco_model_swaps_total") >= 1
+
+
+def test_unknown_retrain_job_returns_404(client: TestClient):
+    response = client.get("/retrain/jobs/does-not-exist")
+    assert response.status_code == 404
+
+
+def test_predict_stream_scores_csv_upload(client: TestClient):
+    raw_path = DATA_DIR / "raw" / "data_capstone.csv"
+    if not raw_path.exists():
+        pytest.skip("Raw data file not available")
+    payload = b"".join(raw_path.open("rb").readlines()[:51])
+    response = client.post("/predict/stream?chunk_rows=20", content=payload, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["summary"]["rows"] == 50
+    assert all("label" in line for line in lines[:-1])
+
+
+def test_unknown_inference_backend_fails_startup(monkeypatch):
+    monkeypatch.setattr(api, "INFERENCE_BACKEND", "onxx")
+    with pytest.raises(ValueError, match="INFERENCE_BACKEND must be one of"):
+        with TestClient(app):
+            pass
@@ -0,0 +1,96 @@
+"""Tests for the offline batch scoring CLI."""
+
+import pickle
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+
+from src.batch_score import DONE_DIR, LABELS_FILE, PARQUET_FILE, PROBABILITIES_FILE, batch_score, plan_csv_chunks
+
+
+@pytest.fixture
+def scoring_inputs(tmp_path, pipeline, raw_frame, onnx_models):
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    for name, obj in (("scaler", pipeline.scaler), ("label_encoder", pipeline.label_encoder),
+                      ("feature_names", pipeline.feature_names)):
+        with open(processed / f"{name}.pkl", "wb") as f:
+            pickle.dump(obj, f)
+    model_path = tmp_path / "model.onnx"
+    model_path.write_bytes(onnx_models[0])
+    input_path = tmp_path / "customers.csv"
+    raw_frame.drop(columns=["target_offer"]).to_csv(input_path, index=False)
+    return input_path, model_path, processed
+
+
+def test_plan_csv_chunks_covers_every_row(tmp_path):
+    path = tmp_path / "x.csv"
+    path.write_bytes(b"a,b\n" + b"".join(f"{i},{i}\n".encode() for i in range(10)) + b"10,10")
+    tasks, rows = plan_csv_chunks(path, chunk_rows=4)
+    assert rows == 11
+    assert [(t.start_row, t.n_rows) for t in tasks] == [(0, 4), (4, 4), (8, 3)]
+    body = path.read_bytes()
+    assert b"".join(body[t.byte_start:t.byte_end] for t in tasks) == body[len(b"a,b\n"):]
+
+
+def test_output_matches_session_in_input_order(tmp_path, scoring_inputs, pipeline, raw_frame):
+    input_path, model_path, processed = scoring_inputs
+    out = tmp_path / "scores"
+    summary = batch_score(input_path, out, workers=2, chunk_rows=64, model_path=model_path,
+                          processed_dir=processed, verbose=False)
+    assert summary["scored_rows"] == len(raw_frame)
+    assert summary["chunks"] == 8
+
+    session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    X = pipeline.prepare_inference_features(raw_frame.to_dict(orient="records"))
+    label, probs = session.run(None, {session.get_inputs()[0].name: X})
+    np.testing.assert_array_equal(np.load(out / LABELS_FILE), label.reshape(-1))
+    expected = np.array([[p[k] for k in sorted(p)] for p in probs], dtype=np.float32)
+    np.testing.assert_allclose(np.load(out / PROBABILITIES_FILE), expected, rtol=1e-6)
+
+
+def test_resume_only_scores_missing_chunks(tmp_path, scoring_inputs):
+    input_path, model_path, processed = scoring_inputs
+    out = tmp_path / "scores"
+    kwargs = dict(workers=1, chunk_rows=100, model_path=model_path, processed_dir=processed, verbose=False)
+    batch_score(input_path, out, **kwargs)
+    expected = np.load(out / LABELS_FILE).copy()
+
+    # Simulate a run interrupted before chunk 2 finished
+    (out / DONE_DIR / "000002").unlink()
+    labels = np.load(out / LABELS_FILE, mmap_mode="r+")
+    labels[200:300] = -1
+    labels.flush()
+    del labels
+
+    summary = batch_score(input_path, out, **kwargs)
+    assert summary["resumed_chunks"] == 4
+    assert summary["scored_rows"] == 100
+    np.testing.assert_array_equal(np.load(out / LABELS_FILE), expected)
+
+    with pytest.raises(ValueError, match="--restart"):
+        batch_score(input_path, out, **{**kwargs, "chunk_rows": 50})
+
+
+def test_parquet_input_and_output_round_trip(tmp_path, scoring_inputs, pipeline, raw_frame):
+    pq = pytest.importorskip("pyarrow.parquet")
+    csv_path, model_path, processed = scoring_inputs
+    kwargs = dict(workers=2, model_path=model_path, processed_dir=processed, verbose=False)
+    batch_score(csv_path, tmp_path / "from_csv", chunk_rows=100, **kwargs)
+
+    input_path = tmp_path / "customers.parquet"
+    raw_frame.drop(columns=["target_offer"]).to_parquet(input_path, row_group_size=128)
+    out = tmp_path / "from_parquet"
+    summary = batch_score(input_path, out, output_format="parquet", chunk_rows=100, **kwargs)
+    # One chunk per row group
+    assert summary["chunks"] == 4 and summary["scored_rows"] == len(raw_frame)
+    labels = np.load(tmp_path / "from_csv" / LABELS_FILE)
+    probabilities = np.load(tmp_path / "from_csv" / PROBABILITIES_FILE)
+    np.testing.assert_array_equal(np.load(out / LABELS_FILE), labels)
+
+    predictions = pq.read_table(out / PARQUET_FILE).to_pandas()
+    classes = [str(c) for c in pipeline.label_encoder.classes_]
+    assert list(predictions.columns) == ["label"] + [f"prob_{name}" for name in classes]
+    np.testing.assert_array_equal(predictions["label"].to_numpy(), labels)
+    np.testing.assert_allclose(predictions.iloc[:, 1:].to_numpy(), probabilities, rtol=1e-6)
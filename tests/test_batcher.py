@@ -0,0 +1,126 @@
+"""Tests for the micro-batching dispatcher."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.serving.batcher import BatcherOverloadedError, MicroBatcher
+
+
+class FakeModel:
+    """Records batch sizes and echoes row sums as labels."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, batch: np.ndarray, model=None):
+        if batch.shape[1] != 3:
+            raise ValueError("bad width")
+        self.calls.append(batch.shape[0])
+        return {
+            "label": batch.sum(axis=1).astype(np.int64),
+            "probabilities": [{0: float(row[0])} for row in batch],
+        }
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_share_one_run_and_get_their_rows():
+    model = FakeModel()
+
+    async def scenario():
+        batcher = MicroBatcher(model, window_ms=20, max_batch_size=64)
+        await batcher.start()
+        batcher._batch_ema = 4.0  # pretend concurrency was already observed
+        inputs = [np.full((i + 1, 3), i, dtype=np.float32) for i in range(5)]
+        results = await asyncio.gather(*(batcher.submit(x) for x in inputs))
+        stats = batcher.stats()
+        await batcher.stop()
+        return inputs, results, stats
+
+    inputs, results, stats = _run(scenario())
+    assert model.calls == [15]
+    for x, outs in zip(inputs, results):
+        assert outs["label"].tolist() == x.sum(axis=1).astype(int).tolist()
+        assert len(outs["probabilities"]) == x.shape[0]
+    assert stats["total_batches"] == 1
+    assert stats["total_requests"] == 5
+
+
+def test_requests_run_on_the_model_they_were_submitted_for():
+    calls = []
+
+    def run(batch, model):
+        calls.append((model, batch.shape[0]))
+        return {"label": np.full(batch.shape[0], model)}
+
+    async def scenario():
+        batcher = MicroBatcher(run, window_ms=20, max_batch_size=64)
+        await batcher.start()
+        batcher._batch_ema = 4.0
+        # Generations 1 and 2 interleaved, as around a hot swap
+        models = [1, 1, 2, 1, 2]
+        results = await asyncio.gather(*(batcher.submit(np.ones((1, 3), dtype=np.float32), m) for m in models))
+        await batcher.stop()
+        return models, results
+
+    models, results = _run(scenario())
+    assert [outs["label"].tolist() for outs in results] == [[m] for m in models]
+    # Same-model neighbours are still coalesced
+    assert calls[0] == (1, 2) and sum(rows for _, rows in calls) == 5
+
+
+def test_max_batch_size_is_respected():
+    model = FakeModel()
+
+    async def scenario():
+        batcher = MicroBatcher(model, window_ms=20, max_batch_size=4)
+        await batcher.start()
+        batcher._batch_ema = 4.0
+        await asyncio.gather(*(batcher.submit(np.ones((1, 3), dtype=np.float32)) for _ in range(10)))
+        await batcher.stop()
+
+    _run(scenario())
+    assert sum(model.calls) == 10
+    assert max(model.calls) <= 4
+
+
+def test_bad_request_does_not_fail_its_batch():
+    model = FakeModel()
+
+    async def scenario():
+        batcher = MicroBatcher(model, window_ms=20, max_batch_size=64)
+        await batcher.start()
+        batcher._batch_ema = 4.0
+        good = batcher.submit(np.ones((2, 3), dtype=np.float32))
+        bad = batcher.submit(np.ones((1, 5), dtype=np.float32))
+        results = await asyncio.gather(good, bad, return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    good, bad = _run(scenario())
+    assert good["label"].tolist() == [3, 3]
+    assert isinstance(bad, ValueError)
+
+
+def test_full_queue_rejects_requests():
+    async def scenario():
+        batcher = MicroBatcher(FakeModel(), window_ms=1, max_queue_depth=1)
+        await batcher.start()
+        first = asyncio.ensure_future(batcher.submit(np.ones((1, 3), dtype=np.float32)))
+        second = asyncio.ensure_future(batcher.submit(np.ones((1, 3), dtype=np.float32)))
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        await batcher.stop()
+        return results, batcher.rejected_requests
+
+    results, rejected = _run(scenario())
+    assert rejected == 1
+    assert any(isinstance(r, BatcherOverloadedError) for r in results)
+
+
+def test_submit_requires_start():
+    with pytest.raises(RuntimeError):
+        _run(MicroBatcher(FakeModel()).submit(np.ones((1, 3), dtype=np.float32)))
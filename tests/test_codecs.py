@@ -0,0 +1,94 @@
+"""Tests for the binary and columnar /predict wire formats."""
+
+import io
+
+import numpy as np
+import pytest
+from pandas.api.types import is_numeric_dtype
+
+from src.serving.codecs import (
+    decode_body,
+    decode_npy,
+    detect_body_format,
+    encode_msgpack_response,
+    encode_npy,
+    negotiate_response_format,
+)
+
+
+def test_npy_and_float32_decode_without_copy():
+    X = np.random.default_rng(0).random((50, 7)).astype(np.float32)
+    buffer = io.BytesIO()
+    np.save(buffer, X)
+    body = buffer.getvalue()
+
+    decoded = decode_npy(body)
+    np.testing.assert_array_equal(decoded, X)
+    assert np.shares_memory(decoded, np.frombuffer(body, dtype=np.uint8))
+
+    raw = X.tobytes()
+    decoded = decode_body("float32", raw, 7).X
+    np.testing.assert_array_equal(decoded, X)
+    assert np.shares_memory(decoded, np.frombuffer(raw, dtype=np.uint8))
+
+    # Other dtypes / Fortran order are converted once to C-ordered float32
+    buffer = io.BytesIO()
+    np.save(buffer, np.asfortranarray(X.astype(np.float64)))
+    converted = decode_npy(buffer.getvalue())
+    assert converted.dtype == np.float32 and converted.flags.c_contiguous
+    np.testing.assert_array_equal(converted, X)
+
+    np.testing.assert_array_equal(np.load(io.BytesIO(encode_npy(X))), X)
+
+
+@pytest.mark.parametrize("body, n_features", [(b"\x93NUMPY garbage", 7), (np.zeros(10, np.float32).tobytes(), 7)])
+def test_malformed_bodies_raise_value_error(body, n_features):
+    with pytest.raises(ValueError):
+        decode_body("npy" if body.startswith(b"\x93") else "float32", body, n_features)
+    with pytest.raises(ValueError):
+        decode_body("npy", encode_npy(np.zeros((3, 5), np.float32)), n_features)
+
+
+def test_columnar_formats(raw_frame):
+    df = raw_frame.head(30)
+    features = df.drop(columns=["customer_id", "target_offer"])
+    buffer = io.BytesIO()
+    columns = {c: features[c].to_numpy(dtype=None if is_numeric_dtype(features[c]) else str) for c in features}
+    np.savez(buffer, true_label=df["target_offer"].to_numpy(dtype=str), **columns)
+    npz = decode_body("npz", buffer.getvalue(), 0)
+    assert npz.true_labels == df["target_offer"].tolist()
+    assert npz.records()[0]["plan_type"] == features.iloc[0]["plan_type"]
+
+    buffer = io.BytesIO()
+    np.savez(buffer, plan_type=features["plan_type"].to_numpy(dtype=object))
+    with pytest.raises(ValueError):
+        decode_body("npz", buffer.getvalue(), 0)
+
+    msgpack = pytest.importorskip("msgpack")
+    payload = {c: features[c].tolist() for c in features}
+    payload["monthly_spend"] = features["monthly_spend"].to_numpy(dtype="<f8").tobytes()
+    decoded = decode_body("msgpack", msgpack.packb(payload), 0)
+    np.testing.assert_array_equal(decoded.columns["monthly_spend"], features["monthly_spend"].to_numpy())
+    assert decoded.true_labels is None
+
+    labels, probabilities = np.array([1, 0]), np.array([[0.1, 0.9], [0.8, 0.2]])
+    response = msgpack.unpackb(encode_msgpack_response(labels, probabilities, prediction_count=3))
+    assert response["shape"] == [2, 2] and response["prediction_count"] == 3
+    np.testing.assert_array_equal(np.frombuffer(response["labels"], "<i4"), labels)
+
+    pa = pytest.importorskip("pyarrow")
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(features, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    arrow = decode_body("arrow", sink.getvalue(), 0)
+    np.testing.assert_array_equal(arrow.columns["monthly_spend"], features["monthly_spend"].to_numpy())
+
+
+def test_content_negotiation():
+    assert detect_body_format(None) == "json"
+    assert detect_body_format("application/x-npy; charset=binary") == "npy"
+    assert detect_body_format("text/plain") is None
+    assert negotiate_response_format("application/x-npy, application/json") == "npy"
+    assert negotiate_response_format("text/html, */*") == "json"
+    assert negotiate_response_format(None) == "json"
@@ -0,0 +1,80 @@
+"""Parity tests for the compiled raw-feature encoder."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocessing.encoder import CompiledFeatureEncoder
+from src.preprocessing.pipeline import PreprocessingPipeline
+
+
+def _dataframe_path(pipeline: PreprocessingPipeline, records) -> np.ndarray:
+    """The original pandas inference path (get_dummies + reindex + scaler.transform)."""
+    df = pd.DataFrame(records).drop(columns=["customer_id", "target_offer"], errors="ignore")
+    return np.asarray(pipeline.scale_features(pipeline.encode_categorical(df)), dtype=np.float32)
+
+
+def test_encode_records_matches_dataframe_path_bit_for_bit(pipeline, raw_frame):
+    records = raw_frame.to_dict(orient="records")
+    expected = _dataframe_path(pipeline, records)
+    actual = pipeline.prepare_inference_features(records)
+    assert actual.dtype == np.float32
+    assert np.array_equal(actual.view(np.uint32), expected.view(np.uint32))
+
+
+def test_encode_columns_matches_encode_records(pipeline, raw_frame):
+    columns = {col: raw_frame[col].to_numpy() for col in raw_frame.columns}
+    records = raw_frame.to_dict(orient="records")
+    assert np.array_equal(
+        pipeline.encoder.encode_columns(columns),
+        pipeline.encoder.encode_records(records),
+    )
+
+
+def test_single_row_keeps_categorical_levels(pipeline, raw_frame):
+    record = raw_frame.iloc[3].to_dict()
+    expected = pipeline.encoder.encode_records(raw_frame.to_dict(orient="records"))[3]
+    assert np.array_equal(pipeline.prepare_inference_features([record])[0], expected)
+
+
+def test_missing_and_unknown_values(pipeline):
+    encoder = pipeline.encoder
+    row = encoder.encode_records([{"plan_type": "Unknown", "device_brand": "samsung", "extra": 1}])
+    # Missing numeric features are padded with 0 and unknown levels stay at baseline
+    assert np.array_equal(row[0], encoder.zero_row)
+    partial = encoder.encode_records([{"monthly_spend": 1000.0}, {"topup_freq": 2}])
+    j = encoder.numeric_index["monthly_spend"]
+    assert np.isnan(partial[1, j])
+
+
+def test_preallocated_output_is_reused(pipeline, raw_frame):
+    records = raw_frame.head(4).to_dict(orient="records")
+    out = np.full((4, len(pipeline.feature_names)), 7.0, dtype=np.float32)
+    result = pipeline.encoder.encode_records(records, out=out)
+    assert result is out
+    assert np.array_equal(out, pipeline.encoder.encode_records(records))
+
+
+def test_invalid_payloads_raise_value_error(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.prepare_inference_features([])
+    with pytest.raises(ValueError):
+        pipeline.prepare_inference_features([{"monthly_spend": "a lot"}])
+    with pytest.raises(ValueError):
+        pipeline.encoder.encode_columns({"monthly_spend": [1.0, 2.0], "topup_freq": [1]})
+
+
+def test_dropped_baseline_follows_the_fitted_columns(pipeline):
+    assert pipeline.encoder.baseline_levels == {"plan_type": "Postpaid", "device_brand": "Apple"}
+    assert pipeline.encoder.categorical_levels["plan_type"] == ["Postpaid", "Prepaid"]
+    # Retrained on data with a new first brand: it was dropped and Apple got a column
+    names = pipeline.feature_names + ["device_brand_Apple"]
+    encoder = CompiledFeatureEncoder(names, None)
+    assert encoder.baseline_levels["device_brand"] is None
+    assert "Apple" in encoder.categorical_levels["device_brand"]
+    # Retrained on data without Apple: Huawei was dropped, but Apple and Huawei both lack
+    # a column and sort first, so the baseline cannot be told and is not guessed
+    names = [n for n in pipeline.feature_names if n != "device_brand_Huawei"]
+    encoder = CompiledFeatureEncoder(names, None)
+    assert encoder.baseline_levels["device_brand"] is None
+    assert encoder.categorical_levels["device_brand"][0] == "Oppo"
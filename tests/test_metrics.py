@@ -0,0 +1,103 @@
+"""Tests for the process-shared Prometheus metrics."""
+
+import multiprocessing
+import os
+
+from src.serving.metrics import MetricsRegistry, StageTimer
+
+
+def _registry():
+    registry = MetricsRegistry()
+    stages = registry.histogram("test_stage_seconds", "Stage time", label=("stage", ("parse", "inference")),
+                                buckets=(0.001, 0.01))
+    requests = registry.counter("test_requests_total", "Requests")
+    depth = registry.gauge("test_queue_depth", "Queue depth")
+    return registry, stages, requests, depth
+
+
+def _sample(text: str, name: str) -> float:
+    values = [float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(name + " ")]
+    assert len(values) == 1, name
+    return values[0]
+
+
+def test_histogram_buckets_are_cumulative_and_stage_timer_records_on_finish():
+    registry, stages, requests, _ = _registry()
+    stages.observe(0.0005, "parse")
+    stages.observe(0.001, "parse")  # bucket bounds are inclusive
+    stages.observe(0.5, "parse")
+    timer = StageTimer(stages)
+    timer.mark("inference")
+    assert timer.finish() > 0
+    # Observations are buffered until a flush (a scrape flushes this process)
+    assert len(stages._pending) == 2 * 4
+
+    text = registry.render()
+    assert _sample(text, 'test_stage_seconds_bucket{stage="parse",le="0.001"}') == 2
+    assert _sample(text, 'test_stage_seconds_bucket{stage="parse",le="0.01"}') == 2
+    assert _sample(text, 'test_stage_seconds_bucket{stage="parse",le="+Inf"}') == 3
+    assert _sample(text, 'test_stage_seconds_sum{stage="parse"}') == 0.5015
+    assert _sample(text, 'test_stage_seconds_count{stage="inference"}') == 1
+    assert "# TYPE test_requests_total counter" in text
+
+    registry.disable()
+    requests.inc()
+    assert not registry.enabled
+
+
+def _child(requests, depth, stages):
+    requests.inc(5)
+    depth.set(7)
+    stages.observe(0.002, "parse")
+    stages.registry.flush()
+
+
+def test_files_of_all_processes_are_aggregated(tmp_path):
+    registry, stages, requests, depth = _registry()
+    # Recorded before attach: carried into the file
+    requests.inc()
+    stages.observe(0.002, "parse")
+    registry.attach(tmp_path)
+    depth.set(2)
+    stages.observe(0.003, "parse")  # still pending at fork time: counted once, by the parent
+
+    child = multiprocessing.get_context("fork").Process(target=_child, args=(requests, depth, stages))
+    child.start()
+    child.join()
+    assert child.exitcode == 0
+    assert len(list(tmp_path.glob("metrics-*.db"))) == 2
+
+    text = registry.render()
+    assert _sample(text, "test_requests_total") == 6
+    assert _sample(text, 'test_stage_seconds_count{stage="parse"}') == 3
+    # Gauges only count live processes
+    assert _sample(text, "test_queue_depth") == 2
+
+    other = MetricsRegistry()
+    other.counter("unrelated_total", "Different layout")
+    other.attach(tmp_path)
+    assert _sample(registry.render(), "test_requests_total") == 6
+
+
+def test_attach_compacts_files_of_exited_processes(tmp_path):
+    registry, stages, requests, depth = _registry()
+    registry.attach(tmp_path)
+    requests.inc()
+    children = []
+    for _ in range(3):
+        child = multiprocessing.get_context("fork").Process(target=_child, args=(requests, depth, stages))
+        child.start()
+        child.join()
+        children.append(child.pid)
+    # Each child folded the exited one before it into the archive when it attached
+    names = {p.name.split("-", 2)[2] for p in tmp_path.glob("metrics-*.db")}
+    assert names == {f"{os.getpid()}.db", f"{children[-1]}.db", "archive.db"}
+    assert _sample(registry.render(), "test_requests_total") == 16
+
+    registry._compact(tmp_path)
+    names = {p.name.split("-", 2)[2] for p in tmp_path.glob("metrics-*.db")}
+    assert names == {f"{os.getpid()}.db", "archive.db"}
+    text = registry.render()
+    assert _sample(text, "test_requests_total") == 16
+    assert _sample(text, 'test_stage_seconds_count{stage="parse"}') == 3
+    assert _sample(text, "test_queue_depth") == 0
@@ -0,0 +1,76 @@
+"""Tests for model loading, validation and hot-swapping."""
+
+import asyncio
+
+import pytest
+
+from src.serving.registry import ModelRegistry, ModelValidationError
+
+
+def test_load_swap_and_dedupe(tmp_path, onnx_models):
+    path = tmp_path / "best_model.onnx"
+    path.write_bytes(onnx_models[0])
+
+    async def scenario():
+        registry = ModelRegistry(path)
+        assert await registry.load() is True
+        first = registry.current
+        # Same content: no swap
+        assert await registry.load() is False
+        path.write_bytes(onnx_models[1])
+        assert await registry.load() is True
+        return registry, first
+
+    registry, first = asyncio.run(scenario())
+    second = registry.current
+    assert (first.generation, second.generation) == (1, 2)
+    assert first.version != second.version
+    assert first.session is not second.session
+    stats = registry.stats()
+    assert stats["swaps"] == 2
+    assert stats["last_warmup_ms"] is not None and stats["last_swap_ms"] is not None
+
+
+def test_invalid_model_keeps_current_generation(tmp_path, onnx_models):
+    path = tmp_path / "best_model.onnx"
+    path.write_bytes(onnx_models[0])
+
+    async def scenario():
+        registry = ModelRegistry(path)
+        await registry.load()
+        path.write_bytes(onnx_models[1][:100])  # truncated / half-written file
+        assert await registry.load() is False
+        return registry
+
+    registry = asyncio.run(scenario())
+    assert registry.generation == 1
+    assert registry.failed_loads == 1
+    assert registry.last_error
+
+
+def test_initial_load_failure_raises(tmp_path):
+    path = tmp_path / "best_model.onnx"
+    path.write_bytes(b"not a model")
+    with pytest.raises(ModelValidationError):
+        asyncio.run(ModelRegistry(path).load())
+
+
+def test_watcher_picks_up_external_model(tmp_path, onnx_models):
+    path = tmp_path / "best_model.onnx"
+    path.write_bytes(onnx_models[0])
+
+    async def scenario():
+        registry = ModelRegistry(path)
+        await registry.load()
+        registry.start_watching(0.02)
+        tmp = tmp_path / "incoming.onnx"
+        tmp.write_bytes(onnx_models[1])
+        tmp.replace(path)
+        for _ in range(100):
+            if registry.generation == 2:
+                break
+            await asyncio.sleep(0.02)
+        await registry.stop_watching()
+        return registry
+
+    assert asyncio.run(scenario()).generation == 2
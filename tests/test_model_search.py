@@ -0,0 +1,110 @@
+"""Tests for the parallel model search."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("catboost")
+pytest.importorskip("imblearn")
+
+from src.training.search import (
+    COMPARISON_COLUMNS,
+    Candidate,
+    candidate_grid,
+    load_retrain_config,
+    resolve_workers,
+    run_search,
+    save_search_results,
+)
+
+
+@pytest.fixture(scope="module")
+def search_data(pipeline, raw_frame):
+    X = pipeline.prepare_inference_features(raw_frame.to_dict(orient="records"))
+    return np.asarray(X, dtype=np.float64), pipeline.encode_target(raw_frame["target_offer"])
+
+
+def test_search_writes_ranked_comparison_and_retrain_config(search_data, tmp_path):
+    X, y = search_data
+    results = run_search(X, y, strategy="random", families=["catboost", "random_forest"], n_candidates=3,
+                         seed=1, workers=2, time_budget=0, verbose=False)
+    assert len(results) == 3
+    macro = [result.f1_macro for result in results]
+    assert macro == sorted(macro, reverse=True)
+
+    config = save_search_results(results, tmp_path / "model_comparison_search.csv",
+                                 tmp_path / "training_config.json", strategy="random")
+    comparison = pd.read_csv(tmp_path / "model_comparison_search.csv")
+    assert comparison.columns.tolist() == COMPARISON_COLUMNS
+    assert comparison["Rank"].tolist() == [1, 2, 3]
+    assert comparison["Model"].iloc[0] == config["winner"]["model"] == results[0].candidate.name
+
+    retrain = load_retrain_config(tmp_path / "training_config.json")
+    catboost = [result for result in results if result.candidate.family == "catboost"]
+    if catboost:
+        assert retrain["model"] == catboost[0].candidate.name
+        assert retrain["params"]["iterations"] == 600 and "thread_count" not in retrain["params"]
+    else:
+        assert retrain is None
+    assert load_retrain_config(tmp_path / "missing.json") is None
+
+
+def test_halving_and_time_budget(search_data, tmp_path):
+    X, y = search_data
+    # Nothing may start once the budget is spent
+    assert run_search(X, y, families=["random_forest"], time_budget=1e-9, verbose=False) == []
+    with pytest.raises(ValueError):
+        save_search_results([], tmp_path / "c.csv", tmp_path / "t.json")
+
+    results = run_search(X, y, strategy="halving", families=["random_forest"], eta=2, workers=1,
+                         time_budget=0, verbose=False)
+    # 8 candidates, eta 2: rungs of 8, 4, 2 and 1 candidates; the survivor ranks first with all its trees
+    assert len(results) == len(candidate_grid(["random_forest"])) == 8
+    assert [result.rung for result in results] == [3, 2, 1, 1, 0, 0, 0, 0]
+    assert results[0].params["n_estimators"] == 400 and results[-1].params["n_estimators"] == 50
+
+
+def test_budget_ending_halving_early_saves_no_retrain_config(search_data, tmp_path, monkeypatch):
+    import time
+    from types import SimpleNamespace
+
+    from src.training import search
+
+    X, y = search_data
+    # The clock jumps past the deadline once rung 0 has been collected
+    skew = {"seconds": 0.0}
+    monkeypatch.setattr(search, "time", SimpleNamespace(time=lambda: time.time() + skew["seconds"],
+                                                        perf_counter=time.perf_counter))
+    run_rung = search._run_rung
+
+    def first_rung_only(*args, **kwargs):
+        results = run_rung(*args, **kwargs)
+        skew["seconds"] = 1e6
+        return results
+
+    monkeypatch.setattr(search, "_run_rung", first_rung_only)
+    results = run_search(X, y, strategy="halving", families=["catboost"], n_candidates=4, eta=2, workers=1,
+                         time_budget=600, verbose=False)
+    assert len(results) == 4 and {result.rung for result in results} == {0}
+    assert {result.params["iterations"] for result in results} == {150}
+    assert not any(result.fully_trained for result in results)
+
+    config = save_search_results(results, tmp_path / "c.csv", tmp_path / "training_config.json")
+    assert config["winner"]["params"]["iterations"] == 150
+    assert config["retrain"] is None and load_retrain_config(tmp_path / "training_config.json") is None
+
+
+def test_workers_never_oversubscribe_cpus(monkeypatch):
+    monkeypatch.setattr("os.sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    assert resolve_workers(None, n_tasks=10) == (8, 1)
+    assert resolve_workers(2, n_tasks=10) == (2, 4)
+    assert resolve_workers(3, n_tasks=10) == (3, 2)
+    assert resolve_workers(64, n_tasks=4) == (4, 2)
+
+
+def test_candidate_names_and_params():
+    candidate = Candidate("catboost", (("depth", 4), ("learning_rate", 0.1)), balanced=False)
+    assert candidate.name == "CatBoost (Original) depth=4, learning_rate=0.1"
+    assert candidate.model_params(1 / 3)["iterations"] == 200
+    with pytest.raises(ValueError):
+        run_search(np.zeros((4, 2)), np.zeros(4), families=["svm"])
@@ -0,0 +1,72 @@
+"""Tests for the NumPy oblivious-tree inference backend."""
+
+import asyncio
+
+import joblib
+import numpy as np
+import pytest
+
+from src.app import extract_predictions, run_model
+from src.serving.oblivious import ObliviousTreeEnsemble, create_oblivious_session
+from src.serving.registry import ModelRegistry
+
+
+def test_matches_catboost_predict_proba(catboost_models, pipeline, raw_frame):
+    X = pipeline.prepare_inference_features(raw_frame.to_dict(orient="records"))
+    X[:5, 0] = np.nan
+    for model in catboost_models:
+        ensemble = ObliviousTreeEnsemble.from_catboost(model)
+        np.testing.assert_allclose(ensemble.predict_proba(X), model.predict_proba(X), atol=1e-6, rtol=0)
+        np.testing.assert_array_equal(ensemble.predict(X), model.predict(X).reshape(-1))
+        # Single rows take the same path as batches
+        np.testing.assert_allclose(ensemble.predict_proba(X[:1]), model.predict_proba(X[:1]), atol=1e-6, rtol=0)
+
+
+def test_logloss_and_json_export(tmp_path, pipeline, raw_frame):
+    catboost = pytest.importorskip("catboost")
+    X = pipeline.prepare_inference_features(raw_frame.to_dict(orient="records"))
+    y = (pipeline.encode_target(raw_frame["target_offer"]) == 0).astype(int)
+    model = catboost.CatBoostClassifier(iterations=15, depth=3, loss_function="Logloss", verbose=False,
+                                        allow_writing_files=False).fit(X, y)
+    path = tmp_path / "model.json"
+    model.save_model(str(path), format="json")
+
+    ensemble = ObliviousTreeEnsemble.from_json(path)
+    np.testing.assert_allclose(ensemble.predict_proba(X), model.predict_proba(X), atol=1e-6, rtol=0)
+    with pytest.raises(ValueError):
+        ensemble.predict_proba(X[:, :-1])
+
+
+def test_registry_serves_pickled_model(tmp_path, catboost_models, pipeline, raw_frame):
+    path = tmp_path / "best_model.pkl"
+    joblib.dump(catboost_models[0], path)
+
+    registry = ModelRegistry(path, session_factory=create_oblivious_session, backend="numpy")
+    assert asyncio.run(registry.load()) is True
+    assert registry.stats()["backend"] == "numpy"
+    assert registry.stats()["probabilities_output"] == "tensor"
+
+    X = pipeline.prepare_inference_features(raw_frame.head(20).to_dict(orient="records"))
+    labels, probabilities = extract_predictions(run_model(registry.current.session, X))
+    assert labels == catboost_models[0].predict(X).reshape(-1).tolist()
+    np.testing.assert_allclose(probabilities, catboost_models[0].predict_proba(X), atol=1e-6)
+
+
+def test_concurrent_batches_of_different_sizes(catboost_models, pipeline, raw_frame):
+    from concurrent.futures import ThreadPoolExecutor
+
+    ensemble = ObliviousTreeEnsemble.from_catboost(catboost_models[0])
+    X = np.tile(pipeline.prepare_inference_features(raw_frame.to_dict(orient="records")), (8, 1))
+    sizes = [1, 700, 4000, 50, 2500, 4000, 3, 1500] * 4
+    expected = {size: ensemble.predict_proba(X[:size]) for size in set(sizes)}
+
+    fresh = ObliviousTreeEnsemble.from_catboost(catboost_models[0])
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda size: fresh.predict_proba(X[:size]), sizes))
+    for size, result in zip(sizes, results):
+        np.testing.assert_array_equal(result, expected[size])
+
+
+def test_registry_rejects_unknown_backend(tmp_path):
+    with pytest.raises(ValueError, match="backend must be one of"):
+        ModelRegistry(tmp_path / "best_model.pkl", backend="onxx")
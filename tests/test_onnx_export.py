@@ -0,0 +1,40 @@
+"""Tests for the tensor-probability ONNX export."""
+
+import numpy as np
+import onnxruntime as ort
+
+from src.app import extract_predictions, run_model
+from src.serialization.onnx_exporter import ONNXExporter
+
+
+def _session(path):
+    return ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+
+
+def test_export_matches_predict_proba(tmp_path, catboost_models, pipeline, raw_frame):
+    model = catboost_models[0]
+    path = tmp_path / "model.onnx"
+    assert ONNXExporter.export_to_onnx(model, str(path), pipeline.feature_names)
+    assert ONNXExporter.validate_onnx(str(path))
+
+    session = _session(path)
+    assert session.get_outputs()[1].type == "tensor(float)"
+    X = pipeline.prepare_inference_features(raw_frame.to_dict(orient="records"))
+    label, probabilities = session.run(None, {session.get_inputs()[0].name: X})
+
+    assert probabilities.shape == (len(X), len(model.classes_))
+    np.testing.assert_allclose(probabilities, model.predict_proba(X), atol=1e-5)
+    np.testing.assert_array_equal(label, model.predict(X).reshape(-1))
+
+
+def test_converted_model_matches_zipmap_model(tmp_path, onnx_models, pipeline, raw_frame):
+    zipmap_path, tensor_path = tmp_path / "zipmap.onnx", tmp_path / "tensor.onnx"
+    zipmap_path.write_bytes(onnx_models[0])
+    assert ONNXExporter.convert_to_tensor_probabilities(str(zipmap_path), str(tensor_path))
+    assert not ONNXExporter.convert_to_tensor_probabilities(str(tensor_path))
+
+    X = pipeline.prepare_inference_features(raw_frame.head(50).to_dict(orient="records"))
+    zipmap_labels, zipmap_probs = extract_predictions(run_model(_session(zipmap_path), X))
+    tensor_labels, tensor_probs = extract_predictions(run_model(_session(tensor_path), X))
+    assert tensor_labels == zipmap_labels
+    assert tensor_probs == zipmap_probs
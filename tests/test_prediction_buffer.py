@@ -0,0 +1,176 @@
+"""Tests for the append-only prediction buffer."""
+
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion.buffer import PredictionBufferWriter
+from src.data_ingestion.columnar import normalize_record
+from src.data_ingestion.repository import DataRepository
+
+
+def _repo(tmp_path) -> DataRepository:
+    return DataRepository(
+        data_buffer_path=tmp_path / "prediction_buffer.csv",
+        processed_data_dir=tmp_path,
+        buffer_dir=tmp_path / "prediction_buffer",
+    )
+
+
+def test_rows_are_batched_and_sealed(tmp_path):
+    writer = PredictionBufferWriter(tmp_path, flush_rows=3, flush_interval=0, segment_rows=4, fsync="never",
+                                    segment_format="ndjson")
+    for i in range(2):
+        writer.append({"i": i})
+    assert writer.pending_rows == 2
+    assert not list(tmp_path.iterdir())
+    writer.extend([{"i": i} for i in range(2, 10)])
+    # 10 rows flushed into segments of 4: two sealed, the last 2 rows in the active segment
+    assert writer.pending_rows == 0
+    assert len(list(tmp_path.glob("*.ndjson"))) == 2
+    assert len(list(tmp_path.glob("*.ndjson.active"))) == 1
+    writer.close()
+    assert len(list(tmp_path.glob("*.ndjson"))) == 3
+    rows = sum(len(p.read_text().splitlines()) for p in tmp_path.glob("*.ndjson"))
+    assert rows == 10
+
+
+def test_retrain_consumes_only_listed_segments(tmp_path):
+    repo = _repo(tmp_path)
+    pd.DataFrame([{"monthly_spend": 1.0, "plan_type": "Prepaid"}]).to_csv(repo.data_buffer_path, index=False)
+    repo.append_to_buffer({"monthly_spend": 2.0, "plan_type": "Postpaid"}, "General Offer")
+    repo.seal_buffer()
+
+    segments = repo.list_buffer_segments()
+    df = repo.load_prediction_buffer(segments)
+    assert df["monthly_spend"].tolist() == [1.0, 2.0]
+    assert df["target_offer"].isna().tolist() == [True, False]
+
+    # Logged while the retrain is running: must survive cleanup
+    repo.append_to_buffer({"monthly_spend": 3.0})
+    repo.remove_buffer_segments(segments)
+    repo.seal_buffer()
+    assert repo.load_prediction_buffer()["monthly_spend"].tolist() == [3.0]
+
+    repo.clear_buffer()
+    assert repo.load_prediction_buffer() is None
+    repo.close_buffer()
+
+
+def test_time_based_flush(tmp_path):
+    writer = PredictionBufferWriter(tmp_path, flush_rows=1000, flush_interval=0.05, fsync="never",
+                                    segment_format="ndjson")
+    writer.append({"x": np.int64(1)})
+    for _ in range(100):
+        if writer.pending_rows == 0:
+            break
+        writer._stop.wait(0.02)
+    assert writer.pending_rows == 0
+    writer.close()
+    assert len(list(tmp_path.glob("*.ndjson"))) == 1
+
+
+def test_columnar_segments_are_typed_and_normalized(tmp_path):
+    repo = _repo(tmp_path)
+    # A legacy CSV written before aliases were normalized
+    pd.DataFrame([{"sms_frequency": 7, "complaint_count": 1, "plan_type": "Prepaid"}]).to_csv(
+        repo.data_buffer_path, index=False)
+    repo.append_batch_to_buffer([
+        {"monthly_spend": 1.5, "sms_freq": 3, "complain_count": 2, "plan_type": "Prepaid", "device_brand": "Oppo"},
+        {"monthly_spend": 2.5, "sms_frequency": 4, "complaint_count": 0, "plan_type": "Postpaid"},
+    ], ["General Offer", None])
+    repo.seal_buffer()
+    repo.append_to_buffer({"monthly_spend": 3.5, "sms_freq": 5, "plan_type": "Postpaid",
+                           "device_brand": "Apple"}, "Roaming Pass")
+    repo.seal_buffer()
+
+    segments = repo.list_buffer_segments()
+    assert [s.suffix for s in segments] == [".csv", ".columns", ".columns"]
+    assert not list(repo.buffer_dir.glob("*.active"))
+    df = repo.load_prediction_buffer(segments[1:])
+    assert "sms_frequency" not in df.columns and "complain_count" not in df.columns
+    assert df["sms_freq"].tolist() == [3, 4, 5]
+    assert df["sms_freq"].dtype == np.int64 and df["monthly_spend"].dtype == np.float64
+    # Missing in the second segment -> float with NaN, as CSV parsing would give
+    assert df["complaint_count"].isna().tolist() == [False, False, True]
+    # Dictionary columns stay categorical across segments with different dictionaries
+    assert list(df["device_brand"].cat.categories) == ["Apple", "Oppo"]
+    assert df["device_brand"].tolist()[::2] == ["Oppo", "Apple"] and pd.isna(df["device_brand"][1])
+    assert df["target_offer"].isna().tolist() == [False, True, False]
+
+    subset = repo.load_prediction_buffer(columns=["sms_freq", "target_offer", "unknown"])
+    assert list(subset.columns) == ["sms_freq", "target_offer"]
+    assert subset["sms_freq"].tolist() == [7, 3, 4, 5]
+
+    repo.clear_buffer()
+    assert repo.load_prediction_buffer() is None
+    repo.close_buffer()
+
+
+def test_normalize_record_does_not_depend_on_key_order():
+    # The canonical key wins when set, the alias fills it when it is None, whatever the order
+    assert normalize_record({"sms_frequency": 5, "sms_freq": None}) == {"sms_freq": 5}
+    assert normalize_record({"sms_freq": None, "sms_frequency": 5}) == {"sms_freq": 5}
+    assert normalize_record({"sms_frequency": 5, "sms_freq": 3}) == {"sms_freq": 3}
+    assert normalize_record({"sms_freq": 3, "sms_frequency": 5}) == {"sms_freq": 3}
+    assert normalize_record({"complain_count": 1, "monthly_spend": 2.0}) == {"monthly_spend": 2.0, "complaint_count": 1}
+
+
+def test_other_writers_seal_on_request(tmp_path):
+    repo = _repo(tmp_path)
+    # Another API worker's writer on the same directory
+    peer = PredictionBufferWriter(tmp_path / "prediction_buffer", flush_rows=1, flush_interval=0.05,
+                                  fsync="never", segment_format="ndjson")
+    peer.append({"monthly_spend": 1.0})
+    repo.append_to_buffer({"monthly_spend": 2.0})
+    repo.seal_buffer()
+
+    deadline = time.monotonic() + 2
+    while len(repo.list_buffer_segments()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sorted(repo.load_prediction_buffer()["monthly_spend"]) == [1.0, 2.0]
+    peer.close()
+    repo.close_buffer()
+
+
+_LIVE_WRITER = """
+import sys
+from src.data_ingestion.buffer import PredictionBufferWriter
+writer = PredictionBufferWriter(sys.argv[1], flush_rows=1, flush_interval=0, fsync="never", segment_format="ndjson")
+writer.append({"monthly_spend": 3.0})
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def test_orphaned_active_segments_are_adopted(tmp_path):
+    buffer_dir = tmp_path / "prediction_buffer"
+    buffer_dir.mkdir()
+    # Left by a killed writer, torn mid-line; its pid now belongs to a live process (this one)
+    orphan = buffer_dir / f"{time.time_ns():020d}-{os.getpid()}-000001.ndjson.active"
+    orphan.write_text('{"monthly_spend":1.0}\n{"monthly_spend":2.0}\n{"monthly_sp')
+    # Crashed after its columnar segment was written: the rows must not be read twice
+    sealed = PredictionBufferWriter(buffer_dir, flush_interval=0, fsync="never")
+    sealed.append({"monthly_spend": 4.0})
+    sealed.close()
+    (buffer_dir / next(buffer_dir.glob("*.columns")).name.replace(".columns", ".ndjson.active")).write_text(
+        '{"monthly_spend":4.0}\n')
+    # Appended to by a writer in another process (or container)
+    live = subprocess.Popen([sys.executable, "-c", _LIVE_WRITER, str(buffer_dir)], cwd=os.getcwd(),
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert live.stdout.readline().strip() == "ready"
+        repo = _repo(tmp_path)
+        assert sorted(repo.load_prediction_buffer()["monthly_spend"]) == [1.0, 2.0, 4.0]
+        assert len(list(buffer_dir.glob("*.ndjson.active"))) == 1
+    finally:
+        live.kill()
+        live.wait()
+    # Once its writer is gone, the live segment is adopted too
+    _repo(tmp_path)
+    assert sorted(repo.load_prediction_buffer()["monthly_spend"]) == [1.0, 2.0, 3.0, 4.0]
+    assert not list(buffer_dir.glob("*.ndjson.active"))
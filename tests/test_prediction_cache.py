@@ -0,0 +1,66 @@
+"""Tests for the per-row prediction cache."""
+
+import numpy as np
+
+from src.serving.result_cache import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _probs(n, n_classes=3):
+    return np.random.default_rng(n).random((n, n_classes)).astype(np.float32)
+
+
+def test_rows_are_keyed_by_content_and_evicted_lru():
+    cache = PredictionCache(max_entries=3, ttl_seconds=0)
+    X = np.arange(12, dtype=np.float32).reshape(4, 3)
+    keys = cache.keys_for(X)
+    assert len(set(keys)) == 4
+    assert cache.keys_for(X[1:2].copy()) == keys[1:2]
+    assert cache.keys_for(np.asfortranarray(X)) == keys
+
+    probabilities = _probs(4)
+    cache.put_many(keys[:3], [0, 1, 2], probabilities[:3], generation=1)
+    assert [e.label for e in cache.get_many(keys[:1], generation=1)] == [0]  # key 0 now most recent
+    cache.put_many(keys[3:], [3], probabilities[3:], generation=1)
+
+    entries = cache.get_many(keys, generation=1)
+    assert [e is not None for e in entries] == [True, False, True, True]
+    np.testing.assert_array_equal(entries[3].probabilities, probabilities[3])
+    assert not np.shares_memory(entries[3].probabilities, probabilities)
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (3, 1, 4, 1)
+    assert stats["hit_rate"] == 0.8
+    assert stats["memory_bytes"] >= 3 * probabilities[0].nbytes
+
+
+def test_model_swap_and_ttl_invalidate_entries():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_seconds=10, clock=clock)
+    keys = cache.keys_for(np.eye(2, dtype=np.float32))
+    cache.put_many(keys, [0, 1], _probs(2), generation=1)
+
+    assert cache.get_many(keys, generation=2) == [None, None]
+    assert cache.stats()["stale"] == 2 and len(cache) == 0
+
+    cache.put_many(keys, [0, 1], _probs(2), generation=2)
+    clock.now = 9.9
+    assert all(cache.get_many(keys, generation=2))
+    clock.now = 10.0
+    assert cache.get_many(keys, generation=2) == [None, None]
+    assert cache.stats()["expirations"] == 2
+    assert cache.stats()["memory_bytes"] == 0
+
+
+def test_accepts_only_small_requests():
+    cache = PredictionCache(max_rows=2)
+    assert cache.accepts(np.zeros((2, 3), np.float32))
+    assert not cache.accepts(np.zeros((3, 3), np.float32))
+    assert not cache.accepts(np.zeros((0, 3), np.float32))
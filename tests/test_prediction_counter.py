@@ -0,0 +1,62 @@
+"""Tests for the cross-process prediction counter."""
+
+import multiprocessing
+
+from src.data_ingestion.stats import PredictionCounter, SQLitePredictionCounter
+
+PROCESSES = 4
+INCREMENTS = 250
+THRESHOLD = 700
+
+
+def _hammer(db_path: str) -> int:
+    """Increment the shared counter INCREMENTS times and return how many crossings this process saw."""
+    counter = SQLitePredictionCounter(db_path, snapshot_path=None, checkpoint_interval=0)
+    crossings = 0
+    for _ in range(INCREMENTS):
+        _, crossed = counter.increment_and_check(1, THRESHOLD)
+        crossings += crossed
+    counter.close()
+    return crossings
+
+
+def test_concurrent_processes_count_exactly(tmp_path):
+    db_path = tmp_path / "counter.db"
+    SQLitePredictionCounter(db_path, snapshot_path=None, checkpoint_interval=0).close()
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(PROCESSES) as pool:
+        crossings = pool.map(_hammer, [str(db_path)] * PROCESSES)
+
+    counter = SQLitePredictionCounter(db_path, snapshot_path=None, checkpoint_interval=0)
+    assert counter.get_count() == PROCESSES * INCREMENTS
+    assert sum(crossings) == 1
+    counter.close()
+
+
+def test_crossing_rearms_after_decrement(tmp_path):
+    counter = SQLitePredictionCounter(tmp_path / "counter.db", snapshot_path=None, checkpoint_interval=0)
+    fired = [counter.increment_and_check(1, 3)[1] for _ in range(5)]
+    assert fired == [False, False, True, False, False]
+
+    # A retrain consumed 3 rows: 2 remain, the next crossing fires again
+    assert counter.decrement(3) == 2
+    assert counter.increment_and_check(1, 3) == (3, True)
+
+    # A failed retrain rearms without touching the count
+    counter.rearm()
+    assert counter.increment_and_check(1, 3) == (4, True)
+    counter.close()
+
+
+def test_seeds_from_and_checkpoints_to_text_file(tmp_path):
+    snapshot = tmp_path / "prediction_counter.txt"
+    legacy = PredictionCounter(snapshot)
+    legacy.increment(42)
+
+    counter = SQLitePredictionCounter(tmp_path / "counter.db", snapshot_path=snapshot, checkpoint_interval=0)
+    assert counter.get_count() == 42
+    counter.increment(8)
+    counter.checkpoint()
+    assert legacy.get_count() == 50
+    counter.close()
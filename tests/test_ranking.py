@@ -0,0 +1,50 @@
+"""Tests for top-k offer ranking and eligibility masks."""
+
+import numpy as np
+import pytest
+
+from src.serving.ranking import OfferEligibility, decode_top_k, top_k
+
+
+@pytest.mark.parametrize("n_classes", [9, 40])
+def test_top_k_matches_full_sort(n_classes):
+    probabilities = np.random.default_rng(0).dirichlet(np.ones(n_classes), size=200).astype(np.float32)
+    for k in (1, 3, 8, 9, 20, 60):
+        indices, scores = top_k(probabilities, k)
+        expected = np.argsort(-probabilities, axis=1, kind='stable')[:, :min(k, n_classes)]
+        np.testing.assert_array_equal(indices, expected)
+        np.testing.assert_array_equal(scores, np.take_along_axis(probabilities, expected, axis=1))
+
+
+def test_eligibility_rules_mask_offers(pipeline, raw_frame):
+    classes = [str(c) for c in pipeline.label_encoder.classes_]
+    rules = [
+        {"when": {"plan_type": "Prepaid"}, "exclude": ["Family Plan Offer", "Device Upgrade Offer"]},
+        # Postpaid is the dropped baseline level: matches rows with no plan_type column set
+        {"when": {"plan_type": "Postpaid", "device_brand": "Apple"}, "only": ["Data Booster"]},
+    ]
+    eligibility = OfferEligibility(rules, pipeline.encoder, classes)
+    X = pipeline.prepare_inference_features(raw_frame.to_dict(orient="records"))
+    mask = eligibility.mask(X)
+
+    prepaid = (raw_frame["plan_type"] == "Prepaid").to_numpy()
+    postpaid_apple = ((raw_frame["plan_type"] == "Postpaid") & (raw_frame["device_brand"] == "Apple")).to_numpy()
+    family, booster = classes.index("Family Plan Offer"), classes.index("Data Booster")
+    assert not mask[prepaid, family].any() and mask[~prepaid & ~postpaid_apple].all()
+    np.testing.assert_array_equal(mask[postpaid_apple].sum(axis=1), 1)
+    assert mask[postpaid_apple, booster].all()
+
+    probabilities = np.full((len(X), len(classes)), 1 / len(classes), dtype=np.float32)
+    labels, offers, probs = decode_top_k(*top_k(probabilities, 3, mask), classes)
+    row = int(np.flatnonzero(postpaid_apple)[0])
+    assert offers[row] == ["Data Booster"] and labels[row] == [booster] and len(probs[row]) == 1
+    assert all(len(o) == 3 and "Family Plan Offer" not in o for o in np.array(offers, dtype=object)[prepaid])
+
+    with pytest.raises(ValueError):
+        OfferEligibility([{"when": {"plan_type": "Prepaid"}, "exclude": ["No Such Offer"]}], pipeline.encoder, classes)
+    with pytest.raises(ValueError):
+        OfferEligibility([{"when": {"monthly_spend": 1}, "exclude": []}], pipeline.encoder, classes)
+    # A misspelt level must not be taken for the baseline (it would match every Postpaid customer)
+    with pytest.raises(ValueError, match="unknown level 'Prepayed'"):
+        OfferEligibility([{"when": {"plan_type": "Prepayed"}, "exclude": ["Family Plan Offer"]}],
+                         pipeline.encoder, classes)
@@ -0,0 +1,105 @@
+"""Tests for the precomputed per-customer recommendation table."""
+
+import pickle
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+
+from src.build_recommendations import build_recommendation_table
+from src.serving.recommendations import RecommendationTable
+
+
+@pytest.fixture
+def table_inputs(tmp_path, pipeline, raw_frame, onnx_models):
+    processed = tmp_path / "processed"
+    processed.mkdir()
+    for name, obj in (("scaler", pipeline.scaler), ("label_encoder", pipeline.label_encoder),
+                      ("feature_names", pipeline.feature_names)):
+        with open(processed / f"{name}.pkl", "wb") as f:
+            pickle.dump(obj, f)
+    model_paths = []
+    for i, blob in enumerate(onnx_models):
+        model_paths.append(tmp_path / f"model_{i}.onnx")
+        model_paths[-1].write_bytes(blob)
+    input_path = tmp_path / "customers.csv"
+    raw_frame.drop(columns=["target_offer"]).to_csv(input_path, index=False)
+    return input_path, model_paths, processed
+
+
+def _expected(model_path, pipeline, frame):
+    session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    X = pipeline.prepare_inference_features(frame.to_dict(orient="records"))
+    label, probs = session.run(None, {session.get_inputs()[0].name: X})
+    return label.reshape(-1), np.array([[p[k] for k in sorted(p)] for p in probs], dtype=np.float32)
+
+
+def test_table_matches_model_and_rebuilds_incrementally(tmp_path, table_inputs, pipeline, raw_frame):
+    input_path, (model_a, model_b), processed = table_inputs
+    table_dir = tmp_path / "recommendations"
+    kwargs = dict(processed_dir=processed, verbose=False)
+
+    first = build_recommendation_table(input_path, table_dir, model_path=model_a, **kwargs)
+    assert (first["rescored"], first["reused"]) == (len(raw_frame), 0)
+    table = RecommendationTable.open(table_dir)
+    labels, probabilities = _expected(model_a, pipeline, raw_frame)
+    row = table.row("C00042")
+    assert table.probabilities.dtype == np.float16 and len(table) == len(raw_frame)
+    assert table.labels[row] == labels[41]
+    np.testing.assert_allclose(table.probabilities[row], probabilities[41], atol=1e-3)
+    assert table.classes == [str(c) for c in pipeline.label_encoder.classes_]
+
+    # Two customers changed, one is new: only those three are scored
+    frame = raw_frame.copy()
+    frame.loc[[3, 7], "monthly_spend"] += 50_000
+    frame.loc[len(frame)] = frame.loc[0].to_dict() | {"customer_id": "C99999"}
+    frame.drop(columns=["target_offer"]).to_csv(input_path, index=False)
+    second = build_recommendation_table(input_path, table_dir, model_path=model_a, **kwargs)
+    assert (second["rescored"], second["reused"]) == (3, len(raw_frame) - 2)
+    table = RecommendationTable.open(table_dir)
+    labels, probabilities = _expected(model_a, pipeline, frame)
+    np.testing.assert_array_equal(np.asarray(table.labels), labels)
+    np.testing.assert_allclose(np.asarray(table.probabilities, dtype=np.float32), probabilities, atol=1e-3)
+
+    # A new model rescores everyone; only the live build and one previous build are kept
+    third = build_recommendation_table(input_path, table_dir, model_path=model_b, **kwargs)
+    assert third["rescored"] == len(frame)
+    assert third["model_version"] != second["model_version"]
+    assert sorted(p.name for p in table_dir.glob("build-*")) == [second["build"], third["build"]]
+
+
+def test_table_records_the_version_each_backend_serves(tmp_path, table_inputs):
+    import hashlib
+
+    input_path, (model_a, _), processed = table_inputs
+    pickled = model_a.with_suffix(".pkl")
+    pickled.write_bytes(b"catboost model the ONNX file was exported from")
+    build_recommendation_table(input_path, tmp_path / "recommendations", model_path=model_a,
+                               processed_dir=processed, verbose=False)
+    table = RecommendationTable.open(tmp_path / "recommendations")
+
+    onnx_version = hashlib.sha256(model_a.read_bytes()).hexdigest()[:12]
+    numpy_version = hashlib.sha256(pickled.read_bytes()).hexdigest()[:12]
+    assert table.model_versions == {"onnx": onnx_version, "numpy": numpy_version}
+    assert table.scored_by(onnx_version, "onnx") and table.scored_by(numpy_version, "numpy")
+    assert not table.scored_by(onnx_version, "numpy")
+
+
+def test_open_tables_survive_pruning(tmp_path, table_inputs):
+    input_path, (model_a, _), processed = table_inputs
+    table_dir = tmp_path / "recommendations"
+    kwargs = dict(processed_dir=processed, full=True, verbose=False)
+
+    first = build_recommendation_table(input_path, table_dir, model_path=model_a, keep=1, **kwargs)
+    table = RecommendationTable.open(table_dir)
+    stats = table.stats()
+    # The build a worker may still be mapping is kept even with keep=1
+    second = build_recommendation_table(input_path, table_dir, model_path=model_a, keep=1, **kwargs)
+    assert sorted(p.name for p in table_dir.glob("build-*")) == [first["build"], second["build"]]
+
+    third = build_recommendation_table(input_path, table_dir, model_path=model_a, keep=1, **kwargs)
+    assert not (table_dir / first["build"]).exists()
+    assert sorted(p.name for p in table_dir.glob("build-*")) == [second["build"], third["build"]]
+    assert table.stats() == stats
+    # The pruned arrays are still mapped
+    assert table.probabilities[table.row("C00042")].shape == (len(table.classes),)
@@ -0,0 +1,145 @@
+"""Tests for the background retrain job runner."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.services.retrain_worker import RetrainInProgressError, RetrainJobRunner
+
+
+def _result(success: bool = True) -> dict:
+    return {
+        "success": success, "timestamp": "20250101_000000", "new_samples": 10, "total_samples": 100,
+        "f1_weighted": 0.9, "f1_macro": 0.8, "model_path": "m.pkl", "onnx_path": "m.onnx",
+    }
+
+
+def test_single_flight_and_success_hook():
+    release = threading.Event()
+    calls, reloaded = [], []
+
+    def job_fn():
+        calls.append(1)
+        release.wait(5)
+        return _result()
+
+    async def scenario():
+        runner = RetrainJobRunner(job_fn=job_fn, executor_factory=lambda: ThreadPoolExecutor(1), on_success=reloaded.append)
+        await runner.start()
+        first = runner.submit("threshold")
+        await asyncio.sleep(0.05)
+        second = runner.submit("manual")
+        assert second is first
+        assert runner.get_job(first.job_id).status == "running"
+        release.set()
+        await runner.stop()
+        return first
+
+    job = asyncio.run(scenario())
+    assert calls == [1]
+    assert job.status == "succeeded"
+    assert job.result.f1_weighted == 0.9
+    assert reloaded == [job]
+
+
+def test_failures_are_recorded_and_release_the_slot():
+    outcomes = iter([RuntimeError("boom"), RetrainInProgressError("busy"), _result(success=False)])
+
+    def job_fn():
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def scenario():
+        runner = RetrainJobRunner(job_fn=job_fn, executor_factory=lambda: ThreadPoolExecutor(1))
+        await runner.start()
+        jobs = []
+        for _ in range(3):
+            job = runner.submit()
+            while runner.active_job is not None:
+                await asyncio.sleep(0.01)
+            jobs.append(job)
+        await runner.stop()
+        return jobs
+
+    crashed, skipped, failed = asyncio.run(scenario())
+    assert (crashed.status, crashed.error) == ("failed", "boom")
+    assert skipped.status == "skipped"
+    assert failed.status == "failed" and failed.result.success is False
+
+
+def test_broken_worker_is_replaced():
+    factories = []
+
+    def factory():
+        executor = ThreadPoolExecutor(1)
+        factories.append(executor)
+        return executor
+
+    def job_fn():
+        if len(factories) == 1:
+            raise BrokenProcessPool("worker died")
+        return _result()
+
+    async def scenario():
+        runner = RetrainJobRunner(job_fn=job_fn, executor_factory=factory)
+        await runner.start()
+        jobs = []
+        for _ in range(2):
+            job = runner.submit()
+            while runner.active_job is not None:
+                await asyncio.sleep(0.01)
+            jobs.append(job)
+        await runner.stop()
+        return jobs
+
+    broken, recovered = asyncio.run(scenario())
+    assert broken.status == "failed"
+    assert recovered.status == "succeeded"
+    assert len(factories) == 2
+
+
+def test_submit_threadsafe_from_worker_thread():
+    async def scenario():
+        runner = RetrainJobRunner(job_fn=_result, executor_factory=lambda: ThreadPoolExecutor(1))
+        await runner.start()
+        await asyncio.get_running_loop().run_in_executor(None, runner.submit_threadsafe, "threshold")
+        await asyncio.sleep(0.05)
+        await runner.stop()
+        return list(runner.jobs.values())
+
+    jobs = asyncio.run(scenario())
+    assert len(jobs) == 1 and jobs[0].trigger == "threshold"
+
+
+def test_file_counter_rearms_across_processes_after_a_successful_retrain(tmp_path):
+    from src.data_ingestion.stats import PredictionCounter
+
+    threshold = 5
+    api_counter = PredictionCounter(tmp_path / "prediction_counter.txt")
+
+    def job_fn():
+        # The retrain worker is another process with its own counter object
+        PredictionCounter(tmp_path / "prediction_counter.txt").decrement(threshold)
+        return _result()
+
+    async def scenario():
+        runner = RetrainJobRunner(job_fn=job_fn, executor_factory=lambda: ThreadPoolExecutor(1))
+        await runner.start()
+        fired = []
+        for _ in range(2 * threshold + 2):
+            _, crossed = api_counter.increment_and_check(1, threshold)
+            fired.append(crossed)
+            if crossed:
+                runner.submit("threshold")
+                while runner.active_job is not None:
+                    await asyncio.sleep(0.01)
+        await runner.stop()
+        return fired, list(runner.jobs.values())
+
+    fired, jobs = asyncio.run(scenario())
+    assert [i for i, crossed in enumerate(fired) if crossed] == [threshold - 1, 2 * threshold - 1]
+    assert [job.status for job in jobs] == ["succeeded", "succeeded"]
+    assert api_counter.get_count() == 2
@@ -0,0 +1,269 @@
+"""Tests for bulk prediction logging in RetrainingService."""
+
+import numpy as np
+import pytest
+
+from src.data_ingestion.repository import DataRepository
+from src.data_ingestion.stats import SQLitePredictionCounter
+from src.services import retraining_service
+from src.services.retraining_service import RetrainingService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch, pipeline):
+    repo = DataRepository(
+        data_buffer_path=tmp_path / "prediction_buffer.csv",
+        processed_data_dir=tmp_path,
+        buffer_dir=tmp_path / "prediction_buffer",
+    )
+    monkeypatch.setattr(
+        repo, "load_preprocessing_artifacts",
+        lambda: (pipeline.scaler, pipeline.label_encoder, pipeline.feature_names)
+    )
+    counter = SQLitePredictionCounter(tmp_path / "counter.db", snapshot_path=None, checkpoint_interval=0)
+    monkeypatch.setattr(retraining_service, "DataRepository", lambda: repo)
+    monkeypatch.setattr(retraining_service, "create_prediction_counter", lambda: counter)
+
+    triggers = []
+    svc = RetrainingService(retrain_threshold=5, on_threshold=lambda: triggers.append(counter.get_count()),
+                            state_path=tmp_path / "retrain_state.json",
+                            training_config_path=tmp_path / "training_config.json")
+    svc.triggers = triggers
+    yield svc
+    repo.close_buffer()
+    counter.close()
+
+
+def test_batch_is_logged_and_counted_once(service, raw_frame):
+    rows = raw_frame.drop(columns=["target_offer"]).head(3).to_dict("records")
+    assert service.log_predictions_batch(rows, ["A", None]) is False
+    assert service.counter.get_count() == 3
+
+    service.data_repo.seal_buffer()
+    df = service.data_repo.load_prediction_buffer()
+    assert len(df) == 3
+    assert df["target_offer"].iloc[0] == "A"
+    assert df["target_offer"].iloc[1:].isna().all()
+
+
+def test_batch_crossing_threshold_triggers_once_with_whole_batch(service, raw_frame):
+    rows = raw_frame.drop(columns=["target_offer"]).to_dict("records")
+    assert service.log_predictions_batch(rows[:3]) is False
+    # Crosses 5 at its second row: the whole batch is counted and visible before the trigger
+    assert service.log_predictions_batch(rows[3:7]) is True
+    assert service.triggers == [7]
+    assert len(service.data_repo.load_prediction_buffer()) == 7
+    # Already past the threshold: no second trigger until a retrain consumes rows
+    assert service.log_predictions_batch(rows[7:9]) is False
+    assert service.log_prediction(rows[9]) is False
+    assert service.triggers == [7]
+
+
+def test_empty_batch_is_a_no_op(service):
+    assert service.log_predictions_batch([]) is False
+    assert service.counter.get_count() == 0
+
+
+class _RecordingTrainer:
+    """Stands in for ModelTrainer: records what it was trained on"""
+
+    def __init__(self):
+        self.seen = []
+        self.balancing = []
+        self.last_step_seconds = {}
+
+    def train_and_evaluate(self, X, y, label_encoder, apply_balancing=True):
+        self.seen.append((X.copy(), y.copy()))
+        self.balancing.append(apply_balancing)
+        return {"model": len(X)}, {"f1_weighted": 0.5, "f1_macro": 0.4, "roc_auc": None,
+                                   "classification_report": ""}
+
+
+class _NoopExporter:
+    @staticmethod
+    def export_to_onnx(model, path, feature_names):
+        return True
+
+
+def test_retrain_appends_new_rows_as_a_shard(service, raw_frame, pipeline, tmp_path):
+    from src.storage.artifact_manager import ArtifactManager
+
+    X_seed, y_seed = pipeline.preprocess_new_data(raw_frame.iloc[:200])
+    np.save(tmp_path / "X_train_original.npy", X_seed)
+    np.save(tmp_path / "y_train_original.npy", y_seed)
+    service.artifact_manager = ArtifactManager(tmp_path / "model", tmp_path / "backups", tmp_path / "logs")
+    service.model_path, service.onnx_path = tmp_path / "model" / "best_model.pkl", tmp_path / "model" / "m.onnx"
+    service._trainer, service._onnx_exporter = _RecordingTrainer(), _NoopExporter()
+
+    for batch in (raw_frame.iloc[200:350], raw_frame.iloc[350:500]):
+        rows = batch.drop(columns=["target_offer"]).to_dict("records")
+        service.log_predictions_batch(rows, batch["target_offer"].tolist())
+        service.data_repo.seal_buffer()
+        result = service.retrain()
+        assert result.success
+
+    X_first, y_first = service._trainer.seen[0]
+    X_second, y_second = service._trainer.seen[1]
+    n_new = len(X_first) - len(X_seed)
+    np.testing.assert_array_equal(X_first[:len(X_seed)], X_seed)
+    # The second retrain trains on the seed, the first batch (now a shard) and its own rows
+    np.testing.assert_array_equal(X_second[:len(X_first)], X_first)
+    assert result.total_samples == len(X_second)
+    assert service.data_repo.training_data_stats() == {
+        "rows": len(X_second), "shards": 3, "n_features": X_seed.shape[1]}
+    assert n_new > 0 and service.data_repo.load_prediction_buffer() is None
+    # The seed file is never rewritten
+    np.testing.assert_array_equal(np.load(tmp_path / "X_train_original.npy"), X_seed)
+
+
+def test_retrain_applies_the_training_window(service, raw_frame, pipeline, tmp_path):
+    from src.data_ingestion.training_window import TrainingWindow
+    from src.storage.artifact_manager import ArtifactManager
+
+    X_seed, y_seed = pipeline.preprocess_new_data(raw_frame.iloc[:400])
+    np.save(tmp_path / "X_train_original.npy", X_seed)
+    np.save(tmp_path / "y_train_original.npy", y_seed)
+    service.artifact_manager = ArtifactManager(tmp_path / "model", tmp_path / "backups", tmp_path / "logs")
+    service.model_path, service.onnx_path = tmp_path / "model" / "best_model.pkl", tmp_path / "model" / "m.onnx"
+    service._trainer, service._onnx_exporter = _RecordingTrainer(), _NoopExporter()
+    service.training_window = TrainingWindow(max_samples=150)
+
+    batch = raw_frame.iloc[400:500]
+    service.log_predictions_batch(batch.drop(columns=["target_offer"]).to_dict("records"),
+                                  batch["target_offer"].tolist())
+    service.data_repo.seal_buffer()
+    result = service.retrain()
+
+    assert result.success and result.total_samples == len(service._trainer.seen[0][0]) == 150
+    # New rows are still committed in full for later cycles
+    assert service.data_repo.training_data_stats()["rows"] == len(X_seed) + result.new_samples
+    log = next((tmp_path / "logs").iterdir()).read_text()
+    assert "Training window: uniform reservoir (max_samples=150, stratified by class)" in log
+    assert f"Available samples: {len(X_seed) + result.new_samples}" in log
+
+
+def test_retrain_uses_the_searched_training_config(service, raw_frame, pipeline, tmp_path):
+    import json
+
+    from src.storage.artifact_manager import ArtifactManager
+
+    X_seed, y_seed = pipeline.preprocess_new_data(raw_frame.iloc[:400])
+    np.save(tmp_path / "X_train_original.npy", X_seed)
+    np.save(tmp_path / "y_train_original.npy", y_seed)
+    service.artifact_manager = ArtifactManager(tmp_path / "model", tmp_path / "backups", tmp_path / "logs")
+    service.model_path, service.onnx_path = tmp_path / "model" / "best_model.pkl", tmp_path / "model" / "m.onnx"
+    service._trainer, service._onnx_exporter = _RecordingTrainer(), _NoopExporter()
+    (tmp_path / "training_config.json").write_text(json.dumps({"retrain": {
+        "model": "CatBoost (Original) depth=4", "balanced": False,
+        "params": {"iterations": 600, "depth": 4, "learning_rate": 0.05}}}))
+
+    batch = raw_frame.iloc[400:500]
+    service.log_predictions_batch(batch.drop(columns=["target_offer"]).to_dict("records"),
+                                  batch["target_offer"].tolist())
+    service.data_repo.seal_buffer()
+    assert service.retrain().success
+
+    # Searched values override the defaults; keys the search does not tune are kept
+    assert service._trainer.model_params["depth"] == 4 and service._trainer.model_params["learning_rate"] == 0.05
+    assert service._trainer.model_params["loss_function"] == "MultiClass"
+    assert service._trainer.balancing == [False]
+    log = next((tmp_path / "logs").iterdir()).read_text()
+    assert "Model config: searched config CatBoost (Original) depth=4" in log
+
+
+class _WarmStartTrainer(_RecordingTrainer):
+    """Models are tree counts; an update adds 10 trees and reports the scripted F1 against 0.5"""
+
+    def __init__(self, f1_updates):
+        super().__init__()
+        self.f1_updates = list(f1_updates)
+        self.modes = []
+
+    def train_and_evaluate(self, X, y, label_encoder, apply_balancing=True):
+        self.modes.append("full")
+        return {"trees": 100}, {"f1_weighted": 0.5, "f1_macro": 0.4, "roc_auc": None,
+                                "classification_report": ""}
+
+    def train_incremental(self, init_model, X_new, y_new, label_encoder, X_replay=None, y_replay=None,
+                          apply_balancing=True):
+        self.modes.append("incremental")
+        self.seen.append((np.concatenate([X_new, X_replay]), np.concatenate([y_new, y_replay])))
+        return {"trees": init_model["trees"] + 10}, {
+            "f1_weighted": self.f1_updates.pop(0), "f1_macro": 0.4, "roc_auc": None,
+            "classification_report": "", "baseline_f1_weighted": 0.5, "baseline_f1_macro": 0.4}
+
+
+def test_incremental_mode_warm_starts_between_full_rebuilds(service, raw_frame, pipeline, tmp_path):
+    from src.storage.artifact_manager import ArtifactManager
+
+    X_seed, y_seed = pipeline.preprocess_new_data(raw_frame.iloc[:200])
+    np.save(tmp_path / "X_train_original.npy", X_seed)
+    np.save(tmp_path / "y_train_original.npy", y_seed)
+    service.artifact_manager = ArtifactManager(tmp_path / "model", tmp_path / "backups", tmp_path / "logs")
+    service.model_path, service.onnx_path = tmp_path / "model" / "best_model.pkl", tmp_path / "model" / "m.onnx"
+    service.retrain_mode = "incremental"
+    service.full_retrain_every, service.replay_samples = 2, 50
+    # The first three updates stay within the 0.01 tolerance, the fourth drops F1 beyond it
+    service._trainer = _WarmStartTrainer([0.5, 0.495, 0.52, 0.45])
+    service._onnx_exporter = _NoopExporter()
+
+    results = []
+    for start in range(200, 500, 50):
+        batch = raw_frame.iloc[start:start + 50]
+        service.log_predictions_batch(batch.drop(columns=["target_offer"]).to_dict("records"),
+                                      batch["target_offer"].tolist())
+        service.data_repo.seal_buffer()
+        results.append(service.retrain())
+
+    # No model yet -> full; two updates; scheduled rebuild; update; regressed update -> full rebuild
+    assert [r.mode for r in results] == ["full", "incremental", "incremental", "full", "incremental", "full"]
+    assert service._trainer.modes == ["full", "incremental", "incremental", "full", "incremental",
+                                      "incremental", "full"]
+    assert service.artifact_manager.load_model(service.model_path) == {"trees": 100}
+    # Updates train on the new rows plus a bounded replay sample, not the whole history
+    X_update, _ = service._trainer.seen[0]
+    assert results[1].total_samples == len(X_update) <= 50 + results[1].new_samples
+    logs = sorted((tmp_path / "logs").iterdir())
+    assert "Retrain mode: full (fallback: incremental F1-weighted 0.4500 regressed from 0.5000)" in \
+        logs[-1].read_text()
+
+
+class _FailingExporter:
+    @staticmethod
+    def export_to_onnx(model, path, feature_names):
+        return False
+
+
+def test_failed_onnx_export_fails_the_retrain_and_keeps_the_buffer(service, raw_frame, pipeline, tmp_path):
+    from src.storage.artifact_manager import ArtifactManager
+
+    X_seed, y_seed = pipeline.preprocess_new_data(raw_frame.iloc[:200])
+    np.save(tmp_path / "X_train_original.npy", X_seed)
+    np.save(tmp_path / "y_train_original.npy", y_seed)
+    service.artifact_manager = ArtifactManager(tmp_path / "model", tmp_path / "backups", tmp_path / "logs")
+    service.model_path, service.onnx_path = tmp_path / "model" / "best_model.pkl", tmp_path / "model" / "m.onnx"
+    service._trainer, service._onnx_exporter = _RecordingTrainer(), _NoopExporter()
+    batch = raw_frame.iloc[200:300]
+    service.log_predictions_batch(batch.drop(columns=["target_offer"]).to_dict("records"),
+                                  batch["target_offer"].tolist())
+    service.data_repo.seal_buffer()
+    assert service.retrain().success
+    previous_model = service.artifact_manager.load_model(service.model_path)
+
+    batch = raw_frame.iloc[300:400]
+    service.log_predictions_batch(batch.drop(columns=["target_offer"]).to_dict("records"),
+                                  batch["target_offer"].tolist())
+    service.data_repo.seal_buffer()
+    stats = service.data_repo.training_data_stats()
+    service._onnx_exporter = _FailingExporter()
+    assert not service.retrain().success
+    # Nothing was consumed and the pickle still matches the served ONNX model
+    assert len(service.data_repo.load_prediction_buffer()) == 100
+    assert service.counter.get_count() == 100
+    assert service.data_repo.training_data_stats() == stats
+    assert service.artifact_manager.load_model(service.model_path) == previous_model
+
+    service.artifact_manager.save_model = lambda model, path: False
+    service._onnx_exporter = _NoopExporter()
+    assert not service.retrain().success
+    assert len(service.data_repo.load_prediction_buffer()) == 100
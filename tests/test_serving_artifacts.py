@@ -0,0 +1,60 @@
+"""Tests for the inference-only preprocessing sidecar and the slim import graph."""
+
+import json
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from src.preprocessing.artifacts import SERVING_ARTIFACTS_FILE, load_serving_preprocessor
+
+
+def _write_pickles(directory, pipeline):
+    for name, obj in (("scaler.pkl", pipeline.scaler), ("label_encoder.pkl", pipeline.label_encoder),
+                      ("feature_names.pkl", pipeline.feature_names)):
+        with open(directory / name, "wb") as f:
+            pickle.dump(obj, f)
+
+
+def test_sidecar_matches_pipeline_and_tracks_pickles(tmp_path, pipeline, raw_frame):
+    _write_pickles(tmp_path, pipeline)
+    records = raw_frame.head(50).to_dict(orient="records")
+
+    slim = load_serving_preprocessor(tmp_path)
+    assert (tmp_path / SERVING_ARTIFACTS_FILE).exists()
+    assert slim.feature_names == pipeline.feature_names
+    assert slim.classes == pipeline.label_encoder.classes_.tolist()
+    np.testing.assert_array_equal(slim.prepare_inference_features(records),
+                                  pipeline.prepare_inference_features(records))
+
+    # Changed pickles invalidate the sidecar
+    pipeline.scaler.mean_ = pipeline.scaler.mean_ + 1.0
+    try:
+        _write_pickles(tmp_path, pipeline)
+        reloaded = load_serving_preprocessor(tmp_path)
+        np.testing.assert_array_equal(reloaded.scaler.mean_, pipeline.scaler.mean_)
+    finally:
+        pipeline.scaler.mean_ = pipeline.scaler.mean_ - 1.0
+
+    # Without pickles the sidecar alone is enough
+    for name in ("scaler.pkl", "label_encoder.pkl", "feature_names.pkl"):
+        (tmp_path / name).unlink()
+    assert json.loads((tmp_path / SERVING_ARTIFACTS_FILE).read_text())["feature_names"] == pipeline.feature_names
+    assert load_serving_preprocessor(tmp_path).feature_names == pipeline.feature_names
+
+
+def test_inference_mode_imports_no_training_stack(tmp_path, pipeline):
+    _write_pickles(tmp_path, pipeline)
+    load_serving_preprocessor(tmp_path)
+    code = (
+        "import sys\n"
+        "import src.app\n"
+        "from src.preprocessing.artifacts import load_serving_preprocessor\n"
+        f"load_serving_preprocessor({str(tmp_path)!r})\n"
+        "print(','.join(m for m in ('catboost', 'imblearn', 'sklearn', 'onnx', 'pandas', 'scipy') if m in sys.modules))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=Path(__file__).resolve().parents[1], env={"SERVING_MODE": "inference", "PYTHONPATH": "."})
+    assert out.stdout.strip() == ""
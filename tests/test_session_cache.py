@@ -0,0 +1,49 @@
+"""Tests for the optimized ORT-format model cache."""
+
+import numpy as np
+import pytest
+
+from src.serving.session import OptimizedModelCache, build_session_options, create_session
+
+
+def _run(session, X):
+    return session.run(None, {session.get_inputs()[0].name: X})
+
+
+def test_cache_miss_then_hit(tmp_path, onnx_models, pipeline, raw_frame):
+    cache = OptimizedModelCache(tmp_path / "optimized")
+    X = pipeline.prepare_inference_features(raw_frame.head(20).to_dict(orient="records"))
+
+    first = create_session(onnx_models[0], cache=cache)
+    assert (cache.hits, cache.misses, cache.last_hit) == (0, 1, False)
+    assert [p.name for p in cache.cache_dir.iterdir()] == [cache.last_path.name]
+
+    second = create_session(onnx_models[0], cache=cache)
+    assert (cache.hits, cache.misses, cache.last_hit) == (1, 1, True)
+    for a, b in zip(_run(first, X), _run(second, X)):
+        assert a == b if isinstance(a, list) else np.array_equal(a, b)
+
+    # A different model gets its own file; only `keep` files survive
+    cache.keep = 1
+    create_session(onnx_models[1], cache=cache)
+    assert cache.misses == 2
+    assert [p.name for p in cache.cache_dir.iterdir()] == [cache.last_path.name]
+
+
+def test_corrupt_or_unwritable_cache_falls_back(tmp_path, onnx_models):
+    cache = OptimizedModelCache(tmp_path / "optimized")
+    cache.cache_dir.mkdir()
+    cache.path_for(onnx_models[0], "extended").write_bytes(b"not a model")
+    assert create_session(onnx_models[0], optimization_level="extended", cache=cache) is not None
+    assert cache.misses == 1 and cache.path_for(onnx_models[0], "extended").stat().st_size > 100
+
+    blocked = tmp_path / "blocked"
+    blocked.write_text("a file, not a directory")
+    cache = OptimizedModelCache(blocked / "optimized")
+    assert create_session(onnx_models[0], cache=cache) is not None
+    assert cache.failures == 1
+
+
+def test_unknown_optimization_level():
+    with pytest.raises(ValueError):
+        build_session_options(optimization_level="max")
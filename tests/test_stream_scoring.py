@@ -0,0 +1,89 @@
+"""Tests for chunked CSV/NDJSON stream scoring."""
+
+import asyncio
+import json
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+
+from src.serving.stream import StreamScorer, detect_stream_format, iter_line_chunks
+
+
+async def _collect(payload: bytes, piece: int, chunk_rows: int):
+    async def stream():
+        for i in range(0, len(payload), piece):
+            yield payload[i:i + piece]
+    return [chunk async for chunk in iter_line_chunks(stream(), chunk_rows)]
+
+
+def _predict_fn(session):
+    input_name = session.get_inputs()[0].name
+
+    def predict(X):
+        label, probs = session.run(None, {input_name: X})
+        return label.astype(int).tolist(), [[float(p[k]) for k in sorted(p)] for p in probs]
+    return predict
+
+
+def _score(scorer: StreamScorer, payload: bytes, chunk_rows: int):
+    out = b"".join(scorer.score_chunk(lines) for lines in asyncio.run(_collect(payload, 37, chunk_rows)))
+    return [json.loads(line) for line in out.splitlines()]
+
+
+def test_line_chunks_are_bounded_and_lossless():
+    payload = b"".join(f"line-{i}\n".encode() for i in range(25)) + b"\nlast-without-newline"
+    chunks = asyncio.run(_collect(payload, 7, chunk_rows=10))
+    assert [len(c) for c in chunks] == [10, 10, 6]
+    assert [line.decode() for c in chunks for line in c] == [f"line-{i}" for i in range(25)] + ["last-without-newline"]
+
+
+def test_overlong_lines_are_rejected():
+    async def endless_line():
+        for _ in range(1000):
+            yield b"x" * 1000
+
+    async def consume(stream):
+        return [chunk async for chunk in iter_line_chunks(stream, 10, max_line_bytes=4096)]
+
+    with pytest.raises(ValueError, match="longer than 4096 bytes"):
+        asyncio.run(consume(endless_line()))
+
+    async def one_piece():
+        yield b"ok\n" + b"y" * 5000 + b"\nok\n"
+
+    with pytest.raises(ValueError):
+        asyncio.run(consume(one_piece()))
+
+
+def test_detect_stream_format():
+    assert detect_stream_format("text/csv; charset=utf-8") == "csv"
+    assert detect_stream_format("application/x-ndjson") == "ndjson"
+    assert detect_stream_format("application/json") is None
+
+
+def test_csv_and_ndjson_match_batch_predictions(pipeline, raw_frame, onnx_models):
+    session = ort.InferenceSession(onnx_models[0], providers=["CPUExecutionProvider"])
+    frame = raw_frame.drop(columns=["target_offer"]).head(120)
+    X = pipeline.prepare_inference_features(frame.to_dict(orient="records"))
+    expected_labels, expected_probs = _predict_fn(session)(X)
+
+    csv_rows = _score(StreamScorer(pipeline.encoder, _predict_fn(session), "csv"),
+                      frame.to_csv(index=False).encode(), chunk_rows=50)
+    ndjson = "\n".join(json.dumps(r) for r in frame.to_dict(orient="records")).encode()
+    ndjson_rows = _score(StreamScorer(pipeline.encoder, _predict_fn(session), "ndjson"), ndjson, chunk_rows=32)
+
+    for rows in (csv_rows, ndjson_rows):
+        assert [r["customer_id"] for r in rows] == frame["customer_id"].tolist()
+        assert [r["label"] for r in rows] == expected_labels
+        np.testing.assert_allclose([r["probabilities"] for r in rows], expected_probs, rtol=1e-6)
+
+
+def test_scorer_reports_throughput(pipeline, raw_frame, onnx_models):
+    session = ort.InferenceSession(onnx_models[0], providers=["CPUExecutionProvider"])
+    scorer = StreamScorer(pipeline.encoder, _predict_fn(session), "csv")
+    _score(scorer, raw_frame.head(10).to_csv(index=False).encode(), chunk_rows=4)
+    summary = scorer.summary()
+    assert summary["rows"] == 10
+    assert summary["chunks"] == 3
+    assert summary["rows_per_sec"] > 0
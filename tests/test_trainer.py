@@ -0,0 +1,35 @@
+"""Tests for warm-start updates in ModelTrainer."""
+
+import pytest
+
+pytest.importorskip("catboost")
+pytest.importorskip("imblearn")
+
+from src.training.trainer import ModelTrainer
+
+
+def test_incremental_update_adds_trees_and_scores_the_previous_model(catboost_models, pipeline, raw_frame):
+    init_model = catboost_models[0]
+    X = pipeline.prepare_inference_features(raw_frame.to_dict(orient="records"))
+    y = pipeline.encode_target(raw_frame["target_offer"])
+    trainer = ModelTrainer(
+        model_params={"depth": 4, "loss_function": "MultiClass", "random_seed": 0, "verbose": False,
+                      "allow_writing_files": False},
+        incremental_params={"iterations": 5, "learning_rate": 0.03},
+    )
+
+    # Missing classes among the new rows are covered by the replayed rows
+    new = y != 0
+    model, metrics = trainer.train_incremental(init_model, X[new], y[new], pipeline.label_encoder,
+                                               X_replay=X[~new], y_replay=y[~new])
+    assert model.tree_count_ == init_model.tree_count_ + 5
+    assert 0 <= metrics["baseline_f1_weighted"] <= 1 and 0 <= metrics["f1_weighted"] <= 1
+    assert set(trainer.last_step_seconds) == {"smote", "fit", "evaluate"}
+    # The previous model is left untouched
+    assert init_model.tree_count_ == 20
+
+    # Continuing on data without every class would change the number of outputs
+    with pytest.raises(ValueError, match="no training rows"):
+        trainer.train_incremental(init_model, X[new], y[new], pipeline.label_encoder)
+    with pytest.raises(ValueError, match="CatBoostClassifier"):
+        trainer.train_incremental(None, X, y, pipeline.label_encoder)
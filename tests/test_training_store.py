@@ -0,0 +1,56 @@
+"""Tests for the append-only training data store."""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.data_ingestion.training_store import TrainingDataStore
+
+
+def _seeded_store(tmp_path, rows=5, features=3):
+    X = np.arange(rows * features, dtype=np.float64).reshape(rows, features)
+    y = np.arange(rows) % 2
+    np.save(tmp_path / "X_train_original.npy", X)
+    np.save(tmp_path / "y_train_original.npy", y)
+    return TrainingDataStore(tmp_path / "store", tmp_path / "X_train_original.npy",
+                             tmp_path / "y_train_original.npy"), X, y
+
+
+def test_appended_shards_are_materialized_after_the_seed(tmp_path):
+    store, X_seed, y_seed = _seeded_store(tmp_path)
+    assert store.stats() == {"rows": 5, "shards": 1, "n_features": 3}
+    np.testing.assert_array_equal(store.materialize()[0], X_seed)
+    seed_bytes = (tmp_path / "X_train_original.npy").read_bytes()
+
+    X1, y1 = np.full((2, 3), -1.0, dtype=np.float32), np.array([1, 0])
+    entry = store.append(X1, y1, source="retrain A")
+    assert entry["id"] == 1 and entry["rows"] == 2
+    X_extra, y_extra = np.full((1, 3), 7.0), np.array([1])
+
+    X, y = store.materialize(extra=[(X_extra, y_extra)])
+    assert X.dtype == np.float64 and X.shape == (8, 3)
+    np.testing.assert_array_equal(X, np.vstack([X_seed, X1, X_extra]))
+    np.testing.assert_array_equal(y, np.concatenate([y_seed, y1, y_extra]))
+    # The seed is referenced, never rewritten; extra rows are not committed
+    assert (tmp_path / "X_train_original.npy").read_bytes() == seed_bytes
+    assert store.stats()["rows"] == 7
+    sources = [shard["source"] for shard in json.loads(store.manifest_path.read_text())["shards"]]
+    assert sources == ["seed", "retrain A"]
+
+
+def test_uncommitted_shard_is_ignored_and_width_is_checked(tmp_path):
+    store, _, _ = _seeded_store(tmp_path)
+    store.append(np.zeros((1, 3)), np.array([0]))
+    # A crash after writing shard 2 but before the manifest commit
+    np.save(store.directory / "shard-000002.X.npy", np.ones((4, 3)))
+    assert store.stats()["rows"] == 6
+
+    entry = store.append(np.ones((2, 3)), np.array([1, 1]))
+    assert entry["id"] == 2
+    assert len(store.materialize()[0]) == 8
+
+    with pytest.raises(ValueError):
+        store.append(np.zeros((1, 4)), np.array([0]))
+    with pytest.raises(FileNotFoundError):
+        TrainingDataStore(tmp_path / "empty").materialize()
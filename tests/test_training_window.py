@@ -0,0 +1,66 @@
+"""Tests for the bounded training window."""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.data_ingestion.training_store import TrainingDataStore
+from src.data_ingestion.training_window import TrainingWindow
+
+
+def _store(tmp_path, labels):
+    """Seed whose X rows are their own index, so selections can be traced back"""
+    X = np.arange(len(labels), dtype=np.float64).reshape(-1, 1).repeat(2, axis=1)
+    np.save(tmp_path / "X_train_original.npy", X)
+    np.save(tmp_path / "y_train_original.npy", np.asarray(labels))
+    return TrainingDataStore(tmp_path / "store", tmp_path / "X_train_original.npy",
+                             tmp_path / "y_train_original.npy")
+
+
+def test_unbounded_window_returns_every_row(tmp_path):
+    store = _store(tmp_path, [0, 1, 1, 2])
+    extra = [(np.full((2, 2), 9.0), np.array([0, 0]))]
+    X, y, summary = TrainingWindow().select(store, extra)
+    X_all, y_all = store.materialize(extra)
+    np.testing.assert_array_equal(X, X_all)
+    np.testing.assert_array_equal(y, y_all)
+    assert summary["selected"] == summary["available"] == 6
+    assert summary["class_counts"] == {0: 3, 1: 2, 2: 1}
+    assert summary["policy"].startswith("all rows")
+
+
+def test_stratified_reservoir_caps_rows_and_keeps_minority_classes(tmp_path):
+    labels = [0] * 900 + [1] * 80 + [2] * 20
+    store = _store(tmp_path, labels)
+    store.append(np.full((100, 2), -1.0), np.zeros(100, dtype=int))
+
+    X, y, summary = TrainingWindow(max_samples=300).select(store)
+    assert len(X) == 300 and summary["available"] == 1100
+    # Classes 2 and 1 fit in their share and are kept whole; class 0 gets the rest
+    assert summary["class_counts"] == {0: 200, 1: 80, 2: 20}
+    # Rows come back in storage order, aligned with their labels
+    seed_rows = X[:, 0][X[:, 0] >= 0].astype(int)
+    assert np.all(np.diff(seed_rows) > 0)
+    np.testing.assert_array_equal(y[:len(seed_rows)], np.asarray(labels)[seed_rows])
+
+    X, y, summary = TrainingWindow(max_samples=300, stratified=False).select(store)
+    assert len(X) == 300 and summary["class_counts"][2] < 20
+
+
+def test_time_decay_favours_recent_shards(tmp_path):
+    store = _store(tmp_path, np.zeros(1000, dtype=int))
+    store.append(np.full((1000, 2), -1.0), np.zeros(1000, dtype=int), source="recent")
+    # Make the seed look a year old and the appended shard a day old
+    year_ago = (datetime.now() - timedelta(days=365)).timestamp()
+    os.utime(tmp_path / "X_train_original.npy", (year_ago, year_ago))
+    manifest = json.loads(store.manifest_path.read_text())
+    manifest["shards"][1]["created_at"] = (datetime.now() - timedelta(days=1)).isoformat(timespec="seconds")
+    store.manifest_path.write_text(json.dumps(manifest))
+
+    uniform = TrainingWindow(max_samples=500).select(store)[0]
+    decayed, _, summary = TrainingWindow(max_samples=500, half_life_days=30).select(store)
+    assert 150 < (uniform[:, 0] < 0).sum() < 350
+    assert (decayed[:, 0] < 0).sum() > 490
+    assert "half_life_days=30" in summary["policy"]